@@ -1,10 +1,9 @@
 from datetime import datetime
-import random
-import string
 import frappe
 from frappe.exceptions import DoesNotExistError
 from frappe import _
 from vms.utils.custom_send_mail import custom_sendmail
+from vms.utils.otp_store import PASSWORD_RESET_PURPOSE, issue_otp
 
 
 
@@ -34,6 +33,13 @@ def send_otp(data):
 
     try:
         user = frappe.get_doc("User", reciever_email) or None
+
+        # Before rotating the API secret, so a rate limited request changes nothing
+        otp_result = issue_otp(reciever_email, PASSWORD_RESET_PURPOSE)
+        if otp_result["status"] != "success":
+            return otp_result
+
+        otp = otp_result["otp"]
         api_credentials = generate_api_keys(user)
 
         api_key = api_credentials.get("api_key")
@@ -45,17 +51,7 @@ def send_otp(data):
                 "message": "No User found for the Mail ID"
             }
         
-        otp = ''.join(random.choices(string.digits, k=6))
 
-        otp_var = frappe.get_doc({
-                                    "doctype":"OTP Verification",
-                                    "email":reciever_email,
-                                    "otp": otp
-                                })
-        
-        otp_var.insert(ignore_permissions=True)
-        
-        
         vendor_name = frappe.db.get_value(
             "User",
             filters={'email': reciever_email},
@@ -0,0 +1,243 @@
+import time
+
+import frappe
+from frappe.utils import cint, get_first_day, get_last_day, today
+
+# Precomputed Vendor Onboarding counters for the dashboard tiles, one entry per scope:
+#   company:<c1,c2,..>  Accounts Team / Head (company list from Employee)
+#   team:<team>         Purchase Team / Head (users of the Employee team)
+#   flows               Super Head and the accounts-team flow counters
+COUNTS_CACHE_KEY = "vendor_dashboard_counts"
+STATS_CACHE_KEY = "vendor_dashboard_counts_stats"
+
+# Entries older than this are recomputed on read, covering writes that bypass doc hooks
+MAX_ENTRY_AGE = 900
+
+# Vendor Onboarding fields that feed one of the counters
+COUNTED_FIELDS = (
+    "onboarding_form_status", "company_name", "registered_by", "register_by_account_team",
+    "purchase_head_undertaking", "purchase_team_undertaking",
+    "accounts_team_undertaking", "mail_sent_to_account_head", "ref_no"
+)
+
+STATUS_COUNTERS = {
+    "approved": "Approved",
+    "pending": "Pending",
+    "rejected": "Rejected",
+    "expired": "Expired",
+    "sap_error": "SAP Error"
+}
+
+
+def _status_sums(prefix=""):
+    return ",\n".join(
+        f"SUM(onboarding_form_status = '{status}') AS {prefix}{counter}"
+        for counter, status in STATUS_COUNTERS.items()
+    )
+
+
+def _current_month_values():
+    return {
+        "month_start": f"{get_first_day(today())} 00:00:00",
+        "month_end": f"{get_last_day(today())} 23:59:59.999999"
+    }
+
+
+def _as_int_dict(row):
+    return {key: cint(value) for key, value in (row or {}).items()}
+
+
+def compute_scope_counts(scope, members):
+    """
+    All counters of one scope in a single aggregate query.
+
+    members: company list for "company" scopes, user ids for "team" scopes, ignored for "flows".
+    """
+    values = _current_month_values()
+
+    if scope == "flows":
+        rows = frappe.db.sql(f"""
+            SELECT
+                IFNULL(register_by_account_team, 0) AS flow,
+                {_status_sums()},
+                SUM(onboarding_form_status = 'Pending'
+                    AND accounts_team_undertaking = 1
+                    AND mail_sent_to_account_head = 1) AS pending_for_head
+            FROM `tabVendor Onboarding`
+            GROUP BY IFNULL(register_by_account_team, 0)
+        """, as_dict=True)
+
+        counts = {"accounts_team": {}, "purchase_team": {}}
+        for row in rows:
+            flow = "accounts_team" if cint(row.pop("flow")) else "purchase_team"
+            counts[flow] = _as_int_dict(row)
+        return counts
+
+    if not members:
+        return {}
+
+    if scope == "company":
+        member_condition = "company_name IN %(members)s"
+        pending_condition = "purchase_head_undertaking = 1"
+    else:
+        member_condition = "registered_by IN %(members)s"
+        pending_condition = "purchase_team_undertaking = 1"
+
+    values["members"] = tuple(members)
+
+    row = frappe.db.sql(f"""
+        SELECT
+            COUNT(DISTINCT ref_no) + MAX(ref_no IS NULL) AS total,
+            {_status_sums()},
+            SUM(onboarding_form_status = 'Pending' AND {pending_condition}) AS pending_undertaking,
+            SUM(creation BETWEEN %(month_start)s AND %(month_end)s) AS current_month
+        FROM `tabVendor Onboarding`
+        WHERE {member_condition}
+    """, values, as_dict=True)
+
+    return _as_int_dict(row[0] if row else {})
+
+
+def get_scope_key(scope, members=None):
+    if scope == "flows":
+        return "flows"
+    if scope == "company":
+        return "company:" + ",".join(sorted(members or []))
+    return f"team:{members}"
+
+
+def _incr_stat(field, amount=1):
+    cache = frappe.cache()
+    cache.hincrby(cache.make_key(STATS_CACHE_KEY), field, amount)
+
+
+def get_dashboard_counts(scope, members=None, team=None):
+    """
+    Return the counters of a scope from Redis, recomputing on a miss, a stale entry
+    (older than MAX_ENTRY_AGE) or a month rollover.
+    """
+    scope_key = get_scope_key(scope, team if scope == "team" else members)
+    entry = frappe.cache().hget(COUNTS_CACHE_KEY, scope_key)
+    now = time.time()
+    month = str(get_first_day(today()))
+
+    if entry and entry.get("month") == month and now - entry.get("computed_at", 0) <= MAX_ENTRY_AGE:
+        _incr_stat("hits")
+        return entry["counts"]
+
+    _incr_stat("misses")
+    return _store_scope(scope_key, scope, members)["counts"]
+
+
+def _store_scope(scope_key, scope, members):
+    entry = {
+        "scope": scope,
+        "members": list(members or []),
+        "counts": compute_scope_counts(scope, members),
+        "computed_at": time.time(),
+        "month": str(get_first_day(today()))
+    }
+    frappe.cache().hset(COUNTS_CACHE_KEY, scope_key, entry)
+    return entry
+
+
+def get_cached_scopes():
+    return {
+        frappe.safe_decode(scope_key): entry
+        for scope_key, entry in frappe.cache().hgetall(COUNTS_CACHE_KEY).items()
+    }
+
+
+def invalidate_for_values(companies, users):
+    """Drop only the scopes whose counters depend on the given companies / registering users"""
+    companies = {c for c in companies if c}
+    users = {u for u in users if u}
+    stale_keys = []
+
+    for scope_key, entry in get_cached_scopes().items():
+        scope = entry.get("scope")
+        members = set(entry.get("members") or [])
+        if scope == "flows" \
+                or (scope == "company" and companies & members) \
+                or (scope == "team" and users & members):
+            stale_keys.append(scope_key)
+
+    for scope_key in stale_keys:
+        frappe.cache().hdel(COUNTS_CACHE_KEY, scope_key)
+
+    if stale_keys:
+        _incr_stat("invalidations", len(stale_keys))
+
+    return stale_keys
+
+
+def invalidate_dashboard_counts(doc, method=None):
+    """Vendor Onboarding after_insert / on_update / on_trash hook"""
+    try:
+        if method == "on_update" and not any(doc.has_value_changed(field) for field in COUNTED_FIELDS):
+            return
+
+        companies = [doc.company_name]
+        users = [doc.registered_by]
+
+        previous = doc.get_doc_before_save()
+        if previous:
+            companies.append(previous.company_name)
+            users.append(previous.registered_by)
+
+        # After commit, so a concurrent read cannot re-cache the pre-commit counts
+        frappe.db.after_commit.add(lambda: invalidate_for_values(companies, users))
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Vendor Dashboard Count Cache Invalidation Error")
+
+
+def refresh_dashboard_count_cache():
+    """Scheduled fallback: recompute every cached scope so missed invalidations do not linger"""
+    refreshed = 0
+    for scope_key, entry in get_cached_scopes().items():
+        try:
+            _store_scope(scope_key, entry.get("scope"), entry.get("members"))
+            refreshed += 1
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), f"Vendor Dashboard Count Cache Refresh Error: {scope_key}")
+
+    _incr_stat("scheduled_refreshes")
+    return refreshed
+
+
+@frappe.whitelist()
+def get_dashboard_count_cache_stats():
+    """Hit rate and staleness of the dashboard count cache"""
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    # Stats are plain redis counters (HINCRBY), read them without the pickling wrapper
+    pipe = cache.pipeline()
+    pipe.hgetall(cache.make_key(STATS_CACHE_KEY))
+    raw_stats = pipe.execute()[0]
+    stats = {frappe.safe_decode(k): cint(frappe.safe_decode(v)) for k, v in raw_stats.items()}
+
+    hits = stats.get("hits", 0)
+    misses = stats.get("misses", 0)
+    now = time.time()
+
+    scopes = [
+        {"scope": scope_key, "age_seconds": round(now - entry.get("computed_at", now), 1)}
+        for scope_key, entry in get_cached_scopes().items()
+    ]
+    ages = [scope["age_seconds"] for scope in scopes]
+
+    return {
+        "status": "success",
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+        "invalidations": stats.get("invalidations", 0),
+        "scheduled_refreshes": stats.get("scheduled_refreshes", 0),
+        "cached_scopes": len(scopes),
+        "max_age_seconds": max(ages) if ages else 0,
+        "avg_age_seconds": round(sum(ages) / len(ages), 1) if ages else 0,
+        "max_entry_age": MAX_ENTRY_AGE,
+        "scopes": scopes
+    }
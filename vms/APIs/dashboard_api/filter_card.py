@@ -3,6 +3,12 @@ import json
 
 from frappe.utils import today, get_first_day, get_last_day
 
+from vms.APIs.dashboard_api.dashboard_count_cache import get_dashboard_counts
+from vms.APIs.dashboard_api.onboarding_enrichment import (
+    enrich_with_company_vendor_codes,
+    get_paginated_onboarding
+)
+
 # Not In Use
 # @frappe.whitelist(allow_guest=False)
 # def get_vendors_details(usr):
@@ -134,154 +140,34 @@ def vendor_data_for_accounts(usr, user_roles):
         # )
 
 
-        values = {"company_list": company_list}
-        total_vendor_count = frappe.db.sql("""
-            SELECT COUNT(*) FROM (
-                SELECT ref_no FROM `tabVendor Onboarding`
-                WHERE company_name IN %(company_list)s
-                GROUP BY ref_no
-            ) AS grouped
-        """, values)[0][0]
-
-        start_date = get_first_day(today())
-        end_date = get_last_day(today())
-
-        # total_vendor_count = frappe.db.count(
-        #     "Vendor Master",
-        #     filters={"name": ["in", vendor_onboarding]}
-        # )
-        
-        # counts for Purchase team flow
-
-        approved_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Approved",
-                "company_name": ["in", company_list]
-            }
-        )
-
-        pending_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Pending",
-                "company_name": ["in", company_list],
-                "purchase_head_undertaking": 1
-            }
-        )
-
-        rejected_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Rejected",
-                "company_name": ["in", company_list]
-            }
-        )
-
-        expired_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Expired",
-                "company_name": ["in", company_list]
-            }
-        )
-
-        sap_error_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "SAP Error",
-                "company_name": ["in", company_list]
-            }
-        )
+        # Counters are served from the per-scope dashboard count cache
+        counts = get_dashboard_counts("company", members=company_list)
+        accounts_flow = get_dashboard_counts("flows").get("accounts_team", {})
 
-        current_month_vendor = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "creation": ["between", [start_date, end_date]],
-                "company_name": ["in", company_list]
-            }
-        )
-
-        # counts for accounts team flow
-
-        vend_onb = frappe.get_all(
-            "Vendor Onboarding",
-            filters={"register_by_account_team": 1},  
-            pluck="name"
-        )
-
-        approved_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Approved",
-                "name": ["in", vend_onb]
-            }
-        )
-
-        pending_vendor_count_by_accounts_team = []
         if "Accounts Head" in user_roles:
-            pending_vendor_count_by_accounts_team = frappe.db.count(
-                "Vendor Onboarding",
-                filters={
-                    "onboarding_form_status": "Pending",
-                    "name": ["in", vend_onb],
-                    "accounts_team_undertaking": 1, "mail_sent_to_account_head": 1
-                }
-            )
+            pending_vendor_count_by_accounts_team = accounts_flow.get("pending_for_head", 0)
         else:
-            pending_vendor_count_by_accounts_team = frappe.db.count(
-                "Vendor Onboarding",
-                filters={
-                    "onboarding_form_status": "Pending",
-                    "name": ["in", vend_onb]
-                }
-            )
-
-
-        rejected_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Rejected",
-                "name": ["in", vend_onb]
-            }
-        )
-
-        sap_error_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "SAP Error",
-                "name": ["in", vend_onb]
-            }
-        )
-
-        expired_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Expired",
-                "name": ["in", vend_onb]
-            }
-        )
-
+            pending_vendor_count_by_accounts_team = accounts_flow.get("pending", 0)
 
         return {
             "status": "success",
             "message": "Vendor Onboarding dashboard counts fetched successfully.",
             "role": user_roles,
             "companies": company_list,
-            "total_vendor_count": total_vendor_count,
-            "pending_vendor_count": pending_vendor_count,
-            "approved_vendor_count": approved_vendor_count,
-            "rejected_vendor_count": rejected_vendor_count,
-            "expired_vendor_count": expired_vendor_count,
-            "sap_error_vendor_count": sap_error_vendor_count,
-            "current_month_vendor": current_month_vendor,
+            "total_vendor_count": counts.get("total", 0),
+            "pending_vendor_count": counts.get("pending_undertaking", 0),
+            "approved_vendor_count": counts.get("approved", 0),
+            "rejected_vendor_count": counts.get("rejected", 0),
+            "expired_vendor_count": counts.get("expired", 0),
+            "sap_error_vendor_count": counts.get("sap_error", 0),
+            "current_month_vendor": counts.get("current_month", 0),
             
             # for accounts team flow
-            "approved_vendor_count_by_accounts_team": approved_vendor_count_by_accounts_team,
+            "approved_vendor_count_by_accounts_team": accounts_flow.get("approved", 0),
             "pending_vendor_count_by_accounts_team": pending_vendor_count_by_accounts_team,
-            "rejected_vendor_count_by_accounts_team": rejected_vendor_count_by_accounts_team,
-            "sap_error_vendor_count_by_accounts_team": sap_error_vendor_count_by_accounts_team,
-            "expired_vendor_count_by_accounts_team": expired_vendor_count_by_accounts_team
+            "rejected_vendor_count_by_accounts_team": accounts_flow.get("rejected", 0),
+            "sap_error_vendor_count_by_accounts_team": accounts_flow.get("sap_error", 0),
+            "expired_vendor_count_by_accounts_team": accounts_flow.get("expired", 0)
         }
 
     except Exception as e:
@@ -331,69 +217,13 @@ def vendor_data_for_purchase(usr, user_roles):
         #         "vendor_onboarding": []
         #     }
 
-        # Dates for current month
-        start_date = get_first_day(today())
-        end_date = get_last_day(today())
-
-        # Count of Vendor Onboarding records by status
-        # total_vendor_count = frappe.db.count(
-        #     "Vendor Onboarding",
-        #     filters={"ref_no": ["in", vendor_names]}
-        # )
+        # Counters are served from the per-scope dashboard count cache
+        counts = get_dashboard_counts("team", members=user_ids, team=team)
 
-        values = {"user_ids": user_ids}
-        total_vendor_count = frappe.db.sql("""
-            SELECT COUNT(*) FROM (
-                SELECT ref_no FROM `tabVendor Onboarding`
-                WHERE registered_by IN %(user_ids)s
-                GROUP BY ref_no
-            ) AS grouped
-        """, values)[0][0]
-
-        approved_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={"registered_by": ["in", user_ids], "onboarding_form_status": "Approved"}
-        )
-
-
-
-        pending_vendor_count = []
         if "Purchase Head" in user_roles:
-            
-            pending_vendor_count = frappe.db.count(
-                "Vendor Onboarding",
-                filters={"registered_by": ["in", user_ids], "onboarding_form_status": "Pending", "purchase_team_undertaking": 1}
-            )
+            pending_vendor_count = counts.get("pending_undertaking", 0)
         else:
-            pending_vendor_count = frappe.db.count(
-                "Vendor Onboarding",
-                filters={"registered_by": ["in", user_ids], "onboarding_form_status": "Pending"}
-            )
-
-
-
-        rejected_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={"registered_by": ["in", user_ids], "onboarding_form_status": "Rejected"}
-        )
-
-        expired_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={"registered_by": ["in", user_ids], "onboarding_form_status": "Expired"}
-        )
-
-        sap_error_vendor_count = frappe.db.count(
-            "Vendor Onboarding",
-            filters={"registered_by": ["in", user_ids], "onboarding_form_status": "SAP Error"}
-        )
-
-        current_month_vendor = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "registered_by": ["in", user_ids],
-                "creation": ["between", [start_date, end_date]]
-            }
-        )
+            pending_vendor_count = counts.get("pending", 0)
 
         po_count = frappe.db.count(
             "Purchase Order",
@@ -441,13 +271,13 @@ def vendor_data_for_purchase(usr, user_roles):
             "message": "Vendor Onboarding dashboard counts fetched successfully.",
             "role": user_roles,
             "team": team,
-            "total_vendor_count": total_vendor_count,
+            "total_vendor_count": counts.get("total", 0),
             "pending_vendor_count": pending_vendor_count,
-            "approved_vendor_count": approved_vendor_count,
-            "rejected_vendor_count": rejected_vendor_count,
-            "expired_vendor_count": expired_vendor_count,
-            "sap_error_vendor_count": sap_error_vendor_count,
-            "current_month_vendor": current_month_vendor,
+            "approved_vendor_count": counts.get("approved", 0),
+            "rejected_vendor_count": counts.get("rejected", 0),
+            "expired_vendor_count": counts.get("expired", 0),
+            "sap_error_vendor_count": counts.get("sap_error", 0),
+            "current_month_vendor": counts.get("current_month", 0),
             "po_count": po_count
         }
 
@@ -462,119 +292,28 @@ def vendor_data_for_purchase(usr, user_roles):
 
 def vendor_data_for_super_head (usr, user_roles):
     try:
-        # for Purchase team
-        vend_onb_by_pur_team = frappe.get_all(
-                "Vendor Onboarding",
-                filters={"register_by_account_team": 0},  
-                pluck="name"
-            )
-
-        approved_vendor_count_by_pur_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Approved",
-                "name": ["in", vend_onb_by_pur_team]
-            }
-        )
-
-        pending_vendor_count_by_pur_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Pending",
-                "name": ["in", vend_onb_by_pur_team]
-            }
-        )
-
-        rejected_vendor_count_by_pur_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Rejected",
-                "name": ["in", vend_onb_by_pur_team]
-            }
-        )
-
-        sap_error_vendor_count_by_pur_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "SAP Error",
-                "name": ["in", vend_onb_by_pur_team]
-            }
-        )
-
-        expired_vendor_count_by_pur_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Expired",
-                "name": ["in", vend_onb_by_pur_team]
-            }
-        )
-
-
-        # for accounts team flow
-        vend_onb_by_acc_team = frappe.get_all(
-                "Vendor Onboarding",
-                filters={"register_by_account_team": 1},  
-                pluck="name"
-            )
-
-        approved_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Approved",
-                "name": ["in", vend_onb_by_acc_team]
-            }
-        )
-
-        pending_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Pending",
-                "name": ["in", vend_onb_by_acc_team]
-            }
-        )
-
-        rejected_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Rejected",
-                "name": ["in", vend_onb_by_acc_team]
-            }
-        )
-
-        sap_error_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "SAP Error",
-                "name": ["in", vend_onb_by_acc_team]
-            }
-        )
-
-        expired_vendor_count_by_accounts_team = frappe.db.count(
-            "Vendor Onboarding",
-            filters={
-                "onboarding_form_status": "Expired",
-                "name": ["in", vend_onb_by_acc_team]
-            }
-        )
-
+        # Counters for both flows are served from the dashboard count cache
+        flows = get_dashboard_counts("flows")
+        purchase_flow = flows.get("purchase_team", {})
+        accounts_flow = flows.get("accounts_team", {})
 
         return {
             "status": "success",
             "message": "Vendor Onboarding dashboard counts fetched successfully.",
             "role": user_roles,
             # for Purchase team
-            "pending_vendor_count_by_pur_team": pending_vendor_count_by_pur_team,
-            "approved_vendor_count_by_pur_team": approved_vendor_count_by_pur_team,
-            "rejected_vendor_count_by_pur_team": rejected_vendor_count_by_pur_team,
-            "expired_vendor_count_by_pur_team": expired_vendor_count_by_pur_team,
-            "sap_error_vendor_count_by_pur_team": sap_error_vendor_count_by_pur_team,
+            "pending_vendor_count_by_pur_team": purchase_flow.get("pending", 0),
+            "approved_vendor_count_by_pur_team": purchase_flow.get("approved", 0),
+            "rejected_vendor_count_by_pur_team": purchase_flow.get("rejected", 0),
+            "expired_vendor_count_by_pur_team": purchase_flow.get("expired", 0),
+            "sap_error_vendor_count_by_pur_team": purchase_flow.get("sap_error", 0),
             
             # for accounts team
-            "approved_vendor_count_by_accounts_team": approved_vendor_count_by_accounts_team,
-            "pending_vendor_count_by_accounts_team": pending_vendor_count_by_accounts_team,
-            "rejected_vendor_count_by_accounts_team": rejected_vendor_count_by_accounts_team,
-            "sap_error_vendor_count_by_accounts_team": sap_error_vendor_count_by_accounts_team,
-            "expired_vendor_count_by_accounts_team": expired_vendor_count_by_accounts_team
+            "approved_vendor_count_by_accounts_team": accounts_flow.get("approved", 0),
+            "pending_vendor_count_by_accounts_team": accounts_flow.get("pending", 0),
+            "rejected_vendor_count_by_accounts_team": accounts_flow.get("rejected", 0),
+            "sap_error_vendor_count_by_accounts_team": accounts_flow.get("sap_error", 0),
+            "expired_vendor_count_by_accounts_team": accounts_flow.get("expired", 0)
         }
 
     except Exception as e:
@@ -692,7 +431,7 @@ def vendor_data_for_super_head (usr, user_roles):
 
 # approved vendor details
 @frappe.whitelist(allow_guest=True)
-def approved_vendor_details(usr):
+def approved_vendor_details(usr, page_no=None, page_length=None):
     try:
         allowed_roles = {"Purchase Team", "Accounts Team", "Purchase Head", "QA Team", "QA Head"}
         user_roles = frappe.get_roles(usr)
@@ -724,15 +463,10 @@ def approved_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "onboarding_form_status": "Approved",
-                    "company_name": ["in", company_list]
-                },
-                fields=fields,
-                order_by="modified desc"
-            )
+            filters = {
+                "onboarding_form_status": "Approved",
+                "company_name": ["in", company_list]
+            }
         else:
             # Filter by team for Purchase/QA teams
             team = frappe.db.get_value("Employee", {"user_id": usr}, "team")
@@ -751,45 +485,20 @@ def approved_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "registered_by": ["in", user_ids],
-                    "onboarding_form_status": "Approved"
-                },
-                fields=fields,
-                order_by="modified desc"
-            )
-
-        # Enrich with company vendor codes
-        for doc in onboarding_docs:
-            ref_no = doc.get("ref_no")
-
-            
-            company_vendor = frappe.get_all(
-                "Company Vendor Code",
-                filters={"vendor_ref_no": ref_no},
-                fields=["name", "company_code"]
-            )
-
-            enriched_codes = []
-            for cvc in company_vendor:
-                vendor_code_children = frappe.get_all(
-                    "Vendor Code",
-                    filters={"parent": cvc.name},
-                    fields=["state", "gst_no", "vendor_code"]
-                )
-                enriched_codes.append({
-                    "company_code": cvc.company_code,
-                    "vendor_codes": vendor_code_children
-                })
-
+            filters = {
+                "registered_by": ["in", user_ids],
+                "onboarding_form_status": "Approved"
+            }
 
-            doc["company_vendor_codes"] = enriched_codes
+        page = get_paginated_onboarding(filters, fields, page_no, page_length)
+        onboarding_docs = enrich_with_company_vendor_codes(page["records"])
 
         return {
             "status": "success",
             "message": "Approved vendor onboarding records fetched successfully.",
+            "total_count": page["total_count"],
+            "page_no": page["page_no"],
+            "page_length": page["page_length"],
             "approved_vendor_onboarding": onboarding_docs
         }
 
@@ -807,7 +516,7 @@ def approved_vendor_details(usr):
 # rejected vendor details
 
 @frappe.whitelist(allow_guest=False)
-def rejected_vendor_details(usr):
+def rejected_vendor_details(usr, page_no=None, page_length=None):
     try:
         allowed_roles = {"Purchase Team", "Accounts Team", "Purchase Head", "QA Team", "QA Head"}
         user_roles = frappe.get_roles(usr)
@@ -840,15 +549,10 @@ def rejected_vendor_details(usr):
                 }
             
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "onboarding_form_status": "Rejected",
-                    "company_name": ["in", company_list]
-                },
-                fields=fields,
-                order_by="modified desc" 
-            )
+            filters = {
+                "onboarding_form_status": "Rejected",
+                "company_name": ["in", company_list]
+            }
         else:
             # Filter by team for Purchase/QA teams
             team = frappe.db.get_value("Employee", {"user_id": usr}, "team")
@@ -867,19 +571,20 @@ def rejected_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "registered_by": ["in", user_ids],
-                    "onboarding_form_status": "Rejected"
-                },
-                fields=fields,
-                order_by="modified desc"
-            )
+            filters = {
+                "registered_by": ["in", user_ids],
+                "onboarding_form_status": "Rejected"
+            }
+
+        page = get_paginated_onboarding(filters, fields, page_no, page_length)
+        onboarding_docs = page["records"]
 
         return {
             "status": "success",
             "message": "Rejected vendor onboarding records fetched successfully.",
+            "total_count": page["total_count"],
+            "page_no": page["page_no"],
+            "page_length": page["page_length"],
             "rejected_vendor_onboarding": onboarding_docs
         }
 
@@ -896,7 +601,7 @@ def rejected_vendor_details(usr):
 # pending vendor details
 
 @frappe.whitelist(allow_guest=False)
-def pending_vendor_details(usr):
+def pending_vendor_details(usr, page_no=None, page_length=None):
     try:
         allowed_roles = {"Purchase Team", "Accounts Team", "Purchase Head", "QA Team", "QA Head"}
         user_roles = frappe.get_roles(usr)
@@ -928,15 +633,10 @@ def pending_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "onboarding_form_status": "Pending",
-                    "company_name": ["in", company_list]
-                },
-                fields=fields,
-                order_by="modified desc"                
-            )
+            filters = {
+                "onboarding_form_status": "Pending",
+                "company_name": ["in", company_list]
+            }
         else:
             # Filter by team for Purchase/QA teams
             team = frappe.db.get_value("Employee", {"user_id": usr}, "team")
@@ -955,19 +655,20 @@ def pending_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "registered_by": ["in", user_ids],
-                    "onboarding_form_status": "Pending"
-                },
-                fields=fields,
-                order_by="modified desc"
-            )
+            filters = {
+                "registered_by": ["in", user_ids],
+                "onboarding_form_status": "Pending"
+            }
+
+        page = get_paginated_onboarding(filters, fields, page_no, page_length)
+        onboarding_docs = page["records"]
 
         return {
             "status": "success",
             "message": "Pending vendor onboarding records fetched successfully.",
+            "total_count": page["total_count"],
+            "page_no": page["page_no"],
+            "page_length": page["page_length"],
             "pending_vendor_onboarding": onboarding_docs
         }
 
@@ -985,7 +686,7 @@ def pending_vendor_details(usr):
 # Expired vendor details
 
 @frappe.whitelist(allow_guest=False)
-def expired_vendor_details(usr):
+def expired_vendor_details(usr, page_no=None, page_length=None):
     try:
         allowed_roles = {"Purchase Team", "Accounts Team", "Purchase Head", "QA Team", "QA Head"}
         user_roles = frappe.get_roles(usr)
@@ -1017,16 +718,10 @@ def expired_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "onboarding_form_status": "Expired",
-                    "company_name": ["in", company_list]
-                },
-                fields=fields,
-                order_by="modified desc"
-                
-            )
+            filters = {
+                "onboarding_form_status": "Expired",
+                "company_name": ["in", company_list]
+            }
         else:
             # Filter by team for Purchase/QA teams
             team = frappe.db.get_value("Employee", {"user_id": usr}, "team")
@@ -1045,19 +740,20 @@ def expired_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "registered_by": ["in", user_ids],
-                    "onboarding_form_status": "Expired"
-                },
-                fields=fields,
-                order_by="modified desc"
-            )
+            filters = {
+                "registered_by": ["in", user_ids],
+                "onboarding_form_status": "Expired"
+            }
+
+        page = get_paginated_onboarding(filters, fields, page_no, page_length)
+        onboarding_docs = page["records"]
 
         return {
             "status": "success",
             "message": "Expired vendor onboarding records fetched successfully.",
+            "total_count": page["total_count"],
+            "page_no": page["page_no"],
+            "page_length": page["page_length"],
             "expired_vendor_onboarding": onboarding_docs
         }
 
@@ -1183,7 +879,7 @@ def total_vendor_details(usr):
 # current month vendor details
 
 @frappe.whitelist(allow_guest=False)
-def current_month_vendor_details(usr):
+def current_month_vendor_details(usr, page_no=None, page_length=None):
     try:
         allowed_roles = {"Purchase Team", "Accounts Team", "Purchase Head", "QA Team", "QA Head"}
         user_roles = frappe.get_roles(usr)
@@ -1218,16 +914,10 @@ def current_month_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "company_name": ["in", company_list],
-                    "creation": ["between", [start_date, end_date]]
-                },
-                fields=fields,
-                order_by="modified desc"
-                
-            )
+            filters = {
+                "company_name": ["in", company_list],
+                "creation": ["between", [start_date, end_date]]
+            }
         else:
             team = frappe.db.get_value("Employee", {"user_id": usr}, "team")
             if not team:
@@ -1245,15 +935,10 @@ def current_month_vendor_details(usr):
                     "vendor_onboarding": []
                 }
 
-            onboarding_docs = frappe.get_all(
-                "Vendor Onboarding",
-                filters={
-                    "registered_by": ["in", user_ids],
-                    "creation": ["between", [start_date, end_date]]
-                },
-                fields=fields,
-                order_by="modified desc"
-            )
+            filters = {
+                "registered_by": ["in", user_ids],
+                "creation": ["between", [start_date, end_date]]
+            }
 
         # onboarding_docs = frappe.db.sql("""
         #     SELECT
@@ -1276,9 +961,15 @@ def current_month_vendor_details(usr):
         # }, as_dict=True)
 
 
+        page = get_paginated_onboarding(filters, fields, page_no, page_length)
+        onboarding_docs = page["records"]
+
         return {
             "status": "success",
             "message": "Vendor onboarding records for the current month fetched successfully.",
+            "total_count": page["total_count"],
+            "page_no": page["page_no"],
+            "page_length": page["page_length"],
             "vendor_onboarding": onboarding_docs
         }
 
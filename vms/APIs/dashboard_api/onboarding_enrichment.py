@@ -0,0 +1,107 @@
+import frappe
+from frappe.utils import cint
+
+# Keep IN (...) lists to a size MariaDB handles comfortably
+ENRICHMENT_CHUNK_SIZE = 500
+
+
+def _chunked(values, size=ENRICHMENT_CHUNK_SIZE):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def get_pagination_args(page_no=None, page_length=None):
+    """
+    Normalise page_no / page_length coming from the request.
+
+    Returns (page_no, page_length, start). page_length of 0 means "no limit",
+    which keeps the old unpaginated behaviour for callers that do not send paging args.
+    """
+    page_length = cint(page_length) if page_length else 0
+    page_no = max(cint(page_no) if page_no else 1, 1)
+    start = (page_no - 1) * page_length if page_length else 0
+    return page_no, page_length, start
+
+
+def get_paginated_onboarding(filters, fields, page_no=None, page_length=None, order_by="modified desc"):
+    """
+    Fetch one page of Vendor Onboarding rows together with the total count for the filters.
+
+    Returns a dict with the rows and the pagination meta used by the dashboard endpoints.
+    """
+    page_no, page_length, start = get_pagination_args(page_no, page_length)
+
+    total_count = frappe.db.count("Vendor Onboarding", filters=filters)
+
+    onboarding_docs = frappe.get_all(
+        "Vendor Onboarding",
+        filters=filters,
+        fields=fields,
+        order_by=order_by,
+        start=start,
+        page_length=page_length
+    )
+
+    return {
+        "records": onboarding_docs,
+        "total_count": total_count,
+        "page_no": page_no,
+        "page_length": page_length or total_count
+    }
+
+
+def get_company_vendor_codes_map(ref_nos):
+    """
+    Build {vendor_ref_no: [{"company_code": ..., "vendor_codes": [...]}, ...]} for the given
+    Vendor Master refs using two set-based queries per chunk instead of one query per
+    onboarding row and one more per Company Vendor Code.
+    """
+    ref_nos = list({ref_no for ref_no in ref_nos if ref_no})
+    result = {ref_no: [] for ref_no in ref_nos}
+    if not ref_nos:
+        return result
+
+    company_vendor_codes = []
+    for chunk in _chunked(ref_nos):
+        company_vendor_codes.extend(frappe.get_all(
+            "Company Vendor Code",
+            filters={"vendor_ref_no": ["in", chunk]},
+            fields=["name", "company_code", "vendor_ref_no"],
+            order_by="modified desc"
+        ))
+
+    if not company_vendor_codes:
+        return result
+
+    children_by_parent = {}
+    cvc_names = [cvc.name for cvc in company_vendor_codes]
+    for chunk in _chunked(cvc_names):
+        vendor_code_rows = frappe.get_all(
+            "Vendor Code",
+            filters={"parent": ["in", chunk], "parenttype": "Company Vendor Code"},
+            fields=["parent", "state", "gst_no", "vendor_code"],
+            order_by="idx asc"
+        )
+        for row in vendor_code_rows:
+            children_by_parent.setdefault(row.pop("parent"), []).append(row)
+
+    for cvc in company_vendor_codes:
+        result[cvc.vendor_ref_no].append({
+            "company_code": cvc.company_code,
+            "vendor_codes": children_by_parent.get(cvc.name, [])
+        })
+
+    return result
+
+
+def enrich_with_company_vendor_codes(onboarding_docs):
+    """Attach `company_vendor_codes` to every onboarding row in place and return the rows."""
+    if not onboarding_docs:
+        return onboarding_docs
+
+    codes_map = get_company_vendor_codes_map([doc.get("ref_no") for doc in onboarding_docs])
+
+    for doc in onboarding_docs:
+        doc["company_vendor_codes"] = codes_map.get(doc.get("ref_no"), [])
+
+    return onboarding_docs
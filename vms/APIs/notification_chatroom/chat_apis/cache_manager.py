@@ -4,6 +4,7 @@
 import frappe
 from frappe.utils import now_datetime, add_to_date
 import json
+from vms.APIs.notification_chatroom.chat_apis.status_manager import chat_presence
 
 @frappe.whitelist()
 def cleanup_status_cache():
@@ -12,60 +13,11 @@ def cleanup_status_cache():
     Runs every 6 hours via cron
     """
     try:
-        cache = frappe.cache()
         current_time = now_datetime()
         
-        # Get all cache keys with the chat status prefix
-        pattern = "chat_user_status_*"
-        
-        # Since frappe.cache doesn't have a direct pattern scan,
-        # we'll track active users and clean their cache if expired
-        active_users = frappe.db.sql("""
-            SELECT name FROM `tabUser` 
-            WHERE enabled = 1 
-            AND user_type = 'System User'
-        """, as_list=True)
-        
-        cleaned_count = 0
-        for user_tuple in active_users:
-            user = user_tuple[0]
-            cache_key = f"chat_user_status_{user}"
-            
-            try:
-                status_data = cache.get_value(cache_key)
-                if status_data:
-                    # Check if cache entry is expired
-                    from frappe.utils import get_datetime, time_diff_in_seconds
-                    last_seen = get_datetime(status_data.get("last_seen"))
-                    
-                    if time_diff_in_seconds(current_time, last_seen) > 3600:  # 1 hour old
-                        cache.delete_value(cache_key)
-                        cleaned_count += 1
-                        
-            except Exception as e:
-                # If there's an error with a specific cache entry, just continue
-                continue
-        
-        # Also clean up activity check cache
-        try:
-            activity_pattern_users = frappe.db.sql("""
-                SELECT DISTINCT name FROM `tabUser` 
-                WHERE enabled = 1 
-                AND user_type = 'System User'
-            """, as_list=True)
-            
-            for user_tuple in activity_pattern_users:
-                user = user_tuple[0]
-                activity_cache_key = f"chat_activity_check_{user}"
-                
-                # These expire automatically, but let's clean old ones
-                try:
-                    cache.delete_value(activity_cache_key)
-                except:
-                    pass
-                    
-        except Exception as e:
-            frappe.log_error(f"Error cleaning activity cache: {str(e)}")
+        # Entries not seen for an hour are dropped with one ZREMRANGEBYSCORE.
+        # chat_activity_check_* keys carry their own TTL and need no cleanup.
+        cleaned_count = chat_presence.expire_stale(ttl=3600)
         
         return {
             "success": True,
@@ -83,33 +35,19 @@ def get_cache_statistics():
     Get statistics about chat cache usage
     """
     try:
-        active_users = frappe.db.sql("""
-            SELECT name FROM `tabUser` 
-            WHERE enabled = 1 
-            AND user_type = 'System User'
-        """, as_list=True)
+        total_users = frappe.db.count("User", {"enabled": 1, "user_type": "System User"})
+        cached_users = chat_presence.count_online()
         
-        cache = frappe.cache()
-        cached_users = 0
-        total_users = len(active_users)
         cache_entries = []
-        
-        for user_tuple in active_users:
-            user = user_tuple[0]
-            cache_key = f"chat_user_status_{user}"
-            
-            try:
-                status_data = cache.get_value(cache_key)
-                if status_data:
-                    cached_users += 1
-                    cache_entries.append({
-                        "user": user,
-                        "status": status_data.get("status"),
-                        "last_seen": status_data.get("last_seen"),
-                        "source": status_data.get("source")
-                    })
-            except:
-                continue
+        for user, _score in chat_presence.get_online_users(limit=10):
+            presence = chat_presence.get(user)
+            if presence:
+                cache_entries.append({
+                    "user": user,
+                    "status": presence["status"],
+                    "last_seen": presence["last_seen"],
+                    "source": "cache"
+                })
         
         return {
             "success": True,
@@ -119,7 +57,7 @@ def get_cache_statistics():
                 "cache_hit_rate": f"{(cached_users/total_users*100):.1f}%" if total_users > 0 else "0%",
                 "timestamp": str(now_datetime())
             },
-            "cache_entries": cache_entries[:10]  # Show first 10 for debugging
+            "cache_entries": cache_entries  # Show first 10 for debugging
         }
         
     except Exception as e:
@@ -135,11 +73,8 @@ def force_refresh_user_cache(user=None):
         if not user:
             user = frappe.session.user
             
-        cache = frappe.cache()
-        cache_key = f"chat_user_status_{user}"
-        
-        # Delete existing cache
-        cache.delete_value(cache_key)
+        # Delete existing presence entry
+        chat_presence.remove(user)
         
         # Create fresh cache entry
         from vms.APIs.notification_chatroom.chat_apis.status_manager import chat_status_manager
@@ -165,24 +100,9 @@ def reset_all_user_statuses():
         if not frappe.has_permission("System Manager"):
             frappe.throw("Insufficient permissions")
             
-        # Clear all status cache
-        active_users = frappe.db.sql("""
-            SELECT name FROM `tabUser` 
-            WHERE enabled = 1 
-            AND user_type = 'System User'
-        """, as_list=True)
-        
-        cache = frappe.cache()
-        cleared_cache = 0
-        
-        for user_tuple in active_users:
-            user = user_tuple[0]
-            cache_key = f"chat_user_status_{user}"
-            try:
-                cache.delete_value(cache_key)
-                cleared_cache += 1
-            except:
-                continue
+        # Clear the whole presence store in one call
+        cleared_cache = chat_presence.count_online()
+        chat_presence.clear()
         
         # Reset database statuses
         updated_db = 0
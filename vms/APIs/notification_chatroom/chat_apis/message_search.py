@@ -0,0 +1,206 @@
+# vms/APIs/notification_chatroom/chat_apis/message_search.py
+# Full-text indexed search for Chat Message
+
+import re
+
+import frappe
+from frappe.utils import cint, flt, get_datetime
+
+FULLTEXT_INDEX_NAME = "chat_message_content_fulltext"
+ROOM_TIMESTAMP_INDEX_NAME = "chat_room_timestamp_index"
+FULLTEXT_CACHE_KEY = "chat_message_fulltext_index_available"
+
+# InnoDB does not index tokens shorter than innodb_ft_min_token_size (3 by default)
+DEFAULT_MIN_TOKEN_SIZE = 3
+MAX_SEARCH_TOKENS = 10
+
+
+def ensure_message_search_index():
+    """
+    Create the FULLTEXT index on message_content and the (chat_room, timestamp) index.
+    InnoDB maintains both on every insert/update, so no extra hooks are needed.
+    """
+    frappe.db.add_index("Chat Message", ["chat_room", "timestamp"], ROOM_TIMESTAMP_INDEX_NAME)
+
+    if not _fulltext_index_exists():
+        frappe.db.sql_ddl(f"""
+            ALTER TABLE `tabChat Message`
+            ADD FULLTEXT INDEX `{FULLTEXT_INDEX_NAME}` (message_content)
+        """)
+
+    frappe.cache().delete_value(FULLTEXT_CACHE_KEY)
+
+
+def _fulltext_index_exists():
+    return bool(frappe.db.sql(
+        "SHOW INDEX FROM `tabChat Message` WHERE Key_name = %s",
+        (FULLTEXT_INDEX_NAME,)
+    ))
+
+
+def has_fulltext_index():
+    available = frappe.cache().get_value(FULLTEXT_CACHE_KEY)
+    if available is None:
+        available = 1 if _fulltext_index_exists() else 0
+        frappe.cache().set_value(FULLTEXT_CACHE_KEY, available, expires_in_sec=86400)
+    return bool(available)
+
+
+def get_min_token_size():
+    try:
+        value = frappe.db.sql("SELECT @@innodb_ft_min_token_size")[0][0]
+        return cint(value) or DEFAULT_MIN_TOKEN_SIZE
+    except Exception:
+        return DEFAULT_MIN_TOKEN_SIZE
+
+
+def build_boolean_query(search_term):
+    """
+    Turn free text into a BOOLEAN MODE query where every word is required and
+    prefix-matched ("+invoice* +pending*"). Operators typed by the user are dropped.
+    Returns None when no word is long enough to be in the index.
+    """
+    min_size = get_min_token_size()
+    tokens = [t for t in re.findall(r"\w+", search_term or "", re.UNICODE) if len(t) >= min_size]
+    if not tokens:
+        return None
+    return " ".join(f"+{token}*" for token in tokens[:MAX_SEARCH_TOKENS])
+
+
+def parse_cursor(cursor):
+    if not cursor:
+        return None
+    cursor = frappe.parse_json(cursor)
+    if not cursor.get("name") or not cursor.get("timestamp"):
+        return None
+    return cursor
+
+
+def search_chat_messages(search_term, room_ids=None, member=None, message_type=None,
+                         from_date=None, to_date=None, sender=None, cursor=None,
+                         page=1, page_size=20, with_total=True):
+    """
+    Ranked search over Chat Message.
+
+    Uses MATCH ... AGAINST on the FULLTEXT index when available and falls back to LIKE
+    (ordered by recency) for terms the index cannot serve.
+
+    Args:
+        room_ids (list): Limit to these rooms
+        member (str): Limit to rooms this user is a member of
+        cursor (dict|str): next_cursor from the previous page (keyset pagination);
+            when not given, `page` is used as a plain offset
+
+    Returns:
+        dict: messages, next_cursor, total_count, search_mode
+    """
+    page_size = cint(page_size) or 20
+    boolean_query = build_boolean_query(search_term) if has_fulltext_index() else None
+    search_mode = "fulltext" if boolean_query else "like"
+
+    conditions = ["cm.is_deleted = 0"]
+    values = {"limit": page_size + 1}
+
+    if boolean_query:
+        conditions.append("MATCH(cm.message_content) AGAINST (%(boolean_query)s IN BOOLEAN MODE)")
+        values["boolean_query"] = boolean_query
+        score_column = "MATCH(cm.message_content) AGAINST (%(boolean_query)s IN BOOLEAN MODE)"
+    else:
+        if search_term:
+            conditions.append("cm.message_content LIKE %(search_term)s")
+            values["search_term"] = f"%{search_term}%"
+        score_column = "0"
+
+    if room_ids:
+        conditions.append("cm.chat_room IN %(room_ids)s")
+        values["room_ids"] = tuple(room_ids)
+
+    if member:
+        conditions.append("""cm.chat_room IN (
+            SELECT parent FROM `tabChat Room Member`
+            WHERE user = %(member)s AND parenttype = 'Chat Room'
+        )""")
+        values["member"] = member
+
+    if message_type:
+        conditions.append("cm.message_type = %(message_type)s")
+        values["message_type"] = message_type
+
+    if from_date:
+        conditions.append("cm.timestamp >= %(from_date)s")
+        values["from_date"] = get_datetime(from_date)
+
+    if to_date:
+        conditions.append("cm.timestamp <= %(to_date)s")
+        values["to_date"] = get_datetime(to_date)
+
+    if sender:
+        conditions.append("cm.sender = %(sender)s")
+        values["sender"] = sender
+
+    where_clause = " AND ".join(conditions)
+
+    total_count = None
+    if with_total:
+        total_count = frappe.db.sql(f"""
+            SELECT COUNT(*) FROM `tabChat Message` cm WHERE {where_clause}
+        """, values)[0][0]
+
+    # Keyset pagination over (score, timestamp, name), all descending
+    keyset_clause = ""
+    offset_clause = ""
+    cursor = parse_cursor(cursor)
+    if cursor:
+        keyset_clause = """
+            WHERE (
+                ranked.score < %(cursor_score)s
+                OR (ranked.score = %(cursor_score)s AND ranked.timestamp < %(cursor_timestamp)s)
+                OR (ranked.score = %(cursor_score)s AND ranked.timestamp = %(cursor_timestamp)s
+                    AND ranked.name < %(cursor_name)s)
+            )
+        """
+        values.update({
+            "cursor_score": flt(cursor.get("score")),
+            "cursor_timestamp": get_datetime(cursor.get("timestamp")),
+            "cursor_name": cursor.get("name")
+        })
+    elif cint(page) > 1:
+        offset_clause = "OFFSET %(offset)s"
+        values["offset"] = (cint(page) - 1) * page_size
+
+    messages = frappe.db.sql(f"""
+        SELECT ranked.*
+        FROM (
+            SELECT
+                cm.name,
+                cm.chat_room,
+                cm.sender,
+                cm.message_type,
+                cm.message_content,
+                cm.timestamp,
+                cm.reply_to_message,
+                {score_column} AS score
+            FROM `tabChat Message` cm
+            WHERE {where_clause}
+        ) ranked
+        {keyset_clause}
+        ORDER BY ranked.score DESC, ranked.timestamp DESC, ranked.name DESC
+        LIMIT %(limit)s {offset_clause}
+    """, values, as_dict=True)
+
+    next_cursor = None
+    if len(messages) > page_size:
+        messages = messages[:page_size]
+        last = messages[-1]
+        next_cursor = {
+            "score": last.score,
+            "timestamp": str(last.timestamp),
+            "name": last.name
+        }
+
+    return {
+        "messages": messages,
+        "next_cursor": next_cursor,
+        "total_count": total_count,
+        "search_mode": search_mode
+    }
@@ -6,6 +6,8 @@ from frappe import _
 from frappe.utils import now_datetime, cint, get_datetime, time_diff_in_seconds
 import json
 from typing import Dict, List, Optional, Any
+from vms.APIs.notification_chatroom.chat_apis.status_manager import chat_presence, ONLINE_STATUSES
+from vms.chat_vms.doctype.chat_settings.chat_settings import get_chat_settings
 
 @frappe.whitelist()
 def get_user_chat_status():
@@ -163,16 +165,8 @@ def update_user_online_status(status="online"):
     try:
         current_user = frappe.session.user
         
-        # Update user's last activity timestamp
-        cache_key = f"chat_user_status_{current_user}"
-        status_data = {
-            "status": status,
-            "last_seen": str(now_datetime()),
-            "user": current_user
-        }
-        
-        # Cache for 10 minutes
-        frappe.cache().set_value(cache_key, status_data, expires_in_sec=600)
+        # Update user's last activity timestamp in the presence store
+        chat_presence.touch(current_user, status)
         
         # Also update in database if user record has custom fields
         try:
@@ -381,7 +375,7 @@ def send_typing_indicator_enhanced(room_id, is_typing=True):
 
 def get_user_online_status(user):
     """
-    Get user's online status from cache
+    Get user's online status from the presence store
     
     Args:
         user (str): User ID
@@ -390,20 +384,8 @@ def get_user_online_status(user):
         str: User's online status
     """
     try:
-        cache_key = f"chat_user_status_{user}"
-        status_data = frappe.cache().get_value(cache_key)
-        
-        if not status_data:
-            return "offline"
-        
-        # Check if user was seen recently (within 10 minutes)
-        last_seen = get_datetime(status_data.get("last_seen"))
-        current_time = now_datetime()
-        
-        if time_diff_in_seconds(current_time, last_seen) > 600:  # 10 minutes
-            return "offline"
-        
-        return status_data.get("status", "offline")
+        # Users not seen within the presence TTL (10 minutes) are reported offline
+        return chat_presence.get_status(user)
         
     except Exception:
         return "offline"
@@ -553,6 +535,35 @@ from frappe import _
 from frappe.utils import now_datetime, cint, get_datetime, time_diff_in_seconds
 import json
 
+# Cached room / sender lookups for the message fan-out
+
+ROOM_INFO_CACHE_KEY = "chat_room_fanout_info"
+SENDER_PROFILE_CACHE_KEY = "chat_sender_profile"
+
+def get_cached_room_info(room_id):
+    """room_name / room_type of a chat room, cached until the room or its members change"""
+    return frappe.cache().hget(
+        ROOM_INFO_CACHE_KEY,
+        room_id,
+        generator=lambda: frappe.db.get_value("Chat Room", room_id, ["room_name", "room_type"], as_dict=True)
+    ) or {}
+
+def get_cached_sender_profile(user):
+    """full_name / user_image of a user, cached until the User is updated"""
+    return frappe.cache().hget(
+        SENDER_PROFILE_CACHE_KEY,
+        user,
+        generator=lambda: frappe.db.get_value("User", user, ["full_name", "user_image"], as_dict=True)
+    ) or {}
+
+def invalidate_room_cache(room_id):
+    frappe.cache().hdel(ROOM_INFO_CACHE_KEY, room_id)
+    chat_presence.invalidate_room(room_id)
+
+def invalidate_sender_profile(doc, method=None):
+    """User on_update hook"""
+    frappe.cache().hdel(SENDER_PROFILE_CACHE_KEY, doc.name)
+
 # Event Handlers for real-time notifications
 
 def handle_new_message_notification(doc, method):
@@ -564,17 +575,16 @@ def handle_new_message_notification(doc, method):
         method: Frappe event method
     """
     try:
-        # Get room and sender information
-        room = frappe.get_doc("Chat Room", doc.chat_room)
-        sender_info = frappe.db.get_value("User", doc.sender, 
-                                        ["full_name", "user_image"], as_dict=True)
+        # Get room and sender information from cache
+        room = get_cached_room_info(doc.chat_room)
+        sender_info = get_cached_sender_profile(doc.sender)
         
         # Prepare notification data
         notification_data = {
             "message_id": doc.name,
             "room_id": doc.chat_room,
-            "room_name": room.room_name,
-            "room_type": room.room_type,
+            "room_name": room.get("room_name"),
+            "room_type": room.get("room_type"),
             "sender": doc.sender,
             "sender_name": sender_info.get("full_name") or doc.sender,
             "sender_image": sender_info.get("user_image"),
@@ -584,8 +594,8 @@ def handle_new_message_notification(doc, method):
             "reply_to": doc.reply_to_message
         }
         
-        # Get room members (excluding sender)
-        room_members = [member.user for member in room.members if member.user != doc.sender]
+        # Get room members (excluding sender) from the cached member set
+        room_members = [member for member in chat_presence.get_room_members(doc.chat_room) if member != doc.sender]
         
         # Send real-time notification
         frappe.publish_realtime(
@@ -595,17 +605,21 @@ def handle_new_message_notification(doc, method):
             room=f"chat_room_{doc.chat_room}"
         )
         
-        # Send desktop notification
-        frappe.publish_realtime(
-            event="chat_desktop_notification",
-            message=notification_data,
-            user=room_members
-        )
+        # Send desktop notification, optionally from a background job
+        if get_chat_settings().get("defer_desktop_notifications"):
+            frappe.enqueue(
+                "vms.APIs.notification_chatroom.chat_apis.realtime_enhanced.send_desktop_notifications",
+                queue="short",
+                enqueue_after_commit=True,
+                users=room_members,
+                notification_data=notification_data
+            )
+        else:
+            send_desktop_notifications(room_members, notification_data)
         
-        # Update unread counts cache
-        for member in room_members:
-            cache_key = f"chat_unread_{member}"
-            frappe.cache().delete_value(cache_key)
+        # Update unread counts cache with a single DEL for all members
+        if room_members:
+            frappe.cache().delete_value([f"chat_unread_{member}" for member in room_members])
         
     except Exception as e:
         frappe.log_error(f"Error in handle_new_message_notification: {str(e)}")
@@ -680,6 +694,9 @@ def handle_room_update_notification(doc, method):
         method: Frappe event method
     """
     try:
+        # Members may have been added or removed with the room save
+        invalidate_room_cache(doc.name)
+        
         # Check what changed
         changes = []
         if doc.has_value_changed("room_name"):
@@ -722,6 +739,8 @@ def handle_member_added_notification(doc, method):
         method: Frappe event method
     """
     try:
+        invalidate_room_cache(doc.parent)
+        
         room = frappe.get_doc("Chat Room", doc.parent)
         user_info = frappe.db.get_value("User", doc.user, 
                                       ["full_name", "user_image"], as_dict=True)
@@ -772,6 +791,8 @@ def handle_member_removed_notification(doc, method):
         method: Frappe event method
     """
     try:
+        invalidate_room_cache(doc.parent)
+        
         room = frappe.get_doc("Chat Room", doc.parent)
         user_info = frappe.db.get_value("User", doc.user, 
                                       ["full_name", "user_image"], as_dict=True)
@@ -813,30 +834,11 @@ def handle_member_removed_notification(doc, method):
 
 def cleanup_user_status_cache():
     """
-    Daily cleanup of expired user status cache entries
+    Daily cleanup of expired user status entries
     """
     try:
-        # This would clean up old status entries
-        # Implementation depends on your cache system
-        print("🧹 Cleaning up user status cache entries...")
-        
-        # Get all users and check their status timestamps
-        users = frappe.get_all("User", filters={"enabled": 1}, pluck="name")
-        
-        current_time = now_datetime()
-        cleaned_count = 0
-        
-        for user in users:
-            cache_key = f"chat_user_status_{user}"
-            status_data = frappe.cache().get_value(cache_key)
-            
-            if status_data and status_data.get("last_seen"):
-                last_seen = get_datetime(status_data["last_seen"])
-                
-                # Remove status if older than 24 hours
-                if time_diff_in_seconds(current_time, last_seen) > 86400:  # 24 hours
-                    frappe.cache().delete_value(cache_key)
-                    cleaned_count += 1
+        # One ZREMRANGEBYSCORE over the presence set, no per-user scan
+        cleaned_count = chat_presence.expire_stale()
         
         print(f"✅ Cleaned up {cleaned_count} expired user status entries")
         
@@ -856,21 +858,11 @@ def update_user_activity_status():
             AND sender != 'Administrator'
         """
         
-        active_users = frappe.db.sql(active_users_query, as_dict=True)
+        active_users = frappe.db.sql(active_users_query, pluck=True)
         
-        for user_data in active_users:
-            user = user_data["user"]
-            cache_key = f"chat_user_status_{user}"
-            
-            # Update last activity timestamp
-            status_data = frappe.cache().get_value(cache_key) or {}
-            status_data.update({
-                "last_seen": str(now_datetime()),
-                "status": status_data.get("status", "online"),
-                "user": user
-            })
-            
-            frappe.cache().set_value(cache_key, status_data, expires_in_sec=900)  # 15 minutes
+        # Refresh last seen for all active senders in one pipeline, then expire stale users
+        chat_presence.touch_many(active_users)
+        chat_presence.expire_stale()
         
     except Exception as e:
         frappe.log_error(f"Error in update_user_activity_status: {str(e)}")
@@ -889,29 +881,37 @@ def get_online_users_in_room(room_id):
         dict: List of online users
     """
     try:
-        # Get room members
-        room = frappe.get_doc("Chat Room", room_id)
-        members = [member.user for member in room.members]
+        # One intersection of the presence set with the room member set
+        present = chat_presence.get_online_users_in_room(room_id)
+        present = {user: info for user, info in present.items() if info["status"] in ONLINE_STATUSES}
+        total_members = len(chat_presence.get_room_members(room_id))
+        
+        user_info_map = {}
+        if present:
+            user_info_map = {
+                u.name: u for u in frappe.get_all(
+                    "User",
+                    filters={"name": ["in", list(present)]},
+                    fields=["name", "full_name", "user_image"]
+                )
+            }
         
         online_users = []
-        for user in members:
-            status = get_user_online_status(user)
-            if status in ["online", "busy", "away"]:
-                user_info = frappe.db.get_value("User", user, 
-                                              ["full_name", "user_image"], as_dict=True)
-                online_users.append({
-                    "user": user,
-                    "full_name": user_info.get("full_name") or user,
-                    "user_image": user_info.get("user_image"),
-                    "status": status
-                })
+        for user, info in present.items():
+            user_info = user_info_map.get(user) or {}
+            online_users.append({
+                "user": user,
+                "full_name": user_info.get("full_name") or user,
+                "user_image": user_info.get("user_image"),
+                "status": info["status"]
+            })
         
         return {
             "success": True,
             "data": {
                 "online_users": online_users,
                 "total_online": len(online_users),
-                "total_members": len(members)
+                "total_members": total_members
             }
         }
         
@@ -3,31 +3,33 @@ import frappe
 from frappe import _
 from frappe.utils import now_datetime, cint, get_datetime, add_days
 import json
+import re
+from vms.APIs.notification_chatroom.chat_apis.message_search import search_chat_messages
 
 @frappe.whitelist()
 def search_messages(room_id, search_term, page=1, page_size=20, message_type=None, 
-                   from_date=None, to_date=None, sender=None):
+                   from_date=None, to_date=None, sender=None, cursor=None):
     """
     Search messages in a chat room
     
     Args:
         room_id (str): Chat room ID
         search_term (str): Search term
-        page (int): Page number
+        page (int): Page number (ignored when cursor is given)
         page_size (int): Messages per page
         message_type (str): Filter by message type
         from_date (str): Start date for search
         to_date (str): End date for search
         sender (str): Filter by sender
+        cursor (str): next_cursor of the previous page for keyset pagination
         
     Returns:
-        dict: Search results with pagination
+        dict: Ranked search results with pagination
     """
     try:
         current_user = frappe.session.user
         page = cint(page) or 1
         page_size = min(cint(page_size) or 20, 50)
-        offset = (page - 1) * page_size
         
         # Verify user is member of the room
         room = frappe.get_doc("Chat Room", room_id)
@@ -36,80 +38,43 @@ def search_messages(room_id, search_term, page=1, page_size=20, message_type=Non
         if not permissions["is_member"]:
             frappe.throw("You are not a member of this chat room")
             
-        # Build search conditions
-        conditions = [
-            "chat_room = %(room_id)s",
-            "is_deleted = 0"
-        ]
-        values = {"room_id": room_id}
-        
-        if search_term:
-            conditions.append("message_content LIKE %(search_term)s")
-            values["search_term"] = f"%{search_term}%"
-            
-        if message_type:
-            conditions.append("message_type = %(message_type)s")
-            values["message_type"] = message_type
-            
-        if from_date:
-            conditions.append("timestamp >= %(from_date)s")
-            values["from_date"] = get_datetime(from_date)
-            
-        if to_date:
-            conditions.append("timestamp <= %(to_date)s")
-            values["to_date"] = get_datetime(to_date)
-            
-        if sender:
-            conditions.append("sender = %(sender)s")
-            values["sender"] = sender
-            
-        where_clause = " AND ".join(conditions)
-        
-        # Get total count
-        count_query = f"""
-            SELECT COUNT(*) as total
-            FROM `tabChat Message`
-            WHERE {where_clause}
-        """
-        
-        total_count = frappe.db.sql(count_query, values, as_dict=True)[0].total
-        
-        # Get messages
-        query = f"""
-            SELECT 
-                name,
-                sender,
-                message_type,
-                message_content,
-                timestamp,
-                reply_to_message
-            FROM `tabChat Message`
-            WHERE {where_clause}
-            ORDER BY timestamp DESC
-            LIMIT %(limit)s OFFSET %(offset)s
-        """
-        
-        values.update({"limit": page_size, "offset": offset})
-        messages = frappe.db.sql(query, values, as_dict=True)
-        
-        # Add sender info and attachments
-        for message in messages:
-            # Get sender info
-            sender_info = frappe.db.get_value(
+        search_result = search_chat_messages(
+            search_term,
+            room_ids=[room_id],
+            message_type=message_type,
+            from_date=from_date,
+            to_date=to_date,
+            sender=sender,
+            cursor=cursor,
+            page=page,
+            page_size=page_size
+        )
+        messages = search_result["messages"]
+        total_count = search_result["total_count"]
+        
+        # Add sender info and attachments with one query each
+        senders = list({message.sender for message in messages if message.sender})
+        sender_map = {
+            u.name: {"full_name": u.full_name, "user_image": u.user_image}
+            for u in frappe.get_all(
                 "User",
-                message.sender,
-                ["full_name", "user_image"],
-                as_dict=True
+                filters={"name": ["in", senders]},
+                fields=["name", "full_name", "user_image"]
             )
-            message["sender_info"] = sender_info or {"full_name": message.sender}
-            
-            # Get attachments
-            message["attachments"] = frappe.get_all(
+        } if senders else {}
+        
+        attachments_map = {}
+        if messages:
+            for attachment in frappe.get_all(
                 "Chat Message Attachment",
-                filters={"parent": message.name},
-                fields=["file_name", "file_url", "file_type"]
-            )
-            
+                filters={"parent": ["in", [message.name for message in messages]]},
+                fields=["parent", "file_name", "file_url", "file_type"]
+            ):
+                attachments_map.setdefault(attachment.pop("parent"), []).append(attachment)
+        
+        for message in messages:
+            message["sender_info"] = sender_map.get(message.sender) or {"full_name": message.sender}
+            message["attachments"] = attachments_map.get(message.name, [])
             message["timestamp"] = str(message.timestamp)
             
         # Pagination info
@@ -120,13 +85,15 @@ def search_messages(room_id, search_term, page=1, page_size=20, message_type=Non
             "data": {
                 "messages": messages,
                 "search_term": search_term,
+                "search_mode": search_result["search_mode"],
                 "pagination": {
                     "total_count": total_count,
                     "page": page,
                     "page_size": page_size,
                     "total_pages": total_pages,
-                    "has_next": page < total_pages,
-                    "has_prev": page > 1
+                    "has_next": bool(search_result["next_cursor"]),
+                    "has_prev": page > 1 or bool(cursor),
+                    "next_cursor": search_result["next_cursor"]
                 }
             }
         }
@@ -306,101 +273,75 @@ def get_chat_analytics(room_id, period="week"):
         }
 
 @frappe.whitelist()
-def get_global_chat_search(search_term, page=1, page_size=20):
+def get_global_chat_search(search_term, page=1, page_size=20, room_ids=None, cursor=None):
     """
     Search across all accessible chat rooms
     
     Args:
         search_term (str): Search term
-        page (int): Page number
+        page (int): Page number (ignored when cursor is given)
         page_size (int): Results per page
+        room_ids (list|str): Optional subset of the user's rooms to search
+        cursor (str): next_cursor of the previous page for keyset pagination
         
     Returns:
-        dict: Global search results
+        dict: Global search results ranked by relevance
     """
     try:
         current_user = frappe.session.user
         page = cint(page) or 1
         page_size = min(cint(page_size) or 20, 50)
-        offset = (page - 1) * page_size
         
         if not search_term:
             frappe.throw("Search term is required")
             
-        # Get rooms user is member of
-        user_rooms = frappe.db.sql("""
-            SELECT DISTINCT parent as room_id
-            FROM `tabChat Room Member`
-            WHERE user = %(user)s
-        """, {"user": current_user}, as_dict=True)
-        
-        if not user_rooms:
-            return {
-                "success": True,
-                "data": {
-                    "results": [],
-                    "pagination": {
-                        "total_count": 0,
-                        "page": page,
-                        "page_size": page_size,
-                        "total_pages": 0,
-                        "has_next": False,
-                        "has_prev": False
-                    }
-                }
-            }
+        if room_ids and isinstance(room_ids, str):
+            room_ids = frappe.parse_json(room_ids)
             
-        room_ids = [room.room_id for room in user_rooms]
-        room_placeholders = ", ".join(["%s"] * len(room_ids))
-        
-        # Search messages across user's rooms
-        query = f"""
-            SELECT 
-                cm.name,
-                cm.chat_room,
-                cm.sender,
-                cm.message_type,
-                cm.message_content,
-                cm.timestamp,
-                cr.room_name,
-                cr.room_type,
-                u.full_name as sender_name
-            FROM `tabChat Message` cm
-            LEFT JOIN `tabChat Room` cr ON cm.chat_room = cr.name
-            LEFT JOIN `tabUser` u ON cm.sender = u.name
-            WHERE cm.chat_room IN ({room_placeholders})
-                AND cm.message_content LIKE %(search_term)s
-                AND cm.is_deleted = 0
-            ORDER BY cm.timestamp DESC
-            LIMIT %(limit)s OFFSET %(offset)s
-        """
-        
-        values = room_ids + [f"%{search_term}%", page_size, offset]
-        results = frappe.db.sql(query, values, as_dict=True)
-        
-        # Get total count
-        count_query = f"""
-            SELECT COUNT(*) as total
-            FROM `tabChat Message` cm
-            WHERE cm.chat_room IN ({room_placeholders})
-                AND cm.message_content LIKE %(search_term)s
-                AND cm.is_deleted = 0
-        """
+        # Membership is resolved inside the search query, no room list round trip
+        search_result = search_chat_messages(
+            search_term,
+            room_ids=room_ids,
+            member=current_user,
+            cursor=cursor,
+            page=page,
+            page_size=page_size
+        )
+        results = search_result["messages"]
+        total_count = search_result["total_count"]
+        
+        room_names = list({result.chat_room for result in results})
+        room_map = {
+            r.name: r for r in frappe.get_all(
+                "Chat Room",
+                filters={"name": ["in", room_names]},
+                fields=["name", "room_name", "room_type"]
+            )
+        } if room_names else {}
         
-        count_values = room_ids + [f"%{search_term}%"]
-        total_count = frappe.db.sql(count_query, count_values, as_dict=True)[0].total
+        senders = list({result.sender for result in results if result.sender})
+        sender_names = dict(frappe.get_all(
+            "User",
+            filters={"name": ["in", senders]},
+            fields=["name", "full_name"],
+            as_list=True
+        )) if senders else {}
         
         # Format results
+        highlight_pattern = re.compile(re.escape(search_term), re.IGNORECASE)
         for result in results:
+            room = room_map.get(result.chat_room) or {}
+            result["room_name"] = room.get("room_name")
+            result["room_type"] = room.get("room_type")
+            result["sender_name"] = sender_names.get(result.sender)
             result["timestamp"] = str(result.timestamp)
             
             # Highlight search term in message content
-            if result.message_content and search_term.lower() in result.message_content.lower():
-                highlighted = result.message_content.replace(
-                    search_term,
-                    f"<mark>{search_term}</mark>"
+            if result.message_content:
+                result["highlighted_content"] = highlight_pattern.sub(
+                    lambda match: f"<mark>{match.group(0)}</mark>",
+                    result.message_content
                 )
-                result["highlighted_content"] = highlighted
             else:
                 result["highlighted_content"] = result.message_content
                 
@@ -412,13 +353,15 @@ def get_global_chat_search(search_term, page=1, page_size=20):
             "data": {
                 "results": results,
                 "search_term": search_term,
+                "search_mode": search_result["search_mode"],
                 "pagination": {
                     "total_count": total_count,
                     "page": page,
                     "page_size": page_size,
                     "total_pages": total_pages,
-                    "has_next": page < total_pages,
-                    "has_prev": page > 1
+                    "has_next": bool(search_result["next_cursor"]),
+                    "has_prev": page > 1 or bool(cursor),
+                    "next_cursor": search_result["next_cursor"]
                 }
             }
         }
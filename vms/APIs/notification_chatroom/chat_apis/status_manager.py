@@ -5,8 +5,190 @@ import frappe
 from frappe.utils import now_datetime, add_to_date, cint
 from frappe.model.document import Document
 import json
+import time
+from datetime import timedelta
 from typing import Dict, List, Optional
 
+ONLINE_STATUSES = ("online", "busy", "away")
+
+
+class ChatPresenceStore:
+    """
+    Redis-native presence store for chat users.
+
+    - `chat_presence:last_seen`  sorted set, member = user, score = last seen (epoch seconds)
+    - `chat_presence:status`     hash, user -> status (online, away, busy, offline)
+    - `chat_presence:room:<id>`  set of room members, loaded lazily from Chat Room Member
+
+    Expiry is one ZREMRANGEBYSCORE and "who is online in this room" is one ZINTERSTORE,
+    so maintenance is proportional to the number of active users, not to all users.
+    """
+
+    def __init__(self, presence_ttl=600, room_members_ttl=3600):
+        self.presence_ttl = presence_ttl
+        self.room_members_ttl = room_members_ttl
+
+    @property
+    def cache(self):
+        return frappe.cache()
+
+    def _key(self, name):
+        return self.cache.make_key(f"chat_presence:{name}")
+
+    @property
+    def last_seen_key(self):
+        return self._key("last_seen")
+
+    @property
+    def status_key(self):
+        return self._key("status")
+
+    def room_key(self, room_id):
+        return self._key(f"room:{room_id}")
+
+    def _run(self, method, *args):
+        # Keys are already prefixed; RedisWrapper.exists / smembers would prefix them again
+        pipe = self.cache.pipeline()
+        getattr(pipe, method)(*args)
+        return pipe.execute()[0]
+
+    def _cutoff(self, ttl=None):
+        return time.time() - (ttl or self.presence_ttl)
+
+    def _format_last_seen(self, score):
+        # Scores are epoch seconds, report them in system time like now_datetime()
+        return str(now_datetime() - timedelta(seconds=max(time.time() - score, 0)))
+
+    def touch(self, user, status="online"):
+        """Record activity for one user (O(log N))"""
+        score = time.time()
+        pipe = self.cache.pipeline()
+        pipe.zadd(self.last_seen_key, {user: score})
+        pipe.hset(self.status_key, user, status)
+        pipe.execute()
+
+    def touch_many(self, users):
+        """Refresh last seen for many users in one round trip, keeping any explicit status"""
+        if not users:
+            return 0
+
+        score = time.time()
+        pipe = self.cache.pipeline()
+        pipe.zadd(self.last_seen_key, {user: score for user in users})
+        for user in users:
+            pipe.hsetnx(self.status_key, user, "online")
+        pipe.execute()
+        return len(users)
+
+    def get(self, user):
+        """Return {"status", "last_seen"} for one user or None when not present (O(1))"""
+        pipe = self.cache.pipeline()
+        pipe.zscore(self.last_seen_key, user)
+        pipe.hget(self.status_key, user)
+        score, status = pipe.execute()
+
+        if score is None or score < self._cutoff():
+            return None
+
+        return {
+            "status": frappe.safe_decode(status) if status else "online",
+            "last_seen": self._format_last_seen(score)
+        }
+
+    def get_status(self, user):
+        presence = self.get(user)
+        return presence["status"] if presence else "offline"
+
+    def remove(self, user):
+        pipe = self.cache.pipeline()
+        pipe.zrem(self.last_seen_key, user)
+        pipe.hdel(self.status_key, user)
+        pipe.execute()
+
+    def expire_stale(self, ttl=None):
+        """Drop every user not seen within ttl seconds; returns the number of users removed"""
+        cutoff = self._cutoff(ttl)
+        stale_users = self.cache.zrangebyscore(self.last_seen_key, "-inf", cutoff)
+        if not stale_users:
+            return 0
+
+        pipe = self.cache.pipeline()
+        pipe.zremrangebyscore(self.last_seen_key, "-inf", cutoff)
+        pipe.hdel(self.status_key, *stale_users)
+        pipe.execute()
+        return len(stale_users)
+
+    def count_online(self):
+        return self.cache.zcount(self.last_seen_key, self._cutoff(), "+inf")
+
+    def get_online_users(self, limit=None):
+        """[(user, last_seen_epoch)] most recent first"""
+        rows = self.cache.zrevrangebyscore(
+            self.last_seen_key, "+inf", self._cutoff(),
+            start=0 if limit else None, num=limit or None, withscores=True
+        )
+        return [(frappe.safe_decode(user), score) for user, score in rows]
+
+    def clear(self):
+        self.cache.delete(self.last_seen_key, self.status_key)
+
+    def _ensure_room_members(self, room_id):
+        room_key = self.room_key(room_id)
+        if self._run("exists", room_key):
+            return
+
+        members = frappe.get_all(
+            "Chat Room Member",
+            filters={"parent": room_id, "parenttype": "Chat Room"},
+            pluck="user"
+        )
+        pipe = self.cache.pipeline()
+        pipe.delete(room_key)
+        if members:
+            pipe.sadd(room_key, *members)
+        pipe.expire(room_key, self.room_members_ttl)
+        pipe.execute()
+
+    def get_room_members(self, room_id):
+        self._ensure_room_members(room_id)
+        return [frappe.safe_decode(user) for user in self._run("smembers", self.room_key(room_id))]
+
+    def invalidate_room(self, room_id):
+        self.cache.delete(self.room_key(room_id))
+
+    def get_online_users_in_room(self, room_id):
+        """
+        Online members of a room as {user: {"status", "last_seen"}}, using one
+        ZINTERSTORE of the presence set with the room member set (O(room size)).
+        """
+        self._ensure_room_members(room_id)
+
+        tmp_key = self._key(f"room_online:{room_id}:{frappe.generate_hash(length=8)}")
+        pipe = self.cache.pipeline()
+        pipe.zinterstore(tmp_key, {self.last_seen_key: 1, self.room_key(room_id): 0}, aggregate="SUM")
+        pipe.zrangebyscore(tmp_key, self._cutoff(), "+inf", withscores=True)
+        pipe.delete(tmp_key)
+        _, rows, _ = pipe.execute()
+
+        if not rows:
+            return {}
+
+        users = [frappe.safe_decode(user) for user, _score in rows]
+        statuses = self.cache.hmget(self.status_key, users)
+
+        return {
+            user: {
+                "status": frappe.safe_decode(status) if status else "online",
+                "last_seen": self._format_last_seen(score)
+            }
+            for user, (_u, score), status in zip(users, rows, statuses)
+        }
+
+
+# Global presence store
+chat_presence = ChatPresenceStore()
+
+
 class ChatStatusManager:
     """
     Centralized chat status manager to handle all user status updates
@@ -14,8 +196,8 @@ class ChatStatusManager:
     """
     
     def __init__(self):
-        self.cache_prefix = "chat_user_status"
-        self.cache_expiry = 600  # 10 minutes
+        self.presence = chat_presence
+        self.cache_expiry = chat_presence.presence_ttl  # 10 minutes
         
     @frappe.whitelist()
     def update_user_status_safe(self, user=None, status="online", source="manual"):
@@ -64,18 +246,9 @@ class ChatStatusManager:
             }
     
     def _update_status_cache(self, user, status, timestamp, source):
-        """Update status in cache (always succeeds)"""
+        """Update status in the presence store (always succeeds)"""
         try:
-            cache_key = f"{self.cache_prefix}_{user}"
-            status_data = {
-                "status": status,
-                "last_seen": str(timestamp),
-                "user": user,
-                "source": source,
-                "updated_at": str(timestamp)
-            }
-            
-            frappe.cache().set_value(cache_key, status_data, expires_in_sec=self.cache_expiry)
+            self.presence.touch(user, status)
             return True
             
         except Exception as e:
@@ -172,22 +345,15 @@ class ChatStatusManager:
             if not user:
                 user = frappe.session.user
                 
-            # Try cache first
-            cache_key = f"{self.cache_prefix}_{user}"
-            status_data = frappe.cache().get_value(cache_key)
+            # Try presence store first (expired entries are treated as missing)
+            presence = self.presence.get(user)
             
-            if status_data:
-                # Check if status is still valid (not too old)
-                from frappe.utils import get_datetime, time_diff_in_seconds
-                last_seen = get_datetime(status_data.get("last_seen"))
-                current_time = now_datetime()
-                
-                if time_diff_in_seconds(current_time, last_seen) <= self.cache_expiry:
-                    return {
-                        "status": status_data.get("status", "offline"),
-                        "last_seen": status_data.get("last_seen"),
-                        "source": "cache"
-                    }
+            if presence:
+                return {
+                    "status": presence["status"],
+                    "last_seen": presence["last_seen"],
+                    "source": "cache"
+                }
             
             # Fallback to database
             return self.get_user_status_fallback(user)
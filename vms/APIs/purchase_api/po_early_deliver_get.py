@@ -544,49 +544,16 @@ from frappe import _
 import redis
 import json
 import hashlib
+import time
 from datetime import datetime, timedelta
 
-# Redis connection for caching
-def get_redis_connection():
-    """Get Redis connection for caching"""
-    try:
-        return frappe.cache()
-    except:
-        return None
-
-# Advanced caching with TTL
-class AdvancedCache:
-    def __init__(self, ttl=300):  # 5 minutes default TTL
-        self.redis_conn = get_redis_connection()
-        self.ttl = ttl
-    
-    def get_cache_key(self, prefix, *args):
-        """Generate cache key from arguments"""
-        key_data = f"{prefix}:{':'.join(str(arg) for arg in args if arg is not None)}"
-        return hashlib.md5(key_data.encode()).hexdigest()[:16]
-    
-    def get(self, key):
-        """Get cached data"""
-        if not self.redis_conn:
-            return None
-        try:
-            data = self.redis_conn.get(key)
-            return json.loads(data) if data else None
-        except:
-            return None
-    
-    def set(self, key, data):
-        """Set cached data with TTL"""
-        if not self.redis_conn:
-            return
-        try:
-            self.redis_conn.setex(key, self.ttl, json.dumps(data, default=str))
-        except:
-            pass
+from vms.APIs.purchase_api.po_list_cache import (
+    PO_LIST_CACHE_TTL, VersionedCache, get_cache_stats, get_scope
+)
 
-# Global cache instances
-user_cache = AdvancedCache(ttl=1800)  # 30 minutes for user data
-po_cache = AdvancedCache(ttl=60)      # 1 minute for PO data
+# Global cache instances; PO pages are invalidated through scope generations (po_list_cache)
+user_cache = VersionedCache("po_user", ttl=1800)  # 30 minutes for user data
+po_cache = VersionedCache("po_list", ttl=PO_LIST_CACHE_TTL)
 
 @frappe.whitelist(allow_guest=True)
 def filtering_po_details_ultra_fast(page_no=None, page_length=None, company=None, refno=None, status=None, search=None, usr=None, early_del=None, **kwargs):
@@ -624,7 +591,7 @@ def filtering_po_details_ultra_fast(page_no=None, page_length=None, company=None
                 return {"status": "error", "message": "User not found.", "code": 404}
             
             user_role_data = {
-                "roles": set(user_data[0].roles.split(',')) if user_data[0].roles else set(),
+                "roles": sorted(set(user_data[0].roles.split(','))) if user_data[0].roles else [],
                 "team": user_data[0].team,
                 "purchase_groups": user_data[0].purchase_groups.split(',') if user_data[0].purchase_groups else []
             }
@@ -647,16 +614,23 @@ def get_employee_po_ultra_fast(page_no, page_length, company, refno, status, sea
         if not user_role_data["purchase_groups"]:
             return {"status": "error", "message": "No purchase groups found.", "po": []}
 
-        # Generate cache key for this specific query
+        # Cache key for this specific query, tied to the generations of its purchase groups
+        scopes = [get_scope("purchase_group", group) for group in user_role_data["purchase_groups"]]
+        if company:
+            scopes.append(get_scope("company", company))
+
         cache_key = po_cache.get_cache_key(
             "employee_po", usr, page_no, page_length, company, status, search,
-            hash(tuple(user_role_data["purchase_groups"]))
+            sorted(user_role_data["purchase_groups"]), scopes=scopes
         )
         
         cached_result = po_cache.get(cache_key)
         if cached_result:
+            cached_result["cached"] = True
             return cached_result
 
+        started = time.perf_counter()
+
         # Pagination setup
         page_no = int(page_no) if page_no else 1
         page_length = min(int(page_length) if page_length else 10, 100)  # Cap at 100
@@ -727,7 +701,7 @@ def get_employee_po_ultra_fast(page_no, page_length, company, refno, status, sea
         }
 
         # Cache the result
-        po_cache.set(cache_key, response)
+        po_cache.set(cache_key, response, compute_ms=(time.perf_counter() - started) * 1000)
         return response
 
     except Exception as e:
@@ -766,16 +740,23 @@ def get_vendor_po_ultra_fast(page_no, page_length, company, refno, status, searc
             
             user_cache.set(vendor_cache_key, vendor_codes)
 
-        # Generate cache key for this vendor query
+        # Cache key for this vendor query, tied to the generations of its vendor codes
+        scopes = [get_scope("vendor_code", code) for code in vendor_codes]
+        if company:
+            scopes.append(get_scope("company", company))
+
         cache_key = po_cache.get_cache_key(
             "vendor_po", usr, page_no, page_length, company, status, search,
-            hash(tuple(vendor_codes))
+            sorted(vendor_codes), scopes=scopes
         )
         
         cached_result = po_cache.get(cache_key)
         if cached_result:
+            cached_result["cached"] = True
             return cached_result
 
+        started = time.perf_counter()
+
         # Pagination
         page_no = int(page_no) if page_no else 1
         page_length = min(int(page_length) if page_length else 10, 100)
@@ -849,7 +830,7 @@ def get_vendor_po_ultra_fast(page_no, page_length, company, refno, status, searc
             "cached": False
         }
 
-        po_cache.set(cache_key, response)
+        po_cache.set(cache_key, response, compute_ms=(time.perf_counter() - started) * 1000)
         return response
 
     except Exception as e:
@@ -893,50 +874,19 @@ def warm_po_cache(user_list=None, **kwargs):
 # Database optimization functions
 def create_advanced_indexes():
     """
-    Create advanced covering indexes for maximum performance
-    Run once during deployment
+    Create the registered covering indexes (vms.utils.index_registry).
+    They are applied on every migrate; this remains for manual runs.
     """
-    advanced_indexes = [
-        # Covering indexes for employee queries
-        """CREATE INDEX IF NOT EXISTS idx_po_employee_covering 
-           ON `tabPurchase Order` (purchase_group, company_code, vendor_status, creation DESC, name, po_no)""",
-        
-        # Covering indexes for vendor queries  
-        """CREATE INDEX IF NOT EXISTS idx_po_vendor_covering
-           ON `tabPurchase Order` (vendor_code, company_code, vendor_status, creation DESC, name, po_no)""",
-        
-        # Full-text search index
-        """CREATE FULLTEXT INDEX IF NOT EXISTS idx_po_fulltext
-           ON `tabPurchase Order` (name, po_no)""",
-        
-        # Optimized user-team index
-        """CREATE INDEX IF NOT EXISTS idx_employee_user_team_covering
-           ON `tabEmployee` (user_id, team)""",
-        
-        # Purchase group index
-        """CREATE INDEX IF NOT EXISTS idx_purchase_group_team
-           ON `tabPurchase Group Master` (team, purchase_group_code)""",
-        
-        # Vendor master email index
-        """CREATE INDEX IF NOT EXISTS idx_vendor_master_email_covering
-           ON `tabVendor Master` (office_email_primary)""",
-        
-        # Multi-column vendor code index
-        """CREATE INDEX IF NOT EXISTS idx_vendor_code_covering
-           ON `tabVendor Code` (parent, vendor_code)""",
-        
-        # User roles index for faster role checking
-        """CREATE INDEX IF NOT EXISTS idx_has_role_covering
-           ON `tabHas Role` (parent, role)"""
-    ]
-    
-    for index_sql in advanced_indexes:
-        try:
-            frappe.db.sql(index_sql)
-            frappe.db.commit()
-            print(f"✓ Created index: {index_sql[:50]}...")
-        except Exception as e:
-            print(f"✗ Error creating index: {str(e)}")
+    from vms.utils.index_registry import apply_index_registry
+
+    result = apply_index_registry()
+    for index_name in result["created"]:
+        print(f"✓ Created index: {index_name}")
+    for index_name in result["rebuilt"]:
+        print(f"✓ Rebuilt index: {index_name}")
+    for skipped in result["skipped"]:
+        print(f"✗ Skipped index {skipped['index']}: {skipped['reason']}")
+    return result
 
 
 def optimize_mysql_config():
@@ -981,13 +931,12 @@ def optimize_mysql_config():
 def get_performance_stats(**kwargs):
     """Get performance statistics for monitoring"""
     try:
-        stats = {
-            "cache_hits": 0,
-            "cache_misses": 0,
-            "avg_query_time": 0,
+        # avg_query_time: mean milliseconds to build a PO page on a cache miss
+        stats = get_cache_stats()
+        stats.update({
             "active_connections": frappe.db.sql("SHOW STATUS LIKE 'Threads_connected'")[0][1],
             "query_cache_hit_rate": 0
-        }
+        })
         
         # Get query cache stats (MySQL < 8.0)
         try:
@@ -0,0 +1,158 @@
+import hashlib
+import json
+
+import frappe
+from frappe.utils import cint, flt
+
+# Versioned cache for the PO list pages of po_early_deliver_get.
+#
+# Every page key embeds the generation of each scope the page was read from:
+#   purchase_group:<code>   employee lists
+#   vendor_code:<code>      vendor lists
+#   company:<code>          lists filtered on a company
+# A Purchase Order write bumps the generations of its scopes, so pages that could contain
+# it are never served again and simply age out. The TTL only bounds writes that bypass
+# the doc hooks.
+GENERATIONS_CACHE_KEY = "po_list_cache:generations"
+STATS_CACHE_KEY = "po_list_cache:stats"
+
+PO_LIST_CACHE_TTL = 1800
+
+# Purchase Order fields whose values decide which cached lists a PO appears in
+SCOPE_FIELDS = (
+    ("purchase_group", "purchase_group"),
+    ("vendor_code", "vendor_code"),
+    ("company", "company_code")
+)
+
+
+def get_scope(scope_type, value):
+    return f"{scope_type}:{value}"
+
+
+def get_generations(scopes):
+    if not scopes:
+        return []
+    cache = frappe.cache()
+    values = cache.hmget(cache.make_key(GENERATIONS_CACHE_KEY), list(scopes))
+    return [cint(frappe.safe_decode(value)) if value else 0 for value in values]
+
+
+def bump_po_cache_generations(purchase_groups=(), vendor_codes=(), companies=()):
+    """Invalidate every cached PO list that depends on the given purchase groups / vendor codes / companies"""
+    scopes = {
+        get_scope(scope_type, value)
+        for scope_type, values in (
+            ("purchase_group", purchase_groups),
+            ("vendor_code", vendor_codes),
+            ("company", companies)
+        )
+        for value in values if value
+    }
+    if not scopes:
+        return 0
+
+    cache = frappe.cache()
+    generations_key = cache.make_key(GENERATIONS_CACHE_KEY)
+    pipeline = cache.pipeline()
+    for scope in scopes:
+        pipeline.hincrby(generations_key, scope, 1)
+    pipeline.hincrby(cache.make_key(STATS_CACHE_KEY), "invalidations", len(scopes))
+    pipeline.execute()
+    return len(scopes)
+
+
+def invalidate_po_list_cache(doc, method=None):
+    """Purchase Order on_update / on_submit / on_cancel / on_update_after_submit / on_trash hook"""
+    try:
+        values = {scope_type: {doc.get(fieldname)} for scope_type, fieldname in SCOPE_FIELDS}
+
+        previous = doc.get_doc_before_save()
+        if previous:
+            for scope_type, fieldname in SCOPE_FIELDS:
+                values[scope_type].add(previous.get(fieldname))
+
+        # After commit, so a concurrent read cannot re-cache the pre-commit page
+        frappe.db.after_commit.add(lambda: bump_po_cache_generations(
+            purchase_groups=values["purchase_group"],
+            vendor_codes=values["vendor_code"],
+            companies=values["company"]
+        ))
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "PO List Cache Invalidation Error")
+
+
+class VersionedCache:
+    """JSON cache whose keys embed the current generation of the scopes they depend on"""
+
+    def __init__(self, namespace, ttl=PO_LIST_CACHE_TTL):
+        self.namespace = namespace
+        self.ttl = ttl
+
+    def get_cache_key(self, prefix, *args, scopes=()):
+        """Cache key for the arguments; pass `scopes` to tie the entry to their generations"""
+        parts = [repr(arg) for arg in args]
+        scopes = sorted(set(scopes))
+        parts.extend(f"{scope}={generation}" for scope, generation in zip(scopes, get_generations(scopes), strict=True))
+        digest = hashlib.md5("\x1f".join(parts).encode()).hexdigest()
+        return f"{self.namespace}:{prefix}:{digest}"
+
+    def _incr_stat(self, field, amount=1):
+        cache = frappe.cache()
+        stats_key = cache.make_key(STATS_CACHE_KEY)
+        pipeline = cache.pipeline()
+        pipeline.hincrby(stats_key, field, amount)
+        pipeline.hincrby(stats_key, f"{self.namespace}:{field}", amount)
+        pipeline.execute()
+
+    def get(self, key):
+        """Cached data or None; counts a hit or a miss"""
+        try:
+            cache = frappe.cache()
+            data = cache.get(cache.make_key(key))
+            self._incr_stat("hits" if data else "misses")
+            return json.loads(data) if data else None
+        except Exception:
+            return None
+
+    def set(self, key, data, compute_ms=None):
+        """Store data for the TTL; compute_ms is added to the miss timing stats"""
+        try:
+            cache = frappe.cache()
+            cache.setex(cache.make_key(key), self.ttl, json.dumps(data, default=str))
+            if compute_ms is not None:
+                stats_key = cache.make_key(STATS_CACHE_KEY)
+                pipeline = cache.pipeline()
+                pipeline.hincrbyfloat(stats_key, "miss_ms", flt(compute_ms))
+                pipeline.hincrby(stats_key, "timed_misses", 1)
+                pipeline.execute()
+        except Exception:
+            pass
+
+
+def get_cache_stats():
+    """Hit / miss counters of the PO list caches since the last reset"""
+    cache = frappe.cache()
+    # raw HGETALL: the wrapper's hgetall unpickles values
+    raw = cache.pipeline().hgetall(cache.make_key(STATS_CACHE_KEY)).execute()[0]
+    stats = {frappe.safe_decode(field): flt(frappe.safe_decode(value)) for field, value in raw.items()}
+
+    hits = cint(stats.get("hits"))
+    misses = cint(stats.get("misses"))
+    lookups = hits + misses
+    timed_misses = cint(stats.get("timed_misses"))
+
+    return {
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "cache_hit_rate": round(hits * 100.0 / lookups, 2) if lookups else 0,
+        "avg_query_time": round(stats.get("miss_ms", 0) / timed_misses, 2) if timed_misses else 0,
+        "invalidations": cint(stats.get("invalidations")),
+        "by_namespace": {field: cint(value) for field, value in stats.items() if ":" in field}
+    }
+
+
+def reset_cache_stats():
+    cache = frappe.cache()
+    cache.delete(cache.make_key(STATS_CACHE_KEY))
@@ -2,6 +2,7 @@ import frappe
 import json
 from frappe import _
 from vms.utils.custom_send_mail import custom_sendmail
+from vms.APIs.purchase_api.po_list_cache import bump_po_cache_generations
 
 @frappe.whitelist()
 def send_po_to_vendor_email(data=None, po_name=None):
@@ -195,6 +196,12 @@ def send_po_to_vendor_email(data=None, po_name=None):
         if po_name:
             purchase_order = frappe.get_doc("Purchase Order", po_name)
             purchase_order.db_set({"sent_to_vendor" : 1})
+            # db_set runs no doc hooks; the vendor list filters on sent_to_vendor
+            frappe.db.after_commit.add(lambda: bump_po_cache_generations(
+                purchase_groups=[purchase_order.purchase_group],
+                vendor_codes=[purchase_order.vendor_code],
+                companies=[purchase_order.company_code]
+            ))
             
         
 
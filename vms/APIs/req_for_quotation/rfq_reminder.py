@@ -1,7 +1,7 @@
 import frappe
 from frappe.utils import getdate, today
 from frappe.utils import now_datetime
-from vms.utils.custom_send_mail import custom_sendmail
+from vms.utils.custom_send_mail import custom_sendmail, send_many
 
 # send reminder notification to vendor
 def send_reminder_notification():
@@ -13,6 +13,8 @@ def send_reminder_notification():
         fields=["name", "first_reminder", "second_reminder", "third_reminder"]
     )
 
+    messages = []
+
     for rfq_data in req_quotations:
         rfq = frappe.get_doc("Request For Quotation", rfq_data.name)
 
@@ -43,32 +45,24 @@ def send_reminder_notification():
         """
 
 
-        sent = False
-
-        for row in rfq.vendor_details:
-            if row.office_email_primary and row.mail_sent:
-                frappe.custom_sendmail(
-                    recipients=row.office_email_primary,
-                    subject=subject,
-                    message=body,
-                    now=True
-                )
-                frappe.logger().info(f"Sent {reminder_type} reminder to {row.office_email_primary}")
-                sent = True
-
-        for row in rfq.non_onboarded_vendor_details:
-            if row.office_email_primary and row.mail_sent:
-                frappe.custom_sendmail(
-                    recipients=row.office_email_primary,
-                    subject=subject,
-                    message=body,
-                    now=True
-                )
-                frappe.logger().info(f"Sent {reminder_type} reminder to {row.office_email_primary}")
-                sent = True
-
-        if not sent:
+        vendor_emails = [
+            row.office_email_primary
+            for row in list(rfq.vendor_details) + list(rfq.non_onboarded_vendor_details)
+            if row.office_email_primary and row.mail_sent
+        ]
+
+        if not vendor_emails:
             frappe.logger().info(f"No eligible vendors for {rfq.name}")
+            continue
+
+        for email in vendor_emails:
+            messages.append({"recipients": email, "subject": subject, "message": body})
+            frappe.logger().info(f"Queued {reminder_type} reminder to {email}")
+
+    # one SMTP session for every reminder of the run
+    if messages:
+        result = send_many(messages)
+        frappe.logger().info(f"RFQ reminders: {result}")
 
 
 # block the quotation link after passing rfq cut off date or quotation deadline
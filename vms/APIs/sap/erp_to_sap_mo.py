@@ -20,6 +20,7 @@ import requests
 from requests.auth import HTTPBasicAuth
 from datetime import datetime
 from requests.exceptions import RequestException
+from vms.APIs.sap.sap_session_pool import SAPConnectionError, get_mo_sap_connection
 
 
 # =====================================================================================
@@ -68,42 +69,28 @@ def safe_get_value(doctype, filters, fieldname):
 class SAPSessionManager:
     """
     Manages SAP sessions for Material Onboarding CSRF token and cookie handling
+    Backed by the shared connection pool (sap_session_pool), so the token and cookies
+    are reused across requests and refreshed when SAP answers 403
     """
     
     def __init__(self, sap_client_code):
         self.sap_client_code = sap_client_code
+        self.connection = None
         self.session = None
         self.csrf_token = None
-        self.auth = None
-        self.sap_settings = None
-        self._initialize_settings()
-    
-    def _initialize_settings(self):
-        """Initialize SAP settings from Frappe"""
-        try:
-            self.sap_settings = frappe.get_doc("SAP Settings")
-            self.auth = HTTPBasicAuth(
-                self.sap_settings.auth_user_name,
-                self.sap_settings.auth_user_pass
-            )
-            print("✅ SAP settings initialized successfully")
-        except Exception as e:
-            error_msg = f"Failed to initialize SAP settings: {str(e)}"
-            print(f"❌ {error_msg}")
-            frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP Settings Init Error")
-            raise
     
     def create_session(self):
-        """Create a new SAP session and fetch CSRF token"""
+        """Attach to the pooled SAP session, fetching a CSRF token only if none is cached"""
         try:
-            self.session = requests.Session()
-            print(f"🔐 Creating new SAP session for client code: {self.sap_client_code}")
+            print(f"🔐 Acquiring SAP session for client code: {self.sap_client_code}")
             
-            csrf_result = self._fetch_csrf_token()
+            self.connection = get_mo_sap_connection(self.sap_client_code)
+            csrf_result = self.connection.fetch_csrf_token()
             
             if csrf_result["success"]:
+                self.session = self.connection.session
                 self.csrf_token = csrf_result["csrf_token"]
-                print(f"✅ SAP session created successfully")
+                print(f"✅ SAP session ready (token {'reused' if csrf_result['reused'] else 'fetched'})")
                 return {"success": True}
             else:
                 error_msg = csrf_result.get("error", "Unknown error")
@@ -116,93 +103,17 @@ class SAPSessionManager:
             frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP Session Creation Error")
             return {"success": False, "error": error_msg}
     
-    def _fetch_csrf_token(self):
-        """Fetch CSRF token from SAP server"""
-        try:
-            url = f"{self.sap_settings.mo_sap_link}{self.sap_client_code}"
-            
-            csrf_headers = {'X-CSRF-Token': 'FETCH'}
-            
-            print(f"🔑 Fetching CSRF token from: {url}")
-            print(f"🔑 User: {self.sap_settings.auth_user_name}")
-            
-            response = self.session.get(
-                url, 
-                headers=csrf_headers, 
-                auth=self.auth, 
-                timeout=30
-            )
-            
-            print(f"🔑 CSRF Response Status: {response.status_code}")
-            print(f"🔑 Session Cookies Count: {len(self.session.cookies)}")
-            
-            for cookie in self.session.cookies:
-                print(f"🍪 Cookie: {cookie.name} = {cookie.value}")
-            
-            if response.status_code == 200:
-                csrf_token = response.headers.get('x-csrf-token')
-                
-                if csrf_token:
-                    print(f"✅ CSRF Token obtained: {csrf_token}")
-                    
-                    session_id_found = False
-                    usercontext_found = False
-                    
-                    for cookie in self.session.cookies:
-                        if 'SAP_SESSIONID' in cookie.name:
-                            session_id_found = True
-                        if cookie.name == 'sap-usercontext':
-                            usercontext_found = True
-                    
-                    if not session_id_found:
-                        print("⚠️  WARNING: SAP Session ID cookie not found!")
-                    if not usercontext_found:
-                        print("⚠️  WARNING: sap-usercontext cookie not found!")
-                    
-                    return {"success": True, "csrf_token": csrf_token}
-                else:
-                    error_msg = "CSRF token not found in response headers"
-                    print(f"❌ {error_msg}")
-                    return {"success": False, "error": error_msg}
-            else:
-                error_msg = f"Failed to fetch CSRF token: HTTP {response.status_code} - {response.text}"
-                print(f"❌ {error_msg}")
-                return {"success": False, "error": error_msg}
-                
-        except requests.exceptions.Timeout:
-            error_msg = "CSRF token request timed out"
-            print(f"❌ {error_msg}")
-            return {"success": False, "error": error_msg}
-        except Exception as e:
-            error_msg = f"Exception while fetching CSRF token: {str(e)}"
-            print(f"❌ {error_msg}")
-            frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP CSRF Fetch Error")
-            return {"success": False, "error": error_msg}
-    
     def send_data(self, data):
         """Send data to SAP using the established session"""
-        if not self.session or not self.csrf_token:
+        if not self.connection or not self.csrf_token:
             return {"success": False, "error": "Session not initialized. Call create_session() first."}
         
         try:
-            url = f"{self.sap_settings.mo_sap_link}{self.sap_client_code}"
-            
-            headers = {
-                'X-CSRF-Token': self.csrf_token,
-                'Content-Type': 'application/json;charset=utf-8',
-                'Accept': 'application/json'
-            }
-            
-            print(f"📤 Sending data to SAP: {url}")
+            print(f"📤 Sending data to SAP: {self.connection.url}")
             print(f"📦 Payload preview: {json.dumps(data, indent=2)[:500]}...")
             
-            response = self.session.post(
-                url,
-                headers=headers,
-                auth=self.auth,
-                json=data,
-                timeout=60
-            )
+            response = self.connection.post(json=data, timeout=60)
+            self.csrf_token = self.connection.csrf_token
             
             print(f"📥 SAP Response Status: {response.status_code}")
             print(f"📥 SAP Response: {response.text[:500]}...")
@@ -217,6 +128,8 @@ class SAPSessionManager:
                 error_msg = f"SAP returned status {response.status_code}: {response.text}"
                 return {"success": False, "error": error_msg, "status_code": response.status_code}
                 
+        except SAPConnectionError as e:
+            return {"success": False, "error": str(e)}
         except requests.exceptions.Timeout:
             error_msg = "Request to SAP timed out"
             return {"success": False, "error": error_msg}
@@ -227,12 +140,10 @@ class SAPSessionManager:
             return {"success": False, "error": error_msg}
     
     def close_session(self):
-        """Close the SAP session"""
-        if self.session:
-            self.session.close()
-            self.session = None
-            self.csrf_token = None
-            print("🔒 SAP session closed")
+        """Release the pooled session; the connection stays open for the next request"""
+        self.connection = None
+        self.session = None
+        self.csrf_token = None
 
 
 # =====================================================================================
@@ -846,6 +846,7 @@ from requests.auth import HTTPBasicAuth
 from requests.exceptions import RequestException, JSONDecodeError
 from datetime import datetime
 from vms.utils.custom_send_mail import custom_sendmail
+from vms.APIs.sap.sap_session_pool import get_pr_sap_connection
 
 @frappe.whitelist(allow_guest=True)
 def erp_to_sap_pr(doc_name, method=None):
@@ -1259,66 +1260,22 @@ def build_pr_payload(doc, name_for_sap):
         return None
 
 def get_pr_csrf_token_and_session(sap_client_code, prf_type):
-    """Get CSRF token and session cookies for PR API"""
+    """Get CSRF token and session cookies for PR API from the pooled SAP session"""
     try:
-        sap_settings = frappe.get_doc("SAP Settings")
-        erp_to_sap_pr_url = None
-        if prf_type == "NB":
-            erp_to_sap_pr_url = sap_settings.sap_pr_url_nb
+        connection = get_pr_sap_connection(sap_client_code, prf_type)
+        csrf_result = connection.fetch_csrf_token()
 
-        else:
-            erp_to_sap_pr_url = sap_settings.sap_pr_url_sb
-
-
-        url = f"{erp_to_sap_pr_url}{sap_client_code}"
-        header_auth_type = sap_settings.authorization_type
-        header_auth_key = sap_settings.authorization_key
-        user = sap_settings.auth_user_name
-        password = sap_settings.auth_user_pass
-
-        # Create a session to maintain cookies
-        session = requests.Session()
-        auth = HTTPBasicAuth(user, password)
-
-        headers = {
-            'x-csrf-token': 'fetch',
-            'Authorization': f"{header_auth_type} {header_auth_key}",
-            'Content-Type': 'application/json'
-        }
-
-        print("=" * 80)
-        print("FETCHING PR CSRF TOKEN")
-        print("=" * 80)
-        print(f"URL: {url}")
-        print(f"User: {user}")
-        print("=" * 80)
+        if csrf_result["success"]:
+            print(f"✅ PR CSRF Token {'reused' if csrf_result['reused'] else 'obtained'} for {connection.url}")
 
-        response = session.get(url, headers=headers, auth=auth, timeout=30)
-        
-        print(f"🔑 CSRF Response Status: {response.status_code}")
-        print(f"🔑 CSRF Response Headers: {dict(response.headers)}")
-        print(f"🔑 CSRF Response Cookies: {dict(response.cookies)}")
-        print("=" * 80)
-        
-        if response.status_code == 200:
-            csrf_token = response.headers.get('x-csrf-token')
-            
-            # Get all session cookies properly
-            session_cookies = {}
-            for cookie in response.cookies:
-                session_cookies[cookie.name] = cookie.value
-            
-            print(f"✅ PR CSRF Token obtained: {csrf_token}")
-            print(f"✅ PR Session cookies: {session_cookies}")
-            
             return {
                 "success": True,
-                "csrf_token": csrf_token,
-                "session_cookies": session_cookies,
-                "session": session
+                "csrf_token": csrf_result["csrf_token"],
+                "session_cookies": connection.get_cookies(),
+                "session": connection.session
             }
         else:
-            error_msg = f"Failed to fetch PR CSRF token. Status: {response.status_code}, Response: {response.text}"
+            error_msg = f"Failed to fetch PR CSRF token. {csrf_result['error']}"
             print(f"❌ CSRF ERROR: {error_msg}")
             return {"success": False, "error": error_msg}
             
@@ -1330,32 +1287,13 @@ def get_pr_csrf_token_and_session(sap_client_code, prf_type):
 
 @frappe.whitelist(allow_guest=True)
 def send_pr_detail(csrf_token, data_list, session_cookies, doc, sap_code, name_for_sap, prf_type):
-    """Send PR details to SAP with comprehensive logging - Enhanced Version"""
-    sap_settings = frappe.get_doc("SAP Settings")
-    erp_to_sap_pr_url = None
-    if prf_type == "NB":
-        erp_to_sap_pr_url = sap_settings.sap_pr_url_nb
-
-    else:
-        erp_to_sap_pr_url = sap_settings.sap_pr_url_sb
-    url = f"{erp_to_sap_pr_url}{sap_code}"
-    header_auth_type = sap_settings.authorization_type
-    header_auth_key = sap_settings.authorization_key
-    user = sap_settings.auth_user_name
-    password = sap_settings.auth_user_pass
-
-    # Build cookie string from session cookies
-    cookie_string = "; ".join([f"{name}={value}" for name, value in session_cookies.items()])
-
-    headers = {
-        'X-CSRF-TOKEN': csrf_token,
-        'Authorization': f"{header_auth_type} {header_auth_key}",
-        'Content-Type': 'application/json;charset=utf-8',
-        'Accept': 'application/json',
-        'Cookie': cookie_string
-    }
-
-    auth = HTTPBasicAuth(user, password)
+    """
+    Send PR details to SAP with comprehensive logging - Enhanced Version
+    Goes through the pooled SAP session: csrf_token / session_cookies are kept for
+    compatibility, the pool supplies (and on 403 refreshes) the current token and cookies
+    """
+    connection = get_pr_sap_connection(sap_code, prf_type)
+    url = connection.url
     
     # Initialize response variables
     response = None
@@ -1369,8 +1307,6 @@ def send_pr_detail(csrf_token, data_list, session_cookies, doc, sap_code, name_f
     print("SAP PR API PAYLOAD DEBUG")
     print("=" * 80)
     print(f"URL: {url}")
-    print(f"Headers: {json.dumps(dict(headers), indent=2)}")
-    print(f"Auth User: {user}")
     print(f"SAP Client Code: {sap_code}")
     print(f"PR Document: {doc.name}")
     print(f"PR Type: {doc.purchase_requisition_type}")
@@ -1380,7 +1316,7 @@ def send_pr_detail(csrf_token, data_list, session_cookies, doc, sap_code, name_f
     print("=" * 80)
     
     try:
-        response = requests.post(url, headers=headers, auth=auth, json=data_list, timeout=30)
+        response = connection.post(json=data_list, timeout=30)
         sap_response_text = response.text[:1000]  # Truncate to avoid DB constraint issues
         
         # Debug response details
@@ -7,6 +7,11 @@ from vms.utils.custom_send_mail import custom_sendmail
 from vms.APIs.vendor_onboarding.extend_vendor_code_in_sap import send_vendor_code_extend_mail_for_sap_team
 from requests.exceptions import RequestException, JSONDecodeError
 from frappe.utils import now_datetime
+from vms.APIs.sap.sap_session_pool import (
+    SAPConnectionError,
+    get_sap_settings,
+    get_vendor_sap_connection
+)
 
 def update_sap_vonb(doc, method=None):
     """
@@ -80,62 +85,50 @@ def update_sap_vonb(doc, method=None):
 class SAPSessionManager:
     """
     Manages SAP sessions for CSRF token and cookie handling
-    This class handles all SAP authentication and session management
+    Sessions come from the shared pool in sap_session_pool: the keep-alive connection,
+    CSRF token and cookies are reused across pushes and refreshed when SAP answers 403
     """
     
+    send_timeout = 300
+    
     def __init__(self, sap_client_code):
         self.sap_client_code = sap_client_code
+        self.connection = None
         self.session = None
         self.csrf_token = None
-        self.auth = None
         self.sap_settings = None
         self._initialize_settings()
     
     def _initialize_settings(self):
         """Initialize SAP settings from Frappe"""
         try:
-            self.sap_settings = frappe.get_doc("SAP Settings")
-            self.auth = HTTPBasicAuth(
-                self.sap_settings.auth_user_name, 
-                self.sap_settings.auth_user_pass
-            )
+            self.sap_settings = get_sap_settings()
         except Exception as e:
             frappe.log_error(f"Failed to initialize SAP settings: {str(e)}", "SAP Settings Error")
             raise
     
     def create_session(self):
         """
-        Create a new SAP session with proper authentication and CSRF token
+        Attach to the pooled SAP session, fetching a CSRF token only if none is cached
         Returns: dict with success status and session details
         """
         try:
-            print("🔄 Creating new SAP session...")
-            print(f"SAP Client Code: {self.sap_client_code}")
-            
-            # Create new session
-            self.session = requests.Session()
+            print(f"🔄 Acquiring SAP session for client: {self.sap_client_code}")
             
-            # Set default headers for all requests in this session
-            self.session.headers.update({
-                'Authorization': f"{self.sap_settings.authorization_type} {self.sap_settings.authorization_key}",
-                'Content-Type': 'application/json;charset=utf-8',
-                'Accept': 'application/json',
-                'User-Agent': 'Frappe-SAP-Integration/1.0'
-            })
-            
-            # Get CSRF token
-            csrf_result = self._fetch_csrf_token()
+            self.connection = get_vendor_sap_connection(self.sap_client_code)
+            csrf_result = self.connection.fetch_csrf_token()
             
             if csrf_result["success"]:
+                self.session = self.connection.session
                 self.csrf_token = csrf_result["csrf_token"]
-                print(f"✅ SAP Session created successfully")
-                print(f"✅ CSRF Token: {self.csrf_token}")
+                print(f"✅ SAP Session ready (token {'reused' if csrf_result['reused'] else 'fetched'})")
                 return {
                     "success": True,
                     "csrf_token": self.csrf_token,
                     "message": "Session created successfully"
                 }
             else:
+                print(f"❌ {csrf_result['error']}")
                 return csrf_result
                 
         except Exception as e:
@@ -144,114 +137,30 @@ class SAPSessionManager:
             frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP Session Creation Error")
             return {"success": False, "error": error_msg}
     
-    def _fetch_csrf_token(self):
-        """
-        Fetch CSRF token from SAP server
-        This also establishes the session cookies automatically
-        """
-        try:
-            url = f"{self.sap_settings.url}{self.sap_client_code}"
-            
-            # Prepare headers for CSRF token request
-            csrf_headers = {'X-CSRF-Token': 'FETCH'}
-            
-            print(f"🔑 Fetching CSRF token from: {url}")
-            print(f"🔑 User: {self.sap_settings.auth_user_name}")
-            
-            # Make request to get CSRF token
-            response = self.session.get(
-                url, 
-                headers=csrf_headers, 
-                auth=self.auth, 
-                timeout=300
-            )
-            
-            print(f"🔑 CSRF Response Status: {response.status_code}")
-            print(f"🔑 CSRF Response Headers: {dict(response.headers)}")
-            print(f"🔑 Session Cookies Count: {len(self.session.cookies)}")
-            
-            # Log cookies for debugging
-            for cookie in self.session.cookies:
-                print(f"🍪 Cookie: {cookie.name} = {cookie.value}")
-            
-            if response.status_code == 200:
-                csrf_token = response.headers.get('x-csrf-token')
-                
-                if csrf_token:
-                    print(f"✅ CSRF Token obtained: {csrf_token}")
-                    
-                    # Validate essential cookies
-                    session_id_found = False
-                    usercontext_found = False
-                    
-                    for cookie in self.session.cookies:
-                        if 'SAP_SESSIONID' in cookie.name:
-                            session_id_found = True
-                        if cookie.name == 'sap-usercontext':
-                            usercontext_found = True
-                    
-                    if not session_id_found:
-                        print("⚠️  WARNING: SAP Session ID cookie not found!")
-                    if not usercontext_found:
-                        print("⚠️  WARNING: sap-usercontext cookie not found!")
-                    
-                    return {
-                        "success": True,
-                        "csrf_token": csrf_token
-                    }
-                else:
-                    error_msg = "CSRF token not found in response headers"
-                    print(f"❌ {error_msg}")
-                    return {"success": False, "error": error_msg}
-            else:
-                error_msg = f"Failed to fetch CSRF token: HTTP {response.status_code} - {response.text}"
-                print(f"❌ {error_msg}")
-                return {"success": False, "error": error_msg}
-                
-        except requests.exceptions.Timeout:
-            error_msg = "CSRF token request timed out"
-            print(f"❌ {error_msg}")
-            return {"success": False, "error": error_msg}
-        except Exception as e:
-            error_msg = f"Exception while fetching CSRF token: {str(e)}"
-            print(f"❌ {error_msg}")
-            frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP CSRF Fetch Error")
-            return {"success": False, "error": error_msg}
-    
     def send_data(self, data, endpoint_suffix=""):
         """
         Send data to SAP using the established session
         data: The JSON data to send
         endpoint_suffix: Additional endpoint path if needed
         """
-        if not self.session or not self.csrf_token:
+        if not self.connection or not self.csrf_token:
             return {"success": False, "error": "Session not initialized. Call create_session() first."}
         
         try:
-            url = f"{self.sap_settings.url}{self.sap_client_code}{endpoint_suffix}"
-            
-            # Update session headers with CSRF token
-            self.session.headers.update({'X-CSRF-Token': self.csrf_token})
+            url = f"{self.connection.url}{endpoint_suffix}"
             
             print("=" * 80)
             print("📤 SENDING DATA TO SAP")
             print("=" * 80)
             print(f"URL: {url}")
-            print(f"CSRF Token: {self.csrf_token}")
-            print(f"Cookies Count: {len(self.session.cookies)}")
             print(f"Data: {json.dumps(data, indent=2, default=str)}")
             print("=" * 80)
             
-            # Send POST request
-            response = self.session.post(
-                url, 
-                json=data, 
-                auth=self.auth, 
-                timeout=300
-            )
+            # The pooled connection re-fetches the token and retries once on 403
+            response = self.connection.post(url, json=data, timeout=self.send_timeout)
+            self.csrf_token = self.connection.csrf_token
             
             print(f"📨 SAP Response Status: {response.status_code}")
-            print(f"📨 SAP Response Headers: {dict(response.headers)}")
             
             if response.status_code in [200, 201]:
                 response_data = response.json()
@@ -271,6 +180,10 @@ class SAPSessionManager:
                     "response_text": response.text
                 }
                 
+        except SAPConnectionError as e:
+            error_msg = str(e)
+            print(f"❌ {error_msg}")
+            return {"success": False, "error": error_msg}
         except requests.exceptions.Timeout:
             error_msg = "SAP request timed out"
             print(f"❌ {error_msg}")
@@ -290,12 +203,10 @@ class SAPSessionManager:
             return {"success": False, "error": error_msg}
     
     def close_session(self):
-        """Close the SAP session"""
-        if self.session:
-            self.session.close()
-            self.session = None
-            self.csrf_token = None
-            print("🔒 SAP session closed")
+        """Release the pooled session; the connection stays open for the next push"""
+        self.connection = None
+        self.session = None
+        self.csrf_token = None
 
 
 def sanitize_sap_payload(data):
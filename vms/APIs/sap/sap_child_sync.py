@@ -0,0 +1,126 @@
+import frappe
+from frappe.utils import cint, cstr, flt, get_datetime, getdate
+
+# =====================================================================================
+# LINE-LEVEL CHILD TABLE SYNC FOR SAP RE-PUSHES
+# =====================================================================================
+#
+# Instead of wiping a child table and appending every line again, SAP lines are matched
+# to the existing rows on their SAP item number: changed rows are updated, new lines
+# inserted, missing lines deleted. Untouched rows keep a snapshot in their flags and the
+# child controllers skip their UPDATE on save (see is_unchanged_row).
+
+FLOAT_FIELDTYPES = ("Float", "Currency", "Percent")
+INT_FIELDTYPES = ("Int", "Check")
+
+# Columns rewritten on every save that say nothing about the line itself
+VOLATILE_COLUMNS = ("modified", "modified_by")
+
+
+def _normalize(fieldtype, value):
+    if fieldtype in FLOAT_FIELDTYPES:
+        return flt(value)
+    if fieldtype in INT_FIELDTYPES:
+        return cint(value)
+    if value in (None, ""):
+        return None
+
+    try:
+        if fieldtype == "Date":
+            return getdate(value)
+        if fieldtype == "Datetime":
+            return get_datetime(value)
+    except Exception:
+        pass
+
+    return cstr(value)
+
+
+def _snapshot(row):
+    values = row.get_valid_dict(convert_dates_to_str=True)
+    for column in VOLATILE_COLUMNS:
+        values.pop(column, None)
+    return values
+
+
+def is_unchanged_row(row):
+    """
+    For child controllers' db_update: True when the row was left untouched by
+    sync_child_rows and still matches its snapshot after validation
+    """
+    snapshot = row.flags.pop("sap_line_snapshot", None)
+    return bool(snapshot) and not row.is_new() and _snapshot(row) == snapshot
+
+
+def _item_key(values, key_field):
+    return cstr(values.get(key_field)).strip() if key_field else ""
+
+
+def sync_child_rows(doc, table_field, rows, key_field):
+    """
+    Upsert `rows` (dicts of child fields) into doc.<table_field>, matching existing rows on
+    `key_field`. Row order follows `rows`. Without a key field every line is inserted and
+    the old rows removed, as before.
+
+    Returns:
+        dict: inserted / updated / deleted / unchanged counts and the item numbers involved,
+        updated_items maps item number -> changed fields
+    """
+    child_meta = frappe.get_meta(doc.meta.get_field(table_field).options)
+    fieldtypes = {df.fieldname: df.fieldtype for df in child_meta.fields}
+
+    existing = {}
+    dropped = []
+    for row in doc.get(table_field):
+        key = _item_key(row, key_field)
+        if key and key not in existing:
+            existing[key] = row
+        else:
+            dropped.append(key or row.name)
+
+    report = {"inserted_items": [], "updated_items": {}, "deleted_items": [], "unchanged": 0}
+    children = []
+    unchanged_rows = []
+
+    for idx, values in enumerate(rows, start=1):
+        key = _item_key(values, key_field)
+        row = existing.pop(key, None) if key else None
+
+        if row is None:
+            children.append(values)
+            report["inserted_items"].append(key or f"#{idx}")
+            continue
+
+        changed = [
+            fieldname for fieldname, value in values.items()
+            if fieldname in fieldtypes
+            and _normalize(fieldtypes[fieldname], row.get(fieldname)) != _normalize(fieldtypes[fieldname], value)
+        ]
+
+        if changed:
+            row.update(values)
+            report["updated_items"][key] = changed
+        elif row.idx != idx:
+            report["updated_items"][key] = ["idx"]
+        else:
+            unchanged_rows.append(row)
+            report["unchanged"] += 1
+
+        row.idx = idx
+        children.append(row)
+
+    report["deleted_items"] = list(existing) + dropped
+
+    doc.set(table_field, [])
+    for child in children:
+        doc.append(table_field, child)
+
+    for row in unchanged_rows:
+        row.flags.sap_line_snapshot = _snapshot(row)
+
+    report.update({
+        "inserted": len(report["inserted_items"]),
+        "updated": len(report["updated_items"]),
+        "deleted": len(report["deleted_items"])
+    })
+    return report
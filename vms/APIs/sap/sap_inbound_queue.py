@@ -0,0 +1,389 @@
+import time
+
+import frappe
+from frappe.utils import add_to_date, cint, flt, now_datetime
+
+# =====================================================================================
+# QUEUED INGESTION FOR INBOUND SAP WEBHOOKS (PO / PR / GRN)
+# =====================================================================================
+#
+# Enabled with `"sap_inbound_async": 1` in site_config. The webhook then only writes the
+# payload to its SAP log (status "Queued", the durable copy) and acknowledges. Drain jobs
+# on a background queue process the documents:
+#   - per document number ordering: one drainer at a time holds a document's lock
+#   - coalescing: only the latest pending payload of a document is processed, older
+#     queued logs are marked "Superseded"
+#   - bounded concurrency: at most `sap_inbound_concurrency` drain jobs (fixed job ids)
+#
+# document_field is the log field holding the document number, log_filters select the
+# type's logs when types share a log doctype.
+
+INBOUND_TYPES = {
+    "Purchase Order": {
+        "log_doctype": "Purchase SAP Logs",
+        "process": "vms.APIs.sap.sap_po_pr.process_po_payload",
+        "on_failure": "vms.APIs.sap.sap_po_pr.update_sap_log_failure",
+        "document_field": "sap_document_number",
+        "log_filters": {"transaction_type": "Purchase Order"}
+    },
+    "Purchase Requisition": {
+        "log_doctype": "Purchase SAP Logs",
+        "process": "vms.APIs.sap.sap_po_pr.process_pr_payload",
+        "on_failure": "vms.APIs.sap.sap_po_pr.update_sap_log_failure",
+        "document_field": "sap_document_number",
+        "log_filters": {"transaction_type": "Purchase Requisition"}
+    },
+    "GRN": {
+        "log_doctype": "GRN SAP Logs",
+        "process": "vms.APIs.sap.sap_to_grn.process_grn_payload",
+        "on_failure": "vms.APIs.sap.sap_to_grn.update_grn_log_failure",
+        "document_field": "grn_number",
+        "log_filters": {}
+    }
+}
+
+PENDING_KEY = "sap_inbound:pending"        # zset  doc_key -> first received (epoch)
+LATEST_KEY = "sap_inbound:latest"          # hash  doc_key -> latest queued log
+IN_FLIGHT_KEY = "sap_inbound:in_flight"    # hash  doc_key -> processing started (epoch)
+STATS_KEY = "sap_inbound:stats"            # hash  counters
+LOCK_KEY_PREFIX = "sap_inbound:lock:"
+
+DEFAULT_CONCURRENCY = 2
+LOCK_TTL = 900
+
+# Pending documents a drainer looks at when the oldest ones are locked by other drainers
+CLAIM_WINDOW = 20
+
+# A drain job stops picking new documents after this many seconds (long queue timeout is 1500)
+DRAIN_TIME_BUDGET = 600
+
+# Drain job timeout; a lock outlives the budget so no drainer still runs when it expires
+DRAIN_JOB_TIMEOUT = DRAIN_TIME_BUDGET + LOCK_TTL
+
+# Queued logs older than this with no pending Redis entry are re-queued by the scheduler
+RECOVERY_AGE_MINUTES = 5
+
+
+def is_sap_inbound_async():
+    return bool(cint(frappe.conf.get("sap_inbound_async")))
+
+
+def get_inbound_concurrency():
+    return max(cint(frappe.conf.get("sap_inbound_concurrency")) or DEFAULT_CONCURRENCY, 1)
+
+
+def get_inbound_queue():
+    # A dedicated queue needs a matching worker in common_site_config "workers"
+    return frappe.conf.get("sap_inbound_queue") or "long"
+
+
+def get_doc_key(transaction_type, document_number, log_id):
+    return f"{transaction_type}::{document_number or log_id}"
+
+
+def get_request_details(data, timestamp):
+    """request_details block for the SAP logs; queued payloads are processed outside the HTTP request"""
+    request = getattr(frappe.local, "request", None)
+    if not request:
+        return {"payload": data, "timestamp": timestamp, "source": "SAP Inbound Queue"}
+
+    return {
+        "url": request.url,
+        "method": request.method,
+        "headers": {k: v for k, v in request.headers.items() if k.lower() != 'authorization'},
+        "payload": data,
+        "timestamp": timestamp
+    }
+
+
+def _incr_stat(pipe, cache, field, amount=1):
+    if isinstance(amount, float):
+        pipe.hincrbyfloat(cache.make_key(STATS_KEY), field, amount)
+    else:
+        pipe.hincrby(cache.make_key(STATS_KEY), field, amount)
+
+
+def _register(cache, doc_key, log_id, received_at):
+    """Make log_id the document's pending payload; returns the log it replaced, if any"""
+    pipe = cache.pipeline(transaction=True)
+    pipe.hget(cache.make_key(LATEST_KEY), doc_key)
+    pipe.hset(cache.make_key(LATEST_KEY), doc_key, log_id)
+    pipe.zadd(cache.make_key(PENDING_KEY), {doc_key: received_at}, nx=True)
+    previous = pipe.execute()[0]
+    return frappe.safe_decode(previous) if previous else None
+
+
+def queue_inbound_payload(transaction_type, document_number, log_id):
+    """
+    Register a payload whose SAP log was written with status "Queued" and return the ack.
+    The log holds the payload, so Redis only tracks what is pending.
+    """
+    config = INBOUND_TYPES[transaction_type]
+    cache = frappe.cache()
+    doc_key = get_doc_key(transaction_type, document_number, log_id)
+
+    superseded = _register(cache, doc_key, log_id, time.time())
+
+    pipe = cache.pipeline()
+    _incr_stat(pipe, cache, "received")
+    if superseded:
+        _incr_stat(pipe, cache, "coalesced")
+    pipe.execute()
+
+    if superseded:
+        mark_superseded(config["log_doctype"], superseded, log_id)
+
+    ensure_inbound_drainers()
+
+    return {
+        "status": "success",
+        "message": f"{transaction_type} received and queued for processing.",
+        "log": log_id,
+        "queued": True
+    }
+
+
+def mark_superseded(log_doctype, log_id, superseded_by):
+    frappe.db.set_value(log_doctype, log_id, {
+        "status": "Superseded",
+        "processed_date": now_datetime(),
+        "error_message": f"Superseded by a newer push for the same document: {superseded_by}"
+    }, update_modified=False)
+    frappe.db.commit()
+
+
+def ensure_inbound_drainers():
+    """Start drain jobs up to the concurrency limit; running slots are deduplicated by job id"""
+    cache = frappe.cache()
+    depth = cache.zcard(cache.make_key(PENDING_KEY))
+    if not depth:
+        return 0
+
+    slots = min(get_inbound_concurrency(), depth)
+    for slot in range(slots):
+        frappe.enqueue(
+            "vms.APIs.sap.sap_inbound_queue.drain_sap_inbound_queue",
+            queue=get_inbound_queue(),
+            job_id=f"sap_inbound_drain_{slot}",
+            deduplicate=True,
+            timeout=DRAIN_JOB_TIMEOUT
+        )
+
+    return slots
+
+
+def _acquire_lock(cache, doc_key):
+    return cache.set(cache.make_key(LOCK_KEY_PREFIX + doc_key), 1, nx=True, ex=LOCK_TTL)
+
+
+def _release_lock(cache, doc_key):
+    pipe = cache.pipeline()
+    pipe.delete(cache.make_key(LOCK_KEY_PREFIX + doc_key))
+    pipe.hdel(cache.make_key(IN_FLIGHT_KEY), doc_key)
+    pipe.execute()
+
+
+def _claim(cache, doc_key):
+    pipe = cache.pipeline(transaction=True)
+    pipe.hget(cache.make_key(LATEST_KEY), doc_key)
+    pipe.hdel(cache.make_key(LATEST_KEY), doc_key)
+    log_id = pipe.execute()[0]
+    return frappe.safe_decode(log_id) if log_id else None
+
+
+def _claim_next(cache):
+    """Oldest pending document that no other drainer holds, as (doc_key, received_at)"""
+    pending_key = cache.make_key(PENDING_KEY)
+
+    for member, received_at in cache.zrange(pending_key, 0, CLAIM_WINDOW - 1, withscores=True):
+        doc_key = frappe.safe_decode(member)
+        if not _acquire_lock(cache, doc_key):
+            continue
+        if cache.zrem(pending_key, doc_key):
+            return doc_key, received_at
+        _release_lock(cache, doc_key)
+
+    return None, None
+
+
+def drain_sap_inbound_queue():
+    """Background job: process pending documents, oldest first, until the queue is empty"""
+    cache = frappe.cache()
+    started = time.time()
+    processed = 0
+
+    while time.time() - started < DRAIN_TIME_BUDGET:
+        doc_key, received_at = _claim_next(cache)
+        if not doc_key:
+            # Empty, or every document at the head is being processed by another drainer
+            break
+
+        try:
+            log_id = _claim(cache, doc_key)
+            if log_id:
+                pipe = cache.pipeline()
+                pipe.hset(cache.make_key(IN_FLIGHT_KEY), doc_key, time.time())
+                pipe.execute()
+                process_inbound_log(doc_key.split("::", 1)[0], log_id, received_at)
+                processed += 1
+        finally:
+            _release_lock(cache, doc_key)
+
+    return processed
+
+
+def process_inbound_log(transaction_type, log_id, received_at):
+    config = INBOUND_TYPES[transaction_type]
+    cache = frappe.cache()
+
+    log = frappe.db.get_value(config["log_doctype"], log_id, ["status", "sap_to_erp_data"], as_dict=True)
+    if not log or log.status != "Queued":
+        return
+
+    started = time.time()
+    failed = False
+
+    try:
+        # modified marks the start of processing, recovery re-queues logs stuck past the job timeout
+        frappe.db.set_value(config["log_doctype"], log_id, "status", "In Progress")
+        frappe.db.commit()
+
+        response = frappe.get_attr(config["process"])(frappe.parse_json(log.sap_to_erp_data), log_id)
+        failed = (response or {}).get("status") != "success"
+
+    except Exception as e:
+        failed = True
+        traceback = frappe.get_traceback()
+        frappe.db.rollback()
+        frappe.get_attr(config["on_failure"])(log_id, str(e), traceback)
+        frappe.log_error(
+            title=f"SAP Inbound Queue Error: {transaction_type}",
+            message=f"Log: {log_id}\n\n{traceback}"
+        )
+
+    finally:
+        finished = time.time()
+        pipe = cache.pipeline()
+        _incr_stat(pipe, cache, "failed" if failed else "processed")
+        _incr_stat(pipe, cache, "lag_seconds_total", flt(finished - received_at))
+        _incr_stat(pipe, cache, "processing_seconds_total", flt(finished - started))
+        pipe.execute()
+
+
+def recover_sap_inbound_queue():
+    """
+    Scheduled: re-register "Queued" logs that Redis lost track of (flush, restart), re-queue
+    "In Progress" logs whose drain job died (not modified within the job timeout) and
+    restart drainers for anything still pending
+    """
+    cache = frappe.cache()
+    cutoff = add_to_date(now_datetime(), minutes=-RECOVERY_AGE_MINUTES)
+    stale_cutoff = add_to_date(now_datetime(), seconds=-DRAIN_JOB_TIMEOUT)
+    recovered = 0
+
+    for transaction_type, config in INBOUND_TYPES.items():
+        document_field = config["document_field"]
+        fields = ["name", document_field, "creation"]
+
+        queued_logs = frappe.get_all(
+            config["log_doctype"],
+            filters={"status": "Queued", "creation": ["<", cutoff], **config["log_filters"]},
+            fields=fields,
+            order_by="creation asc"
+        )
+
+        # Synchronous webhooks process in the request, their logs are never re-queued
+        stale_logs = []
+        if is_sap_inbound_async():
+            stale_logs = frappe.get_all(
+                config["log_doctype"],
+                filters={"status": "In Progress", "modified": ["<", stale_cutoff], **config["log_filters"]},
+                fields=fields,
+                order_by="creation asc"
+            )
+
+        for log in stale_logs:
+            doc_key = get_doc_key(transaction_type, log.get(document_field), log.name)
+            if cache.get(cache.make_key(LOCK_KEY_PREFIX + doc_key)):
+                continue
+
+            # The drainer that wrote the in_flight entry is gone
+            pipe = cache.pipeline()
+            pipe.hdel(cache.make_key(IN_FLIGHT_KEY), doc_key)
+            pipe.execute()
+            frappe.db.set_value(config["log_doctype"], log.name, "status", "Queued", update_modified=False)
+            frappe.db.commit()
+            queued_logs.append(log)
+
+        if not queued_logs:
+            continue
+
+        queued_logs.sort(key=lambda log: log.creation)
+
+        pipe = cache.pipeline()
+        pipe.hgetall(cache.make_key(LATEST_KEY))
+        pipe.hkeys(cache.make_key(IN_FLIGHT_KEY))
+        latest, in_flight = pipe.execute()
+        pending_logs = {frappe.safe_decode(v) for v in latest.values()}
+        in_flight_keys = {frappe.safe_decode(k) for k in in_flight}
+
+        for log in queued_logs:
+            doc_key = get_doc_key(transaction_type, log.get(document_field), log.name)
+            if log.name in pending_logs or doc_key in in_flight_keys:
+                continue
+
+            # Oldest first, so a later log of the same document supersedes this one
+            superseded = _register(cache, doc_key, log.name, log.creation.timestamp())
+            if superseded:
+                mark_superseded(config["log_doctype"], superseded, log.name)
+            recovered += 1
+
+    ensure_inbound_drainers()
+    return recovered
+
+
+@frappe.whitelist()
+def get_sap_inbound_queue_metrics():
+    """Queue depth, processing lag and throughput counters of the inbound SAP queue"""
+    frappe.only_for("System Manager")
+
+    cache = frappe.cache()
+    now = time.time()
+
+    pipe = cache.pipeline()
+    pipe.zrange(cache.make_key(PENDING_KEY), 0, -1, withscores=True)
+    pipe.hgetall(cache.make_key(IN_FLIGHT_KEY))
+    pipe.hgetall(cache.make_key(STATS_KEY))
+    pending, in_flight, raw_stats = pipe.execute()
+
+    stats = {frappe.safe_decode(k): flt(frappe.safe_decode(v)) for k, v in raw_stats.items()}
+
+    depth_by_type = {transaction_type: 0 for transaction_type in INBOUND_TYPES}
+    for doc_key, _score in pending:
+        transaction_type = frappe.safe_decode(doc_key).split("::", 1)[0]
+        depth_by_type[transaction_type] = depth_by_type.get(transaction_type, 0) + 1
+
+    completed = stats.get("processed", 0) + stats.get("failed", 0)
+    in_flight_ages = [now - flt(frappe.safe_decode(v)) for v in in_flight.values()]
+
+    return {
+        "status": "success",
+        "async_enabled": is_sap_inbound_async(),
+        "queue": get_inbound_queue(),
+        "concurrency": get_inbound_concurrency(),
+        "queue_depth": len(pending),
+        "queue_depth_by_type": depth_by_type,
+        "oldest_pending_age_seconds": round(now - pending[0][1], 1) if pending else 0,
+        "in_flight": len(in_flight),
+        "longest_in_flight_seconds": round(max(in_flight_ages), 1) if in_flight_ages else 0,
+        "received": cint(stats.get("received")),
+        "coalesced": cint(stats.get("coalesced")),
+        "processed": cint(stats.get("processed")),
+        "failed": cint(stats.get("failed")),
+        "avg_processing_lag_seconds": round(stats.get("lag_seconds_total", 0) / completed, 2) if completed else 0,
+        "avg_processing_seconds": round(stats.get("processing_seconds_total", 0) / completed, 2) if completed else 0,
+        "queued_logs": {
+            "Purchase SAP Logs": frappe.db.count("Purchase SAP Logs", {"status": "Queued"}),
+            "GRN SAP Logs": frappe.db.count("GRN SAP Logs", {"status": "Queued"})
+        }
+    }
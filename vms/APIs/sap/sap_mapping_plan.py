@@ -0,0 +1,213 @@
+import time
+from functools import lru_cache
+
+import frappe
+from frappe.utils import cint
+
+# =====================================================================================
+# COMPILED SAP FIELD-MAPPING PLANS
+# =====================================================================================
+#
+# A plan is the "SAP Mapper PR" rows of one target doctype resolved once against
+# frappe.get_meta: a tuple of (sap_key, erp_field, converter) entries, so converting a
+# payload row is a single loop without per-field meta lookups. Plans are cached per
+# worker and rebuilt when the mapper is saved (version token in Redis) or the meta changes.
+
+PLAN_VERSION_CACHE_KEY = "sap_mapping_plan_version"
+
+_plans = {}
+
+
+class SAPMappingPlan:
+    __slots__ = ("_parent_fields", "entries", "version")
+
+    def __init__(self, entries, version):
+        self.entries = entries
+        self.version = version
+        self._parent_fields = {}
+
+    @property
+    def erp_fields(self):
+        return [erp_field for _sap_key, erp_field, _converter in self.entries]
+
+    def erp_field(self, sap_key):
+        """ERP field a SAP key maps to, or None"""
+        for key, erp_field, _converter in self.entries:
+            if key == sap_key:
+                return erp_field
+        return None
+
+    def parent_fields(self, doctype):
+        """Mapped fields that are also fields of `doctype`, in meta order (PO header fields)"""
+        if doctype not in self._parent_fields:
+            mapped = set(self.erp_fields)
+            self._parent_fields[doctype] = tuple(
+                df.fieldname for df in frappe.get_meta(doctype).fields if df.fieldname in mapped
+            )
+        return self._parent_fields[doctype]
+
+    def convert(self, row, default=""):
+        """Every mapped field; missing SAP keys get `default` (PO / PR item rows)"""
+        get = row.get
+        return {
+            erp_field: converter(get(sap_key, default)) if converter else get(sap_key, default)
+            for sap_key, erp_field, converter in self.entries
+        }
+
+    def convert_present(self, row):
+        """Only the SAP keys present in the row, dropping values that convert to None (GRN)"""
+        converted = {}
+        for sap_key, erp_field, converter in self.entries:
+            if sap_key in row:
+                value = row[sap_key]
+                if converter:
+                    value = converter(value)
+                if value is not None:
+                    converted[erp_field] = value
+        return converted
+
+
+def get_mapper_version():
+    version = frappe.cache().get_value(PLAN_VERSION_CACHE_KEY)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        frappe.cache().set_value(PLAN_VERSION_CACHE_KEY, version)
+    return version
+
+
+def clear_mapping_plans(doc=None, method=None):
+    """SAP Mapper PR on_update / on_trash: new version token, every worker rebuilds its plans"""
+    frappe.cache().set_value(PLAN_VERSION_CACHE_KEY, frappe.generate_hash(length=10))
+    _plans.clear()
+
+
+def get_mapper_rows(target_doctype):
+    """sap_field -> erp_field of the SAP Mapper PR for a target doctype (later rows win)"""
+    mapper_name = frappe.db.get_value("SAP Mapper PR", {"doctype_name": target_doctype}, "name")
+    if not mapper_name:
+        return {}
+
+    rows = frappe.get_all(
+        "SAP Mapper PR Item",
+        filters={"parent": mapper_name},
+        fields=["sap_field", "erp_field"],
+        order_by="idx asc"
+    )
+    return {row.sap_field: row.erp_field for row in rows}
+
+
+def _memoized(converter):
+    # SAP sends the same few dates on hundreds of lines; converters return immutable values
+    cached = lru_cache(maxsize=2048)(converter)
+
+    def convert(value):
+        try:
+            return cached(value)
+        except TypeError:
+            # unhashable value
+            return converter(value)
+
+    return convert
+
+
+def get_mapping_plan(target_doctype, meta_doctype=None, date_converter=None, meta_fields_only=False):
+    """
+    Compiled plan for the SAP Mapper PR of `target_doctype`.
+
+    meta_doctype: doctype whose field types decide the converters (default target_doctype)
+    date_converter: applied to values of Date fields
+    meta_fields_only: drop mapped fields that are not data fields of meta_doctype
+    """
+    meta_doctype = meta_doctype or target_doctype
+    meta = frappe.get_meta(meta_doctype)
+    version = (get_mapper_version(), str(meta.modified))
+
+    converter_key = f"{date_converter.__module__}.{date_converter.__qualname__}" if date_converter else None
+    plan_key = (frappe.local.site, target_doctype, meta_doctype, converter_key, meta_fields_only)
+
+    plan = _plans.get(plan_key)
+    if plan and plan.version == version:
+        return plan
+
+    fieldtypes = {df.fieldname: df.fieldtype for df in meta.fields}
+    date_converter = _memoized(date_converter) if date_converter else None
+
+    entries = []
+    for sap_key, erp_field in get_mapper_rows(target_doctype).items():
+        fieldtype = fieldtypes.get(erp_field)
+        if meta_fields_only and (not fieldtype or fieldtype == "Table"):
+            continue
+        entries.append((sap_key, erp_field, date_converter if fieldtype == "Date" else None))
+
+    plan = SAPMappingPlan(tuple(entries), version)
+    _plans[plan_key] = plan
+    return plan
+
+
+@frappe.whitelist()
+def benchmark_sap_mapping_plan(target_doctype="Purchase Order", lines=500, iterations=5):
+    """
+    Compare the per-field meta lookup conversion with the compiled plan on a synthetic
+    payload of `lines` items built from the mapper (Date fields get repeating dates)
+    """
+    frappe.only_for("System Manager")
+
+    from vms.APIs.sap.sap_po_pr import parse_date
+
+    lines = cint(lines) or 500
+    iterations = cint(iterations) or 5
+
+    mappings = get_mapper_rows(target_doctype)
+    if not mappings:
+        return {"status": "error", "message": f"No SAP Mapper PR found for {target_doctype}"}
+
+    meta = frappe.get_meta(target_doctype)
+    fieldtypes = {df.fieldname: df.fieldtype for df in meta.fields}
+    items = [
+        {
+            sap_field: f"2025-{(i % 12) + 1:02d}-15" if fieldtypes.get(erp_field) == "Date" else f"{sap_field}-{i}"
+            for sap_field, erp_field in mappings.items()
+        }
+        for i in range(lines)
+    ]
+
+    def legacy_convert():
+        field_mappings = get_mapper_rows(target_doctype)
+        rows = []
+        for item in items:
+            row = {}
+            for sap_field, erp_field in field_mappings.items():
+                value = item.get(sap_field, "")
+                field = next((f for f in meta.fields if f.fieldname == erp_field), None)
+                row[erp_field] = parse_date(value) if field and field.fieldtype == 'Date' else value
+            rows.append(row)
+        return rows
+
+    def plan_convert():
+        plan = get_mapping_plan(target_doctype, date_converter=parse_date)
+        return [plan.convert(item) for item in items]
+
+    def timed(fn):
+        best = None
+        result = None
+        for _ in range(iterations):
+            started = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    legacy_seconds, legacy_rows = timed(legacy_convert)
+    plan_seconds, plan_rows = timed(plan_convert)
+
+    return {
+        "status": "success",
+        "target_doctype": target_doctype,
+        "lines": lines,
+        "mapped_fields": len(mappings),
+        "iterations": iterations,
+        "legacy_ms": round(legacy_seconds * 1000, 2),
+        "plan_ms": round(plan_seconds * 1000, 2),
+        "speedup": round(legacy_seconds / plan_seconds, 1) if plan_seconds else None,
+        "identical_output": legacy_rows == plan_rows
+    }
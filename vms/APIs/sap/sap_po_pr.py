@@ -2,6 +2,14 @@ import frappe
 import json
 # from frappe.utils import parse_date
 from vms.utils.custom_send_mail import custom_sendmail
+from vms.APIs.sap.sap_inbound_queue import get_request_details, is_sap_inbound_async, queue_inbound_payload
+from vms.APIs.sap.sap_mapping_plan import get_mapping_plan
+from vms.APIs.sap.sap_child_sync import sync_child_rows
+
+# SAP line item numbers the child rows are matched on when a PO / PR is pushed again
+PO_ITEM_NUMBER_SAP_KEY = "EBELP"
+PR_ITEM_NUMBER_SAP_KEY = "BNFPO"
+
 
 @frappe.whitelist(allow_guest=True)
 def get_field_mappings():
@@ -170,11 +178,99 @@ def get_field_mappings():
 
 
 
+def process_pr_payload(data, log_id):
+    """
+    Create or update the Purchase Requisition from a SAP payload and complete its SAP log.
+    Runs inside the webhook request, or from the inbound queue when it is enabled.
+    """
+    # Validate data
+    if not data or "items" not in data:
+        error_msg = "No valid data received or 'items' key not found."
+        update_sap_log_failure(log_id, error_msg, None)
+        return {"status": "error", "message": error_msg}
+
+    pr_no = data.get("pr_no", "")
+    mapping_plan = get_mapping_plan("Purchase Requisition", date_converter=parse_date)
+
+    # Get or create PR doc
+    if frappe.db.exists("Purchase Requisition", {"purchase_requisition_number": pr_no}):
+        pr_doc = frappe.get_doc("Purchase Requisition", {"purchase_requisition_number": pr_no})
+    else:
+        pr_doc = frappe.new_doc("Purchase Requisition")
+
+    pr_doc.purchase_requisition_number = pr_no
+
+    pr_plant_value = None
+    pr_items = []
+
+    for item in data["items"]:
+        pr_items.append(mapping_plan.convert(item))
+
+        if not pr_plant_value and "plant" in item:
+            pr_plant_value = item["plant"]
+
+    # Only changed / new / removed lines are written
+    item_changes = sync_child_rows(
+        pr_doc, "pr_items", pr_items, mapping_plan.erp_field(PR_ITEM_NUMBER_SAP_KEY)
+    )
+
+    if pr_plant_value:
+        pr_doc.pr_plant = pr_plant_value
+
+    # Save or Update PR
+    if pr_doc.is_new():
+        pr_doc.insert(ignore_permissions=True)
+        frappe.db.commit()
+
+        response = {
+            "status": "success",
+            "message": "Purchase Requisition Created Successfully.",
+            "pr": pr_doc.name,
+            "item_changes": item_changes
+        }
+        
+        # Update log with success
+        update_sap_log_success(
+            log_id=log_id,
+            response=response,
+            frappe_doc_type="Purchase Requisition",
+            frappe_doc_name=pr_doc.name,
+            data=data,
+            po_doc=None
+        )
+        
+        return response
+        
+    else:
+        pr_doc.save(ignore_permissions=True)
+        frappe.db.commit()
+
+        response = {
+            "status": "success",
+            "message": "Purchase Requisition Updated Successfully.",
+            "pr": pr_doc.name,
+            "item_changes": item_changes
+        }
+        
+        # Update log with success
+        update_sap_log_success(
+            log_id=log_id,
+            response=response,
+            frappe_doc_type="Purchase Requisition",
+            frappe_doc_name=pr_doc.name,
+            data=data,
+            po_doc=None
+        )
+        
+        return response
+
+
 @frappe.whitelist(allow_guest=True)
 def get_pr():
     """
     Main API endpoint to receive PR data from SAP
     Ensures logging happens for EVERY request - success or failure
+    With sap_inbound_async enabled the payload is only logged and queued (sap_inbound_queue)
     """
     log_id = None
     data = None
@@ -182,98 +278,20 @@ def get_pr():
     try:
         # Get request data
         data = frappe.request.get_json()
+        queued = is_sap_inbound_async() and bool(data and data.get("items"))
         
         # Create initial log entry IMMEDIATELY
         log_id = create_initial_sap_log(
             data=data,
             transaction_type="Purchase Requisition",
-            sap_document_number=data.get("pr_no", "") if data else ""
+            sap_document_number=data.get("pr_no", "") if data else "",
+            status="Queued" if queued else "In Progress"
         )
         
-        # Validate data
-        if not data or "items" not in data:
-            error_msg = "No valid data received or 'items' key not found."
-            update_sap_log_failure(log_id, error_msg, None)
-            return {"status": "error", "message": error_msg}
-
-        pr_no = data.get("pr_no", "")
-        field_mappings = get_field_mappings()
-
-        # Get or create PR doc
-        if frappe.db.exists("Purchase Requisition", {"purchase_requisition_number": pr_no}):
-            pr_doc = frappe.get_doc("Purchase Requisition", {"purchase_requisition_number": pr_no})
-            pr_doc.set("pr_items", [])
-        else:
-            pr_doc = frappe.new_doc("Purchase Requisition")
-
-        pr_doc.purchase_requisition_number = pr_no
-
-        meta = frappe.get_meta("Purchase Requisition")
-        pr_plant_value = None
-
-        for item in data["items"]:
-            pr_item_data = {}
-            for sap_field, erp_field in field_mappings.items():
-                value = item.get(sap_field, "")
-                field_meta = next((field for field in meta.fields if field.fieldname == erp_field), None)
-
-                if field_meta and field_meta.fieldtype == 'Date':
-                    pr_item_data[erp_field] = parse_date(value)
-                else:
-                    pr_item_data[erp_field] = value
-
-            pr_doc.append("pr_items", pr_item_data)
-
-            if not pr_plant_value and "plant" in item:
-                pr_plant_value = item["plant"]
-
-        if pr_plant_value:
-            pr_doc.pr_plant = pr_plant_value
-
-        # Save or Update PR
-        if pr_doc.is_new():
-            pr_doc.insert(ignore_permissions=True)
-            frappe.db.commit()
-
-            response = {
-                "status": "success",
-                "message": "Purchase Requisition Created Successfully.",
-                "pr": pr_doc.name
-            }
-            
-            # Update log with success
-            update_sap_log_success(
-                log_id=log_id,
-                response=response,
-                frappe_doc_type="Purchase Requisition",
-                frappe_doc_name=pr_doc.name,
-                data=data,
-                po_doc=None
-            )
-            
-            return response
-            
-        else:
-            pr_doc.save(ignore_permissions=True)
-            frappe.db.commit()
-
-            response = {
-                "status": "success",
-                "message": "Purchase Requisition Updated Successfully.",
-                "pr": pr_doc.name
-            }
-            
-            # Update log with success
-            update_sap_log_success(
-                log_id=log_id,
-                response=response,
-                frappe_doc_type="Purchase Requisition",
-                frappe_doc_name=pr_doc.name,
-                data=data,
-                po_doc=None
-            )
-            
-            return response
+        if queued:
+            return queue_inbound_payload("Purchase Requisition", data.get("pr_no"), log_id)
+        
+        return process_pr_payload(data, log_id)
 
     except Exception as e:
         # Capture full error traceback
@@ -510,11 +528,121 @@ def get_po_field_mappings():
 
 
 # create po and puchase sap logs
+def process_po_payload(data, log_id):
+    """
+    Create or update the Purchase Order from a SAP payload and complete its SAP log.
+    Runs inside the webhook request, or from the inbound queue when it is enabled.
+    """
+    # Validate data
+    if not data or "items" not in data:
+        error_msg = "No valid data received or 'items' key not found."
+        update_sap_log_failure(log_id, error_msg, None)
+        return {"status": "error", "message": error_msg}
+
+    po_no = data.get("po_no", "")
+    mapping_plan = get_mapping_plan("Purchase Order", date_converter=parse_date)
+
+    if not mapping_plan.entries:
+        error_msg = "No field mappings found for 'SAP Mapper PO'"
+        update_sap_log_failure(log_id, error_msg, None)
+        return {"status": "error", "message": error_msg}
+
+    # Check if PO exists
+    po_doc = (frappe.get_doc("Purchase Order", {"po_number": po_no})
+              if frappe.db.exists("Purchase Order", {"po_number": po_no})
+              else frappe.new_doc("Purchase Order"))
+
+    po_doc.po_number = po_no
+    header_fields = mapping_plan.parent_fields("Purchase Order")
+    po_items = []
+
+    # Process items
+    for item in data["items"]:
+        po_item_data = mapping_plan.convert(item)
+
+        for fieldname in header_fields:
+            po_doc.set(fieldname, po_item_data[fieldname])
+
+        po_items.append(po_item_data)
+
+    # Only changed / new / removed lines are written
+    item_changes = sync_child_rows(
+        po_doc, "po_items", po_items, mapping_plan.erp_field(PO_ITEM_NUMBER_SAP_KEY)
+    )
+
+    sap_status = data.get("status", "")
+    po_doc.sap_status = sap_status
+    po_doc.status = sap_status
+
+    # Save or Update PO
+    if po_doc.is_new():
+        po_doc.insert()
+        frappe.db.commit()
+
+        if not frappe.db.exists("Purchase Order", po_doc.name):
+            error_msg = f"Purchase Order {po_doc.name} not found in DB after insert"
+            update_sap_log_failure(log_id, error_msg, None)
+            frappe.throw(error_msg)
+
+        po_id = po_doc.name
+        # po_creation_send_mail(po_id)
+        po_creation_email_to_purchase(po_id)
+
+        response = {
+            "status": "success",
+            "message": "Purchase Order Created Successfully.",
+            "po": po_doc.name,
+            "item_changes": item_changes
+        }
+        
+        # Update log with success
+        update_sap_log_success(
+            log_id=log_id,
+            response=response,
+            frappe_doc_type="Purchase Order",
+            frappe_doc_name=po_doc.name,
+            data=data,
+            po_doc=po_doc
+        )
+        
+        return response
+
+    else:
+        po_doc.save()
+        po_id = po_doc.name
+        # po_update_send_mail(po_id)
+        po_updation_email_to_purchase(po_id)
+
+        if sap_status == "REVOKED":
+            po_doc.sent_to_vendor = 0
+            revocked_po_details_mail(po_id)
+
+        response = {
+            "status": "success",
+            "message": "Purchase Order Updated Successfully.",
+            "po": po_doc.name,
+            "item_changes": item_changes
+        }
+        
+        # Update log with success
+        update_sap_log_success(
+            log_id=log_id,
+            response=response,
+            frappe_doc_type="Purchase Order",
+            frappe_doc_name=po_doc.name,
+            data=data,
+            po_doc=po_doc
+        )
+        
+        return response
+
+
 @frappe.whitelist(allow_guest=True)
 def get_po():
     """
     Main API endpoint to receive PO data from SAP
     Ensures logging happens for EVERY request - success or failure
+    With sap_inbound_async enabled the payload is only logged and queued (sap_inbound_queue)
     """
     log_id = None
     data = None
@@ -522,114 +650,20 @@ def get_po():
     try:
         # Get request data
         data = frappe.request.get_json()
+        queued = is_sap_inbound_async() and bool(data and data.get("items"))
         
         # Create initial log entry IMMEDIATELY - before any processing
         log_id = create_initial_sap_log(
             data=data,
             transaction_type="Purchase Order",
-            sap_document_number=data.get("po_no", "") if data else ""
+            sap_document_number=data.get("po_no", "") if data else "",
+            status="Queued" if queued else "In Progress"
         )
         
-        # Validate data
-        if not data or "items" not in data:
-            error_msg = "No valid data received or 'items' key not found."
-            update_sap_log_failure(log_id, error_msg, None)
-            return {"status": "error", "message": error_msg}
-
-        po_no = data.get("po_no", "")
-        field_mappings = get_po_field_mappings()
-
-        if not field_mappings:
-            error_msg = "No field mappings found for 'SAP Mapper PO'"
-            update_sap_log_failure(log_id, error_msg, None)
-            return {"status": "error", "message": error_msg}
-
-        # Check if PO exists
-        po_doc = (frappe.get_doc("Purchase Order", {"po_number": po_no})
-                  if frappe.db.exists("Purchase Order", {"po_number": po_no})
-                  else frappe.new_doc("Purchase Order"))
-
-        meta = frappe.get_meta("Purchase Order")
-        po_doc.po_number = po_no
-        po_doc.set("po_items", [])
-
-        # Process items
-        for item in data["items"]:
-            po_item_data = {}
-            for sap_field, erp_field in field_mappings.items():
-                value = item.get(sap_field, "")
-                field = next((f for f in meta.fields if f.fieldname == erp_field), None)
-                po_item_data[erp_field] = parse_date(value) if field and field.fieldtype == 'Date' else value
-
-            for field in meta.fields:
-                if field.fieldname in po_item_data:
-                    po_doc.set(field.fieldname, po_item_data[field.fieldname])
-
-            po_doc.append("po_items", po_item_data)
-
-        sap_status = data.get("status", "")
-        po_doc.sap_status = sap_status
-        po_doc.status = sap_status
-
-        # Save or Update PO
-        if po_doc.is_new():
-            po_doc.insert()
-            frappe.db.commit()
-
-            if not frappe.db.exists("Purchase Order", po_doc.name):
-                error_msg = f"Purchase Order {po_doc.name} not found in DB after insert"
-                update_sap_log_failure(log_id, error_msg, None)
-                frappe.throw(error_msg)
-
-            po_id = po_doc.name
-            # po_creation_send_mail(po_id)
-            po_creation_email_to_purchase(po_id)
-
-            response = {
-                "status": "success",
-                "message": "Purchase Order Created Successfully.",
-                "po": po_doc.name
-            }
-            
-            # Update log with success
-            update_sap_log_success(
-                log_id=log_id,
-                response=response,
-                frappe_doc_type="Purchase Order",
-                frappe_doc_name=po_doc.name,
-                data=data,
-                po_doc=po_doc
-            )
-            
-            return response
-
-        else:
-            po_doc.save()
-            po_id = po_doc.name
-            # po_update_send_mail(po_id)
-            po_updation_email_to_purchase(po_id)
-
-            if sap_status == "REVOKED":
-                po_doc.sent_to_vendor = 0
-                revocked_po_details_mail(po_id)
-
-            response = {
-                "status": "success",
-                "message": "Purchase Order Updated Successfully.",
-                "po": po_doc.name
-            }
-            
-            # Update log with success
-            update_sap_log_success(
-                log_id=log_id,
-                response=response,
-                frappe_doc_type="Purchase Order",
-                frappe_doc_name=po_doc.name,
-                data=data,
-                po_doc=po_doc
-            )
-            
-            return response
+        if queued:
+            return queue_inbound_payload("Purchase Order", data.get("po_no"), log_id)
+        
+        return process_po_payload(data, log_id)
 
     except Exception as e:
         # Capture full error traceback
@@ -983,28 +1017,23 @@ def revocked_po_details_mail(po_id):
 
 # ============= LOGGING HELPER FUNCTIONS =============
 
-def create_initial_sap_log(data, transaction_type, sap_document_number):
+def create_initial_sap_log(data, transaction_type, sap_document_number, status="In Progress"):
     """
     Create initial SAP log entry when API is hit
     This MUST succeed to ensure we always have a log
+    status "Queued" marks the payload for background processing (sap_inbound_queue)
     """
     try:
         log_doc = frappe.new_doc("Purchase SAP Logs")
         log_doc.transaction_type = transaction_type
         log_doc.sap_document_number = sap_document_number
         log_doc.transaction_date = frappe.utils.now()
-        log_doc.status = "In Progress"
+        log_doc.status = status
         log_doc.sap_to_erp_data = json.dumps(data, indent=2, default=str)
         
         # Store request details in total_transaction
         request_details = {
-            "request_details": {
-                "url": frappe.request.url,
-                "method": frappe.request.method,
-                "headers": {k: v for k, v in frappe.request.headers.items() if k.lower() != 'authorization'},
-                "payload": data,
-                "timestamp": frappe.utils.now()
-            }
+            "request_details": get_request_details(data, frappe.utils.now())
         }
         log_doc.total_transaction = json.dumps(request_details, indent=2, default=str)
         
@@ -1041,13 +1070,7 @@ def update_sap_log_success(log_id, response, frappe_doc_type, frappe_doc_name, d
         
         # Update total transaction with complete details
         total_transaction_data = {
-            "request_details": {
-                "url": frappe.request.url,
-                "method": frappe.request.method,
-                "headers": {k: v for k, v in frappe.request.headers.items() if k.lower() != 'authorization'},
-                "payload": data,
-                "timestamp": log_doc.transaction_date
-            },
+            "request_details": get_request_details(data, log_doc.transaction_date),
             "response_details": {
                 "status_code": 200,
                 "body": response,
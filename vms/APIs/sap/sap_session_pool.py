@@ -0,0 +1,228 @@
+import threading
+import time
+
+import frappe
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+# =====================================================================================
+# SHARED SAP CONNECTION POOL
+# =====================================================================================
+#
+# One keep-alive requests.Session per (site, service url, sap_client_code) and worker
+# process. The CSRF token and SAP session cookies are reused across pushes until they
+# age out or SAP rejects them with 403, in which case they are fetched again and the
+# request is retried once.
+
+# SAP Gateway tokens live as long as the SAP session; refresh a bit before the usual 30 min
+CSRF_TOKEN_TTL = 25 * 60
+
+# (connect, read) timeouts for the token handshake
+CSRF_FETCH_TIMEOUT = (10, 60)
+
+_pool = {}
+_pool_lock = threading.Lock()
+
+
+class SAPConnectionError(Exception):
+	pass
+
+
+class SAPConnection:
+	"""A pooled, keep-alive SAP session with a cached CSRF token"""
+
+	def __init__(self, url, sap_client_code, auth, headers=None):
+		self.url = url
+		self.sap_client_code = sap_client_code
+		self.auth = auth
+		self.default_headers = headers or {}
+		self.csrf_token = None
+		self.token_fetched_at = 0
+		self.lock = threading.RLock()
+		self.stats = {"handshakes": 0, "requests": 0, "token_rejections": 0}
+		self.session = self._new_session()
+
+	def _new_session(self):
+		session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+		session.mount("https://", adapter)
+		session.mount("http://", adapter)
+		session.headers.update(self.default_headers)
+		return session
+
+	def has_valid_token(self):
+		return bool(self.csrf_token) and time.monotonic() - self.token_fetched_at < CSRF_TOKEN_TTL
+
+	def invalidate(self):
+		"""Drop the token and SAP session cookies; the next request performs a new handshake"""
+		with self.lock:
+			self.csrf_token = None
+			self.token_fetched_at = 0
+			self.session.cookies.clear()
+
+	def fetch_csrf_token(self, force=False):
+		"""
+		Return {"success": True, "csrf_token": ...} reusing the cached token when still valid,
+		or {"success": False, "error": ...}
+		"""
+		with self.lock:
+			if not force and self.has_valid_token():
+				return {"success": True, "csrf_token": self.csrf_token, "reused": True}
+
+			self.invalidate()
+
+			try:
+				response = self.session.get(
+					self.url, headers={"X-CSRF-Token": "Fetch"}, auth=self.auth, timeout=CSRF_FETCH_TIMEOUT
+				)
+			except requests.exceptions.Timeout:
+				return {"success": False, "error": "CSRF token request timed out"}
+			except requests.exceptions.RequestException as e:
+				return {"success": False, "error": f"Exception while fetching CSRF token: {e!s}"}
+
+			self.stats["handshakes"] += 1
+
+			if response.status_code != 200:
+				return {
+					"success": False,
+					"error": f"Failed to fetch CSRF token: HTTP {response.status_code} - {response.text}",
+				}
+
+			csrf_token = response.headers.get("x-csrf-token")
+			if not csrf_token:
+				return {"success": False, "error": "CSRF token not found in response headers"}
+
+			self.csrf_token = csrf_token
+			self.token_fetched_at = time.monotonic()
+			return {"success": True, "csrf_token": csrf_token, "reused": False}
+
+	def request(self, method, url=None, headers=None, **kwargs):
+		"""
+		Send a request with the cached CSRF token. A 403 is treated as an expired token or
+		session: the handshake is repeated and the request retried once.
+		Raises SAPConnectionError when no token can be obtained.
+		"""
+		url = url or self.url
+
+		for attempt in range(2):
+			token_result = self.fetch_csrf_token(force=attempt > 0)
+			if not token_result["success"]:
+				raise SAPConnectionError(token_result["error"])
+
+			request_headers = dict(headers or {})
+			request_headers["X-CSRF-Token"] = self.csrf_token
+
+			response = self.session.request(method, url, headers=request_headers, auth=self.auth, **kwargs)
+			self.stats["requests"] += 1
+
+			if response.status_code != 403 or attempt > 0:
+				return response
+
+			self.stats["token_rejections"] += 1
+			self.invalidate()
+
+		return response
+
+	def post(self, url=None, **kwargs):
+		return self.request("POST", url, **kwargs)
+
+	def get_cookies(self):
+		return {cookie.name: cookie.value for cookie in self.session.cookies}
+
+	def close(self):
+		with self.lock:
+			self.session.close()
+			self.csrf_token = None
+
+
+def get_sap_settings():
+	return frappe.get_cached_doc("SAP Settings")
+
+
+def get_sap_connection(base_url, sap_client_code, headers=None):
+	"""
+	Return the pooled connection for a SAP service url and client code.
+	Connections are rebuilt when SAP Settings change (credentials, urls).
+	"""
+	sap_settings = get_sap_settings()
+	url = f"{base_url}{sap_client_code}"
+	pool_key = (frappe.local.site, url)
+	settings_version = str(sap_settings.modified)
+
+	with _pool_lock:
+		entry = _pool.get(pool_key)
+		if entry and entry[0] == settings_version:
+			return entry[1]
+
+		if entry:
+			entry[1].close()
+
+		connection = SAPConnection(
+			url,
+			sap_client_code,
+			HTTPBasicAuth(sap_settings.auth_user_name, sap_settings.auth_user_pass),
+			headers=headers,
+		)
+		_pool[pool_key] = (settings_version, connection)
+		return connection
+
+
+def get_vendor_sap_connection(sap_client_code):
+	"""Vendor master service (SAP Settings.url) with the configured Authorization header"""
+	sap_settings = get_sap_settings()
+	return get_sap_connection(
+		sap_settings.url,
+		sap_client_code,
+		headers={
+			"Authorization": f"{sap_settings.authorization_type} {sap_settings.authorization_key}",
+			"Content-Type": "application/json;charset=utf-8",
+			"Accept": "application/json",
+			"User-Agent": "Frappe-SAP-Integration/1.0",
+		},
+	)
+
+
+def get_pr_sap_connection(sap_client_code, prf_type):
+	"""Purchase requisition service, NB or SB url depending on the PR type"""
+	sap_settings = get_sap_settings()
+	base_url = sap_settings.sap_pr_url_nb if prf_type == "NB" else sap_settings.sap_pr_url_sb
+	return get_sap_connection(
+		base_url,
+		sap_client_code,
+		headers={
+			"Authorization": f"{sap_settings.authorization_type} {sap_settings.authorization_key}",
+			"Content-Type": "application/json;charset=utf-8",
+			"Accept": "application/json",
+		},
+	)
+
+
+def get_mo_sap_connection(sap_client_code):
+	"""Material onboarding service (SAP Settings.mo_sap_link)"""
+	sap_settings = get_sap_settings()
+	return get_sap_connection(
+		sap_settings.mo_sap_link,
+		sap_client_code,
+		headers={"Content-Type": "application/json;charset=utf-8", "Accept": "application/json"},
+	)
+
+
+@frappe.whitelist()
+def get_sap_pool_stats():
+	"""Handshake / request counters of the connections pooled in this worker"""
+	frappe.only_for("System Manager")
+
+	with _pool_lock:
+		connections = [
+			{
+				"url": connection.url,
+				"sap_client_code": connection.sap_client_code,
+				"has_valid_token": connection.has_valid_token(),
+				**connection.stats,
+			}
+			for (site, _url), (_version, connection) in _pool.items()
+			if site == frappe.local.site
+		]
+
+	return {"status": "success", "connections": connections}
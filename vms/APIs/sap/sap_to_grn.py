@@ -4,6 +4,8 @@ from datetime import datetime
 from frappe import _
 from vms.utils.custom_send_mail import custom_sendmail
 from collections import defaultdict
+from vms.APIs.sap.sap_inbound_queue import get_request_details, is_sap_inbound_async, queue_inbound_payload
+from vms.APIs.sap.sap_mapping_plan import get_mapping_plan
 
 
 
@@ -33,12 +35,104 @@ def get_grn_field_mappings():
     return {mapping['sap_field']: mapping['erp_field'] for mapping in mappings}
 
 
+def process_grn_payload(data, log_id):
+    """
+    Create or update the GRN from a SAP payload and complete its GRN SAP log.
+    Runs inside the webhook request, or from the inbound queue when it is enabled.
+    """
+    # Validate data
+    if not data or "items" not in data:
+        error_msg = "No valid data received or 'items' key not found."
+        update_grn_log_failure(log_id, error_msg, None)
+        return {"status": "error", "message": error_msg}
+    
+    grn_no = data.get("MBLNR", "")
+    
+    if not grn_no:
+        error_msg = "MBLNR (GRN Number) not found in the data."
+        update_grn_log_failure(log_id, error_msg, None)
+        return {"status": "error", "message": error_msg}
+    
+    header_plan = get_mapping_plan("GRN", date_converter=convert_and_validate_date, meta_fields_only=True)
+    item_plan = get_mapping_plan("GRN", meta_doctype="GRN Items", date_converter=convert_and_validate_date)
+    
+    if not item_plan.entries:
+        error_msg = "No field mappings found for 'SAP Mapper GRN.'"
+        update_grn_log_failure(log_id, error_msg, None)
+        return {"status": "error", "message": error_msg}
+    
+    # Check if GRN exists
+    is_existing_doc = frappe.db.exists("GRN", {"grn_number": grn_no})
+    
+    if is_existing_doc:
+        grn_doc = frappe.get_doc("GRN", {"grn_number": grn_no})
+    else:
+        grn_doc = frappe.new_doc("GRN")
+    
+    grn_doc.grn_number = grn_no
+    grn_doc.set("grn_items_table", [])
+    
+    # Set header fields (non-table fields, non-None values) on GRN doc
+    for field_name, value in header_plan.convert_present(data).items():
+        grn_doc.set(field_name, value)
+    
+    # Process items (table rows)
+    for item in data["items"]:
+        grn_doc.append("grn_items_table", item_plan.convert_present(item))
+    
+    # Save or Update GRN
+    if is_existing_doc:
+        grn_doc.save()
+        send_grn_emails_to_po_contacts(grn_doc)
+        frappe.db.commit()
+        
+        response = {
+            "status": "success",
+            "message": "GRN Updated Successfully.",
+            "GRN": grn_doc.name
+        }
+        
+        # Update log with success
+        update_grn_log_success(
+            log_id=log_id,
+            response=response,
+            grn_doc_name=grn_doc.name,
+            data=data,
+            is_new=False
+        )
+        
+        return response
+        
+    else:
+        grn_doc.insert()
+        send_grn_emails_to_po_contacts(grn_doc)
+        frappe.db.commit()
+        
+        response = {
+            "status": "success",
+            "message": "GRN Created Successfully.",
+            "GRN": grn_doc.name
+        }
+        
+        # Update log with success
+        update_grn_log_success(
+            log_id=log_id,
+            response=response,
+            grn_doc_name=grn_doc.name,
+            data=data,
+            is_new=True
+        )
+        
+        return response
+
+
 # ============= GRN API WITH GUARANTEED LOGGING =============
 @frappe.whitelist(allow_guest=True)
 def get_grn():
     """
     Main API endpoint to receive GRN data from SAP
     Ensures logging happens for EVERY request - success or failure
+    With sap_inbound_async enabled the payload is only logged and queued (sap_inbound_queue)
     """
     log_id = None
     data = None
@@ -46,130 +140,19 @@ def get_grn():
     try:
         # Get request data
         data = frappe.request.get_json()
+        queued = is_sap_inbound_async() and bool(data and data.get("items"))
         
         # Create initial log entry IMMEDIATELY - before any processing
         log_id = create_initial_grn_log(
             data=data,
-            sap_document_number=data.get("MBLNR", "") if data else ""
+            sap_document_number=data.get("MBLNR", "") if data else "",
+            status="Queued" if queued else "In Progress"
         )
         
-        # Validate data
-        if not data or "items" not in data:
-            error_msg = "No valid data received or 'items' key not found."
-            update_grn_log_failure(log_id, error_msg, None)
-            return {"status": "error", "message": error_msg}
+        if queued:
+            return queue_inbound_payload("GRN", data.get("MBLNR"), log_id)
         
-        grn_no = data.get("MBLNR", "")
-        
-        if not grn_no:
-            error_msg = "MBLNR (GRN Number) not found in the data."
-            update_grn_log_failure(log_id, error_msg, None)
-            return {"status": "error", "message": error_msg}
-        
-        field_mappings = get_grn_field_mappings()
-        
-        if not field_mappings:
-            error_msg = "No field mappings found for 'SAP Mapper GRN.'"
-            update_grn_log_failure(log_id, error_msg, None)
-            return {"status": "error", "message": error_msg}
-        
-        # Check if GRN exists
-        is_existing_doc = frappe.db.exists("GRN", {"grn_number": grn_no})
-        
-        if is_existing_doc:
-            grn_doc = frappe.get_doc("GRN", {"grn_number": grn_no})
-        else:
-            grn_doc = frappe.new_doc("GRN")
-        
-        meta = frappe.get_meta("GRN")
-        grn_doc.grn_number = grn_no
-        grn_doc.set("grn_items_table", [])
-        
-        # Process header data (non-table fields)
-        header_data = {}
-        for sap_field, erp_field in field_mappings.items():
-            if sap_field in data:
-                value = data.get(sap_field, "")
-                field_meta = next((f for f in meta.fields if f.fieldname == erp_field), None)
-                if field_meta and field_meta.fieldtype != "Table":
-                    # Handle date fields
-                    if field_meta.fieldtype == "Date":
-                        value = convert_and_validate_date(value)
-                    header_data[erp_field] = value
-        
-        # Set header fields on GRN doc
-        for field_name, value in header_data.items():
-            if value is not None:  # Only set non-None values
-                grn_doc.set(field_name, value)
-        
-        # Process items (table rows)
-        for idx, item in enumerate(data["items"]):
-            grn_item_data = {}
-            
-            # Get child table meta
-            child_meta = frappe.get_meta("GRN Items")  # Replace with your actual child table doctype name
-            
-            for sap_field, erp_field in field_mappings.items():
-                if sap_field in item:
-                    value = item.get(sap_field, "")
-                    
-                    # Get field metadata from child table
-                    field_meta = next((f for f in child_meta.fields if f.fieldname == erp_field), None)
-                    
-                    # Handle date fields in child table
-                    if field_meta and field_meta.fieldtype == "Date":
-                        value = convert_and_validate_date(value)
-                    
-                    # Only add non-None values
-                    if value is not None:
-                        grn_item_data[erp_field] = value
-            
-            grn_doc.append("grn_items_table", grn_item_data)
-        
-        # Save or Update GRN
-        if is_existing_doc:
-            grn_doc.save()
-            send_grn_emails_to_po_contacts(grn_doc)
-            frappe.db.commit()
-            
-            response = {
-                "status": "success",
-                "message": "GRN Updated Successfully.",
-                "GRN": grn_doc.name
-            }
-            
-            # Update log with success
-            update_grn_log_success(
-                log_id=log_id,
-                response=response,
-                grn_doc_name=grn_doc.name,
-                data=data,
-                is_new=False
-            )
-            
-            return response
-            
-        else:
-            grn_doc.insert()
-            send_grn_emails_to_po_contacts(grn_doc)
-            frappe.db.commit()
-            
-            response = {
-                "status": "success",
-                "message": "GRN Created Successfully.",
-                "GRN": grn_doc.name
-            }
-            
-            # Update log with success
-            update_grn_log_success(
-                log_id=log_id,
-                response=response,
-                grn_doc_name=grn_doc.name,
-                data=data,
-                is_new=True
-            )
-            
-            return response
+        return process_grn_payload(data, log_id)
     
     except Exception as e:
         # Capture full error traceback
@@ -200,16 +183,17 @@ def get_grn():
 
 # ============= GRN LOGGING HELPER FUNCTIONS =============
 
-def create_initial_grn_log(data, sap_document_number):
+def create_initial_grn_log(data, sap_document_number, status="In Progress"):
     """
     Create initial GRN SAP log entry when API is hit
     This MUST succeed to ensure we always have a log
+    status "Queued" marks the payload for background processing (sap_inbound_queue)
     """
     try:
         log_doc = frappe.new_doc("GRN SAP Logs")
         log_doc.grn_number = sap_document_number
         log_doc.transaction_date = frappe.utils.now()
-        log_doc.status = "In Progress"
+        log_doc.status = status
         log_doc.sap_to_erp_data = json.dumps(data, indent=2, default=str)
         
         # Extract additional details from data
@@ -219,13 +203,7 @@ def create_initial_grn_log(data, sap_document_number):
         
         # Store request details in total_transaction
         request_details = {
-            "request_details": {
-                "url": frappe.request.url,
-                "method": frappe.request.method,
-                "headers": {k: v for k, v in frappe.request.headers.items() if k.lower() != 'authorization'},
-                "payload": data,
-                "timestamp": frappe.utils.now()
-            }
+            "request_details": get_request_details(data, frappe.utils.now())
         }
         log_doc.total_transaction = json.dumps(request_details, indent=2, default=str)
         
@@ -261,13 +239,7 @@ def update_grn_log_success(log_id, response, grn_doc_name, data, is_new=True):
         processed_date = ensure_datetime(log_doc.processed_date)
         transaction_date = ensure_datetime(log_doc.transaction_date)
         total_transaction_data = {
-            "request_details": {
-                "url": frappe.request.url,
-                "method": frappe.request.method,
-                "headers": {k: v for k, v in frappe.request.headers.items() if k.lower() != 'authorization'},
-                "payload": data,
-                "timestamp": log_doc.transaction_date
-            },
+            "request_details": get_request_details(data, log_doc.transaction_date),
             "response_details": {
                 "status_code": 200,
                 "body": response,
@@ -7,6 +7,7 @@ import requests
 from requests.auth import HTTPBasicAuth
 from requests.exceptions import RequestException, JSONDecodeError
 from vms.utils.custom_send_mail import custom_sendmail
+from vms.APIs.sap.sap import SAPSessionManager as PooledSAPSessionManager
 
 
 
@@ -230,225 +231,10 @@ def send_vendor_data_to_sap(doc_name):
 
 
 
-class SAPSessionManager:
-    """
-    Manages SAP sessions for CSRF token and cookie handling
-    This class handles all SAP authentication and session management
-    """
-    
-    def __init__(self, sap_client_code):
-        self.sap_client_code = sap_client_code
-        self.session = None
-        self.csrf_token = None
-        self.auth = None
-        self.sap_settings = None
-        self._initialize_settings()
-    
-    def _initialize_settings(self):
-        """Initialize SAP settings from Frappe"""
-        try:
-            self.sap_settings = frappe.get_doc("SAP Settings")
-            self.auth = HTTPBasicAuth(
-                self.sap_settings.auth_user_name, 
-                self.sap_settings.auth_user_pass
-            )
-        except Exception as e:
-            frappe.log_error(f"Failed to initialize SAP settings: {str(e)}", "SAP Settings Error")
-            raise
-    
-    def create_session(self):
-        """
-        Create a new SAP session with proper authentication and CSRF token
-        Returns: dict with success status and session details
-        """
-        try:
-            print("🔄 Creating new SAP session...")
-            print(f"SAP Client Code: {self.sap_client_code}")
-            
-            # Create new session
-            self.session = requests.Session()
-            
-            # Set default headers for all requests in this session
-            self.session.headers.update({
-                'Authorization': f"{self.sap_settings.authorization_type} {self.sap_settings.authorization_key}",
-                'Content-Type': 'application/json;charset=utf-8',
-                'Accept': 'application/json',
-                'User-Agent': 'Frappe-SAP-Integration/1.0'
-            })
-            
-            # Get CSRF token
-            csrf_result = self._fetch_csrf_token()
-            
-            if csrf_result["success"]:
-                self.csrf_token = csrf_result["csrf_token"]
-                print(f"✅ SAP Session created successfully")
-                print(f"✅ CSRF Token: {self.csrf_token}")
-                return {
-                    "success": True,
-                    "csrf_token": self.csrf_token,
-                    "message": "Session created successfully"
-                }
-            else:
-                return csrf_result
-                
-        except Exception as e:
-            error_msg = f"Failed to create SAP session: {str(e)}"
-            print(f"❌ {error_msg}")
-            frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP Session Creation Error")
-            return {"success": False, "error": error_msg}
-    
-    def _fetch_csrf_token(self):
-        """
-        Fetch CSRF token from SAP server
-        This also establishes the session cookies automatically
-        """
-        try:
-            url = f"{self.sap_settings.url}{self.sap_client_code}"
-            
-            # Prepare headers for CSRF token request
-            csrf_headers = {'X-CSRF-Token': 'FETCH'}
-            
-            print(f"🔑 Fetching CSRF token from: {url}")
-            print(f"🔑 User: {self.sap_settings.auth_user_name}")
-            
-            # Make request to get CSRF token
-            response = self.session.get(
-                url, 
-                headers=csrf_headers, 
-                auth=self.auth, 
-                timeout=30
-            )
-            
-            print(f"🔑 CSRF Response Status: {response.status_code}")
-            print(f"🔑 CSRF Response Headers: {dict(response.headers)}")
-            print(f"🔑 Session Cookies Count: {len(self.session.cookies)}")
-            
-            # Log cookies for debugging
-            for cookie in self.session.cookies:
-                print(f"🍪 Cookie: {cookie.name} = {cookie.value}")
-            
-            if response.status_code == 200:
-                csrf_token = response.headers.get('x-csrf-token')
-                
-                if csrf_token:
-                    print(f"✅ CSRF Token obtained: {csrf_token}")
-                    
-                    # Validate essential cookies
-                    session_id_found = False
-                    usercontext_found = False
-                    
-                    for cookie in self.session.cookies:
-                        if 'SAP_SESSIONID' in cookie.name:
-                            session_id_found = True
-                        if cookie.name == 'sap-usercontext':
-                            usercontext_found = True
-                    
-                    if not session_id_found:
-                        print("⚠️  WARNING: SAP Session ID cookie not found!")
-                    if not usercontext_found:
-                        print("⚠️  WARNING: sap-usercontext cookie not found!")
-                    
-                    return {
-                        "success": True,
-                        "csrf_token": csrf_token
-                    }
-                else:
-                    error_msg = "CSRF token not found in response headers"
-                    print(f"❌ {error_msg}")
-                    return {"success": False, "error": error_msg}
-            else:
-                error_msg = f"Failed to fetch CSRF token: HTTP {response.status_code} - {response.text}"
-                print(f"❌ {error_msg}")
-                return {"success": False, "error": error_msg}
-                
-        except requests.exceptions.Timeout:
-            error_msg = "CSRF token request timed out"
-            print(f"❌ {error_msg}")
-            return {"success": False, "error": error_msg}
-        except Exception as e:
-            error_msg = f"Exception while fetching CSRF token: {str(e)}"
-            print(f"❌ {error_msg}")
-            frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP CSRF Fetch Error")
-            return {"success": False, "error": error_msg}
-    
-    def send_data(self, data, endpoint_suffix=""):
-        """
-        Send data to SAP using the established session
-        data: The JSON data to send
-        endpoint_suffix: Additional endpoint path if needed
-        """
-        if not self.session or not self.csrf_token:
-            return {"success": False, "error": "Session not initialized. Call create_session() first."}
-        
-        try:
-            url = f"{self.sap_settings.url}{self.sap_client_code}{endpoint_suffix}"
-            
-            # Update session headers with CSRF token
-            self.session.headers.update({'X-CSRF-Token': self.csrf_token})
-            
-            print("=" * 80)
-            print("📤 SENDING DATA TO SAP")
-            print("=" * 80)
-            print(f"URL: {url}")
-            print(f"CSRF Token: {self.csrf_token}")
-            print(f"Cookies Count: {len(self.session.cookies)}")
-            print(f"Data: {json.dumps(data, indent=2, default=str)}")
-            print("=" * 80)
-            
-            # Send POST request
-            response = self.session.post(
-                url, 
-                json=data, 
-                auth=self.auth, 
-                timeout=30
-            )
-            
-            print(f"📨 SAP Response Status: {response.status_code}")
-            print(f"📨 SAP Response Headers: {dict(response.headers)}")
-            
-            if response.status_code in [200, 201]:
-                response_data = response.json()
-                print(f"✅ Data sent successfully to SAP")
-                return {
-                    "success": True,
-                    "response": response_data,
-                    "status_code": response.status_code
-                }
-            else:
-                error_msg = f"SAP API Error: {response.status_code} - {response.text}"
-                print(f"❌ {error_msg}")
-                return {
-                    "success": False,
-                    "error": error_msg,
-                    "status_code": response.status_code,
-                    "response_text": response.text
-                }
-                
-        except requests.exceptions.Timeout:
-            error_msg = "SAP request timed out"
-            print(f"❌ {error_msg}")
-            return {"success": False, "error": error_msg}
-        except requests.exceptions.RequestException as e:
-            error_msg = f"SAP request failed: {str(e)}"
-            print(f"❌ {error_msg}")
-            return {"success": False, "error": error_msg}
-        except ValueError as e:
-            error_msg = f"JSON parsing error: {str(e)} - Response: {response.text if 'response' in locals() else 'No response'}"
-            print(f"❌ {error_msg}")
-            return {"success": False, "error": error_msg}
-        except Exception as e:
-            error_msg = f"Unexpected error sending data: {str(e)}"
-            print(f"❌ {error_msg}")
-            frappe.log_error(f"{error_msg}\n\nTraceback: {frappe.get_traceback()}", "SAP Send Data Error")
-            return {"success": False, "error": error_msg}
+class SAPSessionManager(PooledSAPSessionManager):
+    """Pooled SAP session (see vms.APIs.sap.sap.SAPSessionManager) with the shorter trigger timeout"""
     
-    def close_session(self):
-        """Close the SAP session"""
-        if self.session:
-            self.session.close()
-            self.session = None
-            self.csrf_token = None
-            print("🔒 SAP session closed")
+    send_timeout = 30
 
 
 # =====================================================================================
@@ -978,9 +978,10 @@ from frappe import _
 from frappe.utils import cstr
 
 @frappe.whitelist(allow_guest=True)
-def get_vendor_onboarding_details_ultra_fast(vendor_onboarding=None, ref_no=None, **kwargs):
+def get_vendor_onboarding_details_ultra_fast(vendor_onboarding=None, ref_no=None, etag=None, **kwargs):
     """
-    Ultra-fast version optimized to beat 117ms - focuses on minimal database calls
+    Served from the materialized onboarding snapshot (onboarding_snapshot), built on a miss.
+    Pass the last `etag` (or an If-None-Match header) to get a 304 when nothing changed.
     """
     try:
         if not vendor_onboarding or not ref_no:
@@ -989,42 +990,8 @@ def get_vendor_onboarding_details_ultra_fast(vendor_onboarding=None, ref_no=None
                 "message": "Missing required parameters: 'vendor_onboarding' and 'ref_no'."
             }
 
-        # Single SQL query to get all document names and basic data
-        doc_data = frappe.db.sql("""
-            SELECT 
-                vocd.name as company_doc_name,
-                ld.name as legal_doc_name,
-                vopd.name as payment_doc_name,
-                vomd.name as manuf_doc_name,
-                voc.name as cert_doc_name
-            FROM `tabVendor Onboarding Company Details` vocd
-            LEFT JOIN `tabLegal Documents` ld ON ld.vendor_onboarding = vocd.vendor_onboarding AND ld.ref_no = vocd.ref_no
-            LEFT JOIN `tabVendor Onboarding Payment Details` vopd ON vopd.vendor_onboarding = vocd.vendor_onboarding AND vopd.ref_no = vocd.ref_no
-            LEFT JOIN `tabVendor Onboarding Manufacturing Details` vomd ON vomd.vendor_onboarding = vocd.vendor_onboarding AND vomd.ref_no = vocd.ref_no
-            LEFT JOIN `tabVendor Onboarding Certificates` voc ON voc.vendor_onboarding = vocd.vendor_onboarding AND voc.ref_no = vocd.ref_no
-            WHERE vocd.vendor_onboarding = %s AND vocd.ref_no = %s
-            LIMIT 1
-        """, (vendor_onboarding, ref_no), as_dict=True)
-
-        if not doc_data:
-            return {
-                "status": "error",
-                "message": "No matching Vendor Onboarding Company Details record found."
-            }
-
-        doc_names = doc_data[0]
-
-        # Use parallel document fetching with minimal field selection
-        docs = _fetch_documents_minimal2(doc_names, vendor_onboarding)
-        
-        # Build response with lazy loading
-        response = _build_minimal_response2(docs, vendor_onboarding, ref_no)
-        
-        return {
-            "status": "success",
-            "message": "Vendor onboarding details fetched successfully.",
-            **response
-        }
+        from vms.APIs.vendor_onboarding.onboarding_snapshot import serve_onboarding_snapshot
+        return serve_onboarding_snapshot(vendor_onboarding, ref_no, etag)
 
     except Exception as e:
         frappe.log_error(f"Fast API Error: {str(e)[:100]}", "Fast Vendor API Error")
@@ -1035,6 +1002,46 @@ def get_vendor_onboarding_details_ultra_fast(vendor_onboarding=None, ref_no=None
         }
 
 
+def build_vendor_onboarding_details(vendor_onboarding, ref_no):
+    """
+    Build the ultra-fast response from the database, minimal database calls.
+    Returns None when there is no matching company details record.
+    """
+    # Single SQL query to get all document names and basic data
+    doc_data = frappe.db.sql("""
+        SELECT 
+            vocd.name as company_doc_name,
+            ld.name as legal_doc_name,
+            vopd.name as payment_doc_name,
+            vomd.name as manuf_doc_name,
+            voc.name as cert_doc_name
+        FROM `tabVendor Onboarding Company Details` vocd
+        LEFT JOIN `tabLegal Documents` ld ON ld.vendor_onboarding = vocd.vendor_onboarding AND ld.ref_no = vocd.ref_no
+        LEFT JOIN `tabVendor Onboarding Payment Details` vopd ON vopd.vendor_onboarding = vocd.vendor_onboarding AND vopd.ref_no = vocd.ref_no
+        LEFT JOIN `tabVendor Onboarding Manufacturing Details` vomd ON vomd.vendor_onboarding = vocd.vendor_onboarding AND vomd.ref_no = vocd.ref_no
+        LEFT JOIN `tabVendor Onboarding Certificates` voc ON voc.vendor_onboarding = vocd.vendor_onboarding AND voc.ref_no = vocd.ref_no
+        WHERE vocd.vendor_onboarding = %s AND vocd.ref_no = %s
+        LIMIT 1
+    """, (vendor_onboarding, ref_no), as_dict=True)
+
+    if not doc_data:
+        return None
+
+    doc_names = doc_data[0]
+
+    # Use parallel document fetching with minimal field selection
+    docs = _fetch_documents_minimal2(doc_names, vendor_onboarding)
+    
+    # Build response with lazy loading
+    response = _build_minimal_response2(docs, vendor_onboarding, ref_no)
+    
+    return {
+        "status": "success",
+        "message": "Vendor onboarding details fetched successfully.",
+        **response
+    }
+
+
 def _fetch_documents_minimal2(doc_names, vendor_onboarding):
     """Fetch only essential document data to minimize database load"""
     docs = {}
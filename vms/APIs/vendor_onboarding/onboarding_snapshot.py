@@ -0,0 +1,179 @@
+import hashlib
+import json
+import statistics
+import time
+
+import frappe
+from frappe.utils import cint, now_datetime
+
+# Materialized read model for get_vendor_onboarding_details_ultra_fast.
+#
+# The full response of one (vendor_onboarding, ref_no) is built once and kept in Redis
+# with a content etag, so a read is a keyed GET plus the Vendor Onboarding `modified`
+# (primary key lookup). Saving any constituent document drops the snapshot after commit
+# and enqueues a rebuild; a read that finds no snapshot, or one built from an older
+# Vendor Onboarding `modified` (frappe.db.set_value runs no hooks), builds it inline.
+# Master data and File rows referenced by the response are not tracked, the TTL bounds
+# how long a renamed master can show.
+
+# Bump when the response shape changes so old snapshots are not served
+SNAPSHOT_SCHEMA_VERSION = 1
+SNAPSHOT_TTL = 24 * 60 * 60
+
+# Doctypes whose documents make up the response, with their onboarding / ref_no fields
+SOURCE_DOCTYPES = {
+    "Vendor Onboarding": ("name", "ref_no"),
+    "Vendor Onboarding Company Details": ("vendor_onboarding", "ref_no"),
+    "Legal Documents": ("vendor_onboarding", "ref_no"),
+    "Vendor Onboarding Payment Details": ("vendor_onboarding", "ref_no"),
+    "Vendor Onboarding Manufacturing Details": ("vendor_onboarding", "ref_no"),
+    "Vendor Onboarding Certificates": ("vendor_onboarding", "ref_no"),
+}
+
+
+def get_snapshot_key(vendor_onboarding, ref_no):
+    return f"vonb_snapshot:v{SNAPSHOT_SCHEMA_VERSION}:{vendor_onboarding}:{ref_no}"
+
+
+def compute_etag(response):
+    payload = json.dumps(response, sort_keys=True, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def rebuild_onboarding_snapshot(vendor_onboarding, ref_no):
+    """Build and store the snapshot; returns the entry or None when the onboarding has no details"""
+    from vms.APIs.vendor_onboarding.get_full_data_vonb_optim import build_vendor_onboarding_details
+
+    key = get_snapshot_key(vendor_onboarding, ref_no)
+    # Read before building: a write during the build leaves the snapshot stale, not current
+    source_modified = get_source_modified(vendor_onboarding)
+    response = build_vendor_onboarding_details(vendor_onboarding, ref_no)
+    if response is None:
+        frappe.cache().delete_value(key)
+        return None
+
+    entry = {
+        "etag": compute_etag(response),
+        "built_at": str(now_datetime()),
+        "source_modified": source_modified,
+        "response": response
+    }
+    frappe.cache().set_value(key, entry, expires_in_sec=SNAPSHOT_TTL)
+    return entry
+
+
+def get_source_modified(vendor_onboarding):
+    modified = frappe.db.get_value("Vendor Onboarding", vendor_onboarding, "modified")
+    return str(modified) if modified else None
+
+
+def get_onboarding_snapshot(vendor_onboarding, ref_no):
+    """(entry, hit) - the stored snapshot, built inline on a miss or when the onboarding changed"""
+    entry = frappe.cache().get_value(get_snapshot_key(vendor_onboarding, ref_no))
+    if entry and entry.get("source_modified") == get_source_modified(vendor_onboarding):
+        return entry, True
+    return rebuild_onboarding_snapshot(vendor_onboarding, ref_no), False
+
+
+def _get_if_none_match():
+    if not getattr(frappe.local, "request", None):
+        return None
+    value = frappe.get_request_header("If-None-Match")
+    return value.strip('W/"') if value else None
+
+
+def serve_onboarding_snapshot(vendor_onboarding, ref_no, etag=None):
+    entry, hit = get_onboarding_snapshot(vendor_onboarding, ref_no)
+    if not entry:
+        return {
+            "status": "error",
+            "message": "No matching Vendor Onboarding Company Details record found."
+        }
+
+    client_etag = etag or _get_if_none_match()
+    if client_etag and client_etag == entry["etag"]:
+        frappe.local.response["http_status_code"] = 304
+        return {"status": "not_modified", "etag": entry["etag"]}
+
+    return {
+        **entry["response"],
+        "etag": entry["etag"],
+        "snapshot_built_at": entry["built_at"],
+        "cached": hit
+    }
+
+
+def invalidate_onboarding_snapshot(doc, method=None):
+    """on_update / on_trash of the SOURCE_DOCTYPES: drop the snapshot and rebuild it in the background"""
+    try:
+        onboarding_field, ref_no_field = SOURCE_DOCTYPES[doc.doctype]
+        vendor_onboarding = doc.get(onboarding_field)
+        ref_no = doc.get(ref_no_field)
+        if not vendor_onboarding or not ref_no:
+            return
+
+        key = get_snapshot_key(vendor_onboarding, ref_no)
+        frappe.db.after_commit.add(lambda: frappe.cache().delete_value(key))
+
+        if method == "on_trash" and doc.doctype == "Vendor Onboarding":
+            return
+
+        frappe.enqueue(
+            "vms.APIs.vendor_onboarding.onboarding_snapshot.rebuild_onboarding_snapshot",
+            queue="short",
+            job_id=f"vonb_snapshot::{vendor_onboarding}::{ref_no}",
+            deduplicate=True,
+            enqueue_after_commit=True,
+            vendor_onboarding=vendor_onboarding,
+            ref_no=ref_no
+        )
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Vendor Onboarding Snapshot Invalidation Error")
+
+
+@frappe.whitelist()
+def benchmark_onboarding_snapshot(vendor_onboarding=None, ref_no=None, iterations=5):
+    """
+    Median / best latency in ms of the legacy builders against a cold (rebuilt) and warm
+    snapshot read for one onboarding
+    """
+    frappe.only_for("System Manager")
+
+    from vms.APIs.vendor_onboarding.get_full_data_of_ven_onboarding import get_vendor_onboarding_details
+    from vms.APIs.vendor_onboarding.get_full_data_vonb_optim import build_vendor_onboarding_details
+
+    if not vendor_onboarding or not ref_no:
+        return {"status": "error", "message": "vendor_onboarding and ref_no are required"}
+
+    iterations = max(cint(iterations) or 5, 1)
+    key = get_snapshot_key(vendor_onboarding, ref_no)
+
+    def cold_read():
+        frappe.cache().delete_value(key)
+        return get_onboarding_snapshot(vendor_onboarding, ref_no)
+
+    def timed(fn):
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - started) * 1000)
+        return {"median_ms": round(statistics.median(samples), 2), "best_ms": round(min(samples), 2)}
+
+    results = {
+        "legacy_full": timed(lambda: get_vendor_onboarding_details(vendor_onboarding, ref_no)),
+        "legacy_ultra_fast": timed(lambda: build_vendor_onboarding_details(vendor_onboarding, ref_no)),
+        "snapshot_cold": timed(cold_read),
+        "snapshot_warm": timed(lambda: get_onboarding_snapshot(vendor_onboarding, ref_no)),
+    }
+
+    warm = results["snapshot_warm"]["median_ms"]
+    return {
+        "status": "success",
+        "vendor_onboarding": vendor_onboarding,
+        "ref_no": ref_no,
+        "iterations": iterations,
+        "results": results,
+        "warm_speedup_vs_ultra_fast": round(results["legacy_ultra_fast"]["median_ms"] / warm, 1) if warm else None
+    }
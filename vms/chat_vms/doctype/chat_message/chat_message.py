@@ -685,4 +685,10 @@ def before_save_hook(self, method=None):
         self.process_message_content()
         
     except Exception as e:
-        frappe.log_error(f"Error in chat message before_save_hook: {str(e)}")
\ No newline at end of file
+        frappe.log_error(f"Error in chat message before_save_hook: {str(e)}")
+
+
+def on_doctype_update():
+    """Full-text and (chat_room, timestamp) indexes used by chat message search"""
+    from vms.APIs.notification_chatroom.chat_apis.message_search import ensure_message_search_index
+    ensure_message_search_index()
@@ -89,6 +89,7 @@ def get_chat_settings():
                 "allowed_file_types": doc.allowed_file_types or "image/*,application/pdf,text/*,.doc,.docx,.xls,.xlsx",
                 "default_room_max_members": doc.default_room_max_members or 50,
                 "enable_desktop_notifications": doc.enable_desktop_notifications if hasattr(doc, 'enable_desktop_notifications') else True,
+                "defer_desktop_notifications": doc.defer_desktop_notifications if hasattr(doc, 'defer_desktop_notifications') else False,
                 "enable_message_editing": doc.enable_message_editing if hasattr(doc, 'enable_message_editing') else True,
                 "message_edit_time_limit": doc.message_edit_time_limit or 24,
                 "enable_message_reactions": doc.enable_message_reactions if hasattr(doc, 'enable_message_reactions') else True,
@@ -106,6 +107,7 @@ def get_chat_settings():
                 "allowed_file_types": "image/*,application/pdf,text/*,.doc,.docx,.xls,.xlsx",
                 "default_room_max_members": 50,
                 "enable_desktop_notifications": True,
+                "defer_desktop_notifications": False,
                 "enable_message_editing": True,
                 "message_edit_time_limit": 24,
                 "enable_message_reactions": True,
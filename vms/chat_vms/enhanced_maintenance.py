@@ -5,6 +5,7 @@ import frappe
 from frappe.utils import now_datetime, add_days, add_to_date, cint
 from datetime import datetime, timedelta
 import json
+from vms.APIs.notification_chatroom.chat_apis.status_manager import chat_presence
 
 def update_user_online_status_enhanced():
     """
@@ -92,27 +93,21 @@ def update_user_activity_status_enhanced():
             AND sender != 'Guest'
         """
         
-        active_users = frappe.db.sql(active_users_query, as_dict=True)
+        active_users = frappe.db.sql(active_users_query, pluck=True)
         
+        # Update presence store for real-time status in one pipeline
+        chat_presence.touch_many(active_users)
+        chat_presence.expire_stale()
+        
+        # Update database if custom field exists
         users_updated = 0
-        for user_data in active_users:
-            user = user_data["user"]
-            
-            # Update cache for real-time status
-            cache_key = f"chat_user_status_{user}"
-            status_data = frappe.cache().get_value(cache_key) or {}
-            status_data.update({
-                "last_seen": str(now_datetime()),
-                "status": status_data.get("status", "online"),
-                "user": user
-            })
-            
-            frappe.cache().set_value(cache_key, status_data, expires_in_sec=900)  # 15 minutes
-            
-            # Update database if custom field exists
-            if frappe.db.exists("Custom Field", {"dt": "User", "fieldname": "custom_last_chat_activity"}):
-                frappe.db.set_value("User", user, "custom_last_chat_activity", now_datetime())
-                users_updated += 1
+        if active_users and frappe.db.exists("Custom Field", {"dt": "User", "fieldname": "custom_last_chat_activity"}):
+            frappe.db.sql("""
+                UPDATE `tabUser`
+                SET custom_last_chat_activity = %(now)s
+                WHERE name IN %(users)s
+            """, {"now": now_datetime(), "users": tuple(active_users)})
+            users_updated = len(active_users)
         
         frappe.db.commit()
         
@@ -330,29 +325,8 @@ def cleanup_user_status_cache_enhanced():
         # Update cron start status
         update_cron_status(cron_method_name, "Running", None)
         
-        # Get all users and clean their expired cache
-        users = frappe.get_all("User", 
-                              filters={"enabled": 1, "user_type": "System User"}, 
-                              fields=["name"])
-        
-        cleaned_count = 0
-        
-        for user in users:
-            cache_key = f"chat_user_status_{user.name}"
-            cached_data = frappe.cache().get_value(cache_key)
-            
-            if cached_data:
-                try:
-                    # Check if cache entry is older than 1 hour
-                    if cached_data.get("last_seen"):
-                        last_seen = datetime.fromisoformat(cached_data["last_seen"])
-                        if (now_datetime() - last_seen).total_seconds() > 3600:  # 1 hour
-                            frappe.cache().delete_value(cache_key)
-                            cleaned_count += 1
-                except Exception:
-                    # If there's any issue with the cached data, remove it
-                    frappe.cache().delete_value(cache_key)
-                    cleaned_count += 1
+        # Drop presence entries older than 1 hour with one ZREMRANGEBYSCORE
+        cleaned_count = chat_presence.expire_stale(ttl=3600)
         
         # Log success
         success_message = f"Successfully cleaned up {cleaned_count} expired user status cache entries."
@@ -0,0 +1,29 @@
+import json
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("vms-index-report")
+@click.option("--apply", is_flag=True, default=False, help="Create missing and rebuild drifted registered indexes before reporting")
+@pass_context
+def vms_index_report(context, apply=False):
+    """Report missing, redundant and unused indexes and the plans of the VMS hot queries"""
+    import frappe
+
+    from vms.utils.index_registry import apply_index_registry, build_index_report
+
+    site = get_site(context)
+    frappe.init(site=site)
+    frappe.connect()
+    try:
+        report = {}
+        if apply:
+            report["applied"] = apply_index_registry()
+        report.update(build_index_report())
+        click.echo(json.dumps(report, indent=2, default=str))
+    finally:
+        frappe.destroy()
+
+
+commands = [vms_index_report]
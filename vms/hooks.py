@@ -130,6 +130,21 @@ fixtures = [
 # before_install = "vms.install.before_install"
 # after_install = "vms.install.after_install"
 
+# Migration
+# ------------
+
+after_migrate = ["vms.utils.index_registry.apply_index_registry"]
+
+# Due-time SLA timers run by vms.utils.sla_scheduler.run_due_sla_timers
+sla_timers = [
+    "vms.material.doctype.cart_details.cart_details.get_cart_escalation_timers"
+]
+
+# OTP Verification rows are the OTP audit log; Log Settings clears them
+default_log_clearing_doctypes = {
+    "OTP Verification": 30
+}
+
 # Uninstallation
 # ------------
 
@@ -190,12 +205,65 @@ has_permission = {
 
 doc_events = {
     "Vendor Master": {
-        "on_update": "vms.vendor_onboarding.vendor_document_management.vendor_master_on_update"
+        "on_update": [
+            "vms.vendor_onboarding.vendor_document_management.vendor_master_on_update",
+            "vms.purchase.doctype.purchase_order.po_vm_validation_corn.on_vendor_master_update"
+        ]
+    },
+    "Company Vendor Code": {
+        "on_update": "vms.purchase.doctype.purchase_order.po_vm_validation_corn.on_company_vendor_code_change",
+        "on_trash": "vms.purchase.doctype.purchase_order.po_vm_validation_corn.on_company_vendor_code_change"
     },
     # "Vendor Onboarding":{
     #                      "before_save": "vms.vendor_onboarding.doctype.vendor_onboarding.vendor_onboarding.set_vendor_onboarding_status"},
+    "Vendor Onboarding": {
+        "after_insert": "vms.APIs.dashboard_api.dashboard_count_cache.invalidate_dashboard_counts",
+        "on_update": [
+            "vms.APIs.dashboard_api.dashboard_count_cache.invalidate_dashboard_counts",
+            "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+        ],
+        "on_trash": [
+            "vms.APIs.dashboard_api.dashboard_count_cache.invalidate_dashboard_counts",
+            "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+        ]
+    },
+    "Vendor Onboarding Company Details": {
+        "on_update": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot",
+        "on_trash": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+    },
+    "Legal Documents": {
+        "on_update": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot",
+        "on_trash": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+    },
+    "Vendor Onboarding Payment Details": {
+        "on_update": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot",
+        "on_trash": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+    },
+    "Vendor Onboarding Manufacturing Details": {
+        "on_update": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot",
+        "on_trash": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+    },
+    "Vendor Onboarding Certificates": {
+        "on_update": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot",
+        "on_trash": "vms.APIs.vendor_onboarding.onboarding_snapshot.invalidate_onboarding_snapshot"
+    },
     "Purchase Requisition Form":{"on_update":"vms.APIs.sap.erp_to_sap_pr.onupdate_pr"},
+    "Purchase Order": {
+        "on_update": "vms.APIs.purchase_api.po_list_cache.invalidate_po_list_cache",
+        "on_submit": "vms.APIs.purchase_api.po_list_cache.invalidate_po_list_cache",
+        "on_cancel": "vms.APIs.purchase_api.po_list_cache.invalidate_po_list_cache",
+        "on_update_after_submit": "vms.APIs.purchase_api.po_list_cache.invalidate_po_list_cache",
+        "on_trash": "vms.APIs.purchase_api.po_list_cache.invalidate_po_list_cache"
+    },
     "Version":{"after_insert":"vms.overrides.versions.get_version_data_universal"},
+    "Email Account": {
+        "on_update": "vms.utils.custom_send_mail.clear_email_account_cache",
+        "on_trash": "vms.utils.custom_send_mail.clear_email_account_cache"
+    },
+    "Email Template": {
+        "on_update": "vms.utils.custom_send_mail.clear_email_template_cache",
+        "on_trash": "vms.utils.custom_send_mail.clear_email_template_cache"
+    },
 
 
     "Chat Message": {
@@ -212,7 +280,10 @@ doc_events = {
         "on_trash": "vms.APIs.notification_chatroom.chat_apis.realtime_enhanced.handle_member_removed_notification"
     },
     "User": {
-        "on_update": "vms.chat_vms.maintenance.update_user_chat_permissions"
+        "on_update": [
+            "vms.chat_vms.maintenance.update_user_chat_permissions",
+            "vms.APIs.notification_chatroom.chat_apis.realtime_enhanced.invalidate_sender_profile"
+        ]
     }
 }
 # doc_events = {
@@ -236,7 +307,6 @@ scheduler_events = {
         "vms.chat_vms.maintenance.cleanup_old_messages",
         "vms.chat_vms.maintenance.update_room_statistics",
         "vms.APIs.notification_chatroom.chat_apis.realtime_enhanced.cleanup_user_status_cache",  # New
-        "vms.vms.doctype.otp_verification.otp_verification.cleanup_old_otps",
         "vms.vms.doctype.vendor_aging_tracker.vendor_aging_tracker.refresh_all_aging_trackers",
         "vms.purchase.doctype.cart_aging_track.cart_aging_track.update_all_cart_aging_tracks",
         "vms.material.doctype.material_aging_track.material_aging_track.update_all_mo_aging_tracks",
@@ -260,24 +330,25 @@ scheduler_events = {
         ],
         "*/15 * * * *": [  # Every 15 minutes
             "vms.chat_vms.maintenance.update_user_online_status",
-            "vms.purchase.doctype.purchase_order.purchase_order.send_dispatch_notifications"
+            "vms.APIs.dashboard_api.dashboard_count_cache.refresh_dashboard_count_cache"
         ],
         "*/1 * * * *": [  # Every minute - for real-time status updates
             "vms.APIs.notification_chatroom.chat_apis.realtime_enhanced.update_user_activity_status",
-            "vms.vms.doctype.otp_verification.otp_verification.expire_otps"
+            "vms.APIs.sap.sap_inbound_queue.recover_sap_inbound_queue",
+            "vms.purchase.doctype.purchase_order.purchase_order.send_dispatch_notifications",
+            "vms.utils.sla_scheduler.run_due_sla_timers"
         ],
         "0 */2 * * *": [  # Every 2 hours - cleanup stuck SAP status
             "vms.vendor_onboarding.doctype.vendor_onboarding.vendor_onboarding.cleanup_stuck_sap_status"
         ],
-        "30 */2 * * *": [  # Every 2 hours at minute 30 - sync vendor documents
+        "30 */2 * * *": [  # Every 2 hours at minute 30 - PO vendor code reconciliation (keyset pass)
             "vms.purchase.doctype.purchase_order.po_vm_validation_corn.enqueue_bulk_validate_vendor_codes"
         ],
         "*/5 * * * *": [
-            "vms.material.doctype.cart_details.cart_details.process_cart_escalations"
+            "vms.vendor_onboarding.doctype.vendor_import_staging.staging_bulk_job.recover_vendor_import_jobs"
         ],
         "*/10 * * * *": [
-            "vms.vendor_onboarding.doctype.vendor_import_staging.vis_stuck_data_handle.monitor_background_jobs",
-            "vms.vms.doctype.otp_verification.otp_verification.delete_expired_otps"
+            "vms.vendor_onboarding.doctype.vendor_import_staging.vis_stuck_data_handle.monitor_background_jobs"
         ],
         "*/30 * * * *": [
             "vms.vendor_onboarding.doctype.vendor_import_staging.vis_stuck_data_handle.monitor_queued_records",
@@ -6,7 +6,8 @@ import time
 from frappe.model.document import Document
 from frappe.utils.background_jobs import enqueue
 import json
-from vms.utils.custom_send_mail import custom_sendmail
+from vms.utils.custom_send_mail import custom_sendmail, send_many
+from vms.utils.sla_scheduler import SLATimer, run_sla_timer
 from datetime import datetime, timedelta
 from frappe.utils import now_datetime, add_to_date, get_datetime
 import time
@@ -172,58 +173,264 @@ class CartDetails(Document):
 
 
 
+# Cart escalations run on the due-time SLA timers (vms.utils.sla_scheduler): every minute
+# the due carts are claimed, mailed in one batch grouped by recipient, and moved to the next
+# escalation_status with one UPDATE.
+
+CART_ESCALATION_FILTERS = {"purchase_team_acknowledgement": 0, "asked_to_modify": 0}
+CART_ESCALATION_FIELDS = ("user", "category_type", "cart_date")
+
+
+def get_cart_escalation_timers():
+    """sla_timers hook: first escalation to the alternate purchase team, second to the Purchase Heads"""
+    return [
+        SLATimer(
+            "cart_first_escalation",
+            "Cart Details",
+            due_field="first_escalation_time",
+            state_field="escalation_status",
+            from_state="Pending",
+            to_state="First Escalation Sent",
+            handler=send_first_escalations,
+            fields=CART_ESCALATION_FIELDS,
+            filters=CART_ESCALATION_FILTERS,
+            set_values={"mailed_to_alternate_purchase_team": 1}
+        ),
+        SLATimer(
+            "cart_second_escalation",
+            "Cart Details",
+            due_field="second_escalation_time",
+            state_field="escalation_status",
+            from_state="First Escalation Sent",
+            to_state="Second Escalation Sent",
+            handler=send_second_escalations,
+            fields=CART_ESCALATION_FIELDS,
+            filters=CART_ESCALATION_FILTERS,
+            set_values={"mail_sent_to_hod": 1}
+        ),
+    ]
+
+
 @frappe.whitelist()
 def process_cart_escalations():
-    current_time = now_datetime()
-    
-    carts_for_first_escalation = frappe.get_all(
-        "Cart Details",
-        filters={
-            "first_escalation_time": ["<=", current_time],
-            "escalation_status": "Pending",
-            "purchase_team_acknowledgement": 0,
-            "asked_to_modify": 0
-        },
-        fields=["name"]
-    )
-    
-    for cart in carts_for_first_escalation:
-        try:
-            cart_doc = frappe.get_doc("Cart Details", cart.name)
-            send_mail_alternate_purchase(cart_doc, method=None)
-            # cart_doc.escalation_status = "First Escalation Sent"
-            # cart_doc.save(ignore_permissions=True)
-            frappe.db.commit()
-        except Exception as e:
-            frappe.log_error(f"First escalation failed for {cart.name}: {str(e)}", "Cart Escalation Error")
-    
-    carts_for_second_escalation = frappe.get_all(
-        "Cart Details",
-        filters={
-            "second_escalation_time": ["<=", current_time],
-            "escalation_status": "First Escalation Sent",
-            "purchase_team_acknowledgement": 0,
-            "asked_to_modify": 0
-        },
-        fields=["name"]
-    )
-    
-    for cart in carts_for_second_escalation:
-        try:
-            cart_doc = frappe.get_doc("Cart Details", cart.name)
-            send_mail_purchase_hod(cart_doc, method=None)
-            # cart_doc.escalation_status = "Second Escalation Sent"
-            # cart_doc.save(ignore_permissions=True)
-            frappe.db.commit()
-        except Exception as e:
-            frappe.log_error(f"Second escalation failed for {cart.name}: {str(e)}", "Cart Escalation Error")
-    
+    """Run one batch of both cart escalation timers now"""
+    first, second = (run_sla_timer(timer) for timer in get_cart_escalation_timers())
     return {
-        "first_escalation_count": len(carts_for_first_escalation),
-        "second_escalation_count": len(carts_for_second_escalation)
+        "first_escalation_count": first["completed"],
+        "second_escalation_count": second["completed"]
     }
 
 
+def _load_cart_escalation_context(carts):
+    """Employee names, product rows and Category Master recipients of a batch of carts, in bulk"""
+    cart_names = [cart.name for cart in carts]
+
+    employee_names = dict(frappe.get_all(
+        "Employee",
+        filters={"user_id": ["in", list({cart.user for cart in carts if cart.user})]},
+        fields=["user_id", "full_name"],
+        as_list=True
+    ))
+
+    products = {}
+    for row in frappe.get_all(
+        "Cart Master",
+        filters={"parent": ["in", cart_names], "parenttype": "Cart Details"},
+        fields=["parent", "assest_code", "product_name", "product_quantity", "uom",
+                "product_price", "lead_time", "user_specifications"],
+        order_by="parent, idx"
+    ):
+        products.setdefault(row.parent, []).append(row)
+
+    product_ids = list({row.product_name for rows in products.values() for row in rows if row.product_name})
+    product_names = dict(frappe.get_all(
+        "VMS Product Master",
+        filters={"name": ["in", product_ids]},
+        fields=["name", "product_name"],
+        as_list=True
+    )) if product_ids else {}
+
+    categories = {
+        category.name: category
+        for category in frappe.get_all(
+            "Category Master",
+            filters={"name": ["in", list({cart.category_type for cart in carts if cart.category_type})]},
+            fields=["name", "alternative_purchase_team", "purchase_team_user"]
+        )
+    }
+
+    return frappe._dict(
+        employee_names=employee_names,
+        products=products,
+        product_names=product_names,
+        categories=categories
+    )
+
+
+def _format_cart_date(cart_date):
+    if not cart_date:
+        return "N/A"
+    try:
+        return cart_date.strftime("%d-%m-%Y")
+    except Exception:
+        return str(cart_date)
+
+
+def _cart_escalation_details(cart, context):
+    """Cart ID / date / submitter and the product table of one cart"""
+    table_html = """
+        <table border="1" cellpadding="5" cellspacing="0" style="border-collapse: collapse;">
+            <tr>
+                <th>Asset Code</th>
+                <th>Product Name</th>
+                <th>Product Quantity</th>
+                <th>UOM</th>
+                <th>Product Price</th>
+                <th>Lead Time</th>
+                <th>User Specifications</th>
+            </tr>
+    """
+    for row in context.products.get(cart.name, []):
+        table_html += f"""
+            <tr>
+                <td>{row.assest_code or ''}</td>
+                <td>{context.product_names.get(row.product_name) or ''}</td>
+                <td>{row.product_quantity or ''}</td>
+                <td>{row.uom or ''}</td>
+                <td>{row.product_price or ''}</td>
+                <td>{row.lead_time or ''}</td>
+                <td>{row.user_specifications or ''}</td>
+            </tr>
+        """
+    table_html += "</table>"
+
+    return f"""
+        <p><b>Cart ID:</b> {cart.name}</p>
+        <p><b>Cart Date:</b> {_format_cart_date(cart.cart_date)}</p>
+        <p><b>Submitted by:</b> {context.employee_names.get(cart.user) or cart.user}</p>
+        <p><b>Cart Products:</b></p>
+        {table_html}
+    """
+
+
+def _send_grouped_escalations(groups, build_message):
+    """
+    One mail per recipient group over one SMTP session; returns the carts that were mailed.
+    Carts of a failed mail are left out, the SLA timer defers and retries them.
+    """
+    messages = []
+    message_carts = []
+    for recipients, carts in groups.items():
+        subject, message = build_message(carts)
+        messages.append({"recipients": list(recipients), "subject": subject, "message": message})
+        message_carts.append(carts)
+
+    if not messages:
+        return []
+
+    # Not left Not Sent in Email Queue as well, a retried cart would be mailed twice
+    failed = set(send_many(messages, queue_failed=False)["failed_indices"])
+    return [
+        cart.name
+        for index, carts in enumerate(message_carts) if index not in failed
+        for cart in carts
+    ]
+
+
+def send_first_escalations(carts):
+    """First escalation handler: carts grouped by their alternate purchase team"""
+    context = _load_cart_escalation_context(carts)
+
+    groups = {}
+    for cart in carts:
+        category = context.categories.get(cart.category_type)
+        if category and category.alternative_purchase_team:
+            groups.setdefault((category.alternative_purchase_team,), []).append(cart)
+
+    def build_message(group_carts):
+        details = "".join(_cart_escalation_details(cart, context) for cart in group_carts)
+        if len(group_carts) == 1:
+            employee_name = context.employee_names.get(group_carts[0].user)
+            subject = f"New Cart Details Submitted by {employee_name}"
+            intro = f"<p>A new cart details submission has been made by <b>{employee_name}</b>.</p>"
+        else:
+            subject = f"{len(group_carts)} Cart Details Pending Review"
+            intro = f"<p>{len(group_carts)} cart details submissions are pending review.</p>"
+
+        return subject, f"""
+            <p>Dear Purchase Team,</p>
+            {intro}
+            <p> please review the details and take necessary actions.</p>
+            {details}
+            <p>Thank you!</p>
+        """
+
+    return _send_grouped_escalations(groups, build_message)
+
+
+def send_second_escalations(carts):
+    """Second escalation handler: carts grouped by the Purchase Heads of their purchase team"""
+    context = _load_cart_escalation_context(carts)
+
+    purchase_team_users = list({
+        category.purchase_team_user for category in context.categories.values() if category.purchase_team_user
+    })
+    teams = dict(frappe.get_all(
+        "Employee",
+        filters={"user_id": ["in", purchase_team_users]},
+        fields=["user_id", "team"],
+        as_list=True
+    )) if purchase_team_users else {}
+
+    purchase_heads = {}
+    if teams:
+        for head in frappe.get_all(
+            "Employee",
+            filters={
+                "team": ["in", list(set(teams.values()))],
+                "designation": "Purchase Head",
+                "status": "Active"  # Only active employees
+            },
+            fields=["team", "user_id"]
+        ):
+            if head.user_id:
+                purchase_heads.setdefault(head.team, set()).add(head.user_id)
+
+    groups = {}
+    cart_teams = {}
+    for cart in carts:
+        category = context.categories.get(cart.category_type)
+        team = teams.get(category.purchase_team_user) if category else None
+        if team and purchase_heads.get(team):
+            cart_teams[cart.name] = team
+            groups.setdefault(tuple(sorted(purchase_heads[team])), []).append(cart)
+
+    def build_message(group_carts):
+        details = "".join(
+            f"{_cart_escalation_details(cart, context)}<p><b>Team:</b> {cart_teams[cart.name]}</p>"
+            for cart in group_carts
+        )
+        if len(group_carts) == 1:
+            employee_name = context.employee_names.get(group_carts[0].user)
+            subject = f"Cart Approval Required - Pending Review by {employee_name}"
+            intro = f"<p>A cart submission by <b>{employee_name}</b> is pending review and requires your approval.</p>"
+        else:
+            subject = f"Cart Approval Required - {len(group_carts)} Carts Pending Review"
+            intro = f"<p>{len(group_carts)} cart submissions are pending review and require your approval.</p>"
+
+        return subject, f"""
+            <p>Dear Purchase Head,</p>
+            {intro}
+            <p>The purchase team has not yet reviewed these carts, so they have been escalated to you for further action.</p>
+            <p>Please review the cart details below and take necessary actions:</p>
+            {details}
+            <p>Please approve or provide further instructions for these cart submissions.</p>
+            <p>Thank you!</p>
+        """
+
+    return _send_grouped_escalations(groups, build_message)
+
+
 
 
 
@@ -1,4 +1,6 @@
 
+import time
+
 import frappe
 from frappe import _
 
@@ -82,85 +84,295 @@ from frappe import _
 
 
 
+# Parent doctype -> child history doctype written on Version.after_insert
+VERSION_HISTORY_DOCTYPES = {
+    "Request For Quotation": "RFQ Item History",
+    "Quotation": "RFQ Item History",
+    "Purchase Order": "Purchase Order History",
+    "Vendor Onboarding": "Vendor Onboarding History"
+}
+
+# Doctypes that only record changes to the listed fields (row changes are ignored).
+# Can be extended / overridden per site with site_config:
+#   "vms_version_history": {"fields": {"Purchase Order": ["po_number", ...]}, "mode": "deferred"}
+DEFAULT_FIELD_ALLOW_LIST = {
+    "Vendor Onboarding": [
+        "company_name", "company", "purchase_organization",
+        "order_currency", "purchase_group", "terms_of_payment",
+        "account_group", "enterprise", "reconciliation_account",
+        "qa_team_remarks", "incoterms"
+    ]
+}
+
+VERSION_HISTORY_PARENTFIELD = "version_history"
+
+HISTORY_INSERT_FIELDS = [
+    "name", "parent", "parenttype", "parentfield", "field_json", "date_and_time",
+    "creation", "modified", "modified_by", "owner", "docstatus", "idx"
+]
+
+
+def get_version_history_settings():
+    """Site level settings: {"fields": {doctype: [fieldnames]}, "mode": "inline" | "deferred"}"""
+    settings = frappe.conf.get("vms_version_history") or {}
+    field_allow_list = dict(DEFAULT_FIELD_ALLOW_LIST)
+    field_allow_list.update(settings.get("fields") or {})
+
+    return {
+        "fields": field_allow_list,
+        "mode": settings.get("mode") or "inline"
+    }
+
+
+def filter_version_changes(ref_doctype, version_data, field_allow_list):
+    """Return (changed, row_changed) limited to the fields that should be recorded"""
+    field_changes = version_data.get("changed", [])
+    allowed_fields = field_allow_list.get(ref_doctype)
+
+    if allowed_fields:
+        allowed_fields = set(allowed_fields)
+        return [c for c in field_changes if len(c) >= 2 and c[0] in allowed_fields], []
+
+    child_table_changes = version_data.get("row_changed", [])
+    return (
+        [c for c in field_changes if len(c) >= 2 and c[0] != VERSION_HISTORY_PARENTFIELD],
+        [c for c in child_table_changes if len(c) >= 2 and c[0] != VERSION_HISTORY_PARENTFIELD]
+    )
+
+
 @frappe.whitelist()
 def get_version_data_universal(self, method=None):
-    """Universal version tracking for both RFQ and Quotation"""
+    """Universal version tracking for RFQ, Quotation, Purchase Order and Vendor Onboarding"""
+    # Skip-fast: this hook runs for every Version in the system, bail out before any parsing
+    if self.ref_doctype not in VERSION_HISTORY_DOCTYPES or not self.docname:
+        return
+    if frappe.flags.skip_version_history:
+        return
+
     try:
-        
-        doctype_mapping = {
-            "Request For Quotation": "RFQ Item History",
-            "Quotation": "RFQ Item History",
-            "Purchase Order": "Purchase Order History",
-            "Vendor Onboarding": "Vendor Onboarding History"
+        settings = get_version_history_settings()
+
+        version_data = frappe.parse_json(self.data)
+        meaningful_changes, meaningful_row_changes = filter_version_changes(
+            self.ref_doctype, version_data, settings["fields"]
+        )
+
+        if not meaningful_changes and not meaningful_row_changes:
+            return
+
+        entry = {
+            "ref_doctype": self.ref_doctype,
+            "docname": self.docname,
+            "changed": meaningful_changes,
+            "row_changed": meaningful_row_changes,
+            "date_and_time": str(self.creation),
+            "user": frappe.session.user
         }
-        
-        if self.ref_doctype in doctype_mapping and self.docname:
-            
-            version_data = frappe.parse_json(self.data)
-            
-            field_changes = version_data.get("changed", [])
-            child_table_changes = version_data.get("row_changed", [])
-            
-            if self.ref_doctype == "Vendor Onboarding":
-                allowed_fields = [
-                    "company_name", "company", "purchase_organization", 
-                    "order_currency", "purchase_group", "terms_of_payment", 
-                    "account_group", "enterprise", "reconciliation_account", 
-                    "qa_team_remarks", "incoterms"
-                ]
-                
-                meaningful_changes = [
-                    c for c in field_changes 
-                    if len(c) >= 2 and c[0] in allowed_fields
-                ]
-                meaningful_row_changes = []
-            else:
-                meaningful_changes = [c for c in field_changes if len(c) >= 2 and c[0] != "version_history"]
-                meaningful_row_changes = [c for c in child_table_changes if len(c) >= 2 and c[0] != "version_history"]
-            
-            
-            if not meaningful_changes and not meaningful_row_changes:
-                return
-            
-            # Prepare filtered data
-            filtered_data = {
-                "changed": meaningful_changes,
-                "row_changed": meaningful_row_changes
-            }
-            
-            # Get the correct child table doctype
-            child_doctype = doctype_mapping[self.ref_doctype]
-            
-            # Create child table entry
-            version_history_doc = frappe.get_doc({
-                "doctype": child_doctype,
-                "parent": self.docname,
-                "parenttype": self.ref_doctype,
-                "parentfield": "version_history",
-                "field_json": frappe.as_json(filtered_data),
-                "date_and_time": self.creation
-            })
-            
-            # Insert without triggering document events
-            version_history_doc.insert(ignore_permissions=True, ignore_mandatory=True)
-            
-            # Update parent's modified timestamp
-            frappe.db.set_value(self.ref_doctype, self.docname, {
-                "modified": frappe.utils.now(),
-                "modified_by": frappe.session.user
-            }, update_modified=False)
-            
-            # Clear cache and send reload signal
-            frappe.clear_document_cache(self.ref_doctype, self.docname)
-            
-            frappe.publish_realtime(
-                event="refresh_form",
-                message={
-                    "doctype": self.ref_doctype,
-                    "docname": self.docname
-                },
-                user=frappe.session.user
-            )
+
+        if settings["mode"] == "deferred":
+            queue_version_history_entry(entry)
+        else:
+            write_version_history_entries([entry])
 
     except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "get_version_data_universal Error")
\ No newline at end of file
+        frappe.log_error(frappe.get_traceback(), "get_version_data_universal Error")
+
+
+def queue_version_history_entry(entry):
+    """
+    Buffer a history entry for the current request. Several versions of the same document
+    are coalesced into one entry and the buffer is handed to a background job after commit.
+    """
+    buffer = getattr(frappe.local, "vms_version_history_buffer", None)
+
+    if buffer is None:
+        buffer = frappe.local.vms_version_history_buffer = {}
+        frappe.db.after_commit.add(flush_version_history_buffer)
+        frappe.db.after_rollback.add(clear_version_history_buffer)
+
+    key = (entry["ref_doctype"], entry["docname"])
+    if key in buffer:
+        buffer[key] = coalesce_version_history_entries(buffer[key], entry)
+    else:
+        buffer[key] = entry
+
+
+def coalesce_version_history_entries(previous, current):
+    """Merge two entries of the same document: keep the first old value and the last new value per field"""
+    changed = {c[0]: list(c) for c in previous["changed"]}
+    for change in current["changed"]:
+        if change[0] in changed and len(change) >= 3:
+            changed[change[0]][-1] = change[-1]
+        else:
+            changed[change[0]] = list(change)
+
+    return {
+        "ref_doctype": previous["ref_doctype"],
+        "docname": previous["docname"],
+        "changed": list(changed.values()),
+        "row_changed": previous["row_changed"] + current["row_changed"],
+        "date_and_time": current["date_and_time"],
+        "user": current["user"]
+    }
+
+
+def clear_version_history_buffer():
+    frappe.local.vms_version_history_buffer = None
+
+
+def flush_version_history_buffer():
+    buffer = getattr(frappe.local, "vms_version_history_buffer", None)
+    clear_version_history_buffer()
+
+    if not buffer:
+        return
+
+    frappe.enqueue(
+        "vms.overrides.versions.write_version_history_entries",
+        queue="short",
+        entries=list(buffer.values()),
+        commit=True
+    )
+
+
+def write_version_history_entries(entries, commit=False):
+    """
+    Write history rows with one bulk insert per child doctype and one UPDATE per parent doctype
+    instead of a full document insert per Version.
+    """
+    if not entries:
+        return
+
+    now = frappe.utils.now()
+    rows_by_child_doctype = {}
+    docnames_by_parent_doctype = {}
+
+    for entry in entries:
+        child_doctype = VERSION_HISTORY_DOCTYPES[entry["ref_doctype"]]
+        rows_by_child_doctype.setdefault(child_doctype, []).append(entry)
+        docnames_by_parent_doctype.setdefault(entry["ref_doctype"], set()).add(entry["docname"])
+
+    for child_doctype, child_entries in rows_by_child_doctype.items():
+        next_idx = get_next_history_idx(child_doctype, child_entries)
+        values = []
+
+        for entry in child_entries:
+            key = (entry["ref_doctype"], entry["docname"])
+            next_idx[key] = next_idx.get(key, 0) + 1
+            values.append((
+                frappe.generate_hash(length=10),
+                entry["docname"],
+                entry["ref_doctype"],
+                VERSION_HISTORY_PARENTFIELD,
+                frappe.as_json({"changed": entry["changed"], "row_changed": entry["row_changed"]}),
+                entry["date_and_time"],
+                now,
+                now,
+                entry["user"],
+                entry["user"],
+                0,
+                next_idx[key]
+            ))
+
+        frappe.db.bulk_insert(child_doctype, HISTORY_INSERT_FIELDS, values)
+
+    users = {(entry["ref_doctype"], entry["docname"]): entry["user"] for entry in entries}
+
+    for parent_doctype, docnames in docnames_by_parent_doctype.items():
+        frappe.db.sql(f"""
+            UPDATE `tab{parent_doctype}`
+            SET modified = %(now)s, modified_by = %(user)s
+            WHERE name IN %(docnames)s
+        """, {"now": now, "user": entries[-1]["user"], "docnames": tuple(docnames)})
+
+    if commit:
+        frappe.db.commit()
+
+    # Clear cache and send reload signal
+    for (ref_doctype, docname), user in users.items():
+        frappe.clear_document_cache(ref_doctype, docname)
+        frappe.publish_realtime(
+            event="refresh_form",
+            message={
+                "doctype": ref_doctype,
+                "docname": docname
+            },
+            user=user
+        )
+
+
+def get_next_history_idx(child_doctype, entries):
+    """Current max idx per (parenttype, parent) for the given entries, in one query"""
+    parents = {(entry["ref_doctype"], entry["docname"]) for entry in entries}
+    parenttypes = tuple({p[0] for p in parents})
+    docnames = tuple({p[1] for p in parents})
+
+    rows = frappe.db.sql(f"""
+        SELECT parenttype, parent, MAX(idx)
+        FROM `tab{child_doctype}`
+        WHERE parentfield = %(parentfield)s
+            AND parenttype IN %(parenttypes)s
+            AND parent IN %(docnames)s
+        GROUP BY parenttype, parent
+    """, {"parentfield": VERSION_HISTORY_PARENTFIELD, "parenttypes": parenttypes, "docnames": docnames})
+
+    return {(row[0], row[1]): row[2] or 0 for row in rows if (row[0], row[1]) in parents}
+
+
+def benchmark_version_history_hook(doctype="Purchase Order", iterations=200):
+    """
+    Measure the cost of the version history hook on synthetic Version rows of a throwaway docname.
+    Not whitelisted, run with:
+        bench --site <site> execute vms.overrides.versions.benchmark_version_history_hook --kwargs "{'doctype': 'Purchase Order'}"
+    History rows are written with plain SQL inside a savepoint that is rolled back; no document is loaded or saved.
+    """
+    if doctype not in VERSION_HISTORY_DOCTYPES:
+        frappe.throw(_("{0} is not tracked by the version history hook").format(doctype))
+
+    iterations = frappe.utils.cint(iterations) or 200
+    docname = f"version-history-benchmark-{frappe.generate_hash(length=10)}"
+    allowed_fields = get_version_history_settings()["fields"].get(doctype)
+    fieldname = allowed_fields[0] if allowed_fields else "version_history_benchmark"
+
+    versions = [
+        frappe._dict(
+            ref_doctype=doctype,
+            docname=docname,
+            creation=frappe.utils.now(),
+            data=frappe.as_json({"changed": [[fieldname, f"old {i}", f"new {i}"]], "row_changed": []})
+        )
+        for i in range(iterations)
+    ]
+
+    results = {}
+    for label, skip in (("with_hook", False), ("without_hook", True)):
+        timings = []
+        frappe.flags.skip_version_history = skip
+        frappe.db.savepoint("version_history_benchmark")
+        try:
+            for version in versions:
+                started_at = time.perf_counter()
+                get_version_data_universal(version)
+                timings.append((time.perf_counter() - started_at) * 1000)
+        finally:
+            frappe.flags.skip_version_history = False
+            frappe.db.rollback(save_point="version_history_benchmark")
+            clear_version_history_buffer()
+
+        timings.sort()
+        results[label] = {
+            "iterations": iterations,
+            "avg_ms": round(sum(timings) / len(timings), 3),
+            "p50_ms": round(timings[len(timings) // 2], 3),
+            "max_ms": round(timings[-1], 3)
+        }
+
+    # Cost of the skip-fast path for an untracked doctype
+    untracked_version = frappe._dict(ref_doctype="ToDo", docname="benchmark", data="{}")
+    started_at = time.perf_counter()
+    for i in range(1000):
+        get_version_data_universal(untracked_version)
+    results["skip_fast_path_us"] = round((time.perf_counter() - started_at) * 1000, 3)
+
+    results["hook_overhead_ms"] = round(results["with_hook"]["avg_ms"] - results["without_hook"]["avg_ms"], 3)
+    return results
@@ -0,0 +1,9 @@
+import frappe
+
+
+def execute():
+    """Create the FULLTEXT search index on existing Chat Message tables"""
+    from vms.APIs.notification_chatroom.chat_apis.message_search import ensure_message_search_index
+
+    if frappe.db.table_exists("Chat Message"):
+        ensure_message_search_index()
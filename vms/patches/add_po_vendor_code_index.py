@@ -0,0 +1,9 @@
+import frappe
+
+
+def execute():
+    """Create the (company_code, vendor_code) index on existing Purchase Order tables"""
+    from vms.purchase.doctype.purchase_order.po_vm_validation_corn import ensure_po_vendor_index
+
+    if frappe.db.table_exists("Purchase Order"):
+        ensure_po_vendor_index()
@@ -0,0 +1,7 @@
+import frappe
+
+
+def execute():
+    """OTPs now live in Redis; drop the pre-audit OTP Verification rows that still hold plain OTPs"""
+    if frappe.db.table_exists("OTP Verification"):
+        frappe.db.delete("OTP Verification", {"event": ("is", "not set")})
@@ -3,7 +3,7 @@
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import now_datetime, get_datetime, time_diff_in_seconds, add_to_date
+from frappe.utils import now_datetime, get_datetime, time_diff_in_seconds, add_to_date, cint, flt
 from datetime import datetime, timedelta
 
 
@@ -586,90 +586,233 @@ def update_all_cart_aging_tracks():
 	}
 
 
+CART_AGING_BULK_CHUNK_SIZE = 1000
+
+CART_AGING_COMPUTED_FIELDS = (
+	"cart_creation_datetime",
+	"cart_approval_datetime",
+	"pr_erp_link",
+	"pr_creation_datetime",
+	"pr_sap_link",
+	"sap_pr_creation_datetime",
+	"cart_approval_duration",
+	"cart_to_pr_creation",
+	"erp_to_sap_pr_creation",
+	"cart_creation_to_sap_pr_creation",
+	"approved_cart_to_sap_creation",
+	"days_since_creation",
+	"aging_status"
+)
+
+
+def _positive_seconds(end, start):
+	if not (end and start):
+		return None
+	duration_seconds = time_diff_in_seconds(get_datetime(end), get_datetime(start))
+	return duration_seconds if duration_seconds > 0 else 0
+
+
+def _get_aging_status(days):
+	if not days or days <= 30:
+		return "New (0-30 days)"
+	elif days <= 90:
+		return "Recent (31-90 days)"
+	elif days <= 180:
+		return "Established (91-180 days)"
+	return "Long Term (180+ days)"
+
+
+def _is_cart_approved(row):
+	"""Same rules as CartAgingTrack.check_cart_approval_status, on a joined row"""
+	if row.hod_approved != 1:
+		return False
+	if row.is_requested_second_stage_approval != 1:
+		return True
+	return row.second_stage_approved == 1
+
+
+def fetch_cart_aging_chunk(after_name, limit):
+	"""
+	One keyset-paginated pass joining Cart Aging Track -> Cart Details ->
+	Purchase Requisition Webform -> Purchase Requisition Form
+	"""
+	return frappe.db.sql("""
+		SELECT
+			cat.name, cat.cart_id,
+			cat.cart_creation_datetime, cat.cart_approval_datetime,
+			cat.pr_erp_link, cat.pr_creation_datetime,
+			cat.pr_sap_link, cat.sap_pr_creation_datetime,
+			cat.cart_approval_duration, cat.cart_to_pr_creation, cat.erp_to_sap_pr_creation,
+			cat.cart_creation_to_sap_pr_creation, cat.approved_cart_to_sap_creation,
+			cat.days_since_creation, cat.aging_status,
+			cd.name AS cd_name, cd.creation AS cd_creation,
+			cd.hod_approved, cd.is_requested_second_stage_approval, cd.second_stage_approved,
+			cd.purchase_requisition_form AS cd_pr_webform,
+			prw.creation AS prw_creation, prw.form_status AS prw_form_status,
+			prw.purchase_requisition_form_link AS prw_sap_pr,
+			prf.name AS prf_name, prf.creation AS prf_creation
+		FROM `tabCart Aging Track` cat
+		LEFT JOIN `tabCart Details` cd ON cd.name = cat.cart_id
+		LEFT JOIN `tabPurchase Requisition Webform` prw ON prw.name = cd.purchase_requisition_form
+		LEFT JOIN `tabPurchase Requisition Form` prf
+			ON prf.name = prw.purchase_requisition_form_link AND prw.form_status = 'PR Created'
+		WHERE cat.name > %(after_name)s
+		ORDER BY cat.name
+		LIMIT %(limit)s
+	""", {"after_name": after_name, "limit": limit}, as_dict=True)
+
+
+def compute_cart_aging_values(row, current_datetime):
+	"""
+	In-memory equivalent of update_cart_aging_track_from_cart + CartAgingTrack.validate/before_save
+	for one joined row. Returns the new values for CART_AGING_COMPUTED_FIELDS.
+	"""
+	values = {field: row.get(field) for field in CART_AGING_COMPUTED_FIELDS}
+
+	if row.cd_name:
+		if row.cd_creation:
+			values["cart_creation_datetime"] = row.cd_creation
+
+		if row.cd_pr_webform:
+			values["pr_erp_link"] = row.cd_pr_webform
+			if row.prw_creation:
+				values["pr_creation_datetime"] = row.prw_creation
+
+			if row.prf_name:
+				values["pr_sap_link"] = row.prf_name
+				values["sap_pr_creation_datetime"] = row.prf_creation
+
+		if _is_cart_approved(row) and not values["cart_approval_datetime"]:
+			values["cart_approval_datetime"] = current_datetime
+
+	if values["cart_creation_datetime"]:
+		values["days_since_creation"] = (current_datetime - get_datetime(values["cart_creation_datetime"])).days
+	values["aging_status"] = _get_aging_status(values["days_since_creation"])
+
+	duration_map = {
+		"cart_approval_duration": ("cart_approval_datetime", "cart_creation_datetime"),
+		"cart_to_pr_creation": ("pr_creation_datetime", "cart_creation_datetime"),
+		"erp_to_sap_pr_creation": ("sap_pr_creation_datetime", "pr_creation_datetime"),
+		"cart_creation_to_sap_pr_creation": ("sap_pr_creation_datetime", "cart_creation_datetime"),
+		"approved_cart_to_sap_creation": ("sap_pr_creation_datetime", "cart_approval_datetime")
+	}
+	for field, (end_field, start_field) in duration_map.items():
+		duration = _positive_seconds(values[end_field], values[start_field])
+		if duration is not None:
+			values[field] = duration
+
+	return values
+
+
+def _has_changed(old, new):
+	if old is None or new is None:
+		return old != new
+	if isinstance(new, datetime):
+		return get_datetime(old) != new
+	if isinstance(new, (int, float)):
+		return flt(old) != flt(new)
+	return old != new
+
+
+def write_cart_aging_chunk(changed_rows, modified):
+	"""Multi-row UPDATE ... JOIN over a derived table of the changed rows"""
+	if not changed_rows:
+		return 0
+
+	select_columns = ", ".join(["%s AS name"] + [f"%s AS `{field}`" for field in CART_AGING_COMPUTED_FIELDS])
+	derived = " UNION ALL ".join([f"SELECT {select_columns}"] * len(changed_rows))
+	params = []
+	for name, values in changed_rows:
+		params.append(name)
+		params.extend(values[field] for field in CART_AGING_COMPUTED_FIELDS)
+
+	assignments = ", ".join(f"cat.`{field}` = src.`{field}`" for field in CART_AGING_COMPUTED_FIELDS)
+	params.append(modified)
+
+	frappe.db.sql(f"""
+		UPDATE `tabCart Aging Track` cat
+		INNER JOIN ({derived}) src ON src.name = cat.name
+		SET {assignments}, cat.modified = %s
+	""", params)
+
+	return len(changed_rows)
+
+
+def bulk_recompute_cart_aging_tracks(chunk_size=CART_AGING_BULK_CHUNK_SIZE):
+	"""
+	Set-based recompute of every Cart Aging Track: one joined read per chunk,
+	durations computed in memory, one multi-row UPDATE and one commit per chunk.
+	"""
+	chunk_size = cint(chunk_size) or CART_AGING_BULK_CHUNK_SIZE
+	current_datetime = now_datetime()
+	last_name = ""
+	scanned = 0
+	updated = 0
+	errors = 0
+
+	while True:
+		rows = fetch_cart_aging_chunk(last_name, chunk_size)
+		if not rows:
+			break
+
+		last_name = rows[-1].name
+		scanned += len(rows)
+		changed_rows = []
+
+		for row in rows:
+			try:
+				values = compute_cart_aging_values(row, current_datetime)
+				if any(_has_changed(row.get(field), values[field]) for field in CART_AGING_COMPUTED_FIELDS):
+					changed_rows.append((row.name, values))
+			except Exception:
+				errors += 1
+				frappe.log_error(
+					title=f"Error computing Cart Aging Track {row.name}",
+					message=frappe.get_traceback()
+				)
+
+		updated += write_cart_aging_chunk(changed_rows, current_datetime)
+		frappe.db.commit()
+
+		frappe.publish_realtime(
+			"cart_aging_update_progress",
+			{"scanned": scanned, "updated": updated, "errors": errors, "status": "running"},
+			user=frappe.session.user
+		)
+
+	return {
+		"status": "success",
+		"scanned": scanned,
+		"updated": updated,
+		"errors": errors
+	}
+
+
 def process_cart_aging_tracks_background():
 	"""
-	Background job to process all records in batches
+	Background job to recompute all Cart Aging Track records in bulk
 	"""
-	batch_size = 1000
-	offset = 0
-	total_updated = 0
-	total_errors = 0
-	
 	total_records = frappe.db.count("Cart Aging Track")
-	
+
 	frappe.publish_realtime(
 		"cart_aging_update_progress",
 		{"progress": 0, "total": total_records, "status": "started"},
 		user=frappe.session.user
 	)
-	
-	while offset < total_records:
-		try:
-			tracks = frappe.get_all(
-				"Cart Aging Track",
-				fields=["name", "cart_id"],
-				limit_start=offset,
-				limit_page_length=batch_size
-			)
-			
-			if not tracks:
-				break
-			
-			for track in tracks:
-				try:
-					track_doc = frappe.get_doc("Cart Aging Track", track.name)
-					
-					if track.cart_id:
-						update_cart_aging_track_from_cart(track_doc, track.cart_id)
-					
-					track_doc.save(ignore_permissions=True)
-					total_updated += 1
-					
-				except Exception as e:
-					total_errors += 1
-					frappe.log_error(
-						title=f"Error updating Cart Aging Track {track.name}",
-						message=frappe.get_traceback()
-					)
-			
-			frappe.db.commit()
-			offset += batch_size
-			
-			# Publish progress
-			progress = (offset / total_records) * 100
-			frappe.publish_realtime(
-				"cart_aging_update_progress",
-				{
-					"progress": progress,
-					"updated": total_updated,
-					"errors": total_errors,
-					"total": total_records
-				},
-				user=frappe.session.user
-			)
-			
-		except Exception as batch_error:
-			frappe.log_error(
-				title=f"Error processing batch at offset {offset}",
-				message=frappe.get_traceback()
-			)
-			offset += batch_size
-	
+
+	result = bulk_recompute_cart_aging_tracks()
+
 	frappe.publish_realtime(
 		"cart_aging_update_progress",
 		{
 			"progress": 100,
 			"status": "completed",
-			"updated": total_updated,
-			"errors": total_errors,
+			"updated": result["updated"],
+			"errors": result["errors"],
 			"total": total_records
 		},
 		user=frappe.session.user
 	)
-	
-	return {
-		"status": "success",
-		"updated": total_updated,
-		"errors": total_errors,
-		"total": total_records
-	}
\ No newline at end of file
+
+	result["total"] = total_records
+	return result
@@ -4,115 +4,222 @@ from frappe import _
 from datetime import datetime
 from frappe.utils import now_datetime, cint, nowdate, format_date
 
+# Index used by the targeted revalidation (vendor / company vendor code changes)
+PO_VENDOR_INDEX_NAME = "company_code_vendor_code_index"
+
+# (company_code, vendor_code) pairs revalidated per UPDATE
+PAIR_CHUNK_SIZE = 500
+
+
+def ensure_po_vendor_index():
+    frappe.db.add_index("Purchase Order", ["company_code", "vendor_code"], PO_VENDOR_INDEX_NAME)
+
+
+def apply_vendor_validity(companies, vendor_codes, po_names=None):
+    """
+    Recompute vendor_code_invalid of the open POs of the given companies / vendor codes
+    (optionally only `po_names`) with a single UPDATE ... JOIN. A PO is valid when its
+    (company_code, vendor_code) exists in Company Vendor Code and the linked Vendor Master
+    is not blocked and has validity_status "Valid". Only POs whose flag changes are written.
+
+    Returns the number of POs updated.
+    """
+    if not companies or not vendor_codes:
+        return 0
+
+    values = {"companies": tuple(companies), "vendor_codes": tuple(vendor_codes)}
+    po_condition = ""
+    if po_names:
+        po_condition = "AND po.name IN %(po_names)s"
+        values["po_names"] = tuple(po_names)
+
+    frappe.db.sql(f"""
+        UPDATE `tabPurchase Order` po
+        LEFT JOIN (
+            SELECT
+                cvc.company_code,
+                vc.vendor_code,
+                MAX(IF(vm.name IS NOT NULL
+                    AND IFNULL(vm.is_blocked, 0) = 0
+                    AND vm.validity_status = 'Valid', 1, 0)) AS is_valid
+            FROM `tabCompany Vendor Code` cvc
+            INNER JOIN `tabVendor Code` vc
+                ON vc.parent = cvc.name
+            LEFT JOIN `tabVendor Master` vm
+                ON vm.name = cvc.vendor_ref_no
+            WHERE cvc.company_code IN %(companies)s
+            AND vc.vendor_code IN %(vendor_codes)s
+            GROUP BY cvc.company_code, vc.vendor_code
+        ) validity
+            ON validity.company_code = po.company_code
+            AND validity.vendor_code = po.vendor_code
+        SET po.vendor_code_invalid = IF(validity.is_valid = 1, 0, 1)
+        WHERE po.company_code IN %(companies)s
+        AND po.vendor_code IN %(vendor_codes)s
+        AND po.docstatus != 2
+        AND po.sent_to_vendor != 1
+        AND IFNULL(po.vendor_code_invalid, 0) != IF(validity.is_valid = 1, 0, 1)
+        {po_condition}
+    """, values)
+
+    return frappe.db.sql("SELECT ROW_COUNT()")[0][0] or 0
+
+
+def flag_pos_without_vendor_keys(po_names):
+    """POs missing a company or vendor code can never match; mark them invalid"""
+    if not po_names:
+        return 0
+
+    frappe.db.sql("""
+        UPDATE `tabPurchase Order`
+        SET vendor_code_invalid = 1
+        WHERE name IN %(po_names)s
+        AND (IFNULL(company_code, '') = '' OR IFNULL(vendor_code, '') = '')
+        AND IFNULL(vendor_code_invalid, 0) != 1
+    """, {"po_names": tuple(po_names)})
+
+    return frappe.db.sql("SELECT ROW_COUNT()")[0][0] or 0
+
+
+def revalidate_po_vendor_codes(pairs):
+    """
+    Background job: revalidate only the open POs of the given (company_code, vendor_code)
+    pairs, enqueued by the Vendor Master / Company Vendor Code hooks
+    """
+    pairs = sorted({(company, code) for company, code in pairs if company and code})
+    updated = 0
+
+    for start in range(0, len(pairs), PAIR_CHUNK_SIZE):
+        chunk = pairs[start:start + PAIR_CHUNK_SIZE]
+        try:
+            updated += apply_vendor_validity(
+                {company for company, _code in chunk},
+                {code for _company, code in chunk}
+            )
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(frappe.get_traceback(), "PO Vendor Revalidation Error")
+
+    return updated
+
+
+def enqueue_po_revalidation(pairs):
+    pairs = [list(pair) for pair in {tuple(pair) for pair in pairs if pair[0] and pair[1]}]
+    if not pairs:
+        return
+
+    frappe.enqueue(
+        "vms.purchase.doctype.purchase_order.po_vm_validation_corn.revalidate_po_vendor_codes",
+        queue="short",
+        enqueue_after_commit=True,
+        pairs=pairs
+    )
+
+
+def get_company_vendor_code_pairs(doc):
+    if not doc:
+        return set()
+    return {(doc.company_code, row.vendor_code) for row in doc.get("vendor_code") or []}
+
+
+def on_vendor_master_update(doc, method=None):
+    """Vendor Master on_update: a block / validity change revalidates the vendor's POs"""
+    try:
+        if not (doc.has_value_changed("is_blocked") or doc.has_value_changed("validity_status")):
+            return
+
+        pairs = frappe.db.sql("""
+            SELECT cvc.company_code, vc.vendor_code
+            FROM `tabCompany Vendor Code` cvc
+            INNER JOIN `tabVendor Code` vc ON vc.parent = cvc.name
+            WHERE cvc.vendor_ref_no = %s
+        """, (doc.name,))
+
+        enqueue_po_revalidation(pairs)
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "PO Vendor Revalidation Hook Error")
+
+
+def on_company_vendor_code_change(doc, method=None):
+    """Company Vendor Code on_update / on_trash: revalidate POs of added, removed or relinked codes"""
+    try:
+        pairs = get_company_vendor_code_pairs(doc)
+
+        if method != "on_trash":
+            previous = doc.get_doc_before_save()
+            previous_pairs = get_company_vendor_code_pairs(previous)
+            if previous and previous_pairs == pairs and previous.vendor_ref_no == doc.vendor_ref_no:
+                return
+            pairs |= previous_pairs
+
+        enqueue_po_revalidation(pairs)
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "PO Vendor Revalidation Hook Error")
+
+
 @frappe.whitelist()
 def bulk_validate_vendor_codes_optimized(batch_size=2000):
     """
-    Optimized bulk validation of vendor codes using raw SQL queries
-    Processes all Purchase Orders in batches without using ORM methods
-    
+    Full reconciliation of vendor_code_invalid for all open Purchase Orders.
+    Day-to-day changes are applied by the Vendor Master / Company Vendor Code hooks; this
+    pass catches anything written around them (db_set, imports).
+
+    Pages through POs by name (keyset) and applies each page with one set-based UPDATE.
+
     Args:
         batch_size: Number of records to process in each batch (default: 2000)
     """
     try:
         batch_size = cint(batch_size) or 2000
-        
-        frappe.logger().info("Starting optimized bulk vendor validation")
-        
-        # Get total count using raw SQL
-        total_count = frappe.db.sql("""
-                                    SELECT COUNT(*) as count
-                                    FROM `tabPurchase Order`
-                                    WHERE docstatus != 2
-                                    AND sent_to_vendor != 1
-                                     """, as_dict=True)[0].count
-
-        if not total_count:
-            return {
-                "status": "success",
-                "message": "No Purchase Orders to validate",
-                "total": 0,
-                "updated": 0,
-                "errors": 0
-            }
-
-        total_batches = (total_count // batch_size) + (1 if total_count % batch_size else 0)
-        frappe.logger().info(f"Total POs: {total_count}, Batches: {total_batches}, Batch Size: {batch_size}")
 
+        frappe.logger().info("Starting keyset bulk vendor validation")
+
+        total_count = 0
         updated_count = 0
         error_count = 0
+        total_batches = 0
+        last_name = ""
+
+        while True:
+            page = frappe.db.sql("""
+                SELECT name, company_code, vendor_code
+                FROM `tabPurchase Order`
+                WHERE docstatus != 2
+                AND sent_to_vendor != 1
+                AND name > %s
+                ORDER BY name
+                LIMIT %s
+            """, (last_name, batch_size), as_dict=True)
+
+            if not page:
+                break
+
+            total_batches += 1
+            total_count += len(page)
+            last_name = page[-1].name
+            po_names = [row.name for row in page]
 
-        # Process in batches
-        for batch_num in range(total_batches):
-            offset = batch_num * batch_size
-            
             try:
-                frappe.logger().info(f"Processing batch {batch_num + 1}/{total_batches}")
-                
-                # Single SQL query to validate and determine vendor_code_invalid status
-                validation_results = frappe.db.sql("""
-                    SELECT 
-                        po.name,
-                        po.vendor_code,
-                        po.company_code,
-                        po.vendor_code_invalid as current_status,
-                        CASE
-                            WHEN po.vendor_code IS NULL OR po.vendor_code = '' THEN 1
-                            WHEN po.company_code IS NULL OR po.company_code = '' THEN 1
-                            WHEN cvc.name IS NULL THEN 1
-                            WHEN vm.name IS NULL THEN 1
-                            WHEN vm.is_blocked = 1 THEN 1
-                            WHEN vm.validity_status != 'Valid' THEN 1
-                            ELSE 0
-                        END as new_status
-                    FROM `tabPurchase Order` po
-                    LEFT JOIN `tabCompany Vendor Code` cvc 
-                        ON cvc.company_code = po.company_code
-                    LEFT JOIN `tabVendor Code` vc 
-                        ON vc.parent = cvc.name 
-                        AND vc.vendor_code = po.vendor_code
-                    LEFT JOIN `tabVendor Master` vm 
-                        ON vm.name = cvc.vendor_ref_no
-                    WHERE po.docstatus != 2
-                    AND po.sent_to_vendor != 1
-                    LIMIT %s OFFSET %s
-                """, (batch_size, offset), as_dict=True)
-
-                if not validation_results:
-                    break
-
-                # Prepare bulk update data - only for records where status changes
-                updates_to_apply = []
-                for row in validation_results:
-                    if row.current_status != row.new_status:
-                        updates_to_apply.append((row.new_status, row.name))
-
-                # Bulk update - execute individual updates in a transaction
-                if updates_to_apply:
-                    for new_status, po_name in updates_to_apply:
-                        frappe.db.sql("""
-                            UPDATE `tabPurchase Order`
-                            SET vendor_code_invalid = %s
-                            WHERE name = %s
-                        """, (new_status, po_name))
-                    
-                    updated_count += len(updates_to_apply)
+                updated_count += apply_vendor_validity(
+                    {row.company_code for row in page if row.company_code},
+                    {row.vendor_code for row in page if row.vendor_code},
+                    po_names
+                )
+                updated_count += flag_pos_without_vendor_keys(po_names)
 
                 # Commit after each batch
                 frappe.db.commit()
-                
-                frappe.logger().info(
-                    f"Batch {batch_num + 1}/{total_batches} completed. "
-                    f"Processed: {len(validation_results)}, Updated: {len(updates_to_apply)}"
-                )
 
             except Exception as batch_error:
-                error_count += batch_size
+                error_count += len(page)
                 frappe.log_error(
-                    f"Error in batch {batch_num + 1}: {str(batch_error)}\n{frappe.get_traceback()}",
+                    f"Error in batch {total_batches}: {str(batch_error)}\n{frappe.get_traceback()}",
                     "Bulk Vendor Validation Batch Error"
                 )
                 frappe.db.rollback()
-                continue
 
         result = {
             "status": "success",
@@ -125,7 +232,7 @@ def bulk_validate_vendor_codes_optimized(batch_size=2000):
         }
 
         frappe.logger().info(f"Bulk validation completed: {result['message']}")
-        
+
         return result
 
     except Exception as e:
@@ -79,9 +79,11 @@ class PurchaseOrder(Document):
 			# Calculate the scheduled notification time
 			scheduled_notification_time = add_to_date(current_date, seconds=exp_t_sec)
 			
-			# Store the scheduled time in the document
-			self.scheduled_notification_time = scheduled_notification_time
-			self.sent_notification_triggered = 1
+			# Store the scheduled time; on_update runs after the row is written, so persist directly
+			self.db_set({
+				"scheduled_notification_time": scheduled_notification_time,
+				"sent_notification_triggered": 1
+			}, update_modified=False)
 
 
 
@@ -423,32 +425,137 @@ def send_pending_notifications(self):
 
 
 
+# Due dispatch reminders handled per scheduler run, oldest due first
+DISPATCH_NOTIFICATION_BATCH_SIZE = 200
+DISPATCH_NOTIFICATION_LOCK_KEY = "dispatch_notification_scheduler_lock"
+DISPATCH_NOTIFICATION_LOCK_TTL = 600
+
+
+def get_due_dispatch_notifications(limit=DISPATCH_NOTIFICATION_BATCH_SIZE):
+    """Due reminders in due-time order, served by idx_po_dispatch_notification_due"""
+    return frappe.db.sql("""
+        SELECT name, po_no, vendor_code, company_code, delivery_date, scheduled_notification_time
+        FROM `tabPurchase Order`
+        WHERE sent_notification_triggered = 1
+        AND sent_notification_to_vendor = 0
+        AND scheduled_notification_time <= %(now)s
+        AND IFNULL(po_dispatch_status, '') != 'Completed'
+        ORDER BY scheduled_notification_time
+        LIMIT %(limit)s
+    """, {"now": now_datetime(), "limit": limit}, as_dict=True)
+
+
+def get_vendor_contacts(vendor_codes):
+    """(company_code, vendor_code) and vendor_code -> vendor email / name, in one query"""
+    if not vendor_codes:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT
+            vc.vendor_code,
+            cvc.company_code,
+            IFNULL(NULLIF(vm.office_email_primary, ''), vm.office_email_secondary) AS email,
+            vm.vendor_name
+        FROM `tabVendor Code` vc
+        INNER JOIN `tabCompany Vendor Code` cvc ON cvc.name = vc.parent
+        INNER JOIN `tabVendor Master` vm ON vm.name = cvc.vendor_ref_no
+        WHERE vc.vendor_code IN %(vendor_codes)s
+    """, {"vendor_codes": tuple(vendor_codes)}, as_dict=True)
+
+    contacts = {}
+    for row in rows:
+        if not row.email:
+            continue
+        contacts.setdefault((row.company_code, row.vendor_code), row)
+        contacts.setdefault(row.vendor_code, row)
+    return contacts
+
+
+def mark_dispatch_notifications_sent(po_names):
+    frappe.db.sql("""
+        UPDATE `tabPurchase Order`
+        SET sent_notification_triggered = 0,
+            sent_notification_to_vendor = 1,
+            scheduled_notification_time = NULL
+        WHERE name IN %(po_names)s
+    """, {"po_names": tuple(po_names)})
+
+
+def send_vendor_dispatch_reminder(vendor, pos):
+    """One reminder mail per vendor listing all of its due Purchase Orders"""
+    rows = "".join(
+        f"<tr><td>{po.po_no or po.name}</td><td>{po.delivery_date or ''}</td></tr>"
+        for po in pos
+    )
+    subject = (
+        f"Dispatch reminder for Purchase Order {pos[0].po_no or pos[0].name}" if len(pos) == 1
+        else f"Dispatch reminder for {len(pos)} Purchase Orders"
+    )
+    message = f"""
+        <p>Dear {vendor.vendor_name or 'Vendor'},</p>
+        <p>Please send the dispatch details for the following Purchase Orders:</p>
+        <table border="1" cellpadding="4" cellspacing="0">
+            <tr><th>Purchase Order</th><th>Delivery Date</th></tr>
+            {rows}
+        </table>
+    """
+    custom_sendmail(recipients=[vendor.email], subject=subject, message=message)
+
+
 def send_dispatch_notifications():
     """
-    Cron job to send dispatch notifications for Purchase Orders
-    This should run every 15 minutes (or as needed)
+    Cron job (every minute) sending the dispatch reminders that are due.
+    Only due rows are read, in due-time order, and mails are batched per vendor.
     """
+    cache = frappe.cache()
+    lock_key = cache.make_key(DISPATCH_NOTIFICATION_LOCK_KEY)
+    if not cache.set(lock_key, 1, nx=True, ex=DISPATCH_NOTIFICATION_LOCK_TTL):
+        return
+
     try:
-        # Get all POs that are ready for notification
-        pos = frappe.get_all(
-            "Purchase Order",
-            filters={
-                "sent_notification_triggered": 1,
-                "sent_notification_to_vendor": 0,
-                "scheduled_notification_time": ["is", "set"],
-                "po_dispatch_status": ["!=", "Completed"]
-            },
-            fields=["name", "scheduled_notification_time"]
-        )
-        
-        current_time = now_datetime()
-        
-        for po in pos:
-            if get_datetime(po.scheduled_notification_time) <= current_time:
-                po_doc = frappe.get_doc("Purchase Order", po.name)
-                po_doc.send_pending_notifications()
-        
-        frappe.db.commit()
-        
+        due = get_due_dispatch_notifications()
+        if not due:
+            return
+
+        contacts = get_vendor_contacts({po.vendor_code for po in due if po.vendor_code})
+
+        by_vendor = {}
+        unreachable = []
+        for po in due:
+            vendor = contacts.get((po.company_code, po.vendor_code)) or contacts.get(po.vendor_code)
+            if vendor:
+                by_vendor.setdefault(vendor.email, (vendor, []))[1].append(po)
+            else:
+                unreachable.append(po.name)
+
+        for vendor, pos in by_vendor.values():
+            try:
+                send_vendor_dispatch_reminder(vendor, pos)
+                mark_dispatch_notifications_sent([po.name for po in pos])
+                frappe.db.commit()
+            except Exception:
+                frappe.db.rollback()
+                frappe.log_error(frappe.get_traceback(), f"Dispatch Notification Error: {vendor.email}")
+
+        if unreachable:
+            # No vendor email: close them as before, so they do not hold the head of the queue
+            mark_dispatch_notifications_sent(unreachable)
+            frappe.db.commit()
+            frappe.log_error(
+                f"No vendor email for dispatch notification of: {', '.join(unreachable)}",
+                "Dispatch Notification Skipped"
+            )
+
+        frappe.logger().info(f"Dispatch notifications sent for {len(due) - len(unreachable)} POs")
+
     except Exception as e:
         frappe.log_error(f"Error in send_dispatch_notifications cron: {str(e)}")
+
+    finally:
+        cache.delete(lock_key)
+
+
+def on_doctype_update():
+    """(company_code, vendor_code) index used by the targeted vendor code revalidation"""
+    from vms.purchase.doctype.purchase_order.po_vm_validation_corn import ensure_po_vendor_index
+    ensure_po_vendor_index()
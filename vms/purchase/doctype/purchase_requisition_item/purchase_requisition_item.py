@@ -4,6 +4,12 @@
 # import frappe
 from frappe.model.document import Document
 
+from vms.APIs.sap.sap_child_sync import is_unchanged_row
+
 
 class PurchaseRequisitionItem(Document):
-	pass
+	def db_update(self):
+		# Lines a SAP re-push left untouched are not rewritten (sap_child_sync)
+		if is_unchanged_row(self):
+			return
+		super().db_update()
@@ -1,5 +1,9 @@
 import frappe
 import smtplib
+from collections import OrderedDict
+from frappe import _
+from frappe.utils import flt, now_datetime
+from frappe.utils.jinja import get_jenv
 from email.message import EmailMessage
 from email.utils import formataddr
 from email.mime.multipart import MIMEMultipart
@@ -8,7 +12,12 @@ from email.mime.base import MIMEBase
 from email import encoders
 import os
 import mimetypes
-from vms.utils.notification import create_notification_log
+import threading
+import time
+from vms.utils.notification import create_notification_log, create_notification_logs
+
+
+DEFAULT_EMAIL_ID = "noreply@merillife.com"
 
 
 
@@ -35,8 +44,10 @@ def custom_sendmail(recipients=None, subject=None, message=None, cc=None, bcc=No
         attachments: Email attachments
         template: Email Template doctype name (optional)
         args: Context dictionary for template rendering
+        queue_notification_log: Write the Notification Logs in a background job
         **kwargs: Additional arguments
     """
+    queue_notification_log = kwargs.pop('queue_notification_log', False)
     
     # Handle Email Template if provided
     if template:
@@ -48,7 +59,7 @@ def custom_sendmail(recipients=None, subject=None, message=None, cc=None, bcc=No
         if message:
             message = frappe.render_template(message, args)
     
-    create_notification_log(recipients=recipients, subject=subject, message=message, **kwargs)
+    create_notification_log(recipients=recipients, subject=subject, message=message, enqueue=queue_notification_log, **kwargs)
 
     # Normalize recipients
     normalized_recipients = _normalize_recipients(recipients)
@@ -60,11 +71,7 @@ def custom_sendmail(recipients=None, subject=None, message=None, cc=None, bcc=No
     
     # If no custom handling needed, use standard frappe.sendmail
     if not needs_custom_handling:
-        try:
-            email_account = frappe.get_doc("Email Account", {"email_id": "noreply@merillife.com"})
-            has_always_bcc = email_account and hasattr(email_account, 'always_bcc') and email_account.always_bcc
-        except:
-            has_always_bcc = False
+        has_always_bcc = bool(_get_email_account_settings().get('always_bcc'))
         
         if not has_always_bcc:
             return frappe.sendmail(
@@ -117,27 +124,134 @@ def custom_send_mail(mail_template, recipient, email_context=None, cc_recepients
 
 def _render_email_template(template_name, context):
     """Render Email Template with context"""
+    return render_email_template_bulk(template_name, [context])[0]
+
+
+
+# =====================================================================================
+# COMPILED EMAIL TEMPLATES
+# =====================================================================================
+#
+# Each Email Template is read once (one query for subject / response / response_html) and
+# its subject and body are compiled to Jinja template objects, kept per worker in a bounded
+# LRU. Saving or deleting an Email Template changes the version token in Redis and every
+# worker recompiles on its next render.
+
+EMAIL_TEMPLATE_VERSION_CACHE_KEY = "custom_sendmail:email_template_version"
+EMAIL_TEMPLATE_CACHE_SIZE = 128
+
+# Content of an empty rich text editor; the template body is then in response_html
+EMPTY_EDITOR_CONTENT = '<div class="ql-editor read-mode"><p><br></p></div>'
+
+_compiled_templates = OrderedDict()
+
+
+class CompiledEmailTemplate:
+    __slots__ = ("version", "subject", "message")
+
+    def __init__(self, version, subject, message):
+        self.version = version
+        self.subject = subject
+        self.message = message
+
+    def render(self, context):
+        return (
+            self.subject.render(context) if self.subject else "",
+            self.message.render(context) if self.message else ""
+        )
+
+
+def get_email_template_version():
+    version = frappe.cache().get_value(EMAIL_TEMPLATE_VERSION_CACHE_KEY)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        frappe.cache().set_value(EMAIL_TEMPLATE_VERSION_CACHE_KEY, version)
+    return version
+
+
+
+def clear_email_template_cache(doc=None, method=None):
+    """Email Template on_update / on_trash: every worker recompiles its templates"""
+    # After commit, so no worker can compile the old body under the new version
+    frappe.db.after_commit.add(_bump_email_template_version)
+
+
+
+def _bump_email_template_version():
+    frappe.cache().set_value(EMAIL_TEMPLATE_VERSION_CACHE_KEY, frappe.generate_hash(length=10))
+    _compiled_templates.clear()
+
+
+
+def _compile_template_source(source):
+    if not source:
+        return None
+    # Same guard as frappe.render_template
+    if ".__" in source:
+        frappe.throw(_("Illegal template"))
+    return get_jenv().from_string(source)
+
+
+
+def get_compiled_email_template(template_name):
+    """Compiled subject / body of an Email Template, from the worker LRU when current"""
+    version = get_email_template_version()
+    key = (frappe.local.site, template_name)
+    
+    compiled = _compiled_templates.get(key)
+    if compiled and compiled.version == version:
+        _compiled_templates.move_to_end(key)
+        return compiled
+    
+    template = frappe.db.get_value(
+        "Email Template", template_name, ["subject", "response", "response_html"], as_dict=True
+    )
+    if not template:
+        frappe.throw(_("Email Template {0} not found").format(template_name))
+    
+    # Handle empty rich text editor content
+    response = template.response
+    if response == EMPTY_EDITOR_CONTENT:
+        response = template.response_html
+    
+    compiled = CompiledEmailTemplate(
+        version,
+        _compile_template_source(template.subject),
+        _compile_template_source(response)
+    )
+    _compiled_templates[key] = compiled
+    _compiled_templates.move_to_end(key)
+    while len(_compiled_templates) > EMAIL_TEMPLATE_CACHE_SIZE:
+        _compiled_templates.popitem(last=False)
+    return compiled
+
+
+
+def render_email_template_bulk(template_name, contexts):
+    """
+    Render an Email Template for each context (one recipient each)
+    
+    Returns a list of (subject, message) in the order of the contexts; a context that
+    fails to render gets the template error subject / message.
+    """
     try:
-        response = frappe.db.get_value("Email Template", template_name, "response")
-        subject = frappe.db.get_value("Email Template", template_name, "subject")
-        
-        # Handle empty rich text editor content
-        if response == '<div class="ql-editor read-mode"><p><br></p></div>':
-            response = frappe.db.get_value("Email Template", template_name, "response_html")
-        
-        # Render templates with context
-        rendered_subject = frappe.render_template(subject, context) if subject else ""
-        rendered_message = frappe.render_template(response, context) if response else ""
-        
-        return rendered_subject, rendered_message
-        
+        compiled = get_compiled_email_template(template_name)
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), f"Error rendering email template {template_name}: {str(e)}")
-        return "Email Template Error", "Failed to render email template"
+        return [("Email Template Error", "Failed to render email template")] * len(contexts)
+    
+    rendered = []
+    for context in contexts:
+        try:
+            rendered.append(compiled.render(context or {}))
+        except Exception as e:
+            frappe.log_error(frappe.get_traceback(), f"Error rendering email template {template_name}: {str(e)}")
+            rendered.append(("Email Template Error", "Failed to render email template"))
+    return rendered
 
 
 
-def _get_email_account_settings(email_id="noreply@merillife.com"):
+def _load_email_account_settings(email_id):
     try:
         email_account = frappe.get_doc("Email Account", {"email_id": email_id})
         
@@ -152,7 +266,7 @@ def _get_email_account_settings(email_id="noreply@merillife.com"):
             'always_bcc': getattr(email_account, 'always_bcc', None)
         }
         
-        frappe.logger("debug").info(f"Email account settings retrieved for {email_id}")
+        frappe.logger("debug").info(f"Email account settings loaded for {email_id}")
         return settings
         
     except Exception as e:
@@ -175,12 +289,17 @@ def _send_email_with_cc_bcc_attachments(subject, body, to_emails, cc_emails=None
     Send email with CC/BCC using direct SMTP
     If suspended, create a custom Email Queue entry that can be sent later
     """
-    
+    email_settings = _get_email_account_settings()
+    prepared = _prepare_message(subject, body, to_emails, cc_emails, bcc_emails, attachments, email_settings)
+    _deliver_messages([prepared], email_settings)
+
+
+
+def _prepare_message(subject, body, to_emails, cc_emails=None, bcc_emails=None, attachments=None, email_settings=None):
+    """Build the MIME message; returns it with the resolved TO / CC / BCC lists"""
     cc_emails = cc_emails or []
     bcc_emails = bcc_emails or []
     
-    email_settings = _get_email_account_settings()
-    
     # Handle always_bcc
     if not bcc_emails and email_settings['always_bcc']:
         if isinstance(email_settings['always_bcc'], str):
@@ -222,74 +341,396 @@ def _send_email_with_cc_bcc_attachments(subject, body, to_emails, cc_emails=None
             msg["Bcc"] = ", ".join(bcc_emails)
        
         msg.add_alternative(body, subtype="html")
-   
-    all_recipients = to_emails + cc_emails + bcc_emails
+    
+    return {
+        'msg': msg,
+        'subject': subject,
+        'to_emails': to_emails,
+        'cc_emails': cc_emails,
+        'bcc_emails': bcc_emails,
+        'all_recipients': to_emails + cc_emails + bcc_emails,
+        'attachments': attachments
+    }
+
+
+
+def _deliver_messages(prepared_messages, email_settings, queue_failed=True):
+    """
+    Send prepared messages over the pooled SMTP connection of the account and log each one
+    to Email Queue (Sent / Not Sent). If sending is suspended they are only queued.
+    With queue_failed=False a failed message is logged as Error, so Email Queue does not
+    resend it (the caller retries). failed_indices lists the failed prepared messages.
+    """
+    def save_to_queue(prepared, status):
+        _save_to_email_queue_with_full_message(
+            msg=prepared['msg'],
+            subject=prepared['subject'],
+            to_emails=prepared['to_emails'],
+            cc_emails=prepared['cc_emails'],
+            bcc_emails=prepared['bcc_emails'],
+            all_recipients=prepared['all_recipients'],
+            email_settings=email_settings,
+            attachments=prepared['attachments'],
+            status=status
+        )
     
     #  If email sending is suspended, save to Email Queue with the full message
     if is_email_sending_suspended():
         frappe.logger("debug").info("Email sending is suspended. Saving to Email Queue with full message format.")
-        _save_to_email_queue_with_full_message(
-            msg=msg,
-            subject=subject,
-            to_emails=to_emails,
-            cc_emails=cc_emails,
-            bcc_emails=bcc_emails,
-            all_recipients=all_recipients,
-            email_settings=email_settings,
-            attachments=attachments
+        for prepared in prepared_messages:
+            save_to_queue(prepared, "Not Sent")
+        return {
+            'sent': 0, 'failed': 0, 'queued': len(prepared_messages), 'seconds': 0, 'messages_per_second': 0,
+            'failed_indices': []
+        }
+    
+    connection = get_smtp_connection(email_settings)
+    sent = failed = 0
+    failed_indices = []
+    send_seconds = 0.0
+    
+    for index, prepared in enumerate(prepared_messages):
+        frappe.logger("debug").info(
+            f"Sending email to: TO={prepared['to_emails']}, CC={prepared['cc_emails']}, "
+            f"BCC={prepared['bcc_emails']}, Attachments={len(prepared['attachments']) if prepared['attachments'] else 0}"
         )
-        return
+        started = time.perf_counter()
+        try:
+            connection.send(prepared['msg'], prepared['all_recipients'])
+            send_seconds += time.perf_counter() - started
+            sent += 1
+            frappe.logger("debug").info(f"Email sent successfully to {len(prepared['all_recipients'])} recipients")
+            save_to_queue(prepared, "Sent")
+            
+        except Exception as e:
+            send_seconds += time.perf_counter() - started
+            failed += 1
+            failed_indices.append(index)
+            # The session may be mid-transaction; the next message starts on a fresh one
+            connection.close()
+            frappe.logger("debug").error(f"Failed to send email: {str(e)}")
+            frappe.log_error(frappe.get_traceback(), f"Error sending email: {str(e)}")
+            
+            # Save to queue for retry
+            save_to_queue(prepared, "Not Sent" if queue_failed else "Error")
     
-    frappe.logger("debug").info(f"Sending email to: TO={to_emails}, CC={cc_emails}, BCC={bcc_emails}, Attachments={len(attachments) if attachments else 0}")
+    _record_send_stats(sent, failed, send_seconds)
+    return {
+        'sent': sent,
+        'failed': failed,
+        'queued': 0,
+        'seconds': round(send_seconds, 3),
+        'messages_per_second': round(sent / send_seconds, 2) if send_seconds else 0,
+        'failed_indices': failed_indices
+    }
 
-    # Send the email via SMTP
-    try:
-        if not email_settings['password']:
+
+
+def send_many(messages, email_id=DEFAULT_EMAIL_ID, queue_notification_log=False, queue_failed=True):
+    """
+    Send many emails over one pooled SMTP connection (cron fan-outs, bulk reminders)
+    
+    Args:
+        messages: list of dicts with recipients, subject, message and optional cc, bcc,
+            attachments, or template + args rendered like custom_sendmail
+        email_id: Email Account to send from
+        queue_notification_log: Write the Notification Logs in a background job
+        queue_failed: Leave failed messages to the Email Queue retry; pass False when the
+            caller retries them itself
+    
+    Returns sent / failed / queued counts, the batch throughput and failed_indices, the
+    positions in `messages` that were not sent.
+    """
+    email_settings = _get_email_account_settings(email_id)
+    prepared_messages = []
+    message_indices = []
+    notification_entries = []
+    
+    # Templated messages are rendered together, one compiled template per Email Template
+    contexts_by_template = {}
+    for index, message in enumerate(messages):
+        if message.get('template'):
+            contexts_by_template.setdefault(message['template'], []).append((index, message.get('args') or {}))
+    
+    rendered = {}
+    for template_name, entries in contexts_by_template.items():
+        results = render_email_template_bulk(template_name, [context for _index, context in entries])
+        rendered.update((index, result) for (index, _context), result in zip(entries, results))
+    
+    for index, message in enumerate(messages):
+        subject = message.get('subject')
+        body = message.get('message')
+        args = message.get('args')
+        
+        if message.get('template'):
+            subject, body = rendered[index]
+        elif args:
+            subject = frappe.render_template(subject, args) if subject else subject
+            body = frappe.render_template(body, args) if body else body
+        
+        to_emails = _normalize_recipients(message.get('recipients'))
+        if not to_emails:
+            continue
+        
+        notification_entries.extend(
+            {'for_user': recipient, 'subject': subject, 'email_content': body, 'from_user': frappe.session.user}
+            for recipient in to_emails
+        )
+        
+        message_indices.append(index)
+        prepared_messages.append(_prepare_message(
+            subject,
+            body or "",
+            to_emails,
+            _normalize_recipients(message.get('cc')),
+            _normalize_recipients(message.get('bcc')),
+            message.get('attachments'),
+            email_settings
+        ))
+    
+    # Notification Logs of the whole batch in one bulk write
+    create_notification_logs(notification_entries, enqueue=queue_notification_log)
+    
+    result = _deliver_messages(prepared_messages, email_settings, queue_failed) if prepared_messages else {
+        'sent': 0, 'failed': 0, 'queued': 0, 'seconds': 0, 'messages_per_second': 0, 'failed_indices': []
+    }
+    result['failed_indices'] = [message_indices[index] for index in result['failed_indices']]
+    result['status'] = 'success' if not result['failed'] else 'partial'
+    return result
+
+
+
+# =====================================================================================
+# MAIL TRANSPORT
+# =====================================================================================
+#
+# Email Account settings (with the decrypted password) are cached per worker and reloaded
+# when the account is saved (version token in Redis). Each worker thread keeps one
+# authenticated SMTP session per account and reuses it for every message it sends; a
+# session that is idle too long or was dropped by the server is reopened before the send.
+# RQ forks a process per job, so a job's whole fan-out shares one session.
+
+EMAIL_ACCOUNT_VERSION_CACHE_KEY = "custom_sendmail:email_account_version"
+MAIL_STATS_CACHE_KEY = "custom_sendmail:stats"
+MAIL_LAST_BATCH_CACHE_KEY = "custom_sendmail:last_batch"
+
+SMTP_TIMEOUT = 30
+# Servers close idle sessions (ZeptoMail after about a minute); reconnect instead of failing a send
+SMTP_MAX_IDLE_SECONDS = 50
+SMTP_MAX_MESSAGES_PER_CONNECTION = 500
+
+_account_settings = {}
+_smtp_connections = {}
+
+
+def get_email_account_version():
+    version = frappe.cache().get_value(EMAIL_ACCOUNT_VERSION_CACHE_KEY)
+    if not version:
+        version = frappe.generate_hash(length=10)
+        frappe.cache().set_value(EMAIL_ACCOUNT_VERSION_CACHE_KEY, version)
+    return version
+
+
+
+def clear_email_account_cache(doc=None, method=None):
+    """Email Account on_update / on_trash: every worker reloads the settings and reconnects"""
+    # After commit, so no worker can cache the old settings under the new version
+    frappe.db.after_commit.add(_bump_email_account_version)
+
+
+
+def _bump_email_account_version():
+    frappe.cache().set_value(EMAIL_ACCOUNT_VERSION_CACHE_KEY, frappe.generate_hash(length=10))
+    _account_settings.clear()
+    close_smtp_connections()
+
+
+
+def _get_email_account_settings(email_id=DEFAULT_EMAIL_ID):
+    version = get_email_account_version()
+    key = (frappe.local.site, email_id)
+    
+    cached = _account_settings.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    
+    settings = _load_email_account_settings(email_id)
+    # The fallback settings have no password; retry the load on the next send
+    if settings['password']:
+        _account_settings[key] = (version, settings)
+    return settings
+
+
+
+def _is_connection_error(exc):
+    if isinstance(exc, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return True
+    # 421: service not available, the server is closing the session
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code == 421
+
+
+
+class SMTPConnection:
+    """Authenticated SMTP session of one Email Account, reused for the messages of a worker"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.server = None
+        self.sent = 0
+        self.last_used = 0
+
+    def open(self):
+        settings = self.settings
+        if not settings['password']:
             raise Exception("Email password not found in Email Account settings")
         
         # Determine connection type
-        if email_settings['use_ssl']:
-            server = smtplib.SMTP_SSL(email_settings['smtp_server'], email_settings['smtp_port'])
+        if settings['use_ssl']:
+            server = smtplib.SMTP_SSL(settings['smtp_server'], settings['smtp_port'], timeout=SMTP_TIMEOUT)
         else:
-            server = smtplib.SMTP(email_settings['smtp_server'], email_settings['smtp_port'])
-            if email_settings['use_tls']:
+            server = smtplib.SMTP(settings['smtp_server'], settings['smtp_port'], timeout=SMTP_TIMEOUT)
+            if settings['use_tls']:
                 server.starttls()
         
-        with server:
-            server.login(email_settings['email_id'], email_settings['password'])
-            server.send_message(msg, to_addrs=all_recipients)
-            
-        frappe.logger("debug").info(f"Email sent successfully to {len(all_recipients)} recipients")
+        try:
+            server.login(settings['email_id'], settings['password'])
+        except Exception:
+            server.close()
+            raise
         
-        # Log to Email Queue as "Sent"
-        _save_to_email_queue_with_full_message(
-            msg=msg,
-            subject=subject,
-            to_emails=to_emails,
-            cc_emails=cc_emails,
-            bcc_emails=bcc_emails,
-            all_recipients=all_recipients,
-            email_settings=email_settings,
-            attachments=attachments,
-            status="Sent"
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+        _incr_send_stat("connections")
+
+    def close(self):
+        if not self.server:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+        self.server = None
+
+    def is_reusable(self):
+        return bool(
+            self.server
+            and self.sent < SMTP_MAX_MESSAGES_PER_CONNECTION
+            and time.monotonic() - self.last_used < SMTP_MAX_IDLE_SECONDS
         )
-            
-    except Exception as e:
-        frappe.logger("debug").error(f"Failed to send email: {str(e)}")
-        frappe.log_error(frappe.get_traceback(), f"Error sending email: {str(e)}")
+
+    def send(self, msg, to_addrs):
+        if not self.is_reusable():
+            self.close()
+            self.open()
         
-        # Save to queue for retry
-        _save_to_email_queue_with_full_message(
-            msg=msg,
-            subject=subject,
-            to_emails=to_emails,
-            cc_emails=cc_emails,
-            bcc_emails=bcc_emails,
-            all_recipients=all_recipients,
-            email_settings=email_settings,
-            attachments=attachments,
-            status="Not Sent"
-        )
+        try:
+            self.server.send_message(msg, to_addrs=to_addrs)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            # Dropped between messages: reconnect once and resend
+            self.close()
+            self.open()
+            self.server.send_message(msg, to_addrs=to_addrs)
+        
+        self.sent += 1
+        self.last_used = time.monotonic()
+
+
+
+def get_smtp_connection(email_settings):
+    """Pooled connection of the current worker thread for the account"""
+    key = (frappe.local.site, email_settings['email_id'], threading.get_ident())
+    connection = _smtp_connections.get(key)
+    
+    # Settings were reloaded (account saved): drop the session opened with the old ones
+    if connection and connection.settings is not email_settings:
+        connection.close()
+        connection = None
+    
+    if not connection:
+        connection = _smtp_connections[key] = SMTPConnection(email_settings)
+    return connection
+
+
+
+def close_smtp_connections():
+    for connection in _smtp_connections.values():
+        connection.close()
+    _smtp_connections.clear()
+
+
+
+def _incr_send_stat(field, amount=1):
+    try:
+        cache = frappe.cache()
+        cache.hincrby(cache.make_key(MAIL_STATS_CACHE_KEY), field, amount)
+    except Exception:
+        pass
+
+
+
+def _record_send_stats(sent, failed, seconds):
+    """Totals and the last batch of the direct SMTP sends"""
+    try:
+        cache = frappe.cache()
+        stats_key = cache.make_key(MAIL_STATS_CACHE_KEY)
+        pipeline = cache.pipeline()
+        pipeline.hincrby(stats_key, "batches", 1)
+        pipeline.hincrby(stats_key, "sent", sent)
+        pipeline.hincrby(stats_key, "failed", failed)
+        pipeline.hincrbyfloat(stats_key, "send_ms", seconds * 1000)
+        pipeline.execute()
+        
+        batch = {
+            'sent': sent,
+            'failed': failed,
+            'seconds': round(seconds, 3),
+            'messages_per_second': round(sent / seconds, 2) if seconds else 0,
+            'at': str(now_datetime())
+        }
+        frappe.cache().set_value(MAIL_LAST_BATCH_CACHE_KEY, batch)
+        
+        if sent + failed > 1:
+            frappe.logger("debug").info(f"Email batch: {batch}")
+    except Exception:
+        pass
+
+
+
+@frappe.whitelist()
+def get_mail_transport_stats():
+    """Throughput of the direct SMTP sends since the last reset"""
+    frappe.only_for("System Manager")
+    
+    cache = frappe.cache()
+    # raw HGETALL: the wrapper's hgetall unpickles values
+    raw = cache.pipeline().hgetall(cache.make_key(MAIL_STATS_CACHE_KEY)).execute()[0]
+    stats = {frappe.safe_decode(field): flt(frappe.safe_decode(value)) for field, value in raw.items()}
+    
+    sent = int(stats.get('sent', 0))
+    send_seconds = stats.get('send_ms', 0) / 1000
+    connections = int(stats.get('connections', 0))
+    
+    return {
+        'batches': int(stats.get('batches', 0)),
+        'sent': sent,
+        'failed': int(stats.get('failed', 0)),
+        'connections_opened': connections,
+        'messages_per_connection': round(sent / connections, 2) if connections else 0,
+        'messages_per_second': round(sent / send_seconds, 2) if send_seconds else 0,
+        'last_batch': cache.get_value(MAIL_LAST_BATCH_CACHE_KEY)
+    }
+
+
+
+@frappe.whitelist()
+def reset_mail_transport_stats():
+    frappe.only_for("System Manager")
+    cache = frappe.cache()
+    cache.delete(cache.make_key(MAIL_STATS_CACHE_KEY))
+    cache.delete_value(MAIL_LAST_BATCH_CACHE_KEY)
 
 
 
@@ -0,0 +1,466 @@
+import frappe
+from frappe.utils import cint
+
+# =====================================================================================
+# DECLARATIVE INDEX REGISTRY
+# =====================================================================================
+#
+# Every secondary index the VMS hot queries rely on is declared here and created by
+# apply_index_registry (after_migrate), so a site cannot drift from the list. Indexes
+# that already exist under the same name are left alone; InnoDB maintains them on write.
+#
+# Report with:  bench --site <site> vms-index-report
+#           or  vms.utils.index_registry.get_index_report (System Manager)
+
+INDEX_REGISTRY = (
+    # PO lists (po_early_deliver_get): employee by purchase group, vendor by vendor code.
+    # Same columns as the indexes po_early_deliver_get.create_advanced_indexes built by hand
+    # (name, po_no keep the list queries covered), so existing sites are not rebuilt.
+    {
+        "doctype": "Purchase Order",
+        "name": "idx_po_employee_covering",
+        "columns": ["purchase_group", "company_code", "vendor_status", "creation", "name", "po_no"]
+    },
+    {
+        "doctype": "Purchase Order",
+        "name": "idx_po_vendor_covering",
+        "columns": ["vendor_code", "company_code", "vendor_status", "creation", "name", "po_no"]
+    },
+    # Targeted vendor code revalidation (po_vm_validation_corn)
+    {
+        "doctype": "Purchase Order",
+        "name": "company_code_vendor_code_index",
+        "columns": ["company_code", "vendor_code"]
+    },
+    # Due dispatch reminders (purchase_order.send_dispatch_notifications)
+    {
+        "doctype": "Purchase Order",
+        "name": "idx_po_dispatch_notification_due",
+        "columns": ["sent_notification_triggered", "sent_notification_to_vendor", "scheduled_notification_time"]
+    },
+    # Cart escalation SLA timers (cart_details.get_cart_escalation_timers)
+    {
+        "doctype": "Cart Details",
+        "name": "idx_cart_first_escalation_due",
+        "columns": ["escalation_status", "first_escalation_time"]
+    },
+    {
+        "doctype": "Cart Details",
+        "name": "idx_cart_second_escalation_due",
+        "columns": ["escalation_status", "second_escalation_time"]
+    },
+    # Dashboard counters and onboarding lists
+    {
+        "doctype": "Vendor Onboarding",
+        "name": "idx_vonb_company_status",
+        "columns": ["company_name", "onboarding_form_status"]
+    },
+    {
+        "doctype": "Vendor Onboarding",
+        "name": "idx_vonb_registered_by_status",
+        "columns": ["registered_by", "onboarding_form_status"]
+    },
+    {
+        "doctype": "Vendor Onboarding",
+        "name": "idx_vonb_ref_no",
+        "columns": ["ref_no"]
+    },
+    # Vendor code resolution
+    {
+        "doctype": "Company Vendor Code",
+        "name": "idx_cvc_vendor_ref_no",
+        "columns": ["vendor_ref_no"]
+    },
+    {
+        "doctype": "Company Vendor Code",
+        "name": "idx_cvc_company_code",
+        "columns": ["company_code"]
+    },
+    {
+        "doctype": "Vendor Code",
+        "name": "idx_vendor_code_covering",
+        "columns": ["parent", "vendor_code"]
+    },
+    {
+        "doctype": "Vendor Code",
+        "name": "idx_vendor_code_value",
+        "columns": ["vendor_code"]
+    },
+    {
+        "doctype": "Vendor Master",
+        "name": "idx_vendor_master_email_covering",
+        "columns": ["office_email_primary"]
+    },
+    # User -> team -> purchase groups
+    {
+        "doctype": "Employee",
+        "name": "idx_employee_user_team_covering",
+        "columns": ["user_id", "team"]
+    },
+    {
+        "doctype": "Purchase Group Master",
+        "name": "idx_purchase_group_team",
+        "columns": ["team", "purchase_group_code"]
+    },
+    # Role checks of the PO list endpoints (roles of a user)
+    {
+        "doctype": "Has Role",
+        "name": "idx_has_role_covering",
+        "columns": ["parent", "role"]
+    },
+    # Chat history (also created by message_search.ensure_message_search_index)
+    {
+        "doctype": "Chat Message",
+        "name": "chat_room_timestamp_index",
+        "columns": ["chat_room", "timestamp"]
+    },
+)
+
+# Representative shapes of the hot queries, EXPLAINed by the report. The values only need
+# to be of the right type; the plan is what matters.
+HOT_QUERIES = (
+    {
+        "name": "employee_po_list",
+        "expected_index": "idx_po_employee_covering",
+        "sql": """
+            SELECT name, po_no, company_code, creation
+            FROM `tabPurchase Order`
+            WHERE purchase_group IN %(values)s AND company_code = %(value)s
+            ORDER BY creation DESC LIMIT 10
+        """
+    },
+    {
+        "name": "vendor_po_list",
+        "expected_index": "idx_po_vendor_covering",
+        "sql": """
+            SELECT name, po_no, company_code, vendor_code, creation
+            FROM `tabPurchase Order`
+            WHERE vendor_code IN %(values)s AND sent_to_vendor = 1
+            ORDER BY creation DESC LIMIT 10
+        """
+    },
+    {
+        "name": "po_vendor_revalidation",
+        "expected_index": "company_code_vendor_code_index",
+        "sql": """
+            SELECT name FROM `tabPurchase Order`
+            WHERE company_code IN %(values)s AND vendor_code IN %(values)s
+        """
+    },
+    {
+        "name": "due_dispatch_notifications",
+        "expected_index": "idx_po_dispatch_notification_due",
+        "sql": """
+            SELECT name FROM `tabPurchase Order`
+            WHERE sent_notification_triggered = 1 AND sent_notification_to_vendor = 0
+            AND scheduled_notification_time <= NOW()
+            ORDER BY scheduled_notification_time LIMIT 200
+        """
+    },
+    {
+        "name": "due_cart_escalations",
+        "expected_index": "idx_cart_first_escalation_due",
+        "sql": """
+            SELECT name FROM `tabCart Details`
+            WHERE escalation_status = 'Pending' AND first_escalation_time <= NOW()
+            AND purchase_team_acknowledgement = 0 AND asked_to_modify = 0
+            ORDER BY first_escalation_time LIMIT 200
+        """
+    },
+    {
+        "name": "dashboard_company_counts",
+        "expected_index": "idx_vonb_company_status",
+        "sql": """
+            SELECT onboarding_form_status, COUNT(*)
+            FROM `tabVendor Onboarding`
+            WHERE company_name IN %(values)s
+            GROUP BY onboarding_form_status
+        """
+    },
+    {
+        "name": "dashboard_team_counts",
+        "expected_index": "idx_vonb_registered_by_status",
+        "sql": """
+            SELECT onboarding_form_status, COUNT(*)
+            FROM `tabVendor Onboarding`
+            WHERE registered_by IN %(values)s
+            GROUP BY onboarding_form_status
+        """
+    },
+    {
+        "name": "onboarding_by_ref_no",
+        "expected_index": "idx_vonb_ref_no",
+        "sql": "SELECT name FROM `tabVendor Onboarding` WHERE ref_no = %(value)s"
+    },
+    {
+        "name": "company_vendor_codes_of_vendor",
+        "expected_index": "idx_cvc_vendor_ref_no",
+        "sql": "SELECT name, company_code FROM `tabCompany Vendor Code` WHERE vendor_ref_no = %(value)s"
+    },
+    {
+        "name": "vendor_by_email",
+        "expected_index": "idx_vendor_master_email_covering",
+        "sql": "SELECT name FROM `tabVendor Master` WHERE office_email_primary = %(value)s"
+    },
+    {
+        "name": "chat_room_history",
+        "expected_index": "chat_room_timestamp_index",
+        "sql": """
+            SELECT name FROM `tabChat Message`
+            WHERE chat_room = %(value)s
+            ORDER BY timestamp DESC LIMIT 50
+        """
+    },
+)
+
+SAMPLE_VALUES = {"value": "_index_report_", "values": ("_index_report_", "_index_report_2")}
+
+
+def _table(doctype):
+    return f"tab{doctype}"
+
+
+def get_table_indexes(tables):
+    """{table: {index_name: {"columns": [...], "unique": bool}}} from information_schema"""
+    if not tables:
+        return {}
+
+    rows = frappe.db.sql("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME, NON_UNIQUE
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+        AND TABLE_NAME IN %(tables)s
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """, {"tables": tuple(tables)}, as_dict=True)
+
+    indexes = {}
+    for row in rows:
+        index = indexes.setdefault(row.TABLE_NAME, {}).setdefault(
+            row.INDEX_NAME, {"columns": [], "unique": not row.NON_UNIQUE}
+        )
+        index["columns"].append(row.COLUMN_NAME)
+    return indexes
+
+
+def apply_index_registry():
+    """
+    Create the registered indexes that do not exist yet and rebuild those whose columns
+    differ from the registry (after_migrate, idempotent)
+    """
+    created = []
+    rebuilt = []
+    skipped = []
+    indexes = get_table_indexes(sorted({_table(entry["doctype"]) for entry in INDEX_REGISTRY}))
+
+    for entry in INDEX_REGISTRY:
+        doctype = entry["doctype"]
+        try:
+            if not frappe.db.table_exists(doctype):
+                skipped.append({"index": entry["name"], "reason": f"{doctype} table missing"})
+                continue
+
+            missing_columns = [c for c in entry["columns"] if not frappe.db.has_column(doctype, c)]
+            if missing_columns:
+                skipped.append({"index": entry["name"], "reason": f"missing columns {missing_columns}"})
+                continue
+
+            existing = indexes.get(_table(doctype), {}).get(entry["name"])
+            if not existing:
+                frappe.db.add_index(doctype, entry["columns"], entry["name"])
+                created.append(entry["name"])
+            elif existing["columns"] != entry["columns"]:
+                # Drop and re-add in one ALTER, the index is never absent
+                columns = ", ".join(f"`{column}`" for column in entry["columns"])
+                frappe.db.sql_ddl(
+                    f"ALTER TABLE `{_table(doctype)}` DROP INDEX `{entry['name']}`, "
+                    f"ADD INDEX `{entry['name']}` ({columns})"
+                )
+                rebuilt.append(entry["name"])
+
+        except Exception:
+            skipped.append({"index": entry["name"], "reason": "error, see Error Log"})
+            frappe.log_error(frappe.get_traceback(), f"Index Registry Error: {entry['name']}")
+
+    if created or rebuilt:
+        frappe.db.commit()
+
+    return {"created": created, "rebuilt": rebuilt, "skipped": skipped}
+
+
+def get_missing_indexes(indexes):
+    """Registered indexes that are absent, or present under their name with other columns"""
+    missing = []
+    for entry in INDEX_REGISTRY:
+        table_indexes = indexes.get(_table(entry["doctype"]), {})
+        existing = table_indexes.get(entry["name"])
+        if existing and existing["columns"] == entry["columns"]:
+            continue
+        if existing:
+            missing.append({
+                "doctype": entry["doctype"],
+                "index": entry["name"],
+                "columns": entry["columns"],
+                "actual_columns": existing["columns"],
+                "covered_by": []
+            })
+            continue
+
+        # Same leading columns under another name (e.g. created by hand) still serve the queries
+        covered_by = [
+            name for name, index in table_indexes.items()
+            if index["columns"][:len(entry["columns"])] == entry["columns"]
+        ]
+        missing.append({
+            "doctype": entry["doctype"],
+            "index": entry["name"],
+            "columns": entry["columns"],
+            "covered_by": covered_by
+        })
+    return missing
+
+
+def get_redundant_indexes(indexes):
+    """Non-unique indexes whose columns are a left prefix of (or equal to) another index"""
+    redundant = []
+    for table, table_indexes in indexes.items():
+        for name, index in table_indexes.items():
+            if name == "PRIMARY" or index["unique"]:
+                continue
+
+            columns = index["columns"]
+            for other_name, other in table_indexes.items():
+                if other_name == name:
+                    continue
+                other_columns = other["columns"]
+                if other_columns[:len(columns)] != columns:
+                    continue
+                # Of two identical indexes report only one
+                if len(other_columns) == len(columns) and not other["unique"] and other_name > name:
+                    continue
+
+                redundant.append({
+                    "table": table,
+                    "index": name,
+                    "columns": columns,
+                    "covered_by": other_name
+                })
+                break
+    return redundant
+
+
+def get_unused_indexes(indexes):
+    """
+    Indexes without reads since the server started, from MariaDB user statistics
+    (userstat=1) or MySQL's sys schema. Returns (source, rows); source is None when
+    neither is available.
+    """
+    tables = tuple(indexes)
+    if not tables:
+        return None, []
+
+    try:
+        userstat = frappe.db.sql("SHOW VARIABLES LIKE 'userstat'")
+        if userstat and str(userstat[0][1]).upper() in ("ON", "1"):
+            used = {
+                (row[0], row[1])
+                for row in frappe.db.sql("""
+                    SELECT TABLE_NAME, INDEX_NAME
+                    FROM information_schema.INDEX_STATISTICS
+                    WHERE TABLE_SCHEMA = DATABASE()
+                    AND TABLE_NAME IN %(tables)s
+                """, {"tables": tables})
+            }
+            return "information_schema.INDEX_STATISTICS", [
+                {"table": table, "index": name, "columns": index["columns"]}
+                for table, table_indexes in indexes.items()
+                for name, index in table_indexes.items()
+                if name != "PRIMARY" and (table, name) not in used
+            ]
+    except Exception:
+        pass
+
+    try:
+        rows = frappe.db.sql("""
+            SELECT object_name, index_name
+            FROM sys.schema_unused_indexes
+            WHERE object_schema = DATABASE()
+            AND object_name IN %(tables)s
+        """, {"tables": tables})
+        return "sys.schema_unused_indexes", [
+            {
+                "table": table,
+                "index": name,
+                "columns": indexes.get(table, {}).get(name, {}).get("columns", [])
+            }
+            for table, name in rows
+        ]
+    except Exception:
+        return None, []
+
+
+def explain_hot_queries():
+    plans = []
+    for query in HOT_QUERIES:
+        try:
+            rows = frappe.db.sql(f"EXPLAIN {query['sql']}", SAMPLE_VALUES, as_dict=True)
+        except Exception as e:
+            plans.append({"query": query["name"], "error": str(e)})
+            continue
+
+        plan = rows[0] if rows else {}
+        key = plan.get("key")
+        possible_keys = (plan.get("possible_keys") or "").split(",")
+        plans.append({
+            "query": query["name"],
+            "table": plan.get("table"),
+            "access_type": plan.get("type"),
+            "key": key,
+            "rows": plan.get("rows"),
+            "expected_index": query["expected_index"],
+            "uses_expected_index": key == query["expected_index"],
+            "expected_index_possible": query["expected_index"] in possible_keys,
+            "full_scan": plan.get("type") == "ALL"
+        })
+    return plans
+
+
+def build_index_report():
+    tables = sorted({_table(entry["doctype"]) for entry in INDEX_REGISTRY})
+    indexes = get_table_indexes(tables)
+    unused_source, unused = get_unused_indexes(indexes)
+    missing = get_missing_indexes(indexes)
+    redundant = get_redundant_indexes(indexes)
+    plans = explain_hot_queries()
+
+    return {
+        "status": "success",
+        "registered": len(INDEX_REGISTRY),
+        "missing": missing,
+        "redundant": redundant,
+        "unused": unused,
+        "unused_source": unused_source or "unavailable (enable userstat on MariaDB or performance_schema on MySQL)",
+        "hot_queries": plans,
+        "summary": {
+            "missing": len(missing),
+            "redundant": len(redundant),
+            "unused": len(unused),
+            "full_scans": sum(1 for plan in plans if plan.get("full_scan"))
+        }
+    }
+
+
+@frappe.whitelist()
+def get_index_report(apply=0):
+    """Missing / redundant / unused indexes of the registered tables and the plans of the hot queries"""
+    frappe.only_for("System Manager")
+
+    try:
+        applied = apply_index_registry() if cint(apply) else None
+        report = build_index_report()
+        if applied is not None:
+            report["applied"] = applied
+        return report
+
+    except Exception as e:
+        frappe.log_error(frappe.get_traceback(), "Index Report Error")
+        return {"status": "error", "message": str(e)}
@@ -1,7 +1,15 @@
 import frappe
 from frappe import _
+from frappe.utils import now_datetime
 
-def create_notification_log(recipients=None, subject=None, message=None, **kwargs):
+NOTIFICATION_LOG_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus",
+    "subject", "type", "document_type", "document_name", "for_user", "from_user",
+    "email_content", "read"
+)
+
+
+def create_notification_log(recipients=None, subject=None, message=None, enqueue=False, **kwargs):
     """
     Create notification logs for specified recipients
     
@@ -9,10 +17,11 @@ def create_notification_log(recipients=None, subject=None, message=None, **kwarg
         recipients (str/list): User ID(s) to send notification to. Can be single user or list of users
         subject (str): Subject/title of the notification
         message (str): Message content of the notification
+        enqueue (bool): Write the logs in a background job after the current transaction commits
         **kwargs: Additional parameters like document_type, document_name, type, etc.
     
     Returns:
-        list: List of created notification log documents
+        list: Names of the created Notification Logs (empty when enqueued)
     """
     # if not recipients:
     #     frappe.throw("Recipients parameter is required")
@@ -24,48 +33,120 @@ def create_notification_log(recipients=None, subject=None, message=None, **kwarg
     if isinstance(recipients, str):
         recipients = [recipients]
     
-    # Default values
-    notification_type = kwargs.get("type", "Alert")
-    document_type = kwargs.get("document_type")
-    document_name = kwargs.get("document_name")
-    from_user = kwargs.get("from_user", frappe.session.user)
+    entries = [
+        {
+            "for_user": recipient,
+            "subject": subject,
+            "email_content": message,
+            "type": kwargs.get("type", "Alert"),
+            "document_type": kwargs.get("document_type"),
+            "document_name": kwargs.get("document_name"),
+            "from_user": kwargs.get("from_user", frappe.session.user)
+        }
+        for recipient in recipients or []
+        if recipient
+    ]
     
-    created_logs = []
+    return create_notification_logs(entries, enqueue=enqueue)
+
+
+
+def create_notification_logs(entries, enqueue=False):
+    """
+    Bulk path for Notification Logs: one IN query validates every recipient, the rows go
+    in with a multi-row insert and the bell updates are published together after commit.
     
-    for recipient in recipients:
-        try:
-            # ✅ Check if user exists
-            if not frappe.db.exists("User", recipient):
-                frappe.log_error(
-                    f"Skipped creating notification. User {recipient} does not exist.",
-                    "Notification Log Creation"
-                )
-                continue
-            
-            # Create notification log document
-            notification_doc = frappe.get_doc({
-                "doctype": "Notification Log",
-                "subject": subject,
-                "type": notification_type,
-                "document_type": document_type,
-                "document_name": document_name,
-                "for_user": recipient,
-                "from_user": from_user,
-                "email_content": message
-            })
-            
-            # Insert the document
-            notification_doc.insert(ignore_permissions=True)
-            created_logs.append(notification_doc)
+    Args:
+        entries (list): dicts with for_user, subject, email_content and optional type,
+            document_type, document_name, from_user
+        enqueue (bool): Do all of it in a background job after the current transaction commits
+    
+    Note: the rows are inserted without Notification Log controller hooks, so Frappe's own
+    notification email is not sent (custom_sendmail sends the mail itself).
+    """
+    if not entries:
+        return []
+    
+    if enqueue:
+        frappe.enqueue(
+            "vms.utils.notification.create_notification_logs",
+            queue="short",
+            enqueue_after_commit=True,
+            entries=entries
+        )
+        return []
+    
+    try:
+        recipients = {entry["for_user"] for entry in entries}
+        existing_users = set(frappe.get_all(
+            "User",
+            filters={"name": ["in", list(recipients)]},
+            pluck="name"
+        ))
         
-        except Exception as e:
+        # ✅ Skip users that do not exist
+        missing_users = recipients - existing_users
+        if missing_users:
             frappe.log_error(
-                f"Failed to create notification for user {recipient}: {str(e)}",
+                f"Skipped creating notification. Users do not exist: {', '.join(sorted(missing_users))}",
                 "Notification Log Creation"
             )
-            continue
+        
+        now = now_datetime()
+        session_user = frappe.session.user
+        values = []
+        for entry in entries:
+            if entry["for_user"] not in existing_users:
+                continue
+            values.append((
+                frappe.generate_hash(length=10), now, now, session_user, session_user, 0,
+                entry.get("subject"),
+                entry.get("type") or "Alert",
+                entry.get("document_type"),
+                entry.get("document_name"),
+                entry["for_user"],
+                entry.get("from_user") or session_user,
+                entry.get("email_content"),
+                0
+            ))
+        
+        if not values:
+            return []
+        
+        frappe.db.bulk_insert("Notification Log", NOTIFICATION_LOG_FIELDS, values)
+        
+        notified_users = sorted({row[10] for row in values})
+        _mark_notifications_unseen(notified_users)
+        frappe.db.after_commit.add(lambda: _publish_notification_updates(notified_users))
+        
+        return [row[0] for row in values]
     
-    return created_logs
+    except Exception as e:
+        frappe.log_error(
+            f"Failed to create notifications for {len(entries)} entries: {str(e)}\n{frappe.get_traceback()}",
+            "Notification Log Creation"
+        )
+        return []
+
+
+
+def _mark_notifications_unseen(users):
+    """What Notification Log.after_insert does per row, as one UPDATE"""
+    frappe.db.sql(
+        """
+        UPDATE `tabNotification Settings`
+        SET seen = 0
+        WHERE name IN %(users)s AND seen = 1
+        """,
+        {"users": users}
+    )
+
+
+
+def _publish_notification_updates(users):
+    # Bell refresh for every user of the batch, once per user
+    for user in users:
+        frappe.publish_realtime("notification", user=user)
 
 
 
@@ -90,10 +171,11 @@ def create_document_notification(recipients, subject, message, doc_type, doc_nam
         type="Alert"
     )
 
-def create_bulk_notification(user_list, subject, message):
+def create_bulk_notification(user_list, subject, message, enqueue=False):
     """Create notifications for multiple users at once"""
     return create_notification_log(
         recipients=user_list,
         subject=subject,
-        message=message
+        message=message,
+        enqueue=enqueue
     )
\ No newline at end of file
@@ -0,0 +1,199 @@
+import hashlib
+import hmac
+import json
+import secrets
+
+import frappe
+from frappe.utils import add_to_date, cint, flt, now_datetime
+
+# Redis OTP engine.
+#
+# One live OTP per (purpose, user), stored as a hash under otp:<purpose>:<user> with the
+# OTP's expiry as the key TTL, so nothing has to expire or delete OTPs afterwards. Only
+# a digest of the OTP is stored. A wrong OTP increments the attempt counter and the OTP
+# is dropped once the attempts run out; a verified OTP is deleted (single use). Issuing
+# is rate limited per (purpose, user) with a counter that expires with its window.
+#
+# With `otp_audit_log` in site config every issue / verify event is pushed to a Redis list
+# and flushed to OTP Verification rows in bulk by a deduplicated background job.
+
+PASSWORD_RESET_PURPOSE = "password_reset"
+
+DEFAULT_OTP_EXPIRY_MINUTES = 5
+DEFAULT_OTP_LENGTH = 6
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_SEND_LIMIT = 5
+DEFAULT_SEND_WINDOW_MINUTES = 15
+
+AUDIT_QUEUE_CACHE_KEY = "otp:audit"
+AUDIT_FLUSH_BATCH_SIZE = 500
+
+
+def get_otp_key(purpose, user):
+    return f"otp:{purpose}:{user}"
+
+
+def get_rate_limit_key(purpose, user):
+    return f"otp_rate:{purpose}:{user}"
+
+
+def get_otp_expiry_minutes():
+    settings = frappe.get_cached_doc("OTP Settings")
+    return flt(settings.otp_expiration_time) or DEFAULT_OTP_EXPIRY_MINUTES
+
+
+def get_max_attempts():
+    return cint(frappe.conf.get("otp_max_attempts")) or DEFAULT_MAX_ATTEMPTS
+
+
+def _digest(otp, purpose, user):
+    return hashlib.sha256(f"{purpose}:{user}:{otp}".encode()).hexdigest()
+
+
+def issue_otp(user, purpose, length=DEFAULT_OTP_LENGTH):
+    """
+    New OTP for the user and purpose, replacing any live one.
+
+    Returns {"status": "success", "otp", "expires_in"} or {"status": "error", "message",
+    "retry_after"} when the user requested too many OTPs in the window.
+    """
+    cache = frappe.cache()
+
+    send_limit = cint(frappe.conf.get("otp_send_limit")) or DEFAULT_SEND_LIMIT
+    window = (cint(frappe.conf.get("otp_send_window_minutes")) or DEFAULT_SEND_WINDOW_MINUTES) * 60
+
+    rate_key = cache.make_key(get_rate_limit_key(purpose, user))
+    pipeline = cache.pipeline()
+    # NX: the window starts at the first request
+    pipeline.set(rate_key, 0, ex=window, nx=True)
+    pipeline.incr(rate_key)
+    pipeline.ttl(rate_key)
+    _created, requests, retry_after = pipeline.execute()
+
+    if requests > send_limit:
+        _audit(user, purpose, "Rate Limited")
+        return {
+            "status": "error",
+            "message": "Too many OTP requests. Please try again later.",
+            "retry_after": max(cint(retry_after), 1)
+        }
+
+    otp = "".join(secrets.choice("0123456789") for _ in range(length))
+    expires_in = int(get_otp_expiry_minutes() * 60)
+
+    key = cache.make_key(get_otp_key(purpose, user))
+    pipeline = cache.pipeline()
+    pipeline.delete(key)
+    pipeline.hset(key, mapping={"digest": _digest(otp, purpose, user), "attempts": 0})
+    pipeline.expire(key, expires_in)
+    pipeline.execute()
+
+    _audit(user, purpose, "Issued", expiration_time=add_to_date(now_datetime(), seconds=expires_in))
+    return {"status": "success", "otp": otp, "expires_in": expires_in}
+
+
+def verify_otp(user, purpose, otp):
+    """
+    Check an OTP; returns {"status": "success"} once per issued OTP, otherwise
+    {"status": "Failed", "message", "attempts_left"}
+    """
+    cache = frappe.cache()
+    key = cache.make_key(get_otp_key(purpose, user))
+
+    # raw HGET: the wrapper's hget unpickles values
+    digest = cache.pipeline().hget(key, "digest").execute()[0] if otp else None
+    if not digest:
+        _audit(user, purpose, "Expired")
+        return {"status": "Failed", "message": "Invalid OTP", "attempts_left": 0}
+
+    if hmac.compare_digest(frappe.safe_decode(digest), _digest(str(otp).strip(), purpose, user)):
+        # DEL returns 0 when a concurrent verify already consumed the OTP
+        if cache.delete(key):
+            _audit(user, purpose, "Verified")
+            return {"status": "success", "message": "OTP verified"}
+        return {"status": "Failed", "message": "Invalid OTP", "attempts_left": 0}
+
+    pipeline = cache.pipeline()
+    pipeline.hincrby(key, "attempts", 1)
+    pipeline.hexists(key, "digest")
+    attempts, live = pipeline.execute()
+
+    attempts_left = max(get_max_attempts() - attempts, 0) if live else 0
+    # Out of attempts, or expired since the read (HINCRBY recreated it without a TTL)
+    if not attempts_left:
+        cache.delete(key)
+
+    _audit(user, purpose, "Failed" if attempts_left else "Locked")
+    return {"status": "Failed", "message": "Wrong OTP", "attempts_left": attempts_left}
+
+
+def revoke_otp(user, purpose):
+    cache = frappe.cache()
+    cache.delete(cache.make_key(get_otp_key(purpose, user)))
+
+
+# -------------------------------------------------------------------------------------
+# Audit log
+# -------------------------------------------------------------------------------------
+
+def _audit(user, purpose, event, expiration_time=None):
+    if not frappe.conf.get("otp_audit_log"):
+        return
+
+    try:
+        cache = frappe.cache()
+        cache.pipeline().rpush(cache.make_key(AUDIT_QUEUE_CACHE_KEY), json.dumps({
+            "email": user,
+            "purpose": purpose,
+            "event": event,
+            "expiration_time": str(expiration_time) if expiration_time else None,
+            "at": str(now_datetime())
+        })).execute()
+        frappe.enqueue(
+            "vms.utils.otp_store.flush_otp_audit_log",
+            queue="short",
+            job_id="otp_audit_flush",
+            deduplicate=True
+        )
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "OTP Audit Error")
+
+
+def flush_otp_audit_log():
+    """Write queued OTP events as OTP Verification rows, AUDIT_FLUSH_BATCH_SIZE per insert"""
+    cache = frappe.cache()
+    queue_key = cache.make_key(AUDIT_QUEUE_CACHE_KEY)
+    fields = (
+        "name", "creation", "modified", "owner", "modified_by", "docstatus",
+        "email", "purpose", "event", "is_verified", "is_not_verified", "expired", "expiration_time"
+    )
+
+    written = 0
+    while True:
+        pipeline = cache.pipeline()
+        pipeline.lrange(queue_key, 0, AUDIT_FLUSH_BATCH_SIZE - 1)
+        pipeline.ltrim(queue_key, AUDIT_FLUSH_BATCH_SIZE, -1)
+        events = pipeline.execute()[0]
+        if not events:
+            break
+
+        values = []
+        for raw in events:
+            event = json.loads(raw)
+            values.append((
+                frappe.generate_hash(length=10), event["at"], event["at"], "Administrator", "Administrator", 0,
+                event["email"],
+                event["purpose"],
+                event["event"],
+                1 if event["event"] == "Verified" else 0,
+                1 if event["event"] in ("Failed", "Locked") else 0,
+                1 if event["event"] == "Expired" else 0,
+                event["expiration_time"]
+            ))
+
+        frappe.db.bulk_insert("OTP Verification", fields, values)
+        frappe.db.commit()
+        written += len(values)
+
+    return written
@@ -0,0 +1,239 @@
+import time
+
+import frappe
+from frappe.utils import cint, flt, now_datetime
+
+# =====================================================================================
+# DUE-TIME SLA TIMERS
+# =====================================================================================
+#
+# An SLA timer is a due-time state transition on a doctype: rows whose state is
+# `from_state` and whose `due_field` has passed are handed to the timer's handler and
+# then moved to `to_state`. The due-at queue is the table itself, read in due order
+# through a (state_field, due_field) index from the index registry.
+#
+# Rows are claimed with one Redis SET NX per row, so workers running the same timer never
+# hand a row to two handlers. The state transition of everything a handler completed is
+# one UPDATE that re-checks from_state. Claims are never released, they expire after
+# CLAIM_TTL, so a worker that read a row just before another worker's transition committed
+# cannot claim it again. A row the handler did not complete (no recipient, send error) gets
+# a retry-at in a Redis hash per timer, RETRY_DELAY ahead and doubling per attempt up to
+# MAX_RETRY_DELAY. Rows waiting for their retry-at are excluded from the due query, so they
+# leave the head of the queue and the rows behind it are still reached. The due_field itself
+# is never changed: it keeps recording when the transition was due.
+#
+# Timers are registered through the `sla_timers` hook: a list of methods returning
+# SLATimer objects. run_due_sla_timers runs every minute and drains a backlog through
+# deduplicated follow-up jobs, so it never overruns its interval.
+
+DEFAULT_BATCH_SIZE = 200
+CLAIM_TTL = 10 * 60
+RETRY_DELAY = CLAIM_TTL
+MAX_RETRY_DELAY = 6 * 60 * 60
+RETRY_CACHE_KEY = "sla_timer_retry:{timer}"
+
+
+class SLATimer:
+    """
+    name: unique timer name (claim keys, follow-up job ids)
+    doctype / due_field / state_field: the due-at queue
+    from_state / to_state: transition applied to handled rows
+    handler: fn(rows) -> names it completed; rows are dicts of name, due_field and `fields`
+    filters: extra conditions on due rows
+    set_values: other fields set with the transition
+    """
+
+    def __init__(self, name, doctype, due_field, state_field, from_state, to_state, handler,
+                 fields=(), filters=None, set_values=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.name = name
+        self.doctype = doctype
+        self.due_field = due_field
+        self.state_field = state_field
+        self.from_state = from_state
+        self.to_state = to_state
+        self.handler = handler
+        self.fields = tuple(fields)
+        self.filters = filters or {}
+        self.set_values = set_values or {}
+        self.batch_size = batch_size
+
+
+def get_sla_timers():
+    timers = {}
+    for method in frappe.get_hooks("sla_timers"):
+        for timer in frappe.get_attr(method)():
+            timers[timer.name] = timer
+    return timers
+
+
+def get_due_rows(timer, now=None, exclude=None):
+    """Oldest due rows first, at most batch_size; names in exclude are skipped"""
+    filters = {
+        timer.state_field: timer.from_state,
+        timer.due_field: ["<=", now or now_datetime()],
+        **timer.filters
+    }
+    if exclude:
+        filters["name"] = ["not in", list(exclude)]
+    return frappe.get_all(
+        timer.doctype,
+        filters=filters,
+        fields=["name", timer.due_field, *timer.fields],
+        order_by=f"{timer.due_field} asc",
+        limit=timer.batch_size
+    )
+
+
+def _claim_key(timer, name):
+    return f"sla_timer_claim:{timer.name}:{name}"
+
+
+def claim_rows(timer, names):
+    """The subset of names this worker claimed; one round trip for the batch"""
+    if not names:
+        return set()
+
+    cache = frappe.cache()
+    token = frappe.generate_hash(length=10)
+    pipeline = cache.pipeline()
+    for name in names:
+        pipeline.set(cache.make_key(_claim_key(timer, name)), token, nx=True, ex=CLAIM_TTL)
+    return {name for name, claimed in zip(names, pipeline.execute(), strict=True) if claimed}
+
+
+def apply_transition(timer, names):
+    """Move handled rows to to_state in one UPDATE; rows that left from_state meanwhile are skipped"""
+    if not names:
+        return 0
+
+    table = frappe.qb.DocType(timer.doctype)
+    query = (
+        frappe.qb.update(table)
+        .set(table[timer.state_field], timer.to_state)
+        .set(table.modified, now_datetime())
+        .where(table.name.isin(list(names)))
+        .where(table[timer.state_field] == timer.from_state)
+    )
+    for fieldname, value in timer.set_values.items():
+        query = query.set(table[fieldname], value)
+    query.run()
+    return len(names)
+
+
+def get_retry_state(timer):
+    """name -> (attempts, retry_at timestamp) of deferred rows; entries long past their retry-at are dropped"""
+    cache = frappe.cache()
+    key = RETRY_CACHE_KEY.format(timer=timer.name)
+    now = time.time()
+
+    state = {}
+    for name, value in (cache.hgetall(key) or {}).items():
+        name = frappe.safe_decode(name)
+        attempts, retry_at = value
+        if now - flt(retry_at) > 2 * MAX_RETRY_DELAY:
+            # A row still failing is re-deferred right after its retry-at; this one left from_state
+            cache.hdel(key, name)
+            continue
+        state[name] = (cint(attempts), flt(retry_at))
+    return state
+
+
+def get_waiting_rows(timer, retry_state=None):
+    """Names whose retry-at has not passed yet"""
+    now = time.time()
+    retry_state = get_retry_state(timer) if retry_state is None else retry_state
+    return {name for name, (attempts, retry_at) in retry_state.items() if retry_at > now}
+
+
+def defer_rows(timer, names, retry_state=None):
+    """Give rows the handler did not complete a retry-at, RETRY_DELAY doubling per attempt"""
+    if not names:
+        return 0
+
+    cache = frappe.cache()
+    key = RETRY_CACHE_KEY.format(timer=timer.name)
+    retry_state = get_retry_state(timer) if retry_state is None else retry_state
+    now = time.time()
+
+    for name in names:
+        attempts = retry_state.get(name, (0, 0))[0]
+        delay = min(RETRY_DELAY * (2 ** min(attempts, 16)), MAX_RETRY_DELAY)
+        cache.hset(key, name, (attempts + 1, now + delay))
+    return len(names)
+
+
+def clear_retry_state(timer, names, retry_state):
+    """Forget the retry-at of rows that completed"""
+    key = RETRY_CACHE_KEY.format(timer=timer.name)
+    for name in names:
+        if name in retry_state:
+            frappe.cache().hdel(key, name)
+
+
+def run_sla_timer(timer, now=None):
+    """One batch of a timer: claim due rows, hand them to the handler, record the transition"""
+    if isinstance(timer, str):
+        timer = get_sla_timers()[timer]
+
+    retry_state = get_retry_state(timer)
+    due_rows = get_due_rows(timer, now, exclude=get_waiting_rows(timer, retry_state))
+    claimed = claim_rows(timer, [row.name for row in due_rows])
+    rows = [row for row in due_rows if row.name in claimed]
+
+    completed = []
+    if rows:
+        try:
+            completed = [name for name in (timer.handler(rows) or []) if name in claimed]
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), f"SLA Timer Error: {timer.name}")
+
+        apply_transition(timer, completed)
+        completed_names = set(completed)
+        frappe.db.commit()
+
+        clear_retry_state(timer, completed_names, retry_state)
+        defer_rows(timer, [row.name for row in rows if row.name not in completed_names], retry_state)
+
+    return {
+        "timer": timer.name,
+        "due": len(due_rows),
+        "claimed": len(rows),
+        "completed": len(completed),
+        "has_more": len(due_rows) >= timer.batch_size
+    }
+
+
+def run_due_sla_timers():
+    """Cron (every minute): one batch per timer; a full batch continues in a follow-up job"""
+    results = []
+    for timer in get_sla_timers().values():
+        try:
+            result = run_sla_timer(timer)
+            results.append(result)
+            if result["has_more"]:
+                enqueue_sla_timer(timer.name)
+        except Exception:
+            frappe.db.rollback()
+            frappe.log_error(frappe.get_traceback(), f"SLA Timer Error: {timer.name}")
+    return results
+
+
+def enqueue_sla_timer(timer_name):
+    frappe.enqueue(
+        "vms.utils.sla_scheduler.drain_sla_timer",
+        queue="long",
+        job_id=f"sla_timer::{timer_name}",
+        deduplicate=True,
+        timer_name=timer_name
+    )
+
+
+def drain_sla_timer(timer_name):
+    """Run batches until nothing due is left to claim"""
+    timer = get_sla_timers()[timer_name]
+    while True:
+        result = run_sla_timer(timer)
+        # Claimed rows are either transitioned or deferred, so every batch makes progress;
+        # a batch claimed entirely by other workers is left to them
+        if not result["has_more"] or not result["claimed"]:
+            break
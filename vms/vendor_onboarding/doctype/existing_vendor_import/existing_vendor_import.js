@@ -68,8 +68,8 @@ frappe.ui.form.on("Existing Vendor Import", {
 		// Add custom buttons
 		add_custom_buttons(frm);
 		
-		// Auto-parse when file is uploaded
-		if (frm.doc.csv_xl && !frm.doc.vendor_data) {
+		// Auto-parse when file is uploaded (streaming imports are parsed by a background job)
+		if (frm.doc.csv_xl && !frm.doc.vendor_data && !frm.doc.streaming_import) {
 			setTimeout(() => {
 				frm.save();
 			}, 1000);
@@ -144,7 +144,7 @@ function add_custom_buttons(frm) {
 		download_sample_template();
 	}, __('Download'));
 	
-	if (frm.doc.vendor_data) {
+	if (has_parsed_data(frm)) {
 		frm.add_custom_button(__('Processed Data (Excel)'), function() {
 			download_processed_data(frm, 'all');
 		}, __('Download'));
@@ -185,7 +185,7 @@ function add_custom_buttons(frm) {
 	}
 	
 	// Field mapping buttons
-	if (frm.doc.csv_xl && frm.doc.vendor_data) {
+	if (frm.doc.csv_xl && has_parsed_data(frm)) {
 		frm.add_custom_button(__('Reset Auto Mapping'), function() {
 			reset_auto_mapping(frm);
 		}, __('Mapping'));
@@ -200,6 +200,10 @@ function add_custom_buttons(frm) {
 	}
 }
 
+function has_parsed_data(frm) {
+	return !!frm.doc.vendor_data || (frm.doc.streaming_import && frm.doc.import_status === 'Parsed');
+}
+
 function reset_form_data(frm) {
 	frm.set_value('existing_vendor_initialized', 0);
 	frm.set_value('vendor_data', '');
@@ -228,7 +232,7 @@ function process_vendors(frm) {
 		return;
 	}
 	
-	if (!frm.doc.vendor_data) {
+	if (!has_parsed_data(frm)) {
 		frappe.msgprint(__('Please save the form to parse the uploaded file first.'));
 		return;
 	}
@@ -270,7 +274,14 @@ function process_vendors(frm) {
 		},
 		callback: function(r) {
 			progress_dialog.hide();
-			
+
+			if (r.message && r.message.status === 'queued') {
+				// Streaming imports are processed in the background, progress comes via realtime
+				frappe.show_alert({message: r.message.message, indicator: 'blue'});
+				frm.reload_doc();
+				return;
+			}
+
 			if (r.message) {
 				let results = r.message;
 				show_results_dialog(results, frm);
@@ -1255,4 +1266,25 @@ frappe.ui.form.on("Existing Vendor Import", {
 			$('[data-toggle="tooltip"]').tooltip();
 		}, 1000);
 	}
-});
\ No newline at end of file
+});
+// Streaming import progress (parse / process run in background jobs)
+frappe.ui.form.on("Existing Vendor Import", {
+	setup(frm) {
+		frappe.realtime.on('existing_vendor_import_progress', (data) => {
+			if (!data || data.docname !== frm.doc.name) return;
+
+			if (data.status === 'Parsing' && data.rows_parsed) {
+				frm.dashboard.show_progress(__('Parsing'), 100, __('{0} rows parsed', [data.rows_parsed]));
+			} else if (data.status === 'Processing' && data.total_rows) {
+				frm.dashboard.show_progress(__('Processing'), data.progress || 0,
+					__('{0} of {1} rows processed', [data.rows_processed, data.total_rows]));
+			} else if (['Completed', 'Failed', 'Parsed'].includes(data.status)) {
+				frm.dashboard.hide_progress();
+				if (data.results) {
+					show_results_dialog(data.results, frm);
+				}
+				frm.reload_doc();
+			}
+		});
+	}
+});
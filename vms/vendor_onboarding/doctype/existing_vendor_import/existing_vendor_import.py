@@ -22,6 +22,16 @@ except ImportError:
     # Alternative import path if the above fails
     from vms.vendor_onboarding.doctype.existing_vendor_import.existing_vendor_import_utils import VendorImportUtils
 
+from vms.vendor_onboarding.doctype.existing_vendor_import.existing_vendor_import_row_store import (
+	DEFAULT_CHUNK_SIZE,
+	VendorImportRowStore,
+	iter_file_chunks,
+	read_file_headers
+)
+
+# Cap on error/warning messages kept in success_fail_rate for streaming imports
+MAX_STORED_MESSAGES = 1000
+
 # Also add this helper method to handle the utils class instantiation
 def get_vendor_utils():
     """Get instance of VendorImportUtils class"""
@@ -36,7 +46,149 @@ def get_vendor_utils():
 class ExistingVendorImport(Document):
 	def validate(self):
 		if self.csv_xl and not self.existing_vendor_initialized:
-			self.parse_and_validate_data()
+			if self.streaming_import:
+				self.prepare_streaming_import()
+			else:
+				self.parse_and_validate_data()
+
+	def on_update(self):
+		if self.flags.enqueue_streaming_parse:
+			frappe.enqueue(
+				"vms.vendor_onboarding.doctype.existing_vendor_import.existing_vendor_import.stream_parse_vendor_import",
+				queue="long",
+				timeout=7200,
+				job_name=f"existing_vendor_import_parse_{self.name}",
+				docname=self.name,
+				enqueue_after_commit=True
+			)
+
+	def on_trash(self):
+		VendorImportRowStore(self.name).clear()
+
+	def prepare_streaming_import(self):
+		"""
+		Streaming mode: only the header row is read inside the request.
+		Parsing and validation of the rows run in a background job (stream_parse_vendor_import).
+		"""
+		file_changed = self.has_value_changed("csv_xl") or self.has_value_changed("streaming_import")
+		if not (file_changed or self.has_value_changed("field_mapping")):
+			return
+
+		if file_changed:
+			file_doc = frappe.get_doc("File", {"file_url": self.csv_xl})
+			headers = read_file_headers(file_doc.get_full_path())
+
+			self.original_headers = json.dumps(headers)
+			self.generate_field_mapping_html(headers)
+
+			if not self.field_mapping:
+				self.field_mapping = json.dumps(self.generate_auto_mapping(headers), indent=2)
+
+		self.mapping_statistics = self.generate_mapping_statistics_html()
+
+		# Rows live in the row store, not in the document
+		self.vendor_data = None
+		self.import_status = "Queued"
+		self.import_progress = 0
+		self.flags.enqueue_streaming_parse = True
+
+	def set_import_progress(self, status, progress=None, **extra):
+		values = {"import_status": status}
+		if progress is not None:
+			values["import_progress"] = progress
+		self.db_set(values, update_modified=False, commit=True)
+
+		frappe.publish_realtime(
+			"existing_vendor_import_progress",
+			{"docname": self.name, "status": status, "progress": progress, **extra},
+			doctype=self.doctype,
+			docname=self.name
+		)
+
+	def run_streaming_parse(self, chunk_size=DEFAULT_CHUNK_SIZE):
+		"""Read the file chunk by chunk into the row store and validate each chunk"""
+		file_doc = frappe.get_doc("File", {"file_url": self.csv_xl})
+		store = VendorImportRowStore(self.name)
+		store.reset(json.loads(self.original_headers or "[]"), chunk_size)
+
+		self.set_import_progress("Parsing", 0)
+
+		validation_results = {
+			"total_records": 0,
+			"valid_records": 0,
+			"invalid_records": 0,
+			"errors": [],
+			"warnings": [],
+			"total_errors": 0,
+			"total_warnings": 0
+		}
+
+		for rows in iter_file_chunks(file_doc.get_full_path(), chunk_size):
+			start_row = store.get_manifest()["total_rows"] + 1
+			store.append_chunk(rows)
+
+			chunk_results = self.validate_vendor_data(rows, start_row=start_row)
+			validation_results["total_records"] += chunk_results["total_records"]
+			validation_results["valid_records"] += chunk_results["valid_records"]
+			validation_results["invalid_records"] += chunk_results["invalid_records"]
+			validation_results["total_errors"] += len(chunk_results["errors"])
+			validation_results["total_warnings"] += len(chunk_results["warnings"])
+
+			for key in ("errors", "warnings"):
+				room = MAX_STORED_MESSAGES - len(validation_results[key])
+				if room > 0:
+					validation_results[key].extend(chunk_results[key][:room])
+
+			frappe.publish_realtime(
+				"existing_vendor_import_progress",
+				{"docname": self.name, "status": "Parsing", "rows_parsed": validation_results["total_records"]},
+				doctype=self.doctype,
+				docname=self.name
+			)
+
+		self.total_rows = validation_results["total_records"]
+		self.success_fail_rate = json.dumps(validation_results, indent=2)
+		self.generate_display_html(store.get_page(1, 10), validation_results)
+		self.import_status = "Parsed"
+		self.import_progress = 100
+		self.save(ignore_permissions=True)
+
+	def run_streaming_process(self):
+		"""Process rows from the row store in chunks, committing after each chunk"""
+		store = VendorImportRowStore(self.name)
+		field_mapping = json.loads(self.field_mapping)
+		total_rows = store.get_manifest()["total_rows"]
+		results = self.get_empty_process_results()
+
+		self.set_import_progress("Processing", 0)
+
+		for start_row, rows in store.iter_chunks():
+			for idx, row in enumerate(rows, start_row):
+				self.process_vendor_row(row, idx, field_mapping, results)
+
+			frappe.db.commit()
+			processed = start_row + len(rows) - 1
+			self.set_import_progress(
+				"Processing",
+				(processed / total_rows) * 100 if total_rows else 100,
+				rows_processed=processed,
+				total_rows=total_rows
+			)
+
+		self.existing_vendor_initialized = 1
+		self.import_status = "Completed"
+		self.import_progress = 100
+		self.save(ignore_permissions=True)
+		frappe.db.commit()
+
+		frappe.publish_realtime(
+			"existing_vendor_import_progress",
+			{"docname": self.name, "status": "Completed", "progress": 100, "results": results},
+			doctype=self.doctype,
+			docname=self.name
+		)
+
+		return results
 
 	def parse_and_validate_data(self):
 		"""Parse CSV/Excel file and validate data"""
@@ -259,6 +411,27 @@ class ExistingVendorImport(Document):
 		if not self.csv_xl:
 			frappe.throw("Please upload a CSV/Excel file first")
 		
+		if self.streaming_import:
+			if self.import_status not in ("Parsed", "Failed"):
+				frappe.throw("The file is still being parsed. Please wait until Import Status is Parsed")
+
+			if not self.field_mapping:
+				frappe.throw("Please configure field mapping first")
+
+			frappe.enqueue(
+				"vms.vendor_onboarding.doctype.existing_vendor_import.existing_vendor_import.process_streaming_vendor_import",
+				queue="long",
+				timeout=14400,
+				job_name=f"existing_vendor_import_process_{self.name}",
+				docname=self.name
+			)
+			self.db_set("import_status", "Processing", update_modified=False)
+
+			return {
+				"status": "queued",
+				"message": f"Processing of {self.total_rows or 0} rows has been queued"
+			}
+
 		if not self.vendor_data:
 			frappe.throw("No vendor data found. Please save the form to parse the CSV file first")
 		
@@ -268,7 +441,19 @@ class ExistingVendorImport(Document):
 		vendor_data = json.loads(self.vendor_data)
 		field_mapping = json.loads(self.field_mapping)
 		
-		results = {
+		results = self.get_empty_process_results()
+		
+		for idx, row in enumerate(vendor_data, 1):
+			self.process_vendor_row(row, idx, field_mapping, results)
+		
+		# Mark as completed
+		self.existing_vendor_initialized = 1
+		self.save()
+		
+		return results
+
+	def get_empty_process_results(self):
+		return {
 			"total_processed": 0,
 			"vendors_created": 0,
 			"vendors_updated": 0,
@@ -279,47 +464,42 @@ class ExistingVendorImport(Document):
 			"errors": [],
 			"warnings": []
 		}
-		
-		for idx, row in enumerate(vendor_data, 1):
-			try:
-				# Apply field mapping (preserves original row)
-				mapped_row = self.apply_field_mapping(row, field_mapping)
-				
-				# Process vendor with standalone payment details
-				vendor_result = self.process_single_vendor(mapped_row, idx)
-				
-				# Aggregate results
-				results["total_processed"] += 1
-				
-				if vendor_result.get("vendor_action") == "created":
-					results["vendors_created"] += 1
-				elif vendor_result.get("vendor_action") == "updated":
-					results["vendors_updated"] += 1
-				
-				if vendor_result.get("company_code_action") == "created":
-					results["company_codes_created"] += 1
-				elif vendor_result.get("company_code_action") == "updated":
-					results["company_codes_updated"] += 1
-				
-				# Track payment details creation/updates
-				if vendor_result.get("payment_details_action") == "created":
-					results["payment_details_created"] += 1
-				elif vendor_result.get("payment_details_action") == "updated":
-					results["payment_details_updated"] += 1
+
+	def process_vendor_row(self, row, idx, field_mapping, results):
+		"""Process a single raw row and aggregate the outcome into results"""
+		try:
+			# Apply field mapping (preserves original row)
+			mapped_row = self.apply_field_mapping(row, field_mapping)
+			
+			# Process vendor with standalone payment details
+			vendor_result = self.process_single_vendor(mapped_row, idx)
+			
+			# Aggregate results
+			results["total_processed"] += 1
+			
+			if vendor_result.get("vendor_action") == "created":
+				results["vendors_created"] += 1
+			elif vendor_result.get("vendor_action") == "updated":
+				results["vendors_updated"] += 1
+			
+			if vendor_result.get("company_code_action") == "created":
+				results["company_codes_created"] += 1
+			elif vendor_result.get("company_code_action") == "updated":
+				results["company_codes_updated"] += 1
+			
+			# Track payment details creation/updates
+			if vendor_result.get("payment_details_action") == "created":
+				results["payment_details_created"] += 1
+			elif vendor_result.get("payment_details_action") == "updated":
+				results["payment_details_updated"] += 1
+			
+			if vendor_result.get("warnings"):
+				results["warnings"].extend(vendor_result["warnings"])
 				
-				if vendor_result.get("warnings"):
-					results["warnings"].extend(vendor_result["warnings"])
-					
-			except Exception as e:
-				error_msg = f"Row {idx}: {str(e)}"
-				results["errors"].append(error_msg)
-				frappe.log_error(f"Vendor import error: {error_msg}")
-		
-		# Mark as completed
-		self.existing_vendor_initialized = 1
-		self.save()
-		
-		return results
+		except Exception as e:
+			error_msg = f"Row {idx}: {str(e)}"
+			results["errors"].append(error_msg)
+			frappe.log_error(f"Vendor import error: {error_msg}")
 
 
 
@@ -954,7 +1134,7 @@ class ExistingVendorImport(Document):
 		
 		return mapped_row
 
-	def validate_vendor_data(self, vendor_data):
+	def validate_vendor_data(self, vendor_data, start_row=1):
 		"""Validate each vendor record using current field mapping"""
 		results = {
 			"total_records": len(vendor_data),
@@ -966,7 +1146,7 @@ class ExistingVendorImport(Document):
 		
 		field_mapping = json.loads(self.field_mapping) if self.field_mapping else {}
 		
-		for idx, row in enumerate(vendor_data, 1):
+		for idx, row in enumerate(vendor_data, start_row):
 			mapped_row = self.apply_field_mapping(row, field_mapping)
 			
 			# Validate required fields
@@ -1448,7 +1628,7 @@ class ExistingVendorImport(Document):
 			return f"<div class='alert alert-danger'>Error: {str(e)}</div>"
 
 	def generate_display_html(self, vendor_data, validation_results):
-		"""Generate all display HTML sections"""
+		"""Generate all display HTML sections (vendor_data may be just a preview page)"""
 		
 		# Generate success/fail rate HTML
 		success_rate = (validation_results['valid_records'] / validation_results['total_records'] * 100) if validation_results['total_records'] > 0 else 0
@@ -1512,7 +1692,9 @@ class ExistingVendorImport(Document):
 		"""
 		
 		# Enhanced Vendor Data HTML with schema
-		vendor_html = self.generate_vendor_data_schema_html(vendor_data, validation_results)
+		vendor_html = self.generate_vendor_data_schema_html(
+			vendor_data, validation_results, total_records=validation_results.get('total_records')
+		)
 		
 		# Add CSS
 		css = """
@@ -1720,7 +1902,7 @@ class ExistingVendorImport(Document):
 		html += '</div>'
 		return html
 
-	def generate_vendor_data_schema_html(self, vendor_data, validation_results):
+	def generate_vendor_data_schema_html(self, vendor_data, validation_results, total_records=None):
 		"""Generate enhanced vendor data HTML with schema and graph format"""
 		
 		if not vendor_data:
@@ -1728,7 +1910,7 @@ class ExistingVendorImport(Document):
 		
 		field_mapping = json.loads(self.field_mapping) if self.field_mapping else {}
 		
-		total_records = len(vendor_data)
+		total_records = total_records or len(vendor_data)
 		valid_records = validation_results.get('valid_records', 0)
 		invalid_records = validation_results.get('invalid_records', 0)
 		total_columns = len(field_mapping)
@@ -1854,11 +2036,11 @@ class ExistingVendorImport(Document):
 			"""
 		
 		# Show more records indicator
-		if len(vendor_data) > 10:
+		if total_records > 10:
 			html += f"""
 				<tr>
 					<td colspan="9" class="text-center text-muted">
-						<i class="fa fa-ellipsis-h"></i> ... and {len(vendor_data) - 10} more records
+						<i class="fa fa-ellipsis-h"></i> ... and {total_records - 10} more records
 					</td>
 				</tr>
 			"""
@@ -2048,6 +2230,36 @@ class ExistingVendorImport(Document):
 
 
 # API Methods
+def get_vendor_rows(doc):
+	"""Iterate raw rows from the row store (streaming imports) or the vendor_data field"""
+	if doc.streaming_import:
+		store = VendorImportRowStore(doc.name)
+		return store.iter_rows() if store.exists() else iter([])
+	return iter(json.loads(doc.vendor_data) if doc.vendor_data else [])
+
+
+def stream_parse_vendor_import(docname):
+	"""Background job: parse and validate a streaming import into its row store"""
+	doc = frappe.get_doc("Existing Vendor Import", docname)
+	try:
+		doc.run_streaming_parse()
+	except Exception as e:
+		frappe.db.rollback()
+		frappe.log_error(frappe.get_traceback(), f"Existing Vendor Import Parse Error: {docname}")
+		doc.set_import_progress("Failed", error=str(e))
+
+
+def process_streaming_vendor_import(docname):
+	"""Background job: create/update vendors from the row store of a streaming import"""
+	doc = frappe.get_doc("Existing Vendor Import", docname)
+	try:
+		return doc.run_streaming_process()
+	except Exception as e:
+		frappe.db.rollback()
+		frappe.log_error(frappe.get_traceback(), f"Existing Vendor Import Process Error: {docname}")
+		doc.set_import_progress("Failed", error=str(e))
+
+
 @frappe.whitelist()
 def process_existing_vendors(docname):
 	"""API method to process vendor import"""
@@ -2072,16 +2284,15 @@ def download_processed_data(docname, data_type="all"):
 	"""Download processed vendor data as Excel"""
 	doc = frappe.get_doc("Existing Vendor Import", docname)
 	
-	if not doc.vendor_data:
+	if not doc.vendor_data and not doc.streaming_import:
 		frappe.throw("No vendor data found")
 	
-	vendor_data = json.loads(doc.vendor_data)
 	field_mapping = json.loads(doc.field_mapping) if doc.field_mapping else {}
 	validation_results = json.loads(doc.success_fail_rate) if doc.success_fail_rate else {}
 	
 	# Apply field mapping to all data
 	processed_data = []
-	for idx, row in enumerate(vendor_data):
+	for idx, row in enumerate(get_vendor_rows(doc)):
 		mapped_row = doc.apply_field_mapping(row, field_mapping)
 		mapped_row['_row_number'] = idx + 1
 		mapped_row['_status'] = 'Valid' if idx < validation_results.get('valid_records', 0) else 'Invalid'
@@ -2203,26 +2414,41 @@ def download_field_mapping_template(docname):
 		frappe.throw(f"Error creating template: {str(e)}")
 
 @frappe.whitelist()
-def get_vendor_import_preview(docname):
-	"""Get preview of vendor data with mapping applied"""
+def get_vendor_import_preview(docname, page_no=1, page_length=5):
+	"""Get a page of vendor data with mapping applied"""
 	doc = frappe.get_doc("Existing Vendor Import", docname)
+	page_no = max(cint(page_no), 1)
+	page_length = max(cint(page_length), 1)
 	
-	if not doc.vendor_data or not doc.field_mapping:
+	if not doc.field_mapping or not (doc.vendor_data or doc.streaming_import):
 		return {"error": "Vendor data and field mapping required"}
 	
-	vendor_data = json.loads(doc.vendor_data)
 	field_mapping = json.loads(doc.field_mapping)
+	start = (page_no - 1) * page_length
+
+	if doc.streaming_import:
+		store = VendorImportRowStore(doc.name)
+		if not store.exists():
+			return {"error": "File has not been parsed yet"}
+		page_rows = store.get_page(page_no, page_length)
+		total_records = store.get_manifest()["total_rows"]
+	else:
+		vendor_data = json.loads(doc.vendor_data)
+		page_rows = vendor_data[start:start + page_length]
+		total_records = len(vendor_data)
 	
-	# Apply mapping to first 5 records for preview
+	# Apply mapping to the requested page only
 	preview_data = []
-	for idx, row in enumerate(vendor_data[:5]):
+	for idx, row in enumerate(page_rows, start + 1):
 		mapped_row = doc.apply_field_mapping(row, field_mapping)
-		mapped_row['_row_number'] = idx + 1
+		mapped_row['_row_number'] = idx
 		preview_data.append(mapped_row)
 	
 	return {
 		"preview_data": preview_data,
-		"total_records": len(vendor_data),
+		"total_records": total_records,
+		"page_no": page_no,
+		"page_length": page_length,
 		"mapped_fields": sum(1 for v in field_mapping.values() if v)
 	}
 
@@ -2316,15 +2542,14 @@ def get_import_summary(docname):
 	"""Get comprehensive import summary"""
 	doc = frappe.get_doc("Existing Vendor Import", docname)
 	
-	if not doc.vendor_data:
+	if not doc.vendor_data and not doc.streaming_import:
 		return {"error": "No vendor data found"}
 	
-	vendor_data = json.loads(doc.vendor_data)
 	field_mapping = json.loads(doc.field_mapping) if doc.field_mapping else {}
 	
 	# Calculate statistics
 	summary = {
-		"total_records": len(vendor_data),
+		"total_records": 0,
 		"mapped_fields": sum(1 for v in field_mapping.values() if v),
 		"unmapped_fields": sum(1 for v in field_mapping.values() if not v),
 		"field_mapping_percentage": 0,
@@ -2337,7 +2562,8 @@ def get_import_summary(docname):
 		summary["field_mapping_percentage"] = (summary["mapped_fields"] / len(field_mapping)) * 100
 	
 	# Analyze data
-	for row in vendor_data:
+	for row in get_vendor_rows(doc):
+		summary["total_records"] += 1
 		mapped_row = doc.apply_field_mapping(row, field_mapping)
 		
 		if mapped_row.get('company_code'):
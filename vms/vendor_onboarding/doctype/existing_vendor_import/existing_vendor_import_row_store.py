@@ -0,0 +1,154 @@
+# existing_vendor_import_row_store.py
+# Copyright (c) 2025, Blue Phoenix and contributors
+# For license information, please see license.txt
+
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+
+import frappe
+import openpyxl
+import pandas as pd
+from frappe.utils import cint
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def read_file_headers(file_path):
+	"""Read only the header row of a CSV/Excel file"""
+	if file_path.endswith('.csv'):
+		with open(file_path, newline='', encoding='utf-8-sig') as f:
+			headers = next(csv.reader(f), [])
+	else:
+		workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+		try:
+			sheet = workbook.active
+			headers = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+		finally:
+			workbook.close()
+
+	return [str(h).strip() if h is not None else "" for h in headers]
+
+
+def iter_file_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+	"""
+	Yield lists of row dicts from a CSV/Excel file without loading the whole sheet.
+	CSV is read with pandas chunksize, Excel with openpyxl read-only mode.
+	"""
+	if file_path.endswith('.csv'):
+		for df in pd.read_csv(file_path, chunksize=chunk_size):
+			df.columns = df.columns.str.strip()
+			yield df.to_dict('records')
+		return
+
+	workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+	try:
+		rows = workbook.active.iter_rows(values_only=True)
+		headers = [str(h).strip() if h is not None else "" for h in next(rows, ())]
+
+		chunk = []
+		for values in rows:
+			if values is None or all(v is None for v in values):
+				continue
+			chunk.append(dict(zip(headers, values, strict=False)))
+			if len(chunk) >= chunk_size:
+				yield chunk
+				chunk = []
+		if chunk:
+			yield chunk
+	finally:
+		workbook.close()
+
+
+class VendorImportRowStore:
+	"""
+	Compact row store for Existing Vendor Import.
+
+	Parsed rows are kept outside the document as gzip-compressed JSON chunk files under
+	the site's private files, with a small manifest (headers, chunk size, total rows).
+	Pages can be read without loading the whole dataset.
+	"""
+
+	def __init__(self, docname):
+		self.docname = docname
+		self.path = frappe.get_site_path("private", "files", "existing_vendor_import", frappe.scrub(docname))
+
+	@property
+	def manifest_path(self):
+		return os.path.join(self.path, "manifest.json")
+
+	def exists(self):
+		return os.path.exists(self.manifest_path)
+
+	def chunk_path(self, chunk_no):
+		return os.path.join(self.path, f"chunk_{chunk_no:05d}.json.gz")
+
+	def reset(self, headers, chunk_size=DEFAULT_CHUNK_SIZE):
+		self.clear()
+		os.makedirs(self.path, exist_ok=True)
+		self._manifest = {"headers": headers, "chunk_size": cint(chunk_size), "total_rows": 0, "chunks": 0}
+		self._write_manifest()
+
+	def clear(self):
+		if os.path.exists(self.path):
+			shutil.rmtree(self.path)
+
+	def get_manifest(self):
+		if not getattr(self, "_manifest", None):
+			with open(self.manifest_path) as f:
+				self._manifest = json.load(f)
+		return self._manifest
+
+	def _write_manifest(self):
+		with open(self.manifest_path, "w") as f:
+			json.dump(self._manifest, f)
+
+	def append_chunk(self, rows):
+		"""Append one chunk of rows; chunks must not exceed the configured chunk size"""
+		manifest = self.get_manifest()
+		chunk_no = manifest["chunks"]
+		with gzip.open(self.chunk_path(chunk_no), "wt", encoding="utf-8") as f:
+			json.dump(rows, f, default=str)
+
+		manifest["chunks"] += 1
+		manifest["total_rows"] += len(rows)
+		self._write_manifest()
+		return chunk_no
+
+	def read_chunk(self, chunk_no):
+		with gzip.open(self.chunk_path(chunk_no), "rt", encoding="utf-8") as f:
+			return json.load(f)
+
+	def iter_chunks(self):
+		"""Yield (start_row_number, rows) with 1-based row numbers"""
+		manifest = self.get_manifest()
+		start = 1
+		for chunk_no in range(manifest["chunks"]):
+			rows = self.read_chunk(chunk_no)
+			yield start, rows
+			start += len(rows)
+
+	def iter_rows(self):
+		for _start, rows in self.iter_chunks():
+			yield from rows
+
+	def get_page(self, page_no=1, page_length=20):
+		"""Return the rows of one page, only reading the chunks that overlap it"""
+		manifest = self.get_manifest()
+		page_no = max(cint(page_no), 1)
+		page_length = max(cint(page_length), 1)
+		chunk_size = manifest["chunk_size"]
+
+		start = (page_no - 1) * page_length
+		end = min(start + page_length, manifest["total_rows"])
+		rows = []
+
+		for chunk_no in range(start // chunk_size, (end - 1) // chunk_size + 1 if end > start else 0):
+			chunk = self.read_chunk(chunk_no)
+			chunk_start = chunk_no * chunk_size
+			rows.extend(chunk[max(start - chunk_start, 0):end - chunk_start])
+
+		return rows
@@ -0,0 +1,9 @@
+# Copyright (c) 2025, Blue Phoenix and Contributors
+# See license.txt
+
+# import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestVendorImportJob(FrappeTestCase):
+	pass
@@ -0,0 +1,30 @@
+// Copyright (c) 2025, Blue Phoenix and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on("Vendor Import Job", {
+	refresh(frm) {
+		if (["Queued", "Running"].includes(frm.doc.status)) {
+			frm.add_custom_button(__("Resume"), () => {
+				frappe.call({
+					method: "vms.vendor_onboarding.doctype.vendor_import_staging.staging_bulk_job.resume_vendor_import_job",
+					args: { job_name: frm.doc.name },
+					callback: () => frm.reload_doc(),
+				});
+			});
+			frm.add_custom_button(__("Cancel Job"), () => {
+				frappe.call({
+					method: "vms.vendor_onboarding.doctype.vendor_import_staging.staging_bulk_job.cancel_vendor_import_job",
+					args: { job_name: frm.doc.name },
+					callback: () => frm.reload_doc(),
+				});
+			});
+		}
+
+		frappe.realtime.off("vendor_import_job_progress");
+		frappe.realtime.on("vendor_import_job_progress", (data) => {
+			if (data.job === frm.doc.name) {
+				frm.reload_doc();
+			}
+		});
+	},
+});
@@ -0,0 +1,500 @@
+# Copyright (c) 2025, Blue Phoenix and contributors
+# For license information, please see license.txt
+
+"""
+Resumable bulk pipeline Vendor Import Staging -> Vendor Master.
+
+A Vendor Import Job owns its staging records (import_job). Each worker claims a small
+chunk of Queued records (import_status -> Processing, import_worker -> its token) and
+commits the claim, then processes every record inside a savepoint and commits the
+created documents together with the records' final status once per chunk. If the chunk
+fails, records not yet attempted go back to Queued and attempted ones are marked Failed,
+since a document hook may already have committed their import. Records of the same vendor are
+serialized across workers with a Redis lock, and Company Master lookups are cached for
+the whole job.
+
+Workers heartbeat in Redis. recover_vendor_import_jobs (scheduler) puts the records of
+a worker whose heartbeat went stale back to Queued and restarts missing workers, so a
+killed worker resumes instead of leaving records in "Processing".
+"""
+
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import add_to_date, cint, flt, get_datetime, now_datetime
+
+from vms.vendor_onboarding.doctype.vendor_import_staging.vendor_import_staging import (
+    RECORD_SAVEPOINT,
+    create_vendor_master_from_staging,
+)
+
+WORKER_METHOD = "vms.vendor_onboarding.doctype.vendor_import_staging.staging_bulk_job.run_vendor_import_worker"
+
+DEFAULT_WORKERS = 2
+MAX_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 20
+MAX_CHUNK_SIZE = 100
+
+# Seconds without a heartbeat after which a worker is considered dead
+HEARTBEAT_STALE_AFTER = 300
+VENDOR_LOCK_TTL = 600
+WORKER_TIMEOUT = 4 * 60 * 60
+
+HEARTBEAT_CACHE_KEY = "vendor_import_job:heartbeats:{job}"
+VENDOR_LOCK_CACHE_KEY = "vendor_import_job:vendor_lock:{vendor}"
+
+ACTIVE_STATUSES = ("Queued", "Running")
+
+
+def get_default_workers():
+    return min(max(cint(frappe.conf.get("vendor_import_workers")) or DEFAULT_WORKERS, 1), MAX_WORKERS)
+
+
+def get_default_chunk_size():
+    return min(max(cint(frappe.conf.get("vendor_import_chunk_size")) or DEFAULT_CHUNK_SIZE, 1), MAX_CHUNK_SIZE)
+
+
+# ------------------------------------------------------------------------------------
+# Job creation
+# ------------------------------------------------------------------------------------
+
+def start_vendor_import_job(record_names, workers=None, chunk_size=None):
+    """
+    Create a Vendor Import Job for the Pending, not Invalid staging records and start its
+    workers. Returns the job name with the accepted and skipped records.
+    """
+    record_names = list(dict.fromkeys(record_names))
+    rows = frappe.db.sql("""
+        SELECT name, import_status, validation_status
+        FROM `tabVendor Import Staging`
+        WHERE name IN %(names)s
+    """, {"names": tuple(record_names)}, as_dict=True) if record_names else []
+
+    valid_records = []
+    skipped_records = []
+    for row in rows:
+        if row.import_status == "Pending" and row.validation_status != "Invalid":
+            valid_records.append(row.name)
+        else:
+            skipped_records.append({
+                "name": row.name,
+                "reason": f"Status: {row.import_status}, Validation: {row.validation_status}"
+            })
+
+    if not valid_records:
+        return {"job": None, "valid_records": [], "skipped_records": skipped_records}
+
+    workers = min(max(cint(workers) or get_default_workers(), 1), MAX_WORKERS)
+    chunk_size = min(max(cint(chunk_size) or get_default_chunk_size(), 1), MAX_CHUNK_SIZE)
+
+    job = frappe.get_doc({
+        "doctype": "Vendor Import Job",
+        "status": "Queued",
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "total_records": len(valid_records),
+        "pending_records": len(valid_records)
+    }).insert(ignore_permissions=True)
+
+    for start in range(0, len(valid_records), 1000):
+        frappe.db.sql("""
+            UPDATE `tabVendor Import Staging`
+            SET import_job = %(job)s, import_status = 'Queued', import_worker = NULL
+            WHERE name IN %(names)s AND import_status = 'Pending'
+        """, {"job": job.name, "names": tuple(valid_records[start:start + 1000])})
+
+    frappe.db.commit()
+
+    enqueue_job_workers(job.name, workers)
+
+    return {"job": job.name, "valid_records": valid_records, "skipped_records": skipped_records}
+
+
+def enqueue_job_workers(job_name, workers, slots=None):
+    for slot in (slots if slots is not None else range(workers)):
+        frappe.enqueue(
+            WORKER_METHOD,
+            queue="long",
+            timeout=WORKER_TIMEOUT,
+            job_id=f"vendor_import_job::{job_name}::{slot}",
+            deduplicate=True,
+            enqueue_after_commit=True,
+            job_name=job_name,
+            slot=slot
+        )
+
+
+# ------------------------------------------------------------------------------------
+# Heartbeats and vendor locks
+# ------------------------------------------------------------------------------------
+
+def _heartbeat(job_name, token):
+    cache = frappe.cache()
+    cache.hset(HEARTBEAT_CACHE_KEY.format(job=job_name), token, time.time())
+
+
+def _clear_heartbeat(job_name, token):
+    frappe.cache().hdel(HEARTBEAT_CACHE_KEY.format(job=job_name), token)
+
+
+def get_live_workers(job_name):
+    """token -> last heartbeat of the workers that beat within HEARTBEAT_STALE_AFTER"""
+    beats = frappe.cache().hgetall(HEARTBEAT_CACHE_KEY.format(job=job_name)) or {}
+    now = time.time()
+    return {
+        frappe.safe_decode(token): flt(beat) for token, beat in beats.items()
+        if now - flt(beat) <= HEARTBEAT_STALE_AFTER
+    }
+
+
+def _vendor_lock_key(staging_doc):
+    vendor = (staging_doc.vendor_name or staging_doc.name or "").strip().lower()
+    cache = frappe.cache()
+    return cache.make_key(VENDOR_LOCK_CACHE_KEY.format(vendor=vendor))
+
+
+def _acquire_vendor_lock(lock_key, token):
+    return bool(frappe.cache().set(lock_key, token, nx=True, ex=VENDOR_LOCK_TTL))
+
+
+def _release_vendor_lock(lock_key, token):
+    cache = frappe.cache()
+    if frappe.safe_decode(cache.get(lock_key)) == token:
+        cache.delete(lock_key)
+
+
+# ------------------------------------------------------------------------------------
+# Worker
+# ------------------------------------------------------------------------------------
+
+def _claim_chunk(job_name, token, chunk_size):
+    frappe.db.sql("""
+        UPDATE `tabVendor Import Staging`
+        SET import_status = 'Processing', import_worker = %(token)s
+        WHERE import_job = %(job)s AND import_status = 'Queued'
+        ORDER BY name
+        LIMIT %(limit)s
+    """, {"job": job_name, "token": token, "limit": chunk_size})
+    frappe.db.commit()
+
+    return frappe.db.sql_list("""
+        SELECT name FROM `tabVendor Import Staging`
+        WHERE import_job = %(job)s AND import_worker = %(token)s AND import_status = 'Processing'
+        ORDER BY name
+    """, {"job": job_name, "token": token})
+
+
+def _set_record_status(record_name, status, error=None, token=None):
+    """Finish a record; with token, only while it is still Processing under that worker's claim"""
+    values = {
+        "status": status,
+        "name": record_name,
+        "token": token,
+        "now": now_datetime(),
+        "progress": 100 if status == "Completed" else 0,
+        "processed": 1 if status == "Completed" else 0,
+        "failed": 1 if status == "Failed" else 0,
+        "error": error or ""
+    }
+    frappe.db.sql("""
+        UPDATE `tabVendor Import Staging`
+        SET import_status = %(status)s,
+            import_worker = NULL,
+            processing_progress = %(progress)s,
+            processed_records = %(processed)s,
+            failed_records = %(failed)s,
+            error_log = %(error)s,
+            import_attempts = IFNULL(import_attempts, 0) + 1,
+            last_processed = %(now)s
+        WHERE name = %(name)s
+    """ + (" AND import_status = 'Processing' AND import_worker = %(token)s" if token else ""), values)
+
+
+def _requeue_record(record_name, token):
+    """Give a claimed record back to the queue; rows already finished or claimed by another worker are left alone"""
+    frappe.db.sql("""
+        UPDATE `tabVendor Import Staging`
+        SET import_status = 'Queued', import_worker = NULL
+        WHERE name = %(name)s AND import_status = 'Processing' AND import_worker = %(token)s
+    """, {"name": record_name, "token": token})
+
+
+def _process_chunk(job_name, record_names, token, master_cache):
+    """Import the claimed records; everything is committed once at the end of the chunk"""
+    counts = {"success": 0, "failed": 0, "requeued": 0, "last_error": None}
+    held_locks = []
+    attempted = set()
+
+    frappe.flags.staging_chunk_commit = True
+    frappe.flags.staging_master_cache = master_cache
+    try:
+        for record_name in record_names:
+            _heartbeat(job_name, token)
+            try:
+                staging_doc = frappe.get_doc("Vendor Import Staging", record_name)
+
+                lock_key = _vendor_lock_key(staging_doc)
+                if lock_key not in held_locks:
+                    if not _acquire_vendor_lock(lock_key, token):
+                        # Same vendor is being imported by another worker; pick it up later
+                        _requeue_record(record_name, token)
+                        counts["requeued"] += 1
+                        continue
+                    held_locks.append(lock_key)
+            except Exception as e:
+                # Fail the record instead of the chunk, otherwise it is re-claimed and crashes every pass
+                error_message = f"Error loading {record_name}: {e!s}"
+                _set_record_status(record_name, "Failed", error_message)
+                counts["failed"] += 1
+                counts["last_error"] = f"{record_name}: {error_message}"
+                continue
+
+            attempted.add(record_name)
+            frappe.db.savepoint(RECORD_SAVEPOINT)
+            try:
+                result = create_vendor_master_from_staging(staging_doc)
+            except Exception as e:
+                frappe.db.rollback(save_point=RECORD_SAVEPOINT)
+                result = {"status": "error", "error": f"Error processing {record_name}: {e!s}"}
+
+            if result.get("status") == "success":
+                _set_record_status(record_name, "Completed")
+                counts["success"] += 1
+            else:
+                error_message = result.get("error", "Unknown error")
+                _set_record_status(record_name, "Failed", error_message)
+                counts["failed"] += 1
+                counts["last_error"] = f"{record_name}: {error_message}"
+
+        frappe.db.commit()
+
+    except Exception:
+        frappe.db.rollback()
+        # Claims were committed before the chunk; only touch records still held by this worker.
+        # An attempted record may have had its import committed by a document hook that commits
+        # on its own, so it is failed for review instead of being imported a second time.
+        for record_name in record_names:
+            if record_name in attempted:
+                _set_record_status(
+                    record_name, "Failed",
+                    _("Import of {0} was interrupted; check for an existing Vendor Master before retrying").format(record_name),
+                    token=token
+                )
+            else:
+                _requeue_record(record_name, token)
+        frappe.db.commit()
+        raise
+
+    finally:
+        frappe.flags.staging_chunk_commit = False
+        frappe.flags.staging_master_cache = None
+        for lock_key in held_locks:
+            _release_vendor_lock(lock_key, token)
+
+    return counts
+
+
+def load_company_master_cache():
+    """company_code -> Company Master name, loaded once per job worker"""
+    return {
+        row.company_code: row.name
+        for row in frappe.get_all("Company Master", fields=["name", "company_code"])
+        if row.company_code
+    }
+
+
+def run_vendor_import_worker(job_name, slot=0):
+    """Background worker: claim and import chunks until the job has no Queued records left"""
+    token = f"{slot}:{frappe.generate_hash(length=8)}"
+    frappe.flags.in_background_job = True
+
+    try:
+        job = frappe.db.get_value("Vendor Import Job", job_name, ["status", "chunk_size"], as_dict=True)
+        if not job or job.status not in ACTIVE_STATUSES:
+            return
+
+        if job.status == "Queued":
+            frappe.db.set_value("Vendor Import Job", job_name, {
+                "status": "Running",
+                "started_at": now_datetime()
+            })
+            frappe.db.commit()
+
+        chunk_size = cint(job.chunk_size) or get_default_chunk_size()
+        master_cache = load_company_master_cache()
+
+        while True:
+            _heartbeat(job_name, token)
+
+            if frappe.db.get_value("Vendor Import Job", job_name, "status") not in ACTIVE_STATUSES:
+                break
+
+            record_names = _claim_chunk(job_name, token, chunk_size)
+            if not record_names:
+                break
+
+            counts = _process_chunk(job_name, record_names, token, master_cache)
+            update_job_progress(job_name, last_error=counts["last_error"])
+
+            if counts["requeued"] == len(record_names):
+                # Only vendors locked by other workers were left in this chunk
+                time.sleep(1)
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), f"Vendor Import Job Worker Error: {job_name}")
+
+    finally:
+        _clear_heartbeat(job_name, token)
+        frappe.flags.in_background_job = False
+        update_job_progress(job_name)
+
+
+# ------------------------------------------------------------------------------------
+# Progress
+# ------------------------------------------------------------------------------------
+
+def get_job_counts(job_name):
+    rows = frappe.db.sql("""
+        SELECT import_status, COUNT(*) AS count
+        FROM `tabVendor Import Staging`
+        WHERE import_job = %s
+        GROUP BY import_status
+    """, (job_name,), as_dict=True)
+    return {row.import_status: cint(row.count) for row in rows}
+
+
+def update_job_progress(job_name, last_error=None):
+    """Recompute the job counters, throughput and ETA from its staging records"""
+    try:
+        job = frappe.db.get_value(
+            "Vendor Import Job", job_name,
+            ["status", "total_records", "started_at"], as_dict=True
+        )
+        if not job:
+            return
+
+        counts = get_job_counts(job_name)
+        success = counts.get("Completed", 0)
+        failed = counts.get("Failed", 0)
+        processed = success + failed
+        pending = counts.get("Queued", 0) + counts.get("Processing", 0)
+        total = cint(job.total_records) or (processed + pending)
+        now = now_datetime()
+
+        values = {
+            "processed_records": processed,
+            "success_count": success,
+            "failed_count": failed,
+            "pending_records": pending,
+            "progress": flt(processed * 100.0 / total, 2) if total else 100,
+            "last_progress_at": now
+        }
+        if last_error:
+            values["last_error"] = last_error[:1000]
+
+        if job.started_at:
+            elapsed_minutes = (now - get_datetime(job.started_at)).total_seconds() / 60
+            if elapsed_minutes > 0 and processed:
+                throughput = processed / elapsed_minutes
+                values["throughput"] = flt(throughput, 2)
+                values["eta"] = add_to_date(now, minutes=pending / throughput) if pending else now
+
+        if not pending and job.status in ACTIVE_STATUSES:
+            values["status"] = "Completed with Errors" if failed else "Completed"
+            values["completed_at"] = now
+
+        frappe.db.set_value("Vendor Import Job", job_name, values)
+        frappe.db.commit()
+
+        frappe.publish_realtime(
+            "vendor_import_job_progress",
+            {"job": job_name, **{k: v for k, v in values.items() if k != "last_error"}}
+        )
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), f"Vendor Import Job Progress Error: {job_name}")
+
+
+# ------------------------------------------------------------------------------------
+# Recovery, resume, cancel
+# ------------------------------------------------------------------------------------
+
+def _release_dead_claims(job_name):
+    """Put Processing records of workers without a live heartbeat back to Queued"""
+    live_tokens = tuple(get_live_workers(job_name)) or ("",)
+    frappe.db.sql("""
+        UPDATE `tabVendor Import Staging`
+        SET import_status = 'Queued', import_worker = NULL
+        WHERE import_job = %(job)s
+        AND import_status = 'Processing'
+        AND IFNULL(import_worker, '') NOT IN %(live)s
+    """, {"job": job_name, "live": live_tokens})
+    released = frappe.db.sql("SELECT ROW_COUNT()")[0][0] or 0
+    frappe.db.commit()
+    return released
+
+
+def resume_job(job_name):
+    job = frappe.db.get_value("Vendor Import Job", job_name, ["status", "workers"], as_dict=True)
+    if not job or job.status not in ACTIVE_STATUSES:
+        return {"job": job_name, "released": 0, "started_workers": 0}
+
+    released = _release_dead_claims(job_name)
+    live_slots = {cint(token.split(":", 1)[0]) for token in get_live_workers(job_name)}
+    missing_slots = [slot for slot in range(cint(job.workers) or 1) if slot not in live_slots]
+
+    if get_job_counts(job_name).get("Queued") and missing_slots:
+        enqueue_job_workers(job_name, len(missing_slots), slots=missing_slots)
+    else:
+        missing_slots = []
+        update_job_progress(job_name)
+
+    return {"job": job_name, "released": released, "started_workers": len(missing_slots)}
+
+
+def recover_vendor_import_jobs():
+    """Scheduler: resume active jobs whose workers died or never started"""
+    for job_name in frappe.get_all("Vendor Import Job", filters={"status": ["in", ACTIVE_STATUSES]}, pluck="name"):
+        try:
+            result = resume_job(job_name)
+            if result["released"] or result["started_workers"]:
+                frappe.logger().info(f"Vendor Import Job {job_name} resumed: {result}")
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), f"Vendor Import Job Recovery Error: {job_name}")
+
+
+@frappe.whitelist()
+def resume_vendor_import_job(job_name):
+    frappe.has_permission("Vendor Import Job", "write", throw=True)
+    return resume_job(job_name)
+
+
+@frappe.whitelist()
+def cancel_vendor_import_job(job_name):
+    """Stop the workers after their current chunk; unprocessed records go back to Pending"""
+    status = frappe.db.get_value("Vendor Import Job", job_name, "status", for_update=True)
+    if not status:
+        frappe.throw(_("Vendor Import Job {0} not found").format(job_name), frappe.DoesNotExistError)
+
+    frappe.has_permission("Vendor Import Job", "write", doc=job_name, throw=True)
+
+    if status not in ACTIVE_STATUSES:
+        frappe.throw(_("Vendor Import Job {0} is {1} and cannot be cancelled").format(job_name, status))
+
+    frappe.db.set_value("Vendor Import Job", job_name, {"status": "Cancelled", "completed_at": now_datetime()})
+    frappe.db.sql("""
+        UPDATE `tabVendor Import Staging`
+        SET import_status = 'Pending', import_worker = NULL
+        WHERE import_job = %s AND import_status = 'Queued'
+    """, (job_name,))
+    frappe.db.commit()
+
+    return {"status": "success", "job": job_name}
+
+
+@frappe.whitelist()
+def get_vendor_import_job_progress(job_name):
+    frappe.has_permission("Vendor Import Job", "read", doc=job_name, throw=True)
+    update_job_progress(job_name)
+    return frappe.db.get_value("Vendor Import Job", job_name, "*", as_dict=True)
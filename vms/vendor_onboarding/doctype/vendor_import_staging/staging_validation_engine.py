@@ -0,0 +1,424 @@
+# Copyright (c) 2025, Blue Phoenix and contributors
+# For license information, please see license.txt
+
+"""
+Validation engine shared by VendorImportStaging.set_validation_status and the
+bulk paths (process_bulk_revalidation, perform_comprehensive_validation_check).
+
+Master data is loaded into in-memory sets once per engine instance, the GST/PAN/email
+patterns are compiled once at import, and format/master checks are evaluated column-wise
+on a pandas DataFrame for a whole batch of records.
+"""
+
+import re
+import time
+
+import frappe
+import pandas as pd
+from frappe.utils import now_datetime
+
+GST_PATTERN = re.compile(r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}$')
+PAN_PATTERN = re.compile(r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$')
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+VALIDATION_FIELDS = [
+    "name", "vendor_name", "vendor_code", "c_code", "gstn_no", "pan_no",
+    "email_id", "primary_email", "secondary_email", "state", "city", "country", "pincode",
+    "bank_name", "order_currency", "beneficiary_currency", "intermediate_currency",
+    "purchase_organization", "account_group", "terms_of_payment", "purchase_group",
+    "incoterm", "reconciliation_account", "vendor_type", "type_of_industry"
+]
+
+EMAIL_FIELDS = ["email_id", "primary_email", "secondary_email"]
+
+CURRENCY_FIELDS = ["order_currency", "beneficiary_currency", "intermediate_currency"]
+
+# (fieldname, master doctype) pairs validated as warnings, in the order messages are emitted
+MASTER_LINK_FIELDS = [
+    ("purchase_organization", "Purchase Organization Master"),
+    ("account_group", "Account Group Master"),
+    ("terms_of_payment", "Terms of Payment Master"),
+    ("purchase_group", "Purchase Group Master"),
+    ("incoterm", "Incoterm Master"),
+    ("reconciliation_account", "Reconciliation Account"),
+    ("vendor_type", "Vendor Type Master"),
+    ("type_of_industry", "Type of Business")
+]
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _clean(series):
+    return series.fillna("").astype(str).str.strip()
+
+
+def _norm(value):
+    """Comparison key matching MariaDB's case-insensitive, trailing-space-insensitive collation"""
+    return str(value).strip().casefold() if value is not None else ""
+
+
+class StagingValidationEngine:
+    """
+    Validates Vendor Import Staging records in batches.
+
+    preload_masters=True loads complete master tables once (bulk runs);
+    otherwise only the values referenced by the validated batch are looked up.
+    `masters` may be passed in directly (e.g. for benchmarks).
+    """
+
+    def __init__(self, preload_masters=True, masters=None):
+        self.preload_masters = preload_masters
+        self.masters = {doctype: {_norm(v) for v in values if v} for doctype, values in (masters or {}).items()}
+        # doctypes whose complete name set is in memory
+        self._complete = set(self.masters)
+        self.state_gst_codes = {}
+        self._state_codes_loaded = False
+
+    # ------------------------------------------------------------------
+    # Master lookups
+    # ------------------------------------------------------------------
+
+    def _master_set(self, doctype, values):
+        """Normalised (_norm) names of the master; compare with _norm'd values"""
+        if doctype in self._complete:
+            return self.masters[doctype]
+
+        key_field = "company_code" if doctype == "Company Master" else "name"
+
+        if self.preload_masters:
+            names = frappe.get_all(doctype, pluck=key_field)
+            self.masters[doctype] = {_norm(n) for n in names if n}
+            self._complete.add(doctype)
+            return self.masters[doctype]
+
+        known = self.masters.setdefault(doctype, set())
+        # the IN lookup itself uses the column collation
+        missing = [v for v in values if v and _norm(v) not in known]
+        if missing:
+            found = frappe.get_all(doctype, filters={key_field: ["in", missing]}, pluck=key_field)
+            known.update(_norm(n) for n in found if n)
+        return known
+
+    def _load_state_gst_codes(self, states):
+        if self._state_codes_loaded:
+            return
+        filters = None if self.preload_masters else {"name": ["in", list(states)]}
+        for row in frappe.get_all("State Master", filters=filters, fields=["name", "state_code", "custom_gst_state_code"]):
+            if row.state_code and row.custom_gst_state_code:
+                self.state_gst_codes[_norm(row.name)] = str(row.custom_gst_state_code).zfill(2)
+        self._state_codes_loaded = self.preload_masters
+
+    def _load_existing_vendor_codes(self, vendor_codes):
+        """(vendor_code, company_name) -> (company_name, vendor_ref_no) for the codes in the batch"""
+        existing = {}
+        vendor_codes = list(vendor_codes)
+        for i in range(0, len(vendor_codes), 1000):
+            rows = frappe.db.sql("""
+                SELECT vc.vendor_code, cvc.company_name, cvc.vendor_ref_no
+                FROM `tabVendor Code` vc
+                INNER JOIN `tabCompany Vendor Code` cvc ON cvc.name = vc.parent
+                WHERE vc.vendor_code IN %(vendor_codes)s
+            """, {"vendor_codes": vendor_codes[i:i + 1000]}, as_dict=True)
+            for row in rows:
+                existing.setdefault((_norm(row.vendor_code), _norm(row.company_name)), (row.company_name, row.vendor_ref_no))
+        return existing
+
+    # ------------------------------------------------------------------
+    # Validation
+    # ------------------------------------------------------------------
+
+    def validate_records(self, records):
+        """
+        Validate a list of dict-like records (fields from VALIDATION_FIELDS).
+        Returns a list of {"name", "errors", "warnings", "missing_masters"} in input order.
+        """
+        if not records:
+            return []
+
+        df = pd.DataFrame([{f: r.get(f) for f in VALIDATION_FIELDS} for r in records], columns=VALIDATION_FIELDS)
+        raw = df.copy()
+        for col in VALIDATION_FIELDS:
+            df[col] = _clean(df[col])
+
+        checks = {}
+
+        # required fields (on the raw value, like the document checks)
+        for col in ("vendor_name", "vendor_code", "c_code", "primary_email"):
+            checks[f"missing_{col}"] = raw[col].isna() | (raw[col].astype(str) == "")
+
+        gst = df["gstn_no"].str.upper()
+        checks["gst_len"] = (gst != "") & (gst.str.len() != 15)
+        checks["gst_fmt"] = (gst.str.len() == 15) & ~gst.str.match(GST_PATTERN, na=False)
+
+        pan = df["pan_no"].str.upper()
+        checks["pan_len"] = (pan != "") & (pan.str.len() != 10)
+        checks["pan_fmt"] = (pan.str.len() == 10) & ~pan.str.match(PAN_PATTERN, na=False)
+
+        for col in EMAIL_FIELDS:
+            checks[f"email_{col}"] = (df[col] != "") & ~df[col].str.match(EMAIL_PATTERN, na=False)
+
+        companies = self._master_set("Company Master", set(df["c_code"]) - {""})
+        checks["company"] = (df["c_code"] != "") & ~df["c_code"].str.casefold().isin(companies)
+
+        is_india = raw["country"].astype(str) == "India"
+        for col, doctype in (("city", "City Master"), ("state", "State Master"), ("country", "Country Master")):
+            master = self._master_set(doctype, set(df.loc[is_india, col]) - {""})
+            checks[f"loc_{col}"] = is_india & (df[col] != "") & ~df[col].str.casefold().isin(master)
+
+        pincode = df["pincode"]
+        checks["pincode"] = is_india & (pincode != "") & ~(pincode.str.isdigit() & (pincode.str.len() == 6))
+
+        banks = self._master_set("Bank Master", set(df["bank_name"]) - {""})
+        checks["bank"] = (df["bank_name"] != "") & ~df["bank_name"].str.casefold().isin(banks)
+
+        currency_values = set()
+        for col in CURRENCY_FIELDS:
+            currency_values |= set(df[col]) - {""}
+        currencies = self._master_set("Currency Master", currency_values)
+        for col in CURRENCY_FIELDS:
+            checks[f"currency_{col}"] = (df[col] != "") & ~df[col].str.casefold().isin(currencies)
+
+        for col, doctype in MASTER_LINK_FIELDS:
+            master = self._master_set(doctype, set(df[col]) - {""})
+            checks[f"link_{col}"] = (df[col] != "") & ~df[col].str.casefold().isin(master)
+
+        has_gst_state = (raw["gstn_no"].notna() & (df["gstn_no"] != "") & (df["state"] != ""))
+        if has_gst_state.any():
+            self._load_state_gst_codes(set(raw.loc[has_gst_state, "state"]))
+
+        needs_dup_check = (df["vendor_code"] != "") & (df["c_code"] != "")
+        existing_codes = {}
+        if needs_dup_check.any():
+            existing_codes = self._load_existing_vendor_codes(set(raw.loc[needs_dup_check, "vendor_code"]))
+
+        check_rows = {key: mask.to_numpy() for key, mask in checks.items()}
+        results = []
+
+        for i, record in enumerate(raw.itertuples(index=False)):
+            errors = []
+            warnings = []
+            missing_masters = []
+
+            def flag(key):
+                return bool(check_rows[key][i])
+
+            if flag("missing_vendor_name"):
+                errors.append("Vendor Name is required")
+            if flag("missing_vendor_code"):
+                errors.append("Vendor Code is required")
+            if flag("missing_c_code"):
+                errors.append("Company Code is required")
+            if flag("missing_primary_email"):
+                errors.append("Primary Email is required")
+
+            if flag("gst_len"):
+                errors.append("GSTN No should be 15 characters")
+            elif flag("gst_fmt"):
+                errors.append("Invalid GSTN No format")
+
+            if flag("pan_len"):
+                errors.append("PAN No should be 10 characters")
+            elif flag("pan_fmt"):
+                errors.append("Invalid PAN No format")
+
+            for col in EMAIL_FIELDS:
+                if flag(f"email_{col}"):
+                    errors.append(f"Invalid email format in {col}: {getattr(record, col)}")
+
+            if flag("company"):
+                errors.append(f"Company Master not found for code: {record.c_code}")
+                missing_masters.append(("Company Master", record.c_code))
+
+            if flag("loc_city"):
+                warnings.append(f"City Master not found: {record.city}")
+                missing_masters.append(("City Master", record.city))
+            if flag("loc_state"):
+                warnings.append(f"State Master not found: {record.state}")
+                missing_masters.append(("State Master", record.state))
+            if flag("loc_country"):
+                warnings.append(f"Country Master not found: {record.country}")
+                missing_masters.append(("Country Master", record.country))
+            if flag("pincode"):
+                warnings.append("Pincode should be 6 digits")
+
+            if flag("bank"):
+                warnings.append(f"Bank Master not found: {record.bank_name}")
+                missing_masters.append(("Bank Master", record.bank_name))
+
+            for col in CURRENCY_FIELDS:
+                if flag(f"currency_{col}"):
+                    value = getattr(record, col)
+                    warnings.append(f"Currency Master not found in {col}: {value}")
+                    missing_masters.append(("Currency Master", value))
+
+            for col, doctype in MASTER_LINK_FIELDS:
+                if flag(f"link_{col}"):
+                    value = getattr(record, col)
+                    warnings.append(f"{doctype} not found: {value}")
+                    missing_masters.append((doctype, value))
+
+            if record.gstn_no and record.state:
+                gst_state_code = str(record.gstn_no)[:2]
+                expected_code = self.state_gst_codes.get(_norm(record.state))
+                if gst_state_code.isdigit() and expected_code and gst_state_code != expected_code:
+                    errors.append(f"GST state code ({gst_state_code}) doesn't match state {record.state} (expected: {expected_code})")
+
+            if record.vendor_code and record.c_code:
+                existing = existing_codes.get((_norm(record.vendor_code), _norm(record.c_code)))
+                if existing:
+                    warnings.append(
+                        f"Vendor code: {record.vendor_code} already exists for Company {existing[0]} "
+                        f"for Vendor ({existing[1]})"
+                    )
+
+            results.append({
+                "name": record.name,
+                "errors": errors,
+                "warnings": warnings,
+                "missing_masters": missing_masters
+            })
+
+        return results
+
+    def validate_record(self, record):
+        return self.validate_records([record])[0]
+
+
+def get_validation_outcome(errors, warnings):
+    """(validation_status, error_log) as stored on Vendor Import Staging"""
+    if errors:
+        return "Invalid", "\n".join(errors + warnings)
+    elif warnings:
+        return "Warning", "WARNINGS:\n" + "\n".join(errors + warnings)
+    return "Valid", ""
+
+
+def iter_staging_batches(filters=None, names=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of staging rows (VALIDATION_FIELDS + import_status) using keyset pagination"""
+    last_name = ""
+    fields = [*VALIDATION_FIELDS, "import_status"]
+    names = list(names) if names else None
+
+    if names:
+        for i in range(0, len(names), batch_size):
+            yield frappe.get_all("Vendor Import Staging", filters={"name": ["in", names[i:i + batch_size]]}, fields=fields)
+        return
+
+    while True:
+        batch_filters = dict(filters or {})
+        batch_filters["name"] = [">", last_name]
+        rows = frappe.get_all(
+            "Vendor Import Staging",
+            filters=batch_filters,
+            fields=fields,
+            order_by="name asc",
+            page_length=batch_size
+        )
+        if not rows:
+            return
+        last_name = rows[-1].name
+        yield rows
+
+
+def write_validation_results(results, validated_at=None):
+    """
+    Persist validation_status / error_log for a batch. Rows with the same outcome
+    (typically all "Valid" rows) are written with a single UPDATE.
+    """
+    validated_at = validated_at or now_datetime()
+    grouped = {}
+    for result in results:
+        outcome = get_validation_outcome(result["errors"], result["warnings"])
+        grouped.setdefault(outcome, []).append(result["name"])
+
+    for (status, error_log), names in grouped.items():
+        for i in range(0, len(names), 1000):
+            frappe.db.sql("""
+                UPDATE `tabVendor Import Staging`
+                SET validation_status = %(status)s, error_log = %(error_log)s,
+                    modified = %(validated_at)s
+                WHERE name IN %(names)s
+            """, {
+                "status": status,
+                "error_log": error_log,
+                "validated_at": validated_at,
+                "names": names[i:i + 1000]
+            })
+
+    return {status: len(names) for (status, _error_log), names in grouped.items()}
+
+
+def benchmark_validation_engine(rows=50000, legacy_sample=2000):
+    """
+    Compare the per-record legacy validation (string regex + one frappe.db.exists per
+    link field) against the batch engine on synthetic staging rows.
+    Legacy timing is measured on `legacy_sample` rows and extrapolated.
+
+    bench --site <site> execute vms.vendor_onboarding.doctype.vendor_import_staging.staging_validation_engine.benchmark_validation_engine
+    """
+    rows = int(rows)
+    legacy_sample = min(int(legacy_sample), rows)
+
+    states = frappe.get_all("State Master", pluck="name", page_length=20) or ["Maharashtra"]
+    companies = frappe.get_all("Company Master", pluck="company_code", page_length=5) or ["1000"]
+    records = []
+    for i in range(rows):
+        records.append(frappe._dict({
+            "name": f"BENCH-{i:06d}",
+            "vendor_name": f"Vendor {i}",
+            "vendor_code": f"9{i:07d}",
+            "c_code": companies[i % len(companies)],
+            "gstn_no": "27AAAPL1234C1Z5" if i % 7 else "27AAAPL1234",
+            "pan_no": "AAAPL1234C" if i % 11 else "BADPAN",
+            "primary_email": f"vendor{i}@example.com" if i % 13 else "not-an-email",
+            "email_id": f"vendor{i}@example.com",
+            "secondary_email": None,
+            "country": "India",
+            "state": states[i % len(states)],
+            "city": f"City {i % 50}",
+            "pincode": "400001",
+            "bank_name": None,
+            "order_currency": "INR",
+            "beneficiary_currency": None,
+            "intermediate_currency": None,
+            "purchase_organization": None,
+            "account_group": None,
+            "terms_of_payment": None,
+            "purchase_group": None,
+            "incoterm": None,
+            "reconciliation_account": None,
+            "vendor_type": None,
+            "type_of_industry": None
+        }))
+
+    start = time.perf_counter()
+    for record in records[:legacy_sample]:
+        if record.gstn_no and len(record.gstn_no) == 15:
+            re.match(r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}$', record.gstn_no)
+        if record.pan_no and len(record.pan_no) == 10:
+            re.match(r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$', record.pan_no)
+        for col in EMAIL_FIELDS:
+            if record.get(col):
+                re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', record.get(col))
+        frappe.db.exists("Company Master", {"company_code": record.c_code})
+        frappe.db.exists("City Master", record.city)
+        frappe.db.exists("State Master", record.state)
+        frappe.db.exists("Country Master", record.country)
+        frappe.db.exists("Currency Master", record.order_currency)
+    legacy_seconds = time.perf_counter() - start
+    legacy_estimated = legacy_seconds * rows / legacy_sample if legacy_sample else 0
+
+    start = time.perf_counter()
+    engine = StagingValidationEngine(preload_masters=True)
+    for i in range(0, rows, DEFAULT_BATCH_SIZE):
+        engine.validate_records(records[i:i + DEFAULT_BATCH_SIZE])
+    engine_seconds = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "legacy_sample_rows": legacy_sample,
+        "legacy_sample_seconds": round(legacy_seconds, 3),
+        "legacy_estimated_seconds": round(legacy_estimated, 3),
+        "engine_seconds": round(engine_seconds, 3),
+        "speedup": round(legacy_estimated / engine_seconds, 1) if engine_seconds else None
+    }
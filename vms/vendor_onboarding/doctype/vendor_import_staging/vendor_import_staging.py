@@ -9,6 +9,12 @@ import re
 from frappe.utils import now_datetime, cint, flt, cstr, today, add_days
 from frappe.utils.background_jobs import enqueue
 from frappe import _
+from vms.vendor_onboarding.doctype.vendor_import_staging.staging_validation_engine import (
+    StagingValidationEngine,
+    get_validation_outcome,
+    iter_staging_batches,
+    write_validation_results
+)
 
 
 class VendorImportStaging(Document):
@@ -32,246 +38,11 @@ class VendorImportStaging(Document):
     
     def set_validation_status(self):
         """Enhanced validation status with comprehensive link field validation"""
-        errors = []
-        warnings = []
-        
         try:
-            # === BASIC FIELD VALIDATIONS ===
-            # Required field validations
-            if not self.vendor_name:
-                errors.append("Vendor Name is required")
-            
-            if not self.vendor_code:
-                errors.append("Vendor Code is required")
-            
-            if not self.c_code:
-                errors.append("Company Code is required")
-
-            if not self.primary_email:
-                errors.append("Primary Email is required")
-            
-            # === FORMAT VALIDATIONS ===
-            # GST validation
-            if self.gstn_no:
-                gst_no = str(self.gstn_no).strip().upper()
-                if len(gst_no) != 15:
-                    errors.append("GSTN No should be 15 characters")
-                else:
-                    # GST format validation
-                    gst_pattern = r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}$'
-                    if not re.match(gst_pattern, gst_no):
-                        errors.append("Invalid GSTN No format")
-            
-            # PAN validation
-            if self.pan_no:
-                pan_no = str(self.pan_no).strip().upper()
-                if len(pan_no) != 10:
-                    errors.append("PAN No should be 10 characters")
-                else:
-                    # PAN format validation
-                    pan_pattern = r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$'
-                    if not re.match(pan_pattern, pan_no):
-                        errors.append("Invalid PAN No format")
-            
-            # Email validation
-            email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            email_fields = [
-                ('email_id', self.email_id),
-                ('primary_email', self.primary_email), 
-                ('secondary_email', self.secondary_email)
-            ]
-            
-            for field_name, email_value in email_fields:
-                if email_value and not re.match(email_pattern, str(email_value).strip()):
-                    errors.append(f"Invalid email format in {field_name}: {email_value}")
-            
-            # Phone number validation
-            # if self.contact_no:
-            #     contact = str(self.contact_no).strip()
-            #     if not contact.replace('+', '').replace('-', '').replace(' ', '').replace('(', '').replace(')', '').isdigit():
-            #         warnings.append(f"Contact number may have invalid format: {contact}")
-            #     elif len(contact.replace('+', '').replace('-', '').replace(' ', '').replace('(', '').replace(')', '')) < 10:
-            #         warnings.append("Contact number seems too short")
-            
-            
-            
-            # === LINK FIELD VALIDATIONS ===
-            
-            # Company Master validation (CRITICAL)
-            if self.c_code:
-                company_exists = frappe.db.exists("Company Master", {"company_code": str(self.c_code).strip()})
-                if not company_exists:
-                    errors.append(f"Company Master not found for code: {self.c_code}")
+            engine = StagingValidationEngine(preload_masters=False)
+            result = engine.validate_record(self.as_dict())
 
-
-            if self.country == "India":
-            
-                # State Master validation
-                if self.city:
-                    city_exists = frappe.db.exists("City Master", str(self.city).strip())
-                    if not city_exists:
-                        warnings.append(f"City Master not found: {self.city}")
-
-                # State Master validation
-                if self.state:
-                    state_exists = frappe.db.exists("State Master", str(self.state).strip())
-                    if not state_exists:
-                        warnings.append(f"State Master not found: {self.state}")
-                
-                # Country validation
-                if self.country:
-                    country_exists = frappe.db.exists("Country Master", str(self.country).strip())
-                    if not country_exists:
-                        warnings.append(f"Country Master not found: {self.country}")
-
-                # Pincode validation
-                if self.pincode:
-                    pincode = str(self.pincode).strip()
-                    if not pincode.isdigit() or len(pincode) != 6:
-                        warnings.append("Pincode should be 6 digits")
-            
-            # Bank Master validation
-            if self.bank_name:
-                bank_exists = frappe.db.exists("Bank Master", str(self.bank_name).strip())
-                if not bank_exists:
-                    warnings.append(f"Bank Master not found: {self.bank_name}")
-            
-            
-            
-            # Currency validation
-            currency_fields = [
-                ('order_currency', self.order_currency),
-                ('beneficiary_currency', self.beneficiary_currency),
-                ('intermediate_currency', self.intermediate_currency)
-            ]
-            
-            for field_name, currency_value in currency_fields:
-                if currency_value:
-                    currency_exists = frappe.db.exists("Currency Master", str(currency_value).strip())
-                    if not currency_exists:
-                        warnings.append(f"Currency Master not found in {field_name}: {currency_value}")
-            
-            # Purchase Organization validation
-            if self.purchase_organization:
-                po_exists = frappe.db.exists("Purchase Organization Master", str(self.purchase_organization).strip())
-                if not po_exists:
-                    warnings.append(f"Purchase Organization Master not found: {self.purchase_organization}")
-            
-            # Account Group validation
-            if self.account_group:
-                ag_exists = frappe.db.exists("Account Group Master", str(self.account_group).strip())
-                if not ag_exists:
-                    warnings.append(f"Account Group Master not found: {self.account_group}")
-            
-            # Terms of Payment validation
-            if self.terms_of_payment:
-                top_exists = frappe.db.exists("Terms of Payment Master", str(self.terms_of_payment).strip())
-                if not top_exists:
-                    warnings.append(f"Terms of Payment Master not found: {self.terms_of_payment}")
-            
-            # Purchase Group validation
-            if self.purchase_group:
-                pg_exists = frappe.db.exists("Purchase Group Master", str(self.purchase_group).strip())
-                if not pg_exists:
-                    warnings.append(f"Purchase Group Master not found: {self.purchase_group}")
-            
-            # Incoterm validation
-            if self.incoterm:
-                inco_exists = frappe.db.exists("Incoterm Master", str(self.incoterm).strip())
-                if not inco_exists:
-                    warnings.append(f"Incoterm Master not found: {self.incoterm}")
-            
-            # Reconciliation Account validation
-            if self.reconciliation_account:
-                ra_exists = frappe.db.exists("Reconciliation Account", str(self.reconciliation_account).strip())
-                if not ra_exists:
-                    warnings.append(f"Reconciliation Account not found: {self.reconciliation_account}")
-            
-            # Vendor Type validation
-            if self.vendor_type:
-                vt_exists = frappe.db.exists("Vendor Type Master", str(self.vendor_type).strip())
-                if not vt_exists:
-                    warnings.append(f"Vendor Type Master not found: {self.vendor_type}")
-            
-            # Type of Business validation
-            if hasattr(self, 'type_of_industry') and self.type_of_industry:
-                tob_exists = frappe.db.exists("Type of Business", str(self.type_of_industry).strip())
-                if not tob_exists:
-                    warnings.append(f"Type of Business not found: {self.type_of_industry}")
-            
-            # Nature of Company validation
-            # if hasattr(self, 'nature') and self.nature:
-            #     nc_exists = frappe.db.exists("Company Nature Master", str(self.nature).strip())
-            #     if not nc_exists:
-            #         warnings.append(f"Company Nature Master not found: {self.nature}")
-            
-            # === BUSINESS LOGIC VALIDATIONS ===
-            
-            # GST and State cross-validation
-            if self.gstn_no and self.state:
-                gst_state_code = str(self.gstn_no)[:2] if len(str(self.gstn_no)) >= 2 else ""
-                if gst_state_code.isdigit():
-                    # Try to get state code from state master
-                    try:
-                        state_doc = frappe.get_doc("State Master", self.state)
-                        if hasattr(state_doc, 'state_code') and state_doc.state_code:
-                            expected_code = str(state_doc.custom_gst_state_code).zfill(2)
-                            if gst_state_code != expected_code:
-                                errors.append(f"GST state code ({gst_state_code}) doesn't match state {self.state} (expected: {expected_code})")
-                    except:
-                        pass  # State master might not exist, already flagged above
-            
-            # GST and PAN cross-validation
-            # if self.gstn_no and self.pan_no:
-            #     gst_pan_part = str(self.gstn_no)[2:12] if len(str(self.gstn_no)) >= 12 else ""
-            #     pan_no = str(self.pan_no).strip().upper()
-            #     if gst_pan_part.upper() != pan_no:
-            #         errors.append("PAN number in GST doesn't match PAN field")
-            
-            # Duplicate vendor code check
-            if self.vendor_code and self.c_code:
-                # Check for existing vendor codes in Vendor Code child table only
-                existing_query = """
-                SELECT 
-                    vc.parent as company_vendor_code_id,
-                    vc.vendor_code,
-                    cvc.company_name,
-                    cvc.vendor_ref_no
-                FROM `tabVendor Code` vc
-                INNER JOIN `tabCompany Vendor Code` cvc ON cvc.name = vc.parent
-                WHERE vc.vendor_code = %(vendor_code)s 
-                AND cvc.company_name = %(company_name)s
-                LIMIT 1
-                """
-                
-                existing = frappe.db.sql(
-                    existing_query,
-                    {
-                        'vendor_code': self.vendor_code,
-                        'company_name': self.c_code
-                    },
-                    as_dict=True
-                )
-                
-                if existing:
-                    warnings.append(
-                        f"Vendor code: {self.vendor_code} already exists for Company {existing[0].company_name} "
-                        f"for Vendor ({existing[0].vendor_ref_no})"
-                    )
-            
-            # === SET VALIDATION STATUS ===
-            
-            if errors:
-                self.validation_status = "Invalid"
-                all_issues = errors + warnings
-                self.error_log = "\n".join(all_issues)
-            elif warnings:
-                self.validation_status = "Warning" 
-                all_issues = errors + warnings
-                self.error_log = "WARNINGS:\n" + "\n".join(all_issues)
-            else:
-                self.validation_status = "Valid"
-                self.error_log = ""
+            self.validation_status, self.error_log = get_validation_outcome(result["errors"], result["warnings"])
             
             # Set last validation run timestamp
             self.last_validation_run = now_datetime()
@@ -924,42 +695,40 @@ def process_bulk_revalidation(docnames):
     error_count = 0
     skipped_count = 0
     errors = []
+    processed = 0
+
+    engine = StagingValidationEngine(preload_masters=True)
     
-    for idx, docname in enumerate(docnames, 1):
+    for batch in iter_staging_batches(names=docnames):
+        processed += len(batch)
+
+        # Double-check import_status before revalidating
+        eligible = [row for row in batch if row.import_status not in ["Queued", "Processing", "Completed"]]
+        skipped_count += len(batch) - len(eligible)
+
         try:
-            # Update progress
-            frappe.publish_progress(
-                percent=(idx / total) * 100,
-                title="Revalidating Staging Records",
-                description=f"Processing {idx} of {total}"
-            )
-            
-            # Get the document
-            staging_doc = frappe.get_doc("Vendor Import Staging", docname)
-            
-            # Double-check import_status before revalidating
-            if staging_doc.import_status in ["Queued", "Processing", "Completed"]:
-                skipped_count += 1
-                continue
-            
-            # Revalidate the record
-            staging_doc.set_validation_status()
-            staging_doc.save()
-            
-            success_count += 1
-            
+            results = engine.validate_records(eligible)
+            write_validation_results(results)
+            success_count += len(results)
         except Exception as e:
-            error_count += 1
-            error_msg = f"{docname}: {str(e)}"
+            # Drop the UPDATE chunks of this batch that already ran before the per-batch commit
+            frappe.db.rollback()
+            error_count += len(eligible)
+            error_msg = f"Batch starting at {batch[0].name}: {str(e)}"
             errors.append(error_msg)
             frappe.log_error(
-                f"Error revalidating {docname}: {str(e)}", 
+                f"Error revalidating batch: {frappe.get_traceback()}", 
                 "Bulk Staging Revalidation Error"
             )
-        
-        # Commit every 20 records to avoid long transactions
-        if idx % 20 == 0:
-            frappe.db.commit()
+
+        # One commit per batch
+        frappe.db.commit()
+
+        frappe.publish_progress(
+            percent=(processed / total) * 100 if total else 100,
+            title="Revalidating Staging Records",
+            description=f"Processing {processed} of {total}"
+        )
     
     # Final commit
     frappe.db.commit()
@@ -1124,6 +893,39 @@ from frappe.utils.background_jobs import enqueue
 # CORRECTED BACKEND METHODS FOR vendor_import_staging.py
 # Replace the existing methods with these corrected versions
 
+# Set by staging_bulk_job while it processes a chunk: record-level commits are deferred to
+# the chunk commit and failures roll back to the record's savepoint
+RECORD_SAVEPOINT = "vendor_import_record"
+
+
+def _commit_record():
+    if not frappe.flags.staging_chunk_commit:
+        frappe.db.commit()
+
+
+def _rollback_record():
+    if not frappe.flags.staging_chunk_commit:
+        frappe.db.rollback()
+        return
+    try:
+        frappe.db.rollback(save_point=RECORD_SAVEPOINT)
+    except Exception:
+        # savepoint released by a commit inside a document hook
+        frappe.db.rollback()
+
+
+def get_company_master_name(company_code):
+    """Company Master name for a company code, from the bulk job's master cache when one is active"""
+    cache = frappe.flags.staging_master_cache
+    if cache is not None and company_code in cache:
+        return cache[company_code]
+
+    company_master = frappe.db.exists("Company Master", {"company_code": company_code})
+    if cache is not None:
+        cache[company_code] = company_master
+    return company_master
+
+
 def create_vendor_master_from_staging(staging_doc):
     """
     Create vendor master from staging document using correct doctype references
@@ -1176,7 +978,7 @@ def create_vendor_master_from_staging(staging_doc):
         if payment_result.get('warnings'):
             result["warnings"].extend(payment_result['warnings'])
         
-        frappe.db.commit()
+        _commit_record()
         
         return {
             "status": "success",
@@ -1186,7 +988,7 @@ def create_vendor_master_from_staging(staging_doc):
         }
         
     except Exception as e:
-        frappe.db.rollback()
+        _rollback_record()
         error_message = f"Error creating vendor master from staging: {str(e)}"
         frappe.log_error(error_message, "Vendor Master Creation Error")
         return {
@@ -1356,7 +1158,7 @@ def create_company_details_from_staging(vendor_ref_no, mapped_row):
                 "vendor_pan": details_doc.company_pan_number,
                 "idx": next_idx
             })
-            frappe.db.commit()
+            _commit_record()
 
 
 
@@ -1393,17 +1195,15 @@ def handle_company_vendor_code_from_staging(vendor_ref_no, mapped_row):
             return result
         
         # Find company master using correct doctype name
-        company_master = frappe.db.exists("Company Master", {"company_code": company_code})
+        company_master = get_company_master_name(company_code)
         if not company_master:
             result["warnings"].append(f"Company Master with code {company_code} not found")
             return result
 
-        company_doc = frappe.get_doc("Company Master", company_master)
-
         # Check if Company Vendor Code exists for this vendor + company combination
         existing_cvc = frappe.db.exists("Company Vendor Code", {
             "vendor_ref_no": vendor_ref_no,
-            "company_name": company_doc.name
+            "company_name": company_master
         })
 
         if existing_cvc:
@@ -1436,7 +1236,7 @@ def handle_company_vendor_code_from_staging(vendor_ref_no, mapped_row):
             # Create new Company Vendor Code
             cvc_doc = frappe.new_doc("Company Vendor Code")
             cvc_doc.vendor_ref_no = vendor_ref_no
-            cvc_doc.company_name = company_doc.name
+            cvc_doc.company_name = company_master
 
             # Add vendor code row
             cvc_doc.append("vendor_code", {
@@ -1450,7 +1250,7 @@ def handle_company_vendor_code_from_staging(vendor_ref_no, mapped_row):
         cvc_doc.save(ignore_permissions=True)
 
         # Update Vendor Master with Company Vendor Code reference
-        update_vendor_master_multiple_company_data(vendor_ref_no, company_doc.name, cvc_doc.name, mapped_row)
+        update_vendor_master_multiple_company_data(vendor_ref_no, company_master, cvc_doc.name, mapped_row)
         
         return result
         
@@ -1529,12 +1329,10 @@ def create_multiple_company_data_from_staging(vendor_ref_no, mapped_row):
         return
     
     # Find company master
-    company_master = frappe.db.exists("Company Master", {"company_code": company_code})
+    company_master = get_company_master_name(company_code)
     if not company_master:
         return
     
-    company_doc = frappe.get_doc("Company Master", company_master)
-    
     # This is handled in update_vendor_master_multiple_company_data now
     # Just ensure the data is there if not already handled
     try:
@@ -1544,14 +1342,14 @@ def create_multiple_company_data_from_staging(vendor_ref_no, mapped_row):
         company_exists = False
         if hasattr(vm_doc, 'multiple_company_data') and vm_doc.multiple_company_data:
             for mc_row in vm_doc.multiple_company_data:
-                if mc_row.company_name == company_doc.name:
+                if mc_row.company_name == company_master:
                     company_exists = True
                     break
         
         # If not exists, add it (this handles cases where company vendor code creation was skipped)
         if not company_exists:
             vm_doc.append("multiple_company_data", {
-                "company_name": company_doc.name,
+                "company_name": company_master,
                 "purchase_organization": mapped_row.get('purchase_organization'),
                 "account_group": mapped_row.get('account_group'),
                 "terms_of_payment": mapped_row.get('terms_of_payment'),
@@ -1913,11 +1711,15 @@ def create_payment_details_from_staging(mapped_row, vendor_master_name):
 # Add the main processing methods that call these functions
 
 @frappe.whitelist()
-def process_bulk_staging_to_vendor_master(record_names, batch_size=50):
+def process_bulk_staging_to_vendor_master(record_names, batch_size=50, workers=None):
     """
-    Process multiple staging records to vendor master via background jobs
-    This is the main entry point called from the list view button
+    Process multiple staging records to vendor master through a resumable Vendor Import Job
+    (staging_bulk_job). This is the main entry point called from the list view button.
+
+    batch_size: records committed together per chunk
+    workers: parallel background workers (default: site config vendor_import_workers)
     """
+    from vms.vendor_onboarding.doctype.vendor_import_staging.staging_bulk_job import start_vendor_import_job
     
     if not record_names:
         return {"status": "error", "error": "No records provided"}
@@ -1930,65 +1732,21 @@ def process_bulk_staging_to_vendor_master(record_names, batch_size=50):
         frappe.throw(_("Insufficient permissions to process staging records"))
     
     try:
-        batch_size = cint(batch_size) or 50
-        total_records = len(record_names)
+        result = start_vendor_import_job(record_names, workers=workers, chunk_size=batch_size)
         
-        # Filter out records that are already processing or completed
-        valid_records = []
-        skipped_records = []
-        
-        for record_name in record_names:
-            staging_doc = frappe.get_doc("Vendor Import Staging", record_name)
-            
-            if staging_doc.import_status in ["Pending"] and staging_doc.validation_status != "Invalid":
-                valid_records.append(record_name)
-                # Update status to Queued immediately
-                staging_doc.db_set("import_status", "Queued", update_modified=False)
-            else:
-                skipped_records.append({
-                    "name": record_name,
-                    "reason": f"Status: {staging_doc.import_status}, Validation: {staging_doc.validation_status}"
-                })
-        
-        frappe.db.commit()
-        
-        if not valid_records:
+        if not result["job"]:
             return {
                 "status": "error",
                 "error": "No valid records to process",
-                "skipped_records": skipped_records
+                "skipped_records": result["skipped_records"]
             }
         
-        # Process in batches via background jobs
-        batch_count = 0
-        job_names = []
-        
-        for i in range(0, len(valid_records), batch_size):
-            batch_records = valid_records[i:i + batch_size]
-            batch_count += 1
-            
-            job_name = f"vendor_master_creation_batch_{batch_count}_{now_datetime().strftime('%Y%m%d_%H%M%S')}"
-            job_names.append(job_name)
-            
-            # Enqueue batch processing
-            enqueue(
-                method="vms.vendor_onboarding.doctype.vendor_import_staging.vendor_import_staging.process_staging_batch_to_vendor_master",
-                queue="default",
-                timeout=7200,  # 2 hour timeout for large batches
-                job_name=job_name,
-                record_names=batch_records,
-                batch_number=batch_count,
-                total_batches=batch_count,
-                enqueue_after_commit=True
-            )
-        
         return {
             "status": "success",
-            "message": f"Initiated {batch_count} background jobs for {len(valid_records)} valid records",
-            "total_batches": batch_count,
-            "total_records": len(valid_records),
-            "skipped_records": skipped_records,
-            "job_names": job_names
+            "message": f"Started Vendor Import Job {result['job']} for {len(result['valid_records'])} valid records",
+            "job": result["job"],
+            "total_records": len(result["valid_records"]),
+            "skipped_records": result["skipped_records"]
         }
         
     except Exception as e:
@@ -2910,8 +2668,6 @@ def perform_comprehensive_validation_check():
     """
     Perform comprehensive validation check similar to set_validation_status but for all records
     """
-    import re
-    
     validation_data = {
         "data_integrity": {},
         "validation_summary": {
@@ -2926,152 +2682,35 @@ def perform_comprehensive_validation_check():
     }
     
     try:
-        # Get all pending staging records
-        staging_records = frappe.get_all("Vendor Import Staging",
-            filters={"import_status": "Pending"},
-            fields=["name", "vendor_name", "vendor_code", "c_code", "gstn_no", "pan_no", 
-                   "email_id", "primary_email", "secondary_email", "contact_no", "state",
-                   "city", "country", "pincode", "bank_name", "order_currency", 
-                   "beneficiary_currency", "intermediate_currency", "purchase_organization",
-                   "account_group", "terms_of_payment", "purchase_group", "incoterm",
-                   "reconciliation_account", "vendor_type", "type_of_industry"]
-        )
-        
-        validation_data["validation_summary"]["total_records"] = len(staging_records)
-        
         # Initialize counters for different validation types
         format_errors = []
         link_field_errors = []
-        business_logic_errors = []
         missing_master_counts = {}
-        
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        gst_pattern = r'^[0-9]{2}[A-Z]{5}[0-9]{4}[A-Z]{1}[1-9A-Z]{1}Z[0-9A-Z]{1}$'
-        pan_pattern = r'^[A-Z]{5}[0-9]{4}[A-Z]{1}$'
-        
-        for record in staging_records:
-            record_errors = []
-            record_warnings = []
-            
-            # === BASIC FIELD VALIDATIONS ===
-            if not record.vendor_name:
-                record_errors.append(f"Record {record.name}: Vendor Name is required")
-            if not record.vendor_code:
-                record_errors.append(f"Record {record.name}: Vendor Code is required")
-            if not record.c_code:
-                record_errors.append(f"Record {record.name}: Company Code is required")
-            if not record.primary_email:
-                record_errors.append(f"Record {record.name}: Primary Email is required")
-            
-            # === FORMAT VALIDATIONS ===
-            # GST validation
-            if record.gstn_no:
-                gst_no = str(record.gstn_no).strip().upper()
-                if len(gst_no) != 15:
-                    record_errors.append(f"Record {record.name}: GSTN No should be 15 characters")
-                elif not re.match(gst_pattern, gst_no):
-                    record_errors.append(f"Record {record.name}: Invalid GSTN No format")
-            
-            # PAN validation
-            if record.pan_no:
-                pan_no = str(record.pan_no).strip().upper()
-                if len(pan_no) != 10:
-                    record_errors.append(f"Record {record.name}: PAN No should be 10 characters")
-                elif not re.match(pan_pattern, pan_no):
-                    record_errors.append(f"Record {record.name}: Invalid PAN No format")
-            
-            # Email validations
-            email_fields = [
-                ('email_id', record.email_id),
-                ('primary_email', record.primary_email),
-                ('secondary_email', record.secondary_email)
-            ]
-            
-            for field_name, email_value in email_fields:
-                if email_value and not re.match(email_pattern, str(email_value).strip()):
-                    record_errors.append(f"Record {record.name}: Invalid email format in {field_name}: {email_value}")
-            
-            # === LINK FIELD VALIDATIONS ===
-            # Company Master validation (CRITICAL)
-            if record.c_code:
-                company_exists = frappe.db.exists("Company Master", {"company_code": str(record.c_code).strip()})
-                if not company_exists:
-                    record_errors.append(f"Record {record.name}: Company Master not found for code: {record.c_code}")
-                    missing_master_counts.setdefault("Company Master", set()).add(record.c_code)
-            
-            # Location validations for India
-            if record.country == "India":
-                if record.city:
-                    city_exists = frappe.db.exists("City Master", str(record.city).strip())
-                    if not city_exists:
-                        record_warnings.append(f"Record {record.name}: City Master not found: {record.city}")
-                        missing_master_counts.setdefault("City Master", set()).add(record.city)
-                
-                if record.state and record.country == "India":
-                    state_exists = frappe.db.exists("State Master", str(record.state).strip())
-                    if not state_exists:
-                        record_warnings.append(f"Record {record.name}: State Master not found: {record.state}")
-                        missing_master_counts.setdefault("State Master", set()).add(record.state)
-                
-                if record.pincode:
-                    pincode = str(record.pincode).strip()
-                    if not pincode.isdigit() or len(pincode) != 6:
-                        record_warnings.append(f"Record {record.name}: Pincode should be 6 digits")
-            
-            if record.country:
-                country_exists = frappe.db.exists("Country Master", str(record.country).strip())
-                if not country_exists:
-                    record_warnings.append(f"Record {record.name}: Country Master not found: {record.country}")
-                    missing_master_counts.setdefault("Country Master", set()).add(record.country)
-            
-            # Other master validations
-            master_checks = [
-                ("Bank Master", record.bank_name),
-                ("Currency Master", record.order_currency),
-                ("Currency Master", record.beneficiary_currency),
-                ("Currency Master", record.intermediate_currency),
-                ("Purchase Organization Master", record.purchase_organization),
-                ("Account Group Master", record.account_group),
-                ("Terms of Payment Master", record.terms_of_payment),
-                ("Purchase Group Master", record.purchase_group),
-                ("Incoterm Master", record.incoterm),
-                ("Reconciliation Account", record.reconciliation_account),
-                ("Vendor Type Master", record.vendor_type),
-                ("Type of Business", record.type_of_industry)
-            ]
-            
-            for master_doctype, field_value in master_checks:
-                if field_value:
-                    exists = frappe.db.exists(master_doctype, str(field_value).strip())
-                    if not exists:
-                        record_warnings.append(f"Record {record.name}: {master_doctype} not found: {field_value}")
-                        missing_master_counts.setdefault(master_doctype, set()).add(field_value)
-            
-            # === BUSINESS LOGIC VALIDATIONS ===
-            # GST and State cross-validation
-            if record.gstn_no and record.state and len(str(record.gstn_no)) >= 2:
-                gst_state_code = str(record.gstn_no)[:2]
-                if gst_state_code.isdigit():
-                    try:
-                        state_doc = frappe.get_doc("State Master", record.state)
-                        if hasattr(state_doc, 'custom_gst_state_code') and state_doc.custom_gst_state_code:
-                            expected_code = str(state_doc.custom_gst_state_code).zfill(2)
-                            if gst_state_code != expected_code:
-                                record_errors.append(f"Record {record.name}: GST state code ({gst_state_code}) doesn't match state {record.state}")
-                    except:
-                        pass
-            
-            # Count record validation status
-            if record_errors:
-                validation_data["validation_summary"]["invalid_records"] += 1
-                format_errors.extend(record_errors)
-                validation_data["critical_issues"] += len(record_errors)
-            elif record_warnings:
-                validation_data["validation_summary"]["warning_records"] += 1
-                link_field_errors.extend(record_warnings)
-                validation_data["warning_issues"] += len(record_warnings)
-            else:
-                validation_data["validation_summary"]["valid_records"] += 1
+
+        # Masters are loaded once for the whole run and records are validated in batches
+        engine = StagingValidationEngine(preload_masters=True)
+
+        for staging_records in iter_staging_batches(filters={"import_status": "Pending"}):
+            validation_data["validation_summary"]["total_records"] += len(staging_records)
+
+            for result in engine.validate_records(staging_records):
+                record_errors = [f"Record {result['name']}: {msg}" for msg in result["errors"]]
+                record_warnings = [f"Record {result['name']}: {msg}" for msg in result["warnings"]]
+
+                for master_doctype, value in result["missing_masters"]:
+                    missing_master_counts.setdefault(master_doctype, set()).add(value)
+
+                # Count record validation status
+                if record_errors:
+                    validation_data["validation_summary"]["invalid_records"] += 1
+                    format_errors.extend(record_errors)
+                    validation_data["critical_issues"] += len(record_errors)
+                elif record_warnings:
+                    validation_data["validation_summary"]["warning_records"] += 1
+                    link_field_errors.extend(record_warnings)
+                    validation_data["warning_issues"] += len(record_warnings)
+                else:
+                    validation_data["validation_summary"]["valid_records"] += 1
         
         # === POPULATE DATA INTEGRITY RESULTS ===
         
@@ -4610,22 +4249,18 @@ def revalidate_all_staging_records():
     """
     try:
         processed_count = 0
+        engine = StagingValidationEngine(preload_masters=True)
         
-        # Get all staging records
-        staging_records = frappe.get_all("Vendor Import Staging",
-            filters={"import_status": "Pending"},
-            fields=["name"]
-        )
-        
-        for record in staging_records:
+        # Pending records in keyset batches, validated and written per batch
+        for batch in iter_staging_batches(filters={"import_status": "Pending"}):
             try:
-                doc = frappe.get_doc("Vendor Import Staging", record.name)
-                # Call the set_validation_status method on each record
-                doc.set_validation_status()
-                doc.save(ignore_permissions=True)
-                processed_count += 1
+                results = engine.validate_records(batch)
+                write_validation_results(results)
+                frappe.db.commit()
+                processed_count += len(results)
             except Exception as e:
-                frappe.log_error(f"Error revalidating record {record.name}: {str(e)}", "Revalidation Error")
+                frappe.db.rollback()
+                frappe.log_error(f"Error revalidating batch starting at {batch[0].name}: {str(e)}", "Revalidation Error")
                 continue
         
         return {"processed_count": processed_count}
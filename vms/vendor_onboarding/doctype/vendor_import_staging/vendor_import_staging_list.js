@@ -977,7 +977,7 @@ function initiate_bulk_vendor_creation(records) {
             
             if (r.message && r.message.status === 'success') {
                 frappe.show_alert({
-                    message: __('Background processing initiated for {0} records', [records.length]),
+                    message: __('Vendor Import Job {0} started for {1} records', [r.message.job, r.message.total_records]),
                     indicator: 'green'
                 });
                 
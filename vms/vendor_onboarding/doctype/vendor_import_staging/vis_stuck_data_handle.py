@@ -28,7 +28,9 @@ def analyze_and_recover_stuck_records():
             "Vendor Import Staging",
             filters={
                 "import_status": "Processing",
-                "modified": ["<", stuck_threshold]
+                "modified": ["<", stuck_threshold],
+                # Vendor Import Job records are recovered by staging_bulk_job
+                "import_job": ["is", "not set"]
             },
             fields=[
                 "name", "vendor_name", "vendor_code", "c_code", 
@@ -303,7 +305,9 @@ def get_stuck_records_report():
             "Vendor Import Staging",
             filters={
                 "import_status": "Processing",
-                "modified": ["<", stuck_threshold]
+                "modified": ["<", stuck_threshold],
+                # Vendor Import Job records are recovered by staging_bulk_job
+                "import_job": ["is", "not set"]
             },
             fields=[
                 "name", "vendor_name", "vendor_code", "c_code",
@@ -541,7 +545,9 @@ def monitor_queued_records():
             "Vendor Import Staging",
             filters={
                 "import_status": "Queued",
-                "modified": ["<", queued_threshold]
+                "modified": ["<", queued_threshold],
+                # Vendor Import Job records are recovered by staging_bulk_job
+                "import_job": ["is", "not set"]
             },
             fields=[
                 "name", "vendor_name", "vendor_code", "c_code",
@@ -897,7 +903,9 @@ def get_queued_records_status():
             "Vendor Import Staging",
             filters={
                 "import_status": "Queued",
-                "modified": ["<", queued_threshold]
+                "modified": ["<", queued_threshold],
+                # Vendor Import Job records are recovered by staging_bulk_job
+                "import_job": ["is", "not set"]
             },
             fields=[
                 "name", "vendor_name", "vendor_code", "c_code",
@@ -979,7 +987,9 @@ def monitor_background_jobs():
             "Vendor Import Staging",
             filters={
                 "import_status": "Processing",
-                "modified": ["<", stuck_threshold]
+                "modified": ["<", stuck_threshold],
+                # Vendor Import Job records are recovered by staging_bulk_job
+                "import_job": ["is", "not set"]
             },
             fields=["name", "vendor_name", "modified"]
         )
@@ -1001,7 +1011,9 @@ def monitor_background_jobs():
             "Vendor Import Staging",
             filters={
                 "import_status": "Queued",
-                "modified": ["<", queue_threshold]
+                "modified": ["<", queue_threshold],
+                # Vendor Import Job records are recovered by staging_bulk_job
+                "import_job": ["is", "not set"]
             },
             fields=["name", "vendor_name", "modified"]
         )
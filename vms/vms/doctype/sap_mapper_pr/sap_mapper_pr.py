@@ -4,6 +4,13 @@
 # import frappe
 from frappe.model.document import Document
 
+from vms.APIs.sap.sap_mapping_plan import clear_mapping_plans
+
 
 class SAPMapperPR(Document):
-	pass
+	def on_update(self):
+		# Compiled mapping plans (sap_mapping_plan) are rebuilt from the new rows
+		clear_mapping_plans()
+
+	def on_trash(self):
+		clear_mapping_plans()
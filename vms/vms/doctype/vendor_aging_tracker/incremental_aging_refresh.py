@@ -0,0 +1,196 @@
+import time
+
+import frappe
+from frappe.utils import get_datetime, now_datetime, nowdate
+
+WATERMARK_KEY = "vendor_aging_tracker_refresh_watermark"
+
+
+def get_refresh_watermark():
+	"""Return the datetime of the last successful incremental refresh (None on first run)."""
+	watermark = frappe.db.get_default(WATERMARK_KEY)
+	return get_datetime(watermark) if watermark else None
+
+
+def set_refresh_watermark(value):
+	frappe.db.set_default(WATERMARK_KEY, str(value))
+
+
+def _affected_rows():
+	# rows changed by the last statement executed on the current connection
+	return frappe.db.sql("SELECT ROW_COUNT()")[0][0] or 0
+
+
+def get_changed_tracker_names(since):
+	"""
+	Trackers whose sources changed after `since`:
+	Vendor Onboarding, Company Vendor Code, VMS SAP Logs and Purchase Order.
+	"""
+	rows = frappe.db.sql("""
+		SELECT vat.name
+		FROM `tabVendor Aging Tracker` vat
+		INNER JOIN `tabVendor Onboarding` vo ON vo.name = vat.vendor_onboarding_link
+		WHERE vo.modified > %(since)s
+
+		UNION
+
+		SELECT vat.name
+		FROM `tabVendor Aging Tracker` vat
+		INNER JOIN `tabCompany Vendor Code` cvc ON cvc.vendor_ref_no = vat.vendor_ref_no
+		WHERE cvc.modified > %(since)s
+
+		UNION
+
+		SELECT vat.name
+		FROM `tabVendor Aging Tracker` vat
+		INNER JOIN `tabVMS SAP Logs` sl ON sl.vendor_onboarding_link = vat.vendor_onboarding_link
+		WHERE sl.modified > %(since)s
+
+		UNION
+
+		SELECT vac.parent
+		FROM `tabVendor Aging Company Codes` vac
+		INNER JOIN `tabPurchase Order` po ON po.vendor_code = vac.vendor_code
+		WHERE vac.parenttype = 'Vendor Aging Tracker'
+			AND IFNULL(vac.vendor_code, '') != ''
+			AND po.modified > %(since)s
+	""", {"since": since})
+
+	return [row[0] for row in rows]
+
+
+def recompute_changed_trackers(tracker_names):
+	"""Run the full controller pipeline only for trackers whose sources changed."""
+	recomputed = 0
+	errors = []
+
+	for name in tracker_names:
+		try:
+			doc = frappe.get_doc("Vendor Aging Tracker", name)
+			# Daily recomputation is derived data, no need for a Version row per tracker
+			doc.flags.ignore_version = True
+			doc.save(ignore_permissions=True)
+			recomputed += 1
+		except Exception:
+			errors.append(name)
+			frappe.log_error(frappe.get_traceback(), f"Vendor Aging Incremental Refresh Error: {name}")
+
+	return recomputed, errors
+
+
+def update_aging_days_bulk(current_datetime, current_date):
+	"""
+	Recompute the time-dependent aging fields for every tracker with set-based UPDATEs.
+	Mirrors VendorAgingTracker.calculate_vendor_aging / update_po_aging /
+	calculate_summary_metrics / update_vendor_status for the parts that change with the date.
+	Only rows whose value actually changes are written.
+	"""
+	values = {"now": current_datetime, "today": current_date}
+	updated = {}
+
+	frappe.db.sql("""
+		UPDATE `tabVendor Aging Tracker`
+		SET
+			days_since_creation = TIMESTAMPDIFF(DAY, vendor_creation_date, %(now)s),
+			total_aging_days = TIMESTAMPDIFF(DAY, vendor_creation_date, %(now)s),
+			vendor_aging_status = CASE
+				WHEN TIMESTAMPDIFF(DAY, vendor_creation_date, %(now)s) <= 30 THEN 'New (0-30 days)'
+				WHEN TIMESTAMPDIFF(DAY, vendor_creation_date, %(now)s) <= 90 THEN 'Recent (31-90 days)'
+				WHEN TIMESTAMPDIFF(DAY, vendor_creation_date, %(now)s) <= 180 THEN 'Established (91-180 days)'
+				ELSE 'Long Term (180+ days)'
+			END
+		WHERE vendor_creation_date IS NOT NULL
+			AND IFNULL(days_since_creation, -1) != TIMESTAMPDIFF(DAY, vendor_creation_date, %(now)s)
+	""", values)
+	updated["trackers"] = _affected_rows()
+
+	frappe.db.sql("""
+		UPDATE `tabVendor Aging PO Details`
+		SET
+			days_since_po = DATEDIFF(%(today)s, po_date),
+			po_aging_status = CASE
+				WHEN DATEDIFF(%(today)s, po_date) <= 7 THEN 'Fresh (0-7 days)'
+				WHEN DATEDIFF(%(today)s, po_date) <= 15 THEN 'Recent (8-15 days)'
+				WHEN DATEDIFF(%(today)s, po_date) <= 30 THEN 'Moderate (16-30 days)'
+				WHEN DATEDIFF(%(today)s, po_date) <= 60 THEN 'Old (31-60 days)'
+				ELSE 'Very Old (60+ days)'
+			END
+		WHERE parenttype = 'Vendor Aging Tracker'
+			AND po_date IS NOT NULL
+			AND IFNULL(days_since_po, -1) != DATEDIFF(%(today)s, po_date)
+	""", values)
+	updated["po_rows"] = _affected_rows()
+
+	frappe.db.sql("""
+		UPDATE `tabVendor Aging Tracker` vat
+		INNER JOIN (
+			SELECT parent, AVG(IFNULL(days_since_po, 0)) AS avg_days
+			FROM `tabVendor Aging PO Details`
+			WHERE parenttype = 'Vendor Aging Tracker'
+			GROUP BY parent
+		) po ON po.parent = vat.name
+		SET vat.average_po_aging = po.avg_days
+		WHERE IFNULL(vat.average_po_aging, -1) != po.avg_days
+	""")
+	updated["average_po_aging"] = _affected_rows()
+
+	frappe.db.sql("""
+		UPDATE `tabVendor Aging Tracker` vat
+		SET vat.vendor_status = 'Inactive'
+		WHERE vat.days_since_creation > 90
+			AND IFNULL(vat.vendor_status, '') = 'Active'
+			AND NOT EXISTS (
+				SELECT 1 FROM `tabVendor Aging PO Details` po
+				WHERE po.parent = vat.name AND po.parenttype = 'Vendor Aging Tracker'
+			)
+	""")
+	updated["vendor_status"] = _affected_rows()
+
+	return updated
+
+
+def run_incremental_refresh(full=False):
+	"""
+	Incremental refresh for Vendor Aging Tracker.
+
+	1. Trackers whose sources changed since the watermark are re-saved (once each).
+	2. The date-dependent aging fields of all trackers are recomputed set-based.
+	3. The watermark is moved to the start of this run.
+
+	full=True (or no watermark yet) re-saves every tracker, like the old daily job.
+	"""
+	started_at = time.monotonic()
+	run_started = now_datetime()
+	watermark = None if full else get_refresh_watermark()
+
+	trackers_scanned = frappe.db.count("Vendor Aging Tracker")
+
+	if watermark:
+		changed = get_changed_tracker_names(watermark)
+	else:
+		changed = frappe.get_all("Vendor Aging Tracker", pluck="name")
+
+	recomputed, errors = recompute_changed_trackers(changed)
+	frappe.db.commit()
+
+	updated = update_aging_days_bulk(run_started, nowdate())
+	frappe.db.commit()
+
+	set_refresh_watermark(run_started)
+	frappe.db.commit()
+
+	stats = {
+		"status": "success" if not errors else "partial_success",
+		"watermark": str(watermark) if watermark else None,
+		"trackers_scanned": trackers_scanned,
+		"changed_trackers": len(changed),
+		"trackers_recomputed": recomputed,
+		"rows_updated": updated,
+		"total_rows_updated": sum(updated.values()) + recomputed,
+		"failed_trackers": errors,
+		"duration_seconds": round(time.monotonic() - started_at, 3)
+	}
+
+	frappe.logger("vendor_aging").info(f"Vendor aging incremental refresh: {stats}")
+
+	return stats
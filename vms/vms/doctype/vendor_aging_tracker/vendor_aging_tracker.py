@@ -7,6 +7,7 @@ from frappe.utils import now, get_datetime, date_diff, getdate, nowdate
 import json
 from frappe import _
 from frappe.utils import now_datetime
+from vms.vms.doctype.vendor_aging_tracker.incremental_aging_refresh import run_incremental_refresh
 
 
 
@@ -522,19 +523,23 @@ def update_aging_tracker_with_po(purchase_order_name):
 
 
 @frappe.whitelist()
-def refresh_all_aging_trackers():
+def refresh_all_aging_trackers(full=0):
     """
-    Refresh all vendor aging trackers
+    Refresh vendor aging trackers
     Can be called from a scheduled job or manually
+
+    Only trackers whose Vendor Onboarding, Company Vendor Code, SAP log or Purchase Order
+    changed since the last run are re-saved; aging-day fields of all trackers are
+    recomputed with set-based updates. Pass full=1 to re-save every tracker.
     """
     try:
-        aging_trackers = frappe.get_all("Vendor Aging Tracker", fields=["name"])
-        
-        for tracker in aging_trackers:
-            doc = frappe.get_doc("Vendor Aging Tracker", tracker.name)
-            doc.save(ignore_permissions=True)
-        
-        frappe.msgprint(f"Successfully refreshed {len(aging_trackers)} aging trackers")
+        stats = run_incremental_refresh(full=frappe.utils.cint(full))
+
+        frappe.msgprint(
+            f"Refreshed aging trackers: {stats['trackers_recomputed']} recomputed, "
+            f"{stats['total_rows_updated']} rows updated in {stats['duration_seconds']}s"
+        )
+        return stats
         
     except Exception as e:
         frappe.log_error(f"Error refreshing aging trackers: {str(e)}", 